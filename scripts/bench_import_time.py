@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时基准 / 预算检查
+
+在全新的子进程中用 `python -X importtime -c "import <模块>"` 导入入口模块，
+解析 importtime 输出，报告：
+- 入口模块的累计导入耗时（多次取中位数）
+- 按顶层包汇总的自身导入耗时 Top N（找出拖慢启动的依赖）
+- 是否导入了不应在启动时加载的重型依赖（pandas、SQLAlchemy、各数据源与 LLM SDK 等）
+
+入口模块：
+- main:  CLI 入口（python main.py --webui-only / --market-review / 定时任务启动前都要导入）
+- webui: Web 服务入口
+
+加 --check 时作为预算检查使用（CI 中运行）：导入耗时超过 --budget-ms，
+或启动时导入了重型依赖，以非零状态退出。
+
+用法：
+    python scripts/bench_import_time.py [--repeat 5] [--top 15]
+    python scripts/bench_import_time.py --check [--budget-ms 1500]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+ENTRY_MODULES = ('main', 'webui')
+
+# 启动时不应导入的重型依赖（顶层包名），应在实际使用处按需导入
+HEAVY_PACKAGES = (
+    'pandas', 'numpy', 'sqlalchemy',
+    'akshare', 'efinance', 'tushare', 'baostock', 'yfinance',
+    'google', 'openai', 'lark_oapi',
+)
+
+# 匹配 "import time:       123 |        456 |     package.module"
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def measure(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    在全新子进程中导入模块
+
+    Returns:
+        (入口模块累计耗时 ms, {顶层包: 自身耗时 ms})
+    """
+    python_path = [os.path.abspath(SRC_DIR)]
+    python_path += [p for p in os.environ.get('PYTHONPATH', '').split(os.pathsep) if p]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(python_path))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.abspath(SRC_DIR), env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''
+        raise RuntimeError(f"导入 {module} 失败: {last_line}")
+
+    total_ms = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        packages[name.split('.')[0]] += int(self_us) / 1000
+        if name == module and len(indent) <= 1:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, dict(packages)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='启动导入耗时基准 / 预算检查')
+    parser.add_argument('--modules', nargs='+', default=list(ENTRY_MODULES), help='入口模块')
+    parser.add_argument('--repeat', type=int, default=5, help='每个模块测量次数（取中位数）')
+    parser.add_argument('--top', type=int, default=15, help='输出自身耗时最高的 N 个顶层包')
+    parser.add_argument('--check', action='store_true', help='预算检查：超预算或导入重型依赖时返回非零')
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='每个入口模块的导入耗时预算（毫秒）')
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for module in args.modules:
+        try:
+            # 第一次导入会写入 .pyc，不计入结果
+            measure(module)
+            runs = [measure(module) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(e)
+            failures.append(str(e))
+            continue
+
+        total_ms = statistics.median(total for total, _ in runs)
+        packages = runs[-1][1]
+        print(f"\n===== import {module}: {total_ms:.1f} ms (中位数, {len(runs)} 次) =====")
+        print(f"{'顶层包':<28}{'自身耗时 ms':>14}")
+        for name, ms in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f"{name:<28}{ms:>14.1f}")
+
+        heavy = [name for name in HEAVY_PACKAGES if name in packages]
+        if heavy:
+            failures.append(f"{module} 启动时导入了重型依赖: {', '.join(heavy)}")
+        if total_ms > args.budget_ms:
+            failures.append(f"{module} 导入耗时 {total_ms:.1f} ms 超过预算 {args.budget_ms:.0f} ms")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1 if args.check else 0
+    if args.check:
+        print(f"\n✅ 启动导入检查通过（预算 {args.budget_ms:.0f} ms）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
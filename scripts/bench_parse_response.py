@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 响应解析基准
+
+对比旧版解析流程（多次 replace + find/rfind + 正则修复）与 response_parser
+的单遍扫描，输出每类样本的解析成功率和单次耗时（µs/response）。
+
+样本覆盖：
+- 合法输出（带/不带 ```json 代码块、前后夹杂说明文字）
+- 常见格式错误（尾随逗号、注释、Python 字面量、字符串内换行、转义引号）
+- 输出被 max_output_tokens 截断（在不同位置截断）
+- 完全没有 JSON 的纯文本
+
+成功的判定：得到字典，且 sentiment_score / operation_advice 与原始样本一致。
+
+用法：
+    python scripts/bench_parse_response.py [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from response_parser import extract_json_object, validate_analysis_payload  # noqa: E402
+
+
+# ========== 样本 ==========
+
+BASE_PAYLOAD = {
+    "sentiment_score": 72,
+    "trend_prediction": "看多",
+    "operation_advice": "买入",
+    "confidence_level": "中",
+    "dashboard": {
+        "core_conclusion": {
+            "one_sentence": "缩量回踩MA10企稳，业绩预增叠加行业政策催化，低吸为主",
+            "signal_type": "🟢买入",
+            "position_advice": {
+                "no_position": "1480-1500 区间分两笔建仓，首笔 3 成",
+                "has_position": "持有，跌破 1420 止损，1650 附近止盈一半"
+            }
+        },
+        "intelligence": {
+            "risk_alerts": ["大股东 \"减持\" 计划尚未执行完毕", "短期乖离率偏高"],
+            "positive_catalysts": ["年报预增 15%-20%", "消费刺激政策落地"]
+        },
+        "battle_plan": {
+            "short_term": {"buy": "1490", "sell": "1620", "stop_loss": "1420"},
+            "long_term": {"buy": "1350-1450 分批", "sell": "1900"}
+        }
+    },
+    "analysis_summary": "行业处于补库存周期，公司现金流稳健、提价能力仍在；技术面缩量回踩 MA10 未破，"
+                        "筹码集中度较高，回调即是机会。",
+    "detailed_analysis": "### 🔍 深度基本面\n- 营收稳健增长，经营现金流/净利润 > 1.1\n- 行业龙头地位稳固\n"
+                         "### 📜 政策与宏观\n- 促消费政策持续加码\n### ⏳ 历史股性复盘\n- 非妖股，跟随大盘节奏\n"
+                         "### 💡 逻辑推演\n- 预期差在于渠道库存去化速度" * 6,
+    "plain_talk_short": "缩量回踩MA10，1490附近可以试着买一点",
+    "plain_talk_long": "业绩稳健但估值不便宜，1400 以下再考虑长线仓位"
+}
+
+
+def _pretty(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, indent=4)
+
+
+def build_corpus():
+    """
+    构建基准样本
+
+    Returns:
+        [(类别, 样本文本, 是否期望能解析出核心字段)]
+    """
+    body = _pretty(BASE_PAYLOAD)
+    corpus = []
+
+    # 合法输出
+    corpus.append(('valid', body, True))
+    corpus.append(('valid', f"```json\n{body}\n```", True))
+    corpus.append(('valid', f"好的，以下是贵州茅台(600519)的决策报告：\n\n```json\n{body}\n```\n\n以上分析仅供参考。", True))
+    corpus.append(('valid', f"分析如下（格式参考 {{字段}} 说明）：\n{body}", True))
+
+    # 常见格式错误
+    trailing = body.replace('"1620",', '"1620",\n').replace('"1900"\n', '"1900",\n')
+    trailing = re.sub(r'("利好2"|"消费刺激政策落地")\]', r'\1,]', trailing)
+    corpus.append(('malformed', trailing, True))
+    corpus.append(('malformed', body.replace('"confidence_level": "中",', '"confidence_level": "中", // 置信度\n'), True))
+    corpus.append(('malformed', body.replace('"sentiment_score": 72,', '/* 评分 */ "sentiment_score": 72,'), True))
+    corpus.append(('malformed', body.replace('"plain_talk_long"', '"is_st": False,\n    "extra": None,\n    "plain_talk_long"'), True))
+    raw_newlines = body.replace('\\n', '\n')  # 字符串内出现真实换行
+    corpus.append(('malformed', f"```json\n{raw_newlines}\n```", True))
+    corpus.append(('malformed', body.replace('"看多"', '"看多 (MA5>MA10>MA20 {多头})"'), True))
+
+    # 输出被截断：在 detailed_analysis 中、dashboard 内、以及结尾前截断
+    for ratio in (0.35, 0.5, 0.7, 0.9, 0.98):
+        cut = int(len(body) * ratio)
+        corpus.append(('truncated', f"```json\n{body[:cut]}", True))
+    cut = body.index('"battle_plan"') + 40
+    corpus.append(('truncated', body[:cut], True))
+    cut = body.index('"signal_type"') + len('"signal_type":')  # 截断在键之后、值之前
+    corpus.append(('truncated', body[:cut], True))
+    cut = body.index('"risk_alerts"') + 30  # 截断在含转义引号的数组元素中
+    corpus.append(('truncated', body[:cut], True))
+
+    # 没有 JSON
+    corpus.append(('no_json', "根据技术面分析，该股均线多头排列，建议逢低买入，评分 70 分。", False))
+    corpus.append(('no_json', "", False))
+
+    return corpus
+
+
+# ========== 旧版解析流程（用于对比） ==========
+
+def _legacy_fix_json_string(json_str: str) -> str:
+    json_str = re.sub(r'//.*?\n', '\n', json_str)
+    json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)
+    json_str = re.sub(r',\s*}', '}', json_str)
+    json_str = re.sub(r',\s*]', ']', json_str)
+    json_str = json_str.replace('True', 'true').replace('False', 'false')
+    quote_count = json_str.count('"') - json_str.count('\\"')
+    if quote_count % 2 != 0:
+        json_str += '"'
+    open_braces = json_str.count('{')
+    close_braces = json_str.count('}')
+    if open_braces > close_braces:
+        json_str += '}' * (open_braces - close_braces)
+    open_brackets = json_str.count('[')
+    close_brackets = json_str.count(']')
+    if open_brackets > close_brackets:
+        json_str += ']' * (open_brackets - close_brackets)
+    return json_str
+
+
+def legacy_parse(text: str):
+    cleaned_text = text
+    if '```json' in cleaned_text:
+        cleaned_text = cleaned_text.replace('```json', '').replace('```', '')
+    elif '```' in cleaned_text:
+        cleaned_text = cleaned_text.replace('```', '')
+    json_start = cleaned_text.find('{')
+    json_end = cleaned_text.rfind('}') + 1
+    if json_start >= 0 and json_end > json_start:
+        try:
+            return json.loads(_legacy_fix_json_string(cleaned_text[json_start:json_end]), strict=False)
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def new_parse(text: str):
+    outcome = extract_json_object(text)
+    if outcome.data is not None:
+        validate_analysis_payload(outcome.data)
+    return outcome.data
+
+
+# ========== 基准 ==========
+
+def _is_success(data) -> bool:
+    return (
+        isinstance(data, dict)
+        and data.get('sentiment_score') == BASE_PAYLOAD['sentiment_score']
+        and data.get('operation_advice') == BASE_PAYLOAD['operation_advice']
+    )
+
+
+def run_benchmark(parse_fn, corpus, repeat: int):
+    """
+    Returns:
+        {类别: (成功数, 期望成功数, µs/response)}
+    """
+    stats = {}
+    for category, text, expect in corpus:
+        ok = _is_success(parse_fn(text))
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse_fn(text)
+        elapsed_us = (time.perf_counter() - start) / repeat * 1e6
+
+        success, expected, total_us, count = stats.get(category, (0, 0, 0.0, 0))
+        stats[category] = (
+            success + (1 if ok and expect else 0),
+            expected + (1 if expect else 0),
+            total_us + elapsed_us,
+            count + 1,
+        )
+    return {k: (s, e, t / c) for k, (s, e, t, c) in stats.items()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='LLM 响应解析基准')
+    parser.add_argument('--repeat', type=int, default=200, help='每个样本的重复次数')
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    print(f"样本数: {len(corpus)}, 平均长度: {sum(len(t) for _, t, _ in corpus) // len(corpus)} 字符, "
+          f"每样本重复 {args.repeat} 次\n")
+
+    results = {
+        'legacy': run_benchmark(legacy_parse, corpus, args.repeat),
+        'scanner': run_benchmark(new_parse, corpus, args.repeat),
+    }
+
+    header = f"{'类别':<12}{'实现':<10}{'成功率':>12}{'µs/response':>14}"
+    print(header)
+    print('-' * len(header))
+    for category in results['legacy']:
+        for impl, stats in results.items():
+            success, expected, us = stats[category]
+            rate = f"{success}/{expected}" if expected else '-'
+            print(f"{category:<12}{impl:<10}{rate:>12}{us:>14.1f}")
+
+    for impl, stats in results.items():
+        success = sum(s for s, _, _ in stats.values())
+        expected = sum(e for _, e, _ in stats.values())
+        print(f"\n{impl}: 总成功率 {success}/{expected} ({success / expected:.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
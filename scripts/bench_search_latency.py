@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+搜索请求耗时基准
+
+对比两种 HTTP 调用方式的 p50/p95 耗时：
+- oneshot: 每次请求都新建连接（旧实现：requests.post / 每次新建 TavilyClient）
+- pooled:  每个 API Key 复用一个 requests.Session（连接池 + keep-alive）
+
+默认向博查接口发送未鉴权的请求（返回 401，不消耗额度），只测量网络往返与握手开销；
+也可以用 --url 指定任意接口。加 --live 时改为通过 SearchService 执行真实搜索
+（需要在 .env 中配置搜索 API Key，会消耗额度，且关闭搜索缓存）。
+
+用法：
+    python scripts/bench_search_latency.py [--requests 30] [--concurrency 2]
+    python scripts/bench_search_latency.py --url https://api.tavily.com/search
+    python scripts/bench_search_latency.py --live --requests 10
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+DEFAULT_URL = "https://api.bocha.cn/v1/web-search"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _run(fn: Callable[[], None], total: int, concurrency: int) -> List[float]:
+    """以给定并发执行 total 次请求，返回每次耗时（秒）"""
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            print(f"  请求失败: {e}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(timed, range(total)))
+
+
+def _report(label: str, samples: List[float]) -> None:
+    print(f"{label:<10}{len(samples):>6}{_percentile(samples, 0.5) * 1000:>12.1f}"
+          f"{_percentile(samples, 0.95) * 1000:>12.1f}{max(samples) * 1000:>12.1f}")
+
+
+def bench_http(url: str, total: int, concurrency: int, timeout: float) -> None:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    payload = {"query": "贵州茅台 最新消息", "count": 1}
+    headers = {'Authorization': 'Bearer invalid', 'Content-Type': 'application/json'}
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # 预热 DNS 缓存，避免首个样本偏差过大
+    requests.post(url, headers=headers, json=payload, timeout=timeout)
+
+    oneshot = _run(lambda: requests.post(url, headers=headers, json=payload, timeout=timeout), total, concurrency)
+    pooled = _run(lambda: session.post(url, headers=headers, json=payload, timeout=timeout), total, concurrency)
+    session.close()
+
+    print(f"目标: {url}，{total} 次请求，并发 {concurrency}\n")
+    print(f"{'方式':<10}{'次数':>6}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}")
+    _report('oneshot', oneshot)
+    _report('pooled', pooled)
+
+
+def bench_live(total: int, concurrency: int) -> None:
+    from config import get_config
+    from search_service import SearchService
+
+    config = get_config()
+    service = SearchService(
+        bocha_keys=config.bocha_api_keys,
+        tavily_keys=config.tavily_api_keys,
+        serpapi_keys=config.serpapi_keys,
+        provider_concurrency=concurrency,
+        cache_enabled=False,
+        http_pool_size=config.search_http_pool_size,
+        http_timeout=config.search_http_timeout,
+        http_connect_timeout=config.search_http_connect_timeout,
+    )
+    if not service.is_available:
+        print("未配置搜索 API Key，无法执行 --live 基准")
+        return
+
+    names = cycle(["贵州茅台", "五粮液", "宁德时代", "中国平安"])
+    for provider in service._providers:
+        _run(lambda: provider.search(f"{next(names)} 最新消息", 3), total, concurrency)
+
+    print(f"{'引擎':<10}{'次数':>6}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}")
+    for name, stats in service.get_latency_stats().items():
+        if stats['count']:
+            print(f"{name:<10}{stats['count']:>6}{stats['p50'] * 1000:>12.1f}"
+                  f"{stats['p95'] * 1000:>12.1f}{stats['max'] * 1000:>12.1f}")
+    service.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='搜索请求耗时基准')
+    parser.add_argument('--url', default=DEFAULT_URL, help='测量的接口地址')
+    parser.add_argument('--requests', type=int, default=30, help='每种方式的请求次数')
+    parser.add_argument('--concurrency', type=int, default=2, help='并发数')
+    parser.add_argument('--timeout', type=float, default=10.0, help='单次请求超时（秒）')
+    parser.add_argument('--live', action='store_true', help='通过 SearchService 执行真实搜索（消耗额度）')
+    args = parser.parse_args()
+
+    if args.live:
+        bench_live(args.requests, args.concurrency)
+    else:
+        bench_http(args.url, args.requests, args.concurrency, args.timeout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,11 +10,14 @@ A股自选股智能分析系统 - AI分析层
 3. 结合技术面和消息面生成分析报告
 """
 
-import json
+import hashlib
 import logging
+import threading
 import time
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import timedelta
+from typing import Optional, Dict, Any, List, Tuple
 
 from tenacity import (
     retry,
@@ -25,6 +28,18 @@ from tenacity import (
 )
 
 from config import get_config
+from cpu_pool import run_cpu_task, parse_analysis_response
+from context_builder import (
+    PromptContextBuilder,
+    estimate_tokens,
+    PRIORITY_TECHNICALS,
+    PRIORITY_RISK_NEWS,
+    PRIORITY_F10,
+    PRIORITY_OTHER_NEWS,
+)
+from response_parser import extract_json_object, validate_analysis_payload
+from metrics import LLM_ERRORS, LLM_SECONDS, LLM_TOKENS, RATE_LIMIT_SLEEP
+from tracing import trace_span
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +132,8 @@ class AnalysisResult:
     data_sources: str = ""  # 数据来源说明
     success: bool = True
     error_message: Optional[str] = None
+    model_name: str = ""  # 实际使用的模型
+    llm_usage: Optional[Dict[str, int]] = None  # Token 用量（prompt/cached/output）
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -154,8 +171,21 @@ class AnalysisResult:
             'search_performed': self.search_performed,
             'success': self.success,
             'error_message': self.error_message,
+            'model_name': self.model_name,
+            'llm_usage': self.llm_usage,
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisResult':
+        """
+        从字典恢复（断点续跑时还原已保存的分析结果，忽略未知字段）
+        
+        Args:
+            data: to_dict() 或 dataclasses.asdict() 的结果
+        """
+        names = {f.name for f in dataclass_fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+    
     def get_core_conclusion(self) -> str:
         """获取核心结论（一句话）"""
         if self.dashboard and 'core_conclusion' in self.dashboard:
@@ -209,6 +239,106 @@ class AnalysisResult:
         return star_map.get(self.confidence_level, '⭐⭐')
 
 
+# 要求模型输出的顶层字段（与 ANALYSIS_PROMPT_PREFIX 中的 JSON 输出要求一致）
+ANALYSIS_OUTPUT_FIELDS = (
+    'sentiment_score',
+    'trend_prediction',
+    'operation_advice',
+    'confidence_level',
+    'dashboard',
+    'analysis_summary',
+    'detailed_analysis',
+    'plain_talk_short',
+    'plain_talk_long',
+)
+
+# 顶层字段的取值约束
+_OUTPUT_FIELD_ENUMS = {
+    'trend_prediction': ['强烈看多', '看多', '震荡', '看空', '强烈看空'],
+    'operation_advice': ['买入', '加仓', '持有', '减仓', '卖出', '观望'],
+    'confidence_level': ['高', '中', '低'],
+}
+
+
+def _string_schema(description: str = '') -> Dict[str, Any]:
+    schema: Dict[str, Any] = {'type': 'string'}
+    if description:
+        schema['description'] = description
+    return schema
+
+
+def _object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {'type': 'object', 'properties': properties, 'required': list(properties)}
+
+
+# dashboard 的结构（AnalysisResult.dashboard 为 Dict，结构在这里定义）
+_DASHBOARD_SCHEMA = _object_schema({
+    'core_conclusion': _object_schema({
+        'one_sentence': _string_schema('一句话核心结论（30字内）'),
+        'signal_type': _string_schema('🟢买入/🟡持有/🔴卖出/⚠️预警'),
+        'position_advice': _object_schema({
+            'no_position': _string_schema('空仓策略（点位+仓位）'),
+            'has_position': _string_schema('持仓策略（止盈/止损位）'),
+        }),
+    }),
+    'intelligence': _object_schema({
+        'risk_alerts': {'type': 'array', 'items': _string_schema()},
+        'positive_catalysts': {'type': 'array', 'items': _string_schema()},
+    }),
+    'battle_plan': _object_schema({
+        'short_term': _object_schema({
+            'buy': _string_schema('短期买入价'),
+            'sell': _string_schema('短期卖出价'),
+            'stop_loss': _string_schema('止损价'),
+        }),
+        'long_term': _object_schema({
+            'buy': _string_schema('中长期配置价'),
+            'sell': _string_schema('中长期目标价'),
+        }),
+    }),
+})
+
+
+@lru_cache(maxsize=1)
+def build_analysis_response_schema() -> Dict[str, Any]:
+    """
+    根据 AnalysisResult 的字段生成结构化输出使用的 JSON Schema
+
+    只使用 Gemini response_schema 与 OpenAI json_schema 都支持的子集
+    （type/properties/required/items/enum/description）。
+
+    Returns:
+        JSON Schema 字典（调用方不要修改）
+    """
+    type_map = {int: 'integer', 'int': 'integer', str: 'string', 'str': 'string'}
+    result_fields = {f.name: f for f in dataclass_fields(AnalysisResult)}
+
+    properties: Dict[str, Any] = {}
+    for name in ANALYSIS_OUTPUT_FIELDS:
+        if name == 'dashboard':
+            properties[name] = _DASHBOARD_SCHEMA
+            continue
+        field_type = type_map.get(result_fields[name].type, 'string')
+        prop: Dict[str, Any] = {'type': field_type}
+        if name in _OUTPUT_FIELD_ENUMS:
+            prop['enum'] = _OUTPUT_FIELD_ENUMS[name]
+        properties[name] = prop
+
+    return _object_schema(properties)
+
+
+def _to_openai_strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI strict 模式要求每个对象都声明 additionalProperties=false 且字段全部必填"""
+    result = dict(schema)
+    if result.get('type') == 'object':
+        result['properties'] = {k: _to_openai_strict_schema(v) for k, v in schema['properties'].items()}
+        result['required'] = list(schema['properties'])
+        result['additionalProperties'] = False
+    elif result.get('type') == 'array':
+        result['items'] = _to_openai_strict_schema(schema['items'])
+    return result
+
+
 class GeminiAnalyzer:
     """
     Gemini AI 分析器
@@ -407,6 +537,103 @@ class GeminiAnalyzer:
 8. **拒绝偷懒**：遇到无新闻或无财报数据时，必须基于PE/PB、市值、换手率等现有数据进行估值和活跃度分析，**严禁使用'暂无数据'、'无重大消息'等敷衍话术**作为独立段落。
 9. **大白话总结**：**必须填写 plain_talk_short 和 plain_talk_long**。这是显示在屏幕底部的“一句话攻略”，**必须包含具体的买入价和卖出价**（数字），禁止只说空话。"""
 
+    # ========================================
+    # 分析提示词 - 固定前缀（可被提供方缓存）
+    # ========================================
+    # 与具体股票无关，所有股票共用同一份前缀：
+    # - Gemini: 作为 CachedContent 的内容，每次运行创建一次
+    # - OpenAI 兼容 API: 拼接在 system 消息中，命中 DeepSeek 等的前缀缓存
+    # 个股数据由 _format_prompt 生成，始终放在前缀之后
+    # ========================================
+
+    ANALYSIS_PROMPT_PREFIX = """# 角色设定
+你是一位拥有20年经验的资深A股基金经理，擅长"基本面选股 + 技术面择时"。
+你的任务是为【输入数据】中指定的股票生成一份【极简决策日报】。
+
+# 分析指令 (Critical Instructions)
+
+请综合【输入数据】中的所有维度，输出一份 JSON 格式的决策报告。
+
+## ⚠️ 核心原则 (必须通过图灵测试的自然度)
+1. **拒绝报菜名**：不要罗列"MA5是多少，MA10是多少"。直接说观点："均线多头排列，上涨趋势确立"。
+2. **拒绝废话**：不要说"基本面良好，技术面震荡"。要说："绩优白马股缩量回调，是黄金坑"。
+3. **多维归因**：解释涨跌时，要结合**基本面(业绩/行业)** + **政策面(利好/利空)** + **技术面(资金/量能)**。
+4. **历史视角**：如果是个股，结合其历史股性（如：是否妖股、是否跟风）；如果是行业，结合行业周期位置。
+
+## JSON 输出要求
+请严格填充以下字段：
+
+```json
+{
+    "sentiment_score": 0-100评分,
+    "trend_prediction": "看多/看空/震荡",
+    "operation_advice": "买入/卖出/持有/观望",
+    "confidence_level": "高/中/低",
+    
+    "dashboard": {
+        "core_conclusion": {
+            "one_sentence": "一句话核心结论（30字内，毒辣精准）",
+            "signal_type": "🟢买入/🟡持有/🔴卖出/⚠️预警",
+            "position_advice": {
+                "no_position": "空仓策略（点位+仓位）",
+                "has_position": "持仓策略（止盈/止损位）"
+            }
+        },
+        "intelligence": {
+            "risk_alerts": ["风险点1(如减持/高乖离)", "风险点2"],
+            "positive_catalysts": ["利好1(如业绩预增/政策)", "利好2"]
+        },
+        "battle_plan": {
+            "short_term": {
+                "buy": "短期买入价（具体数字）",
+                "sell": "短期卖出价（具体数字）",
+                "stop_loss": "止损价（具体数字）"
+            },
+            "long_term": {
+                "buy": "中长期配置价（具体数字/分批建仓区间）",
+                "sell": "中长期目标价（具体数字）"
+            }
+        }
+    },
+
+    "analysis_summary": "100字内的综合分析。必须融合：1.政策/行业风口 2.公司基本面质地 3.当前技术面位置。不要分段，像人类专家一样叙述。",
+    
+    "detailed_analysis": "这里必须生成一份【完整】的研究报告(Markdown格式)。\n包含以下章节：\n1. ### 🔍 深度基本面\n   - 财务健康度拆解(营收/利润/现金流)\n   - 行业竞争格局与地位\n2. ### 📜 政策与宏观\n   - 行业政策影响分析\n   - 宏观环境关联\n3. ### ⏳ 历史股性复盘\n   - 历史妖股属性/跟风属性\n   - 关键支撑压力位历史验证\n4. ### 💡 逻辑推演\n   - 为什么现在是(或不是)买入时机？\n   - 核心预期差在哪里？",
+
+    "plain_talk_short": "短期大白话（例如：'缩量回踩MA10，1800附近可博反弹'）",
+    "plain_talk_long": "长期大白话（例如：'业绩稳健但估值偏高，建议等回调到1700再配置长线'）"
+}
+```
+
+此格式省略了冗长的"技术分析"、"基本面分析"长文段落，强制要求你将这些信息**合成**到 `analysis_summary` 和 `core_conclusion` 中。
+确保 JSON 格式合法。
+"""
+
+    # 情报维度展示名称（顺序即提示词中的展示顺序）
+    NEWS_DIMENSION_LABELS = {
+        'risk_check': '⚠️ 风险排查',
+        'latest_news': '📰 最新消息',
+        'earnings': '📊 业绩预期',
+        'policy_macro': '📜 政策宏观',
+        'industry_analysis': '🏢 行业分析',
+        'capital_flow': '💰 资金流向',
+    }
+    
+    # 单条新闻的 Token 上限（标题 + 摘要）
+    NEWS_ITEM_MAX_TOKENS = 120
+    
+    # Gemini 显式缓存（CachedContent）的最小 Token 数（按模型名前缀匹配，未列出的模型取默认值）
+    # 低于下限时 CachedContent.create 必然失败，直接使用普通请求
+    PREFIX_CACHE_MIN_TOKENS = (
+        ('gemini-1.5', 32768),
+        ('gemini-2.0', 4096),
+        ('gemini-2.5-flash', 1024),
+        ('gemini-2.5-pro', 4096),
+        ('gemini-3-flash', 1024),
+        ('gemini-3-pro', 4096),
+    )
+    PREFIX_CACHE_DEFAULT_MIN_TOKENS = 4096
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         初始化 AI 分析器
@@ -424,6 +651,30 @@ class GeminiAnalyzer:
         self._use_openai = False  # 是否使用 OpenAI 兼容 API
         self._openai_client = None  # OpenAI 客户端
         
+        # Gemini 前缀缓存（CachedContent），每个模型每次运行创建一次，过期前自动续期
+        self._prefix_caches: Dict[str, Dict[str, Any]] = {}
+        self._prefix_cache_retry_at: Dict[str, float] = {}  # 创建失败的模型 -> 允许重试的时间
+        self._prefix_cache_too_small: Dict[str, str] = {}  # 前缀低于最小缓存 Token 数的模型 -> 前缀哈希
+        self._prefix_cache_lock = threading.Lock()
+        
+        # 模型路由使用的其他 Gemini 模型实例（按模型名缓存）
+        self._tier_models: Dict[str, Any] = {}
+        self._tier_models_lock = threading.Lock()
+        
+        # 结构化输出模式（按提供商记录，遇到不支持时逐级降级并在本实例内保持）
+        initial_mode = 'json_schema' if config.llm_structured_output else 'off'
+        self._output_modes: Dict[str, str] = {'gemini': initial_mode, 'openai': initial_mode}
+        
+        # Token 用量统计（线程池共享同一个分析器，需加锁）
+        self._local = threading.local()
+        self._usage_lock = threading.Lock()
+        self._usage_totals: Dict[str, int] = {
+            'calls': 0,
+            'prompt_tokens': 0,
+            'cached_tokens': 0,
+            'output_tokens': 0,
+        }
+        
         # 检查 Gemini API Key 是否有效（过滤占位符）
         gemini_key_valid = self._api_key and not self._api_key.startswith('your_') and len(self._api_key) > 10
         
@@ -578,13 +829,26 @@ class GeminiAnalyzer:
         """检查分析器是否可用"""
         return self._model is not None or self._openai_client is not None
     
-    def _call_openai_api(self, prompt: str, generation_config: dict) -> str:
+    def _call_openai_api(
+        self,
+        prompt: str,
+        generation_config: dict,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> str:
         """
         调用 OpenAI 兼容 API
         
+        OpenAI / DeepSeek 的前缀缓存是自动的（按请求开头的字节匹配），
+        所以静态前缀拼在 system 消息里、放在最前面，每只股票只有 user 消息不同。
+        
         Args:
-            prompt: 提示词
+            prompt: 提示词（本股票的动态部分）
             generation_config: 生成配置
+            prompt_prefix: 可缓存的静态前缀（可选）
+            response_schema: 结构化输出的 JSON Schema（可选）
+            model_name: 本次请求使用的模型（可选，默认为当前模型）
             
         Returns:
             响应文本
@@ -593,6 +857,10 @@ class GeminiAnalyzer:
         max_retries = config.gemini_max_retries
         base_delay = config.gemini_retry_delay
         
+        system_content = self.SYSTEM_PROMPT
+        if prompt_prefix:
+            system_content = f"{self.SYSTEM_PROMPT}\n\n{prompt_prefix}"
+        
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
@@ -601,17 +869,25 @@ class GeminiAnalyzer:
                     logger.info(f"[OpenAI] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
                 
-                response = self._openai_client.chat.completions.create(
-                    model=self._current_model_name,
+                request_kwargs = dict(
+                    model=model_name or self._current_model_name,
                     messages=[
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
+                        {"role": "system", "content": system_content},
                         {"role": "user", "content": prompt}
                     ],
                     temperature=generation_config.get('temperature', 0.7),
                     max_tokens=generation_config.get('max_output_tokens', 8192),
                 )
+                response = self._create_with_output_mode(
+                    'openai',
+                    response_schema,
+                    lambda mode: self._openai_client.chat.completions.create(
+                        **request_kwargs, **self._openai_output_kwargs(mode, response_schema)
+                    ),
+                )
                 
                 if response and response.choices and response.choices[0].message.content:
+                    self._record_usage(self._extract_openai_usage(response))
                     return response.choices[0].message.content
                 else:
                     raise ValueError("OpenAI API 返回空响应")
@@ -630,7 +906,14 @@ class GeminiAnalyzer:
         
         raise Exception("OpenAI API 调用失败，已达最大重试次数")
     
-    def _call_api_with_retry(self, prompt: str, generation_config: dict) -> str:
+    def _call_api_with_retry(
+        self,
+        prompt: str,
+        generation_config: dict,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        model_name: Optional[str] = None
+    ) -> str:
         """
         调用 AI API，带有重试和模型切换机制
         
@@ -641,16 +924,23 @@ class GeminiAnalyzer:
         2. 多次失败后切换到备选模型
         3. Gemini 完全失败后尝试 OpenAI
         
+        前缀缓存：
+        - 传入 prompt_prefix 时优先使用 Gemini CachedContent（前缀只上传一次）
+        - 缓存不可用时退化为「前缀 + 动态部分」拼接，仍可命中隐式缓存
+        
         Args:
-            prompt: 提示词
+            prompt: 提示词（传入 prompt_prefix 时只包含动态部分）
             generation_config: 生成配置
+            prompt_prefix: 可缓存的静态前缀（可选）
+            response_schema: 结构化输出的 JSON Schema（可选，不支持时自动降级）
+            model_name: 本次请求使用的模型（可选，模型路由指定；429 切换备选模型后失效）
             
         Returns:
             响应文本
         """
         # 如果已经在使用 OpenAI 模式，直接调用 OpenAI
         if self._use_openai:
-            return self._call_openai_api(prompt, generation_config)
+            return self._call_openai_api(prompt, generation_config, prompt_prefix, response_schema, model_name)
         
         config = get_config()
         max_retries = config.gemini_max_retries
@@ -658,6 +948,7 @@ class GeminiAnalyzer:
         
         last_error = None
         tried_fallback = getattr(self, '_using_fallback', False)
+        switched_to_fallback = False  # 本次调用中因限流切换过备选模型
         
         for attempt in range(max_retries):
             try:
@@ -668,13 +959,28 @@ class GeminiAnalyzer:
                     logger.info(f"[Gemini] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
                 
-                response = self._model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                    request_options={"timeout": 120}
+                target_model = None if switched_to_fallback else model_name
+                model = self._get_gemini_model(target_model)
+                contents = prompt
+                if prompt_prefix:
+                    cached_model = self._get_cached_prefix_model(prompt_prefix, target_model)
+                    if cached_model is not None:
+                        model = cached_model
+                    else:
+                        contents = f"{prompt_prefix}\n\n{prompt}"
+                
+                response = self._create_with_output_mode(
+                    'gemini',
+                    response_schema,
+                    lambda mode: model.generate_content(
+                        contents,
+                        generation_config=self._gemini_generation_config(mode, generation_config, response_schema),
+                        request_options={"timeout": 120}
+                    ),
                 )
                 
                 if response and response.text:
+                    self._record_usage(self._extract_gemini_usage(response))
                     return response.text
                 else:
                     raise ValueError("Gemini 返回空响应")
@@ -693,6 +999,7 @@ class GeminiAnalyzer:
                     if attempt >= max_retries // 2 and not tried_fallback:
                         if self._switch_to_fallback_model():
                             tried_fallback = True
+                            switched_to_fallback = True
                             logger.info("[Gemini] 已切换到备选模型，继续重试")
                         else:
                             logger.warning("[Gemini] 切换备选模型失败，继续使用当前模型重试")
@@ -704,7 +1011,7 @@ class GeminiAnalyzer:
         if self._openai_client:
             logger.warning("[Gemini] 所有重试失败，切换到 OpenAI 兼容 API")
             try:
-                return self._call_openai_api(prompt, generation_config)
+                return self._call_openai_api(prompt, generation_config, prompt_prefix, response_schema)
             except Exception as openai_error:
                 logger.error(f"[OpenAI] 备选 API 也失败: {openai_error}")
                 raise last_error or openai_error
@@ -714,7 +1021,7 @@ class GeminiAnalyzer:
             self._init_openai_fallback()
             if self._openai_client:
                 try:
-                    return self._call_openai_api(prompt, generation_config)
+                    return self._call_openai_api(prompt, generation_config, prompt_prefix, response_schema)
                 except Exception as openai_error:
                     logger.error(f"[OpenAI] 备选 API 也失败: {openai_error}")
                     raise last_error or openai_error
@@ -722,10 +1029,308 @@ class GeminiAnalyzer:
         # 所有方式都失败
         raise last_error or Exception("所有 AI API 调用失败，已达最大重试次数")
     
+    # 结构化输出降级顺序：JSON Schema 约束 -> 仅 JSON 模式 -> 自由文本
+    _OUTPUT_MODE_DOWNGRADE = {'json_schema': 'json_object', 'json_object': 'off'}
+    
+    # 表示提供商/模型不支持结构化输出参数的错误关键字
+    _OUTPUT_MODE_ERROR_KEYWORDS = (
+        'response_schema', 'response_mime_type', 'response_format',
+        'json_schema', 'json_object', 'json mode', 'structured output',
+    )
+    
+    def _create_with_output_mode(
+        self,
+        provider: str,
+        response_schema: Optional[Dict[str, Any]],
+        create: Any
+    ) -> Any:
+        """
+        按当前结构化输出模式发起请求，提供商不支持时立即降级重发
+        
+        降级不消耗重试次数，且对本实例后续请求持续生效。
+        
+        Args:
+            provider: 'gemini' 或 'openai'
+            response_schema: JSON Schema，为 None 时不启用结构化输出
+            create: 接收模式参数并发起请求的函数
+            
+        Returns:
+            提供商原始响应
+        """
+        while True:
+            mode = self._output_modes[provider] if response_schema else 'off'
+            try:
+                return create(mode)
+            except Exception as e:
+                error_str = str(e).lower()
+                next_mode = self._OUTPUT_MODE_DOWNGRADE.get(mode)
+                if not next_mode or not any(k in error_str for k in self._OUTPUT_MODE_ERROR_KEYWORDS):
+                    raise
+                logger.warning(
+                    f"[结构化输出] {provider} 不支持 {mode} 模式，降级为 {next_mode}: {str(e)[:100]}"
+                )
+                self._output_modes[provider] = next_mode
+    
+    @staticmethod
+    def _gemini_generation_config(
+        mode: str,
+        generation_config: dict,
+        response_schema: Optional[Dict[str, Any]]
+    ) -> dict:
+        """为 Gemini 请求附加 response_mime_type / response_schema"""
+        if mode == 'off':
+            return generation_config
+        config = dict(generation_config, response_mime_type='application/json')
+        if mode == 'json_schema':
+            config['response_schema'] = response_schema
+        return config
+    
+    @staticmethod
+    def _openai_output_kwargs(mode: str, response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """为 OpenAI 兼容请求生成 response_format 参数"""
+        if mode == 'json_schema':
+            return {'response_format': {
+                'type': 'json_schema',
+                'json_schema': {
+                    'name': 'stock_analysis',
+                    'schema': _to_openai_strict_schema(response_schema),
+                    'strict': True,
+                },
+            }}
+        if mode == 'json_object':
+            # DeepSeek 等只支持 JSON 模式；要求提示词中出现 "json" 字样，分析前缀已满足
+            return {'response_format': {'type': 'json_object'}}
+        return {}
+    
+    def _get_gemini_model(self, model_name: Optional[str] = None) -> Any:
+        """
+        获取指定名称的 Gemini 模型实例
+        
+        Args:
+            model_name: 模型名称，为空或与当前模型相同时返回当前模型
+            
+        Returns:
+            GenerativeModel 实例
+        """
+        if not model_name or model_name == self._current_model_name:
+            return self._model
+        
+        with self._tier_models_lock:
+            model = self._tier_models.get(model_name)
+            if model is None:
+                import google.generativeai as genai
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    system_instruction=self.SYSTEM_PROMPT,
+                )
+                self._tier_models[model_name] = model
+                logger.info(f"[LLM] 路由模型初始化成功 (模型: {model_name})")
+            return model
+    
+    def _get_cached_prefix_model(self, prompt_prefix: str, model_name: Optional[str] = None) -> Any:
+        """
+        获取绑定了前缀缓存的 Gemini 模型
+        
+        同一次运行内使用同一模型的所有股票共享一个 CachedContent（按模型 + 前缀哈希区分），
+        剩余有效期不足 1/4 时自动续期。前缀（含系统提示词）低于模型的最小缓存 Token 数时
+        不创建（只记录一次日志）；创建失败（如账号不支持、临时网络错误）后该模型在
+        GEMINI_CACHE_RETRY_SECONDS 内直接回退为普通请求，之后（或下一次运行）再尝试。
+        
+        Args:
+            prompt_prefix: 静态前缀
+            model_name: 模型名称（默认为当前模型）
+            
+        Returns:
+            GenerativeModel 实例，不可用时返回 None
+        """
+        config = get_config()
+        if not config.llm_prompt_cache_enabled or self._model is None:
+            return None
+        
+        model_name = model_name or self._current_model_name
+        if not model_name or self._prefix_cache_retry_at.get(model_name, 0) > time.time():
+            return None
+        
+        prefix_hash = hashlib.sha1(prompt_prefix.encode('utf-8')).hexdigest()[:12]
+        if self._prefix_cache_too_small.get(model_name) == prefix_hash:
+            return None
+        prefix_tokens = estimate_tokens(self.SYSTEM_PROMPT) + estimate_tokens(prompt_prefix)
+        min_tokens = self._prefix_cache_min_tokens(model_name)
+        if prefix_tokens < min_tokens:
+            with self._prefix_cache_lock:
+                if self._prefix_cache_too_small.get(model_name) != prefix_hash:
+                    self._prefix_cache_too_small[model_name] = prefix_hash
+                    logger.info(
+                        f"[Gemini缓存] 前缀约 {prefix_tokens} Token，低于 {model_name} 的最小缓存 Token 数 "
+                        f"{min_tokens}，不创建前缀缓存（使用普通请求）"
+                    )
+            return None
+        ttl_seconds = max(60, config.gemini_cache_ttl)
+        
+        with self._prefix_cache_lock:
+            entry = self._prefix_caches.get(model_name)
+            now = time.time()
+            
+            if entry and entry['prefix_hash'] == prefix_hash:
+                if entry['expire_at'] - now > ttl_seconds / 4:
+                    return entry['model']
+                try:
+                    entry['cache'].update(ttl=timedelta(seconds=ttl_seconds))
+                    entry['expire_at'] = now + ttl_seconds
+                    logger.debug(f"[Gemini缓存] 前缀缓存已续期: {entry['cache'].name}")
+                    return entry['model']
+                except Exception as e:
+                    logger.warning(f"[Gemini缓存] 续期失败，将重新创建: {e}")
+            
+            # 前缀变化或续期失败：旧缓存作废
+            self._delete_prefix_cache_locked(model_name)
+            
+            try:
+                import google.generativeai as genai
+                from google.generativeai import caching
+                
+                cache = caching.CachedContent.create(
+                    model=f"models/{model_name}",
+                    display_name=f"stock-analysis-prefix-{prefix_hash}",
+                    system_instruction=self.SYSTEM_PROMPT,
+                    contents=[prompt_prefix],
+                    ttl=timedelta(seconds=ttl_seconds),
+                )
+                cached_model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+            except Exception as e:
+                retry_seconds = max(0, config.gemini_cache_retry_seconds)
+                self._prefix_cache_retry_at[model_name] = now + retry_seconds
+                logger.warning(
+                    f"[Gemini缓存] 创建前缀缓存失败 (模型: {model_name})，"
+                    f"{retry_seconds}s 内回退为普通请求: {str(e)[:120]}"
+                )
+                return None
+            
+            self._prefix_cache_retry_at.pop(model_name, None)
+            self._prefix_caches[model_name] = {
+                'prefix_hash': prefix_hash,
+                'cache': cache,
+                'model': cached_model,
+                'expire_at': now + ttl_seconds,
+            }
+            logger.info(f"[Gemini缓存] 前缀缓存已创建: {cache.name} (模型: {model_name}, TTL: {ttl_seconds}s)")
+            return cached_model
+    
+    def _prefix_cache_min_tokens(self, model_name: str) -> int:
+        """模型的最小显式缓存 Token 数（模型名可带 models/ 前缀）"""
+        name = model_name.split('/')[-1].lower()
+        for prefix, min_tokens in self.PREFIX_CACHE_MIN_TOKENS:
+            if name.startswith(prefix):
+                return min_tokens
+        return self.PREFIX_CACHE_DEFAULT_MIN_TOKENS
+    
+    def _delete_prefix_cache_locked(self, model_name: str) -> None:
+        """删除指定模型的前缀缓存（调用方需持有 _prefix_cache_lock）"""
+        entry = self._prefix_caches.pop(model_name, None)
+        if not entry:
+            return
+        try:
+            entry['cache'].delete()
+            logger.debug(f"[Gemini缓存] 前缀缓存已删除: {entry['cache'].name}")
+        except Exception as e:
+            logger.debug(f"[Gemini缓存] 删除前缀缓存失败（将按 TTL 自动过期）: {e}")
+    
+    def release_prompt_cache(self) -> None:
+        """
+        释放前缀缓存
+        
+        Gemini 缓存按存储时长计费，一次运行结束后应主动删除。
+        同时清除创建失败的记录，下一次运行重新尝试。
+        """
+        with self._prefix_cache_lock:
+            for model_name in list(self._prefix_caches):
+                self._delete_prefix_cache_locked(model_name)
+            self._prefix_cache_retry_at.clear()
+    
+    @staticmethod
+    def _extract_gemini_usage(response: Any) -> Dict[str, int]:
+        """从 Gemini 响应中提取 Token 用量"""
+        meta = getattr(response, 'usage_metadata', None)
+        if meta is None:
+            return {}
+        return {
+            'prompt_tokens': int(getattr(meta, 'prompt_token_count', 0) or 0),
+            'cached_tokens': int(getattr(meta, 'cached_content_token_count', 0) or 0),
+            'output_tokens': int(getattr(meta, 'candidates_token_count', 0) or 0),
+        }
+    
+    @staticmethod
+    def _extract_openai_usage(response: Any) -> Dict[str, int]:
+        """
+        从 OpenAI 兼容响应中提取 Token 用量
+        
+        命中缓存的 Token 数：
+        - OpenAI: usage.prompt_tokens_details.cached_tokens
+        - DeepSeek: usage.prompt_cache_hit_tokens
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return {}
+        
+        cached = 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        if details is not None:
+            cached = getattr(details, 'cached_tokens', 0) or 0
+        if not cached:
+            cached = getattr(usage, 'prompt_cache_hit_tokens', 0) or 0
+        
+        return {
+            'prompt_tokens': int(getattr(usage, 'prompt_tokens', 0) or 0),
+            'cached_tokens': int(cached),
+            'output_tokens': int(getattr(usage, 'completion_tokens', 0) or 0),
+        }
+    
+    def _record_usage(self, usage: Dict[str, int]) -> None:
+        """记录单次调用的 Token 用量（线程内最近一次 + 全局累计）"""
+        self._local.last_usage = usage or None
+        if not usage:
+            return
+        
+        with self._usage_lock:
+            self._usage_totals['calls'] += 1
+            for key in ('prompt_tokens', 'cached_tokens', 'output_tokens'):
+                self._usage_totals[key] += usage.get(key, 0)
+        for key in ('prompt', 'cached', 'output'):
+            LLM_TOKENS.inc(usage.get(f'{key}_tokens', 0), type=key)
+        
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        cached_tokens = usage.get('cached_tokens', 0)
+        hit_rate = cached_tokens / prompt_tokens * 100 if prompt_tokens else 0.0
+        logger.info(
+            f"[LLM用量] 输入 {prompt_tokens} tokens (缓存命中 {cached_tokens}, {hit_rate:.1f}%), "
+            f"输出 {usage.get('output_tokens', 0)} tokens"
+        )
+    
+    def reset_usage_stats(self) -> None:
+        """清零累计 Token 用量（分析器在多次运行间复用时，每次运行开始调用）"""
+        with self._usage_lock:
+            for key in self._usage_totals:
+                self._usage_totals[key] = 0
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        获取累计 Token 用量
+        
+        Returns:
+            包含 calls/prompt_tokens/cached_tokens/output_tokens/cache_hit_rate 的字典
+        """
+        with self._usage_lock:
+            stats: Dict[str, Any] = dict(self._usage_totals)
+        prompt_tokens = stats['prompt_tokens']
+        stats['cache_hit_rate'] = round(stats['cached_tokens'] / prompt_tokens, 4) if prompt_tokens else 0.0
+        return stats
+    
     def analyze(
         self, 
         context: Dict[str, Any],
-        news_context: Optional[str] = None
+        news_context: Optional[str] = None,
+        model_override: Optional[str] = None,
+        skip_request_delay: bool = False
     ) -> AnalysisResult:
         """
         分析单只股票
@@ -739,6 +1344,8 @@ class GeminiAnalyzer:
         Args:
             context: 从 storage.get_analysis_context() 获取的上下文数据
             news_context: 预先搜索的新闻内容（可选）
+            model_override: 指定本次使用的模型（可选，由 ModelRouter 传入）
+            skip_request_delay: 跳过请求前延时（流水线 llm 阶段已按 LLM_RPM 限速时传入）
             
         Returns:
             AnalysisResult 对象
@@ -746,11 +1353,12 @@ class GeminiAnalyzer:
         code = context.get('code', 'Unknown')
         config = get_config()
         
-        # 请求前增加延时（防止连续请求触发限流）
-        request_delay = config.gemini_request_delay
+        # 请求前增加延时（防止连续请求触发限流）；已由流水线限速器限速时不再叠加
+        request_delay = 0.0 if skip_request_delay else config.gemini_request_delay
         if request_delay > 0:
             logger.debug(f"[LLM] 请求前等待 {request_delay:.1f} 秒...")
             time.sleep(request_delay)
+            RATE_LIMIT_SLEEP.inc(request_delay, limiter='llm.request_delay')
         
         # 优先从上下文获取股票名称（由 main.py 传入）
         name = context.get('stock_name')
@@ -782,7 +1390,7 @@ class GeminiAnalyzer:
             prompt = self._format_prompt(context, name, news_context)
             
             # 获取模型名称
-            model_name = getattr(self, '_current_model_name', None)
+            model_name = model_override or getattr(self, '_current_model_name', None)
             if not model_name:
                 model_name = getattr(self._model, '_model_name', 'unknown')
                 if hasattr(self._model, 'model_name'):
@@ -790,7 +1398,10 @@ class GeminiAnalyzer:
             
             logger.info(f"========== AI 分析 {name}({code}) ==========")
             logger.info(f"[LLM配置] 模型: {model_name}")
-            logger.info(f"[LLM配置] Prompt 长度: {len(prompt)} 字符")
+            logger.info(
+                f"[LLM配置] Prompt 长度: {len(prompt)} 字符 "
+                f"(另有可缓存前缀 {len(self.ANALYSIS_PROMPT_PREFIX)} 字符)"
+            )
             logger.info(f"[LLM配置] 是否包含新闻: {'是' if news_context else '否'}")
             
             # 记录完整 prompt 到日志（INFO级别记录摘要，DEBUG记录完整）
@@ -807,8 +1418,21 @@ class GeminiAnalyzer:
             logger.info(f"[LLM调用] 开始调用 Gemini API (temperature={generation_config['temperature']}, max_tokens={generation_config['max_output_tokens']})...")
             
             # 使用带重试的 API 调用
+            self._local.last_usage = None
             start_time = time.time()
-            response_text = self._call_api_with_retry(prompt, generation_config)
+            try:
+                with trace_span('llm.request', model=model_name) as span, LLM_SECONDS.time(model=model_name):
+                    response_text = self._call_api_with_retry(
+                        prompt,
+                        generation_config,
+                        prompt_prefix=self.ANALYSIS_PROMPT_PREFIX,
+                        response_schema=build_analysis_response_schema() if config.llm_structured_output else None,
+                        model_name=model_override,
+                    )
+                    span.set(**(getattr(self._local, 'last_usage', None) or {}))
+            except Exception:
+                LLM_ERRORS.inc(model=model_name)
+                raise
             elapsed = time.time() - start_time
             
             # 记录响应信息
@@ -820,9 +1444,12 @@ class GeminiAnalyzer:
             logger.debug(f"=== Gemini 完整响应 ({len(response_text)}字符) ===\n{response_text}\n=== End Response ===")
             
             # 解析响应
-            result = self._parse_response(response_text, code, name)
+            with trace_span('llm.parse'):
+                result = run_cpu_task(parse_analysis_response, response_text, code, name)
             result.raw_response = response_text
             result.search_performed = bool(news_context)
+            result.model_name = model_override or self._current_model_name or model_name
+            result.llm_usage = getattr(self._local, 'last_usage', None)
             
             logger.info(f"[LLM解析] {name}({code}) 分析完成: {result.trend_prediction}, 评分 {result.sentiment_score}")
             
@@ -922,88 +1549,115 @@ class GeminiAnalyzer:
 - 资金面: {flow_str}
 """
 
-        prompt = f"""# 角色设定
-你是一位拥有20年经验的资深A股基金经理，擅长"基本面选股 + 技术面择时"。
-现在的任务是为 **{stock_name}({code})** 生成一份【极简决策日报】。
-
-# 输入数据 (Context)
+        technicals = (
+            f"- 价格: {today.get('close', 'N/A')} (涨跌 {today.get('pct_chg', 'N/A')}%)\n"
+            f"- 均线: {ma_info}\n"
+            f"- 量能: 量比 {rt.get('volume_ratio', 'N/A')} | 换手率 {rt.get('turnover_rate', 'N/A')}%\n"
+            f"- 筹码: 获利比例 {chip.get('profit_ratio', 0):.1%} | 90%集中度 {chip.get('concentration_90', 0):.2%} ({chip.get('chip_status', '未知')})\n"
+            f"- 趋势预判(系统自动): {trend.get('trend_status', '未知')} | 乖离率(MA5) {trend.get('bias_ma5', 0):+.2f}%"
+        )
+        
+        # 按 Token 预算裁剪：技术面 > 风险新闻 > F10 > 其他新闻
+        config = get_config()
+        overhead = estimate_tokens(self._render_prompt(stock_name, code, '', '', ''))
+        budget = config.llm_context_token_budget
+        builder = PromptContextBuilder(budget=max(budget - overhead, 1) if budget > 0 else 0)
+        builder.add_text('technicals', technicals, PRIORITY_TECHNICALS, required=True)
+        builder.add_text('f10', f10_summary.strip(), PRIORITY_F10)
+        
+        news_items = context.get('news_items')
+        if news_items:
+            risk_items, other_items = self._build_news_items(news_items)
+            builder.add_items('risk_news', risk_items, PRIORITY_RISK_NEWS, self.NEWS_ITEM_MAX_TOKENS)
+            builder.add_items('other_news', other_items, PRIORITY_OTHER_NEWS, self.NEWS_ITEM_MAX_TOKENS)
+        elif news_context:
+            builder.add_text('other_news', news_context, PRIORITY_OTHER_NEWS)
+        
+        sections = builder.build()
+        builder.log_usage(code, overhead_tokens=overhead)
+        
+        if news_items:
+            news_text = self._render_news_items(
+                sections.get('risk_news', []) + sections.get('other_news', [])
+            )
+        else:
+            news_text = sections.get('other_news', '')
+        
+        return self._render_prompt(
+            stock_name, code,
+            sections['technicals'],
+            sections['f10'],
+            news_text or '暂无重大近期新闻，请基于行业一般认知分析',
+        )
+    
+    @staticmethod
+    def _render_prompt(stock_name: str, code: str, technicals: str, f10: str, news: str) -> str:
+        """渲染每只股票的动态输入部分（静态的角色设定与输出要求见 ANALYSIS_PROMPT_PREFIX）"""
+        return f"""# 输入数据 (Context)
+分析对象: **{stock_name}({code})**
 
 ## 1. 技术面 (择时核心)
-- 价格: {today.get('close', 'N/A')} (涨跌 {today.get('pct_chg', 'N/A')}%)
-- 均线: {ma_info}
-- 量能: 量比 {rt.get('volume_ratio', 'N/A')} | 换手率 {rt.get('turnover_rate', 'N/A')}%
-- 筹码: 获利比例 {chip.get('profit_ratio', 0):.1%} | 90%集中度 {chip.get('concentration_90', 0):.2%} ({chip.get('chip_status', '未知')})
-- 趋势预判(系统自动): {trend.get('trend_status', '未知')} | 乖离率(MA5) {trend.get('bias_ma5', 0):+.2f}%
+{technicals}
 
 ## 2. 基本面 & 资金 (选股核心)
-{f10_summary}
+{f10}
 
 ## 3. 舆情与政策 (环境扫描, 近7日)
 ```text
-{news_context or '暂无重大近期新闻，请基于行业一般认知分析'}
+{news}
 ```
 
 ---
 
-# 分析指令 (Critical Instructions)
-
-请综合以上所有维度，输出一份 JSON 格式的决策报告。
-
-## ⚠️ 核心原则 (必须通过图灵测试的自然度)
-1. **拒绝报菜名**：不要罗列"MA5是多少，MA10是多少"。直接说观点："均线多头排列，上涨趋势确立"。
-2. **拒绝废话**：不要说"基本面良好，技术面震荡"。要说："绩优白马股缩量回调，是黄金坑"。
-3. **多维归因**：解释涨跌时，要结合**基本面(业绩/行业)** + **政策面(利好/利空)** + **技术面(资金/量能)**。
-4. **历史视角**：如果是个股，结合其历史股性（如：是否妖股、是否跟风）；如果是行业，结合行业周期位置。
-
-## JSON 输出要求
-请严格填充以下字段：
-
-```json
-{{
-    "sentiment_score": 0-100评分,
-    "trend_prediction": "看多/看空/震荡",
-    "operation_advice": "买入/卖出/持有/观望",
-    "confidence_level": "高/中/低",
+请基于以上输入数据，按分析指令输出 **{stock_name}({code})** 的 JSON 决策报告。
+"""
     
-    "dashboard": {{
-        "core_conclusion": {{
-            "one_sentence": "一句话核心结论（30字内，毒辣精准）",
-            "signal_type": "🟢买入/🟡持有/🔴卖出/⚠️预警",
-            "position_advice": {{
-                "no_position": "空仓策略（点位+仓位）",
-                "has_position": "持仓策略（止盈/止损位）"
-            }}
-        }},
-        "intelligence": {{
-            "risk_alerts": ["风险点1(如减持/高乖离)", "风险点2"],
-            "positive_catalysts": ["利好1(如业绩预增/政策)", "利好2"]
-        }},
-        "battle_plan": {{
-            "short_term": {{
-                "buy": "短期买入价（具体数字）",
-                "sell": "短期卖出价（具体数字）",
-                "stop_loss": "止损价（具体数字）"
-            }},
-            "long_term": {{
-                "buy": "中长期配置价（具体数字/分批建仓区间）",
-                "sell": "中长期目标价（具体数字）"
-            }}
-        }}
-    }},
-
-    "analysis_summary": "100字内的综合分析。必须融合：1.政策/行业风口 2.公司基本面质地 3.当前技术面位置。不要分段，像人类专家一样叙述。",
+    def _build_news_items(
+        self,
+        news_items: Dict[str, List[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        将情报条目转换为预算条目，拆分为风险新闻和其他新闻
+        
+        Args:
+            news_items: {维度名称: [条目]}，见 SearchService.collect_intel_items
+            
+        Returns:
+            (风险新闻条目, 其他新闻条目)
+        """
+        risk_items: List[Dict[str, Any]] = []
+        other_items: List[Dict[str, Any]] = []
+        
+        ordered_dims = [d for d in self.NEWS_DIMENSION_LABELS if d in news_items]
+        ordered_dims += [d for d in news_items if d not in self.NEWS_DIMENSION_LABELS]
+        
+        for dim in ordered_dims:
+            label = self.NEWS_DIMENSION_LABELS.get(dim, dim)
+            target = risk_items if dim == 'risk_check' else other_items
+            for item in news_items.get(dim) or []:
+                title = (item.get('title') or '').strip()
+                snippet = ' '.join((item.get('snippet') or '').split())
+                date_str = f" [{item['date']}]" if item.get('date') else ""
+                target.append({
+                    'text': f"{title}{date_str}\n     {snippet}" if snippet else f"{title}{date_str}",
+                    'dedup_key': f"{title} {snippet}",
+                    'group': label,
+                })
+        return risk_items, other_items
     
-    "detailed_analysis": "这里必须生成一份【完整】的研究报告(Markdown格式)。\n包含以下章节：\n1. ### 🔍 深度基本面\n   - 财务健康度拆解(营收/利润/现金流)\n   - 行业竞争格局与地位\n2. ### 📜 政策与宏观\n   - 行业政策影响分析\n   - 宏观环境关联\n3. ### ⏳ 历史股性复盘\n   - 历史妖股属性/跟风属性\n   - 关键支撑压力位历史验证\n4. ### 💡 逻辑推演\n   - 为什么现在是(或不是)买入时机？\n   - 核心预期差在哪里？",
-
-    "plain_talk_short": "短期大白话（例如：'缩量回踩MA10，1800附近可博反弹'）",
-    "plain_talk_long": "长期大白话（例如：'业绩稳健但估值偏高，建议等回调到1700再配置长线'）"
-}}
-```
-
-此格式省略了冗长的"技术分析"、"基本面分析"长文段落，强制要求你将这些信息**合成**到 `analysis_summary` 和 `core_conclusion` 中。
-确保 JSON 格式合法。
-"""
-        return prompt
+    @staticmethod
+    def _render_news_items(items: List[Dict[str, Any]]) -> str:
+        """按维度分组渲染新闻条目"""
+        groups: Dict[str, List[str]] = {}
+        for item in items:
+            groups.setdefault(item['group'], []).append(item['text'])
+        
+        lines = []
+        for label, texts in groups.items():
+            lines.append(f"{label}:")
+            for i, text in enumerate(texts, 1):
+                lines.append(f"  {i}. {text}")
+        return "\n".join(lines)
     
     def _format_volume(self, volume: Optional[float]) -> str:
         """格式化成交量显示"""
@@ -1027,8 +1681,9 @@ class GeminiAnalyzer:
         else:
             return f"{amount:.0f} 元"
     
+    @classmethod
     def _parse_response(
-        self, 
+        cls, 
         response_text: str, 
         code: str, 
         name: str
@@ -1036,137 +1691,96 @@ class GeminiAnalyzer:
         """
         解析 Gemini 响应（决策仪表盘版）
         
-        尝试从响应中提取 JSON 格式的分析结果，包含 dashboard 字段
-        如果解析失败，尝试智能提取或返回默认结果
+        使用单遍容错扫描提取 JSON（见 response_parser），可修复尾随逗号、
+        注释和被截断的输出，并按仪表盘结构校验字段类型；
+        仍无法解析时，从纯文本中智能提取
+        
+        不依赖实例状态，可在 CPU 进程池中执行（见 cpu_pool）
         """
-        try:
-            # 清理响应文本：移除 markdown 代码块标记
-            cleaned_text = response_text
-            if '```json' in cleaned_text:
-                cleaned_text = cleaned_text.replace('```json', '').replace('```', '')
-            elif '```' in cleaned_text:
-                cleaned_text = cleaned_text.replace('```', '')
-            
-            # 尝试找到 JSON 内容
-            json_start = cleaned_text.find('{')
-            json_end = cleaned_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = cleaned_text[json_start:json_end]
-                
-                # 尝试修复常见的 JSON 问题
-                json_str = self._fix_json_string(json_str)
-                
-                data = json.loads(json_str, strict=False)
-                
-                
-                # 提取 dashboard 数据
-                dashboard = data.get('dashboard', None)
-                
-                # 智能回退：如果字段缺失，尝试从 dashboard 中提取
-                if not data.get('analysis_summary') and dashboard and 'core_conclusion' in dashboard:
-                     data['analysis_summary'] = dashboard.get('core_conclusion', {}).get('one_sentence', '')
-                     
-                if not data.get('risk_warning') and dashboard and 'risk_assessment' in dashboard:
-                     data['risk_warning'] = dashboard.get('risk_assessment', {}).get('main_risk', '')
-
-                # 解析所有字段，使用默认值防止缺失
-                return AnalysisResult(
-                    code=code,
-                    name=name,
-                    # 核心指标
-                    sentiment_score=int(data.get('sentiment_score', 50)),
-                    trend_prediction=data.get('trend_prediction', '震荡'),
-                    operation_advice=data.get('operation_advice', '持有'),
-                    confidence_level=data.get('confidence_level', '中'),
-                    # 决策仪表盘
-                    dashboard=dashboard,
-                    # 走势分析
-                    trend_analysis=data.get('trend_analysis', ''),
-                    short_term_outlook=data.get('short_term_outlook', ''),
-                    medium_term_outlook=data.get('medium_term_outlook', ''),
-                    # 技术面
-                    technical_analysis=data.get('technical_analysis', ''),
-                    ma_analysis=data.get('ma_analysis', ''),
-                    volume_analysis=data.get('volume_analysis', ''),
-                    pattern_analysis=data.get('pattern_analysis', ''),
-                    # 基本面
-                    fundamental_analysis=data.get('fundamental_analysis', ''),
-                    sector_position=data.get('sector_position', ''),
-                    company_highlights=data.get('company_highlights', ''),
-                    # 情绪面/消息面
-                    news_summary=data.get('news_summary', ''),
-                    market_sentiment=data.get('market_sentiment', ''),
-                    hot_topics=data.get('hot_topics', ''),
-                    # 综合
-                    analysis_summary=data.get('analysis_summary', '分析完成'),
-                    detailed_analysis=data.get('detailed_analysis', ''),  # 新增：完整版深度报告
-                    key_points=data.get('key_points', ''),
-                    risk_warning=data.get('risk_warning', ''),
-                    buy_reason=data.get('buy_reason', ''),
-                    # 交易计划 (解析新结构)
-                    buy_price=data.get('battle_plan', {}).get('short_term', {}).get('buy', '') or data.get('buy_price', ''),
-                    sell_price=data.get('battle_plan', {}).get('short_term', {}).get('sell', '') or data.get('sell_price', ''),
-                    stop_loss_price=data.get('battle_plan', {}).get('short_term', {}).get('stop_loss', '') or data.get('stop_loss_price', ''),
-                    
-                    short_term_buy=data.get('battle_plan', {}).get('short_term', {}).get('buy', ''),
-                    short_term_sell=data.get('battle_plan', {}).get('short_term', {}).get('sell', ''),
-                    long_term_buy=data.get('battle_plan', {}).get('long_term', {}).get('buy', ''),
-                    long_term_sell=data.get('battle_plan', {}).get('long_term', {}).get('sell', ''),
-
-                    # 大白话总结
-                    plain_talk_short=data.get('plain_talk_short', ''),
-                    plain_talk_long=data.get('plain_talk_long', ''),
-                    # 元数据
-                    search_performed=data.get('search_performed', False),
-                    data_sources=data.get('data_sources', '技术面数据'),
-                    success=True,
-                )
-            else:
-                # 没有找到 JSON，尝试从纯文本中提取信息
-                logger.warning(f"无法从响应中提取 JSON，使用原始文本分析")
-                return self._parse_text_response(response_text, code, name)
-                
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON 解析失败: {e}，尝试从文本提取")
-            return self._parse_text_response(response_text, code, name)
-    
-    def _fix_json_string(self, json_str: str) -> str:
-        """修复常见的 JSON 格式问题"""
-        import re
+        outcome = extract_json_object(response_text)
+        if not outcome.success:
+            # 没有可用的 JSON，尝试从纯文本中提取信息
+            logger.warning(f"[LLM解析] {outcome.error}，使用原始文本分析")
+            return cls._parse_text_response(response_text, code, name)
         
-        # 移除注释
-        json_str = re.sub(r'//.*?\n', '\n', json_str)
-        json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)
+        data = outcome.data
+        if outcome.repairs:
+            logger.info(f"[LLM解析] {name}({code}) JSON 已修复: {', '.join(outcome.repairs)}")
+        issues = validate_analysis_payload(data)
+        if issues:
+            logger.warning(f"[LLM解析] {name}({code}) 结构校验: {'; '.join(issues)}")
         
-        # 修复尾随逗号
-        json_str = re.sub(r',\s*}', '}', json_str)
-        json_str = re.sub(r',\s*]', ']', json_str)
+        # 提取 dashboard 数据
+        dashboard = data.get('dashboard', None)
         
-        # 确保布尔值是小写
-        json_str = json_str.replace('True', 'true').replace('False', 'false')
+        # 智能回退：如果字段缺失，尝试从 dashboard 中提取
+        if not data.get('analysis_summary') and dashboard and 'core_conclusion' in dashboard:
+             data['analysis_summary'] = dashboard.get('core_conclusion', {}).get('one_sentence', '')
+             
+        if not data.get('risk_warning') and dashboard and 'risk_assessment' in dashboard:
+             data['risk_warning'] = dashboard.get('risk_assessment', {}).get('main_risk', '')
         
-        # 修复由于长度限制导致的截断 (自动补全)
-        # 1. 补全引号
-        quote_count = json_str.count('"') - json_str.count('\\"')
-        if quote_count % 2 != 0:
-            json_str += '"'
-            
-        # 2. 补全括号
-        open_braces = json_str.count('{')
-        close_braces = json_str.count('}')
-        if open_braces > close_braces:
-            json_str += '}' * (open_braces - close_braces)
+        # 交易计划：提示词要求放在 dashboard 内，兼容直接输出在顶层的情况
+        battle_plan = data.get('battle_plan') or (dashboard or {}).get('battle_plan') or {}
+        short_plan = battle_plan.get('short_term') or {}
+        long_plan = battle_plan.get('long_term') or {}
+
+        # 解析所有字段，使用默认值防止缺失
+        return AnalysisResult(
+            code=code,
+            name=name,
+            # 核心指标
+            sentiment_score=data.get('sentiment_score', 50),
+            trend_prediction=data.get('trend_prediction', '震荡'),
+            operation_advice=data.get('operation_advice', '持有'),
+            confidence_level=data.get('confidence_level', '中'),
+            # 决策仪表盘
+            dashboard=dashboard,
+            # 走势分析
+            trend_analysis=data.get('trend_analysis', ''),
+            short_term_outlook=data.get('short_term_outlook', ''),
+            medium_term_outlook=data.get('medium_term_outlook', ''),
+            # 技术面
+            technical_analysis=data.get('technical_analysis', ''),
+            ma_analysis=data.get('ma_analysis', ''),
+            volume_analysis=data.get('volume_analysis', ''),
+            pattern_analysis=data.get('pattern_analysis', ''),
+            # 基本面
+            fundamental_analysis=data.get('fundamental_analysis', ''),
+            sector_position=data.get('sector_position', ''),
+            company_highlights=data.get('company_highlights', ''),
+            # 情绪面/消息面
+            news_summary=data.get('news_summary', ''),
+            market_sentiment=data.get('market_sentiment', ''),
+            hot_topics=data.get('hot_topics', ''),
+            # 综合
+            analysis_summary=data.get('analysis_summary', '分析完成'),
+            detailed_analysis=data.get('detailed_analysis', ''),  # 新增：完整版深度报告
+            key_points=data.get('key_points', ''),
+            risk_warning=data.get('risk_warning', ''),
+            buy_reason=data.get('buy_reason', ''),
+            # 交易计划 (解析新结构)
+            buy_price=short_plan.get('buy', '') or data.get('buy_price', ''),
+            sell_price=short_plan.get('sell', '') or data.get('sell_price', ''),
+            stop_loss_price=short_plan.get('stop_loss', '') or data.get('stop_loss_price', ''),
             
-        open_brackets = json_str.count('[')
-        close_brackets = json_str.count(']')
-        if open_brackets > close_brackets:
-            json_str += ']' * (open_brackets - close_brackets)
-        
-        return json_str
+            short_term_buy=short_plan.get('buy', ''),
+            short_term_sell=short_plan.get('sell', ''),
+            long_term_buy=long_plan.get('buy', ''),
+            long_term_sell=long_plan.get('sell', ''),
+
+            # 大白话总结
+            plain_talk_short=data.get('plain_talk_short', ''),
+            plain_talk_long=data.get('plain_talk_long', ''),
+            # 元数据
+            search_performed=data.get('search_performed', False),
+            data_sources=data.get('data_sources', '技术面数据'),
+            success=True,
+        )
     
+    @classmethod
     def _parse_text_response(
-        self, 
+        cls, 
         response_text: str, 
         code: str, 
         name: str
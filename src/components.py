@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 组件注册表
+===================================
+
+职责：
+1. 统一创建流水线使用的服务组件（数据源管理器、AI 分析器、模型路由、通知、搜索）
+2. 组件在首次使用时才创建，之后在多次运行、多个 Web 请求之间复用同一个实例
+3. 记录每个组件依赖的配置项，配置变化后下次获取时自动重建；也可调用 reload() 显式重建
+
+旧实现中每次创建 StockAnalysisPipeline 都会重新导入各数据源库、初始化 LLM 客户端和
+搜索服务，Web 每个分析请求要花数秒做这些准备；复用后只在第一次请求时付出这部分开销。
+
+重建或 reload() 时先关闭旧实例（组件提供 close() 时调用之，如搜索服务会写回缓存与
+Key 用量、取消退出时的写入），再创建新实例，避免新旧实例同时持有同一个持久化文件。
+"""
+
+import dataclasses
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import Config, get_config
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Component:
+    """已注册的组件"""
+    name: str
+    factory: Callable[[Config, 'ComponentRegistry'], Any]
+    config_prefixes: Tuple[str, ...] = ()  # 依赖的配置项（字段名前缀）
+    depends_on: Tuple[str, ...] = ()  # 依赖的其他组件（被依赖组件重建后本组件也重建）
+    config_fields: Optional[Tuple[str, ...]] = None  # 匹配前缀的配置字段名（首次计算后缓存）
+    instance: Any = None
+    fingerprint: Optional[Tuple] = None
+    build_seconds: float = 0.0
+    builds: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ComponentRegistry:
+    """
+    服务组件注册表（线程安全）
+
+    get() 时计算组件依赖的配置项取值（以及依赖组件的实例），与创建时不一致就重建；
+    同一组件的创建过程加锁，多个线程同时首次获取时只创建一次。
+    """
+
+    def __init__(self):
+        self._components: Dict[str, _Component] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[Config, 'ComponentRegistry'], Any],
+        config_prefixes: Sequence[str] = (),
+        depends_on: Sequence[str] = (),
+    ) -> None:
+        """
+        注册组件
+
+        Args:
+            name: 组件名称
+            factory: factory(config, registry) 创建组件实例
+            config_prefixes: 组件使用的配置字段名前缀（如 'gemini_'），这些配置变化后重建
+            depends_on: 依赖的组件名称（须已注册）
+        """
+        unknown = [d for d in depends_on if d not in self._components]
+        if unknown:
+            raise ValueError(f"组件 {name} 的依赖 {unknown} 未注册")
+        self._components[name] = _Component(
+            name=name,
+            factory=factory,
+            config_prefixes=tuple(config_prefixes),
+            depends_on=tuple(depends_on),
+        )
+
+    def get(self, name: str, config: Optional[Config] = None) -> Any:
+        """
+        获取组件实例（首次获取或配置变化时创建）
+
+        Args:
+            name: 组件名称
+            config: 配置对象（可选，默认使用全局配置）
+        """
+        component = self._components[name]
+        config = config or get_config()
+        fingerprint = self._fingerprint(component, config)
+        if component.instance is not None and component.fingerprint == fingerprint:
+            return component.instance
+
+        with component.lock:
+            if component.instance is not None and component.fingerprint == fingerprint:
+                return component.instance
+            reason = "创建"
+            if component.instance is not None:
+                reason = "配置变更，重新创建"
+                old, component.instance, component.fingerprint = component.instance, None, None
+                self._dispose(name, old)
+            t0 = time.time()
+            instance = component.factory(config, self)
+            component.build_seconds = time.time() - t0
+            component.builds += 1
+            component.instance, component.fingerprint = instance, fingerprint
+            logger.info(f"[组件] {reason} {name}，耗时 {component.build_seconds:.2f}s")
+            return instance
+
+    def reload(self, *names: str) -> List[str]:
+        """
+        关闭并丢弃组件实例，下次获取时重新创建（依赖它们的组件随之重建）
+
+        Args:
+            *names: 组件名称（不传表示全部）
+
+        Returns:
+            实际丢弃的组件名称
+        """
+        dropped = []
+        for name in names or list(self._components):
+            component = self._components[name]
+            with component.lock:
+                if component.instance is not None:
+                    old, component.instance, component.fingerprint = component.instance, None, None
+                    self._dispose(name, old)
+                    dropped.append(name)
+        if dropped:
+            logger.info(f"[组件] 已标记重新加载: {', '.join(dropped)}")
+        return dropped
+
+    @staticmethod
+    def _dispose(name: str, instance: Any) -> None:
+        """关闭被替换的组件实例（组件未提供 close() 时交给垃圾回收）"""
+        close = getattr(instance, 'close', None)
+        if not callable(close):
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.warning(f"[组件] 关闭 {name} 旧实例失败: {e}")
+
+    def peek(self, name: str) -> Any:
+        """
+        获取已创建的组件实例（不创建、不检查配置变化）
+
+        Returns:
+            组件实例；尚未创建时返回 None
+        """
+        return self._components[name].instance
+
+    def collect_metrics(self) -> List[tuple]:
+        """
+        汇总已创建组件的指标（/metrics 采集时调用）
+
+        组件提供 collect_metrics() 时调用之；尚未创建的组件不会因抓取指标而被创建。
+        """
+        families: List[tuple] = []
+        for name in self._components:
+            instance = self.peek(name)
+            if instance is not None and hasattr(instance, 'collect_metrics'):
+                families.extend(instance.collect_metrics())
+        return families
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各组件状态
+
+        Returns:
+            {组件名称: {'loaded', 'builds', 'build_seconds'}}
+        """
+        return {
+            name: {
+                'loaded': c.instance is not None,
+                'builds': c.builds,
+                'build_seconds': round(c.build_seconds, 3),
+            }
+            for name, c in self._components.items()
+        }
+
+    def _fingerprint(self, component: _Component, config: Config) -> Tuple:
+        """组件依赖的配置项取值 + 依赖组件的实例标识"""
+        if component.config_fields is None:
+            component.config_fields = tuple(
+                f.name for f in dataclasses.fields(config)
+                if component.config_prefixes and f.name.startswith(component.config_prefixes)
+            )
+        values = tuple(repr(getattr(config, name)) for name in component.config_fields)
+        return values + tuple(id(self.get(dep, config)) for dep in component.depends_on)
+
+
+# ============================================================
+# 组件工厂
+# ============================================================
+
+def _create_fetcher_manager(config: Config, registry: ComponentRegistry) -> Any:
+    from data_provider import DataFetcherManager
+    return DataFetcherManager()
+
+
+def _create_akshare_fetcher(config: Config, registry: ComponentRegistry) -> Any:
+    from data_provider.akshare_fetcher import AkshareFetcher
+    return AkshareFetcher()
+
+
+def _create_analyzer(config: Config, registry: ComponentRegistry) -> Any:
+    from analyzer import GeminiAnalyzer
+    return GeminiAnalyzer(api_key=config.gemini_api_key)
+
+
+def _create_model_router(config: Config, registry: ComponentRegistry) -> Any:
+    from model_router import ModelRouter
+    return ModelRouter(registry.get('analyzer', config))
+
+
+def _create_notifier(config: Config, registry: ComponentRegistry) -> Any:
+    from notification import NotificationService
+    return NotificationService()
+
+
+def _create_search_service(config: Config, registry: ComponentRegistry) -> Any:
+    from search_service import SearchService
+    search_service = SearchService(
+        bocha_keys=config.bocha_api_keys,
+        tavily_keys=config.tavily_api_keys,
+        serpapi_keys=config.serpapi_keys,
+        provider_concurrency=config.search_provider_concurrency,
+        intel_deadline=config.search_intel_deadline,
+        cache_enabled=config.search_cache_enabled,
+        cache_path=config.search_cache_path,
+        cache_max_entries=config.search_cache_max_entries,
+        http_pool_size=config.search_http_pool_size,
+        http_timeout=config.search_http_timeout,
+        http_connect_timeout=config.search_http_connect_timeout,
+        intel_top_k=config.search_intel_top_k,
+        monthly_quotas={
+            'Bocha': config.bocha_monthly_quota,
+            'Tavily': config.tavily_monthly_quota,
+            'SerpAPI': config.serpapi_monthly_quota,
+        },
+        quota_reserve=config.search_quota_reserve,
+        key_usage_path=config.search_key_usage_path,
+        provider_timeouts=config.search_provider_timeouts,
+        news_deadline=config.search_news_deadline,
+        hedge_delay=config.search_hedge_delay,
+        news_min_results=config.search_news_min_results,
+        news_index_enabled=config.news_index_enabled,
+        news_index_path=config.news_index_path,
+        news_index_retention_days=config.news_index_retention_days,
+    )
+    if search_service.is_available:
+        logger.info("搜索服务已启用 (Tavily/SerpAPI)")
+    elif search_service.has_news_index:
+        logger.warning("未配置搜索 API Key，情报搜索仅使用本地新闻索引（离线模式）")
+    else:
+        logger.warning("搜索服务未启用（未配置 API Key）")
+    return search_service
+
+
+def create_default_registry() -> ComponentRegistry:
+    """创建并注册默认组件"""
+    registry = ComponentRegistry()
+    registry.register(
+        'fetcher_manager', _create_fetcher_manager,
+        config_prefixes=('tushare_', 'akshare_', 'max_retries', 'retry_'),
+    )
+    registry.register('akshare_fetcher', _create_akshare_fetcher, config_prefixes=('akshare_',))
+    registry.register(
+        'analyzer', _create_analyzer,
+        config_prefixes=(
+            'gemini_', 'openai_', 'ai_provider',
+            'llm_prompt_cache_enabled', 'llm_context_token_budget', 'llm_structured_output',
+        ),
+    )
+    registry.register(
+        'model_router', _create_model_router,
+        config_prefixes=('llm_fast_', 'llm_strong_', 'llm_router_'),
+        depends_on=('analyzer',),
+    )
+    registry.register(
+        'notifier', _create_notifier,
+        config_prefixes=('wechat_', 'feishu_', 'telegram_', 'email_', 'pushover_', 'custom_webhook_'),
+    )
+    registry.register(
+        'search_service', _create_search_service,
+        config_prefixes=('bocha_', 'tavily_', 'serpapi_', 'search_', 'news_index_'),
+    )
+    return registry
+
+
+# 全局组件注册表
+_registry: Optional[ComponentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_components() -> ComponentRegistry:
+    """获取全局组件注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = create_default_registry()
+                REGISTRY.register_collector(_registry.collect_metrics)
+    return _registry
@@ -12,7 +12,7 @@ A股自选股智能分析系统 - 配置管理模块
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv, dotenv_values
 from dataclasses import dataclass, field
 
@@ -30,6 +30,7 @@ class Config:
     
     # === 自选股配置 ===
     stock_list: List[str] = field(default_factory=list)
+    holding_stocks: List[str] = field(default_factory=list)  # 持仓股票（优先分析）
 
     # === 飞书云文档配置 ===
     feishu_app_id: Optional[str] = None
@@ -52,6 +53,26 @@ class Config:
     gemini_max_retries: int = 5  # 最大重试次数
     gemini_retry_delay: float = 5.0  # 重试基础延时（秒）
     
+    # 提示词前缀缓存（静态指令只上传/计费一次，各股票只发送动态数据）
+    llm_prompt_cache_enabled: bool = True
+    gemini_cache_ttl: int = 3600  # Gemini CachedContent 有效期（秒）
+    gemini_cache_retry_seconds: int = 600  # 创建前缀缓存失败后，该模型暂停尝试的秒数
+    
+    # 每只股票动态输入的 Token 预算（按 技术面 > 风险新闻 > F10 > 其他新闻 取舍，<=0 不限制）
+    llm_context_token_budget: int = 3000
+    
+    # 结构化输出：Gemini response_schema / OpenAI response_format，不支持时自动降级
+    llm_structured_output: bool = True
+    
+    # 模型路由：信号明确/无新闻的精简分析走快速模型（与当前 AI 提供商同一家），留空则不启用
+    llm_fast_model: str = ""
+    llm_router_max_fast_tokens: int = 1500  # 新闻等输入超过该 Token 数时使用强模型
+    # 费用估算单价（美元 / 百万 Token），仅用于日志统计
+    llm_fast_input_price: float = 0.0
+    llm_fast_output_price: float = 0.0
+    llm_strong_input_price: float = 0.0
+    llm_strong_output_price: float = 0.0
+    
     # OpenAI 兼容 API（备选，当 Gemini 不可用时使用）
     openai_api_key: Optional[str] = None
     openai_base_url: Optional[str] = None  # 如: https://api.openai.com/v1
@@ -61,6 +82,27 @@ class Config:
     bocha_api_keys: List[str] = field(default_factory=list)  # Bocha API Keys
     tavily_api_keys: List[str] = field(default_factory=list)  # Tavily API Keys
     serpapi_keys: List[str] = field(default_factory=list)  # SerpAPI Keys
+    search_provider_concurrency: int = 2  # 每个搜索引擎的最大并发请求数
+    search_intel_deadline: float = 20.0  # 多维度情报搜索总时限（秒），超时返回部分结果
+    search_cache_enabled: bool = True  # 是否启用搜索结果缓存（按规范化查询，跨运行持久化）
+    search_cache_path: str = "./data/search_cache.json"  # 搜索缓存文件路径
+    search_cache_max_entries: int = 1000  # 搜索缓存最大条目数（LRU 淘汰）
+    search_http_pool_size: int = 4  # 每个搜索 API Key 的 HTTP 连接池大小
+    search_http_timeout: float = 10.0  # 搜索请求读取超时（秒）
+    search_http_connect_timeout: float = 5.0  # 搜索请求连接超时（秒）
+    search_intel_top_k: int = 3  # 情报去重排序后每个维度保留的条数
+    tavily_monthly_quota: int = 1000  # Tavily 每个 Key 的月度额度
+    serpapi_monthly_quota: int = 100  # SerpAPI 每个 Key 的月度额度
+    bocha_monthly_quota: int = 0  # 博查每个 Key 的月度额度（0 表示不限）
+    search_quota_reserve: float = 0.05  # 保留额度比例，低于该比例时优先使用其他搜索引擎
+    search_key_usage_path: str = "./data/search_key_usage.json"  # Key 月度用量记录文件
+    search_provider_timeouts: Dict[str, float] = field(default_factory=dict)  # 各搜索引擎的读取超时（秒）
+    search_news_deadline: float = 15.0  # 股票新闻搜索（含故障转移）总时限（秒）
+    search_hedge_delay: float = 3.0  # 当前引擎超过该时间未返回时并发启动下一个引擎（秒，0 关闭）
+    search_news_min_results: int = 3  # 股票新闻结果达到该条数即返回
+    news_index_enabled: bool = True  # 是否启用本地新闻索引（先查索引再调用付费搜索）
+    news_index_path: str = "./data/news_index.db"  # 本地新闻索引数据库（SQLite FTS5）
+    news_index_retention_days: int = 90  # 本地新闻索引保留天数
     
     # === 通知配置（可同时配置多个，全部推送）===
     
@@ -104,6 +146,20 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    enrich_source_concurrency: int = 2  # 增强数据（实时行情、筹码、F10）每个来源的最大并发请求数
+    enrich_deadline: float = 30.0  # 单只股票增强数据获取总时限（秒），超时的来源按缺失处理
+    
+    # 分阶段流水线：各阶段的并发线程数（数据获取阶段使用 max_workers）
+    pipeline_search_workers: int = 2  # 情报搜索阶段
+    pipeline_cpu_workers: int = 2  # 趋势分析、报告渲染阶段
+    pipeline_cpu_processes: int = 0  # CPU 进程池进程数（趋势分析、响应解析、报告渲染；0 关闭，-1 使用全部核心）
+    pipeline_llm_workers: int = 2  # LLM 分析阶段
+    llm_rpm: float = 0.0  # LLM 每分钟最多调用次数（0 表示不限）
+    pipeline_queue_size: int = 10  # 阶段之间队列的容量（0 表示不限）
+    run_deadline: str = ""  # 个股分析截止时间：HH:MM 或开始后的分钟数，到期后推送已完成的部分（留空不限）
+    trace_enabled: bool = True  # 记录各阶段耗时，运行结束时输出分布与关键路径（写入 LOG_DIR/trace_*.json）
+    trace_otlp_endpoint: str = ""  # OpenTelemetry OTLP/HTTP 导出地址（留空不导出）
+    
     debug: bool = False
     
     # === 定时任务配置 ===
@@ -128,6 +184,8 @@ class Config:
     webui_enabled: bool = False
     webui_host: str = "127.0.0.1"
     webui_port: int = 8000
+    webui_server: str = "threading"  # threading / asyncio
+    webui_workers: int = 8  # asyncio 模式下执行请求处理器的线程数
     
     # 单例实例存储
     _instance: Optional['Config'] = None
@@ -187,6 +245,8 @@ class Config:
         if not stock_list:
             stock_list = ['600519', '000001', '300750']
         
+        holding_stocks = [code.strip() for code in get_clean_env('HOLDING_STOCKS').split(',') if code.strip()]
+        
         # 解析搜索引擎 API Keys（支持多个 key，逗号分隔）
         bocha_keys_str = get_clean_env('BOCHA_API_KEYS')
         bocha_api_keys = [k.strip() for k in bocha_keys_str.split(',') if k.strip()]
@@ -197,8 +257,16 @@ class Config:
         serpapi_keys_str = get_clean_env('SERPAPI_API_KEYS')
         serpapi_keys = [k.strip() for k in serpapi_keys_str.split(',') if k.strip()]
         
+        # 解析各搜索引擎的读取超时（格式：Bocha:6,Tavily:8）
+        search_provider_timeouts = {}
+        for item in get_clean_env('SEARCH_PROVIDER_TIMEOUTS').split(','):
+            name, _, seconds = item.partition(':')
+            if name.strip() and seconds.strip():
+                search_provider_timeouts[name.strip()] = float(seconds)
+        
         return cls(
             stock_list=stock_list,
+            holding_stocks=holding_stocks,
             feishu_app_id=get_clean_env('FEISHU_APP_ID'),
             feishu_app_secret=get_clean_env('FEISHU_APP_SECRET'),
             feishu_folder_token=get_clean_env('FEISHU_FOLDER_TOKEN'),
@@ -209,12 +277,44 @@ class Config:
             gemini_request_delay=float(get_clean_env('GEMINI_REQUEST_DELAY', '2.0')),
             gemini_max_retries=int(get_clean_env('GEMINI_MAX_RETRIES', '5')),
             gemini_retry_delay=float(get_clean_env('GEMINI_RETRY_DELAY', '5.0')),
+            llm_prompt_cache_enabled=get_clean_env('LLM_PROMPT_CACHE_ENABLED', 'true').lower() == 'true',
+            gemini_cache_ttl=int(get_clean_env('GEMINI_CACHE_TTL', '3600')),
+            gemini_cache_retry_seconds=int(get_clean_env('GEMINI_CACHE_RETRY_SECONDS', '600')),
+            llm_context_token_budget=int(get_clean_env('LLM_CONTEXT_TOKEN_BUDGET', '3000')),
+            llm_structured_output=get_clean_env('LLM_STRUCTURED_OUTPUT', 'true').lower() == 'true',
+            llm_fast_model=get_clean_env('LLM_FAST_MODEL'),
+            llm_router_max_fast_tokens=int(get_clean_env('LLM_ROUTER_MAX_FAST_TOKENS', '1500')),
+            llm_fast_input_price=float(get_clean_env('LLM_FAST_INPUT_PRICE', '0')),
+            llm_fast_output_price=float(get_clean_env('LLM_FAST_OUTPUT_PRICE', '0')),
+            llm_strong_input_price=float(get_clean_env('LLM_STRONG_INPUT_PRICE', '0')),
+            llm_strong_output_price=float(get_clean_env('LLM_STRONG_OUTPUT_PRICE', '0')),
             openai_api_key=get_clean_env('OPENAI_API_KEY'),
             openai_base_url=get_clean_env('OPENAI_BASE_URL'),
             openai_model=get_clean_env('OPENAI_MODEL', 'gpt-4o-mini'),
             bocha_api_keys=bocha_api_keys,
             tavily_api_keys=tavily_api_keys,
             serpapi_keys=serpapi_keys,
+            search_provider_concurrency=int(get_clean_env('SEARCH_PROVIDER_CONCURRENCY', '2')),
+            search_intel_deadline=float(get_clean_env('SEARCH_INTEL_DEADLINE', '20')),
+            search_cache_enabled=get_clean_env('SEARCH_CACHE_ENABLED', 'true').lower() == 'true',
+            search_cache_path=get_clean_env('SEARCH_CACHE_PATH', './data/search_cache.json'),
+            search_cache_max_entries=int(get_clean_env('SEARCH_CACHE_MAX_ENTRIES', '1000')),
+            search_http_pool_size=int(get_clean_env('SEARCH_HTTP_POOL_SIZE', '4')),
+            search_http_timeout=float(get_clean_env('SEARCH_HTTP_TIMEOUT', '10')),
+            search_http_connect_timeout=float(get_clean_env('SEARCH_HTTP_CONNECT_TIMEOUT', '5')),
+            search_intel_top_k=int(get_clean_env('SEARCH_INTEL_TOP_K', '3')),
+            tavily_monthly_quota=int(get_clean_env('TAVILY_MONTHLY_QUOTA', '1000')),
+            serpapi_monthly_quota=int(get_clean_env('SERPAPI_MONTHLY_QUOTA', '100')),
+            bocha_monthly_quota=int(get_clean_env('BOCHA_MONTHLY_QUOTA', '0')),
+            search_quota_reserve=float(get_clean_env('SEARCH_QUOTA_RESERVE', '0.05')),
+            search_key_usage_path=get_clean_env('SEARCH_KEY_USAGE_PATH', './data/search_key_usage.json'),
+            search_provider_timeouts=search_provider_timeouts,
+            search_news_deadline=float(get_clean_env('SEARCH_NEWS_DEADLINE', '15')),
+            search_hedge_delay=float(get_clean_env('SEARCH_HEDGE_DELAY', '3')),
+            search_news_min_results=int(get_clean_env('SEARCH_NEWS_MIN_RESULTS', '3')),
+            news_index_enabled=get_clean_env('NEWS_INDEX_ENABLED', 'true').lower() == 'true',
+            news_index_path=get_clean_env('NEWS_INDEX_PATH', './data/news_index.db'),
+            news_index_retention_days=int(get_clean_env('NEWS_INDEX_RETENTION_DAYS', '90')),
             wechat_webhook_url=get_clean_env('WECHAT_WEBHOOK_URL'),
             feishu_webhook_url=get_clean_env('FEISHU_WEBHOOK_URL'),
             telegram_bot_token=get_clean_env('TELEGRAM_BOT_TOKEN'),
@@ -233,6 +333,17 @@ class Config:
             log_dir=get_clean_env('LOG_DIR', './logs'),
             log_level=get_clean_env('LOG_LEVEL', 'INFO'),
             max_workers=int(get_clean_env('MAX_WORKERS', '3')),
+            enrich_source_concurrency=int(get_clean_env('ENRICH_SOURCE_CONCURRENCY', '2')),
+            enrich_deadline=float(get_clean_env('ENRICH_DEADLINE', '30')),
+            pipeline_search_workers=int(get_clean_env('PIPELINE_SEARCH_WORKERS', '2')),
+            pipeline_cpu_workers=int(get_clean_env('PIPELINE_CPU_WORKERS', '2')),
+            pipeline_cpu_processes=int(get_clean_env('PIPELINE_CPU_PROCESSES', '0')),
+            pipeline_llm_workers=int(get_clean_env('PIPELINE_LLM_WORKERS', '2')),
+            llm_rpm=float(get_clean_env('LLM_RPM', '0')),
+            pipeline_queue_size=int(get_clean_env('PIPELINE_QUEUE_SIZE', '10')),
+            run_deadline=get_clean_env('RUN_DEADLINE'),
+            trace_enabled=get_clean_env('TRACE_ENABLED', 'true').lower() == 'true',
+            trace_otlp_endpoint=get_clean_env('TRACE_OTLP_ENDPOINT'),
             debug=get_clean_env('DEBUG', 'false').lower() == 'true',
             schedule_enabled=get_clean_env('SCHEDULE_ENABLED', 'false').lower() == 'true',
             schedule_time=get_clean_env('SCHEDULE_TIME', '18:00'),
@@ -240,6 +351,8 @@ class Config:
             webui_enabled=get_clean_env('WEBUI_ENABLED', 'false').lower() == 'true',
             webui_host=get_clean_env('WEBUI_HOST', '127.0.0.1'),
             webui_port=int(get_clean_env('WEBUI_PORT', '8000')),
+            webui_server=get_clean_env('WEBUI_SERVER', 'threading').lower(),
+            webui_workers=int(get_clean_env('WEBUI_WORKERS', '8')),
             ai_provider=get_clean_env('AI_PROVIDER', 'gemini').lower(),
         )
     
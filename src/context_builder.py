@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 提示词上下文预算
+===================================
+
+职责：
+1. 估算各段输入数据的 Token 数
+2. 按优先级在固定的输入预算内分配：技术面 > 风险新闻 > F10 > 其他新闻
+3. 去除近似重复的新闻摘要，截断过长条目
+4. 输出每段的 Token 账目，便于观察单次调用的输入规模
+
+预算只作用于每只股票的动态输入部分；静态的分析指令走前缀缓存，不在此计算。
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+# 段落优先级（数字越小越优先获得预算）
+PRIORITY_TECHNICALS = 0
+PRIORITY_RISK_NEWS = 1
+PRIORITY_F10 = 2
+PRIORITY_OTHER_NEWS = 3
+
+# 近似重复判定阈值（字符二元组 Jaccard 相似度）
+DEDUP_SIMILARITY = 0.8
+
+_CJK_RE = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+_NORMALIZE_RE = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 Token 数
+
+    不依赖具体模型的分词器：中文及全角字符按 1 字 ≈ 1 Token，
+    其余字符按 4 字符 ≈ 1 Token。对 Gemini / GPT / DeepSeek 误差在 ±20% 以内，
+    用于预算分配足够。
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 Token 数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    other = len(text) - cjk
+    return cjk + math.ceil(other / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = '...') -> str:
+    """
+    将文本截断到不超过 max_tokens（按 estimate_tokens 口径）
+
+    Args:
+        text: 文本
+        max_tokens: Token 上限
+        suffix: 截断后追加的标记
+
+    Returns:
+        截断后的文本
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(suffix)
+    if budget <= 0:
+        return ''
+
+    used = 0.0
+    for i, ch in enumerate(text):
+        used += 1.0 if _CJK_RE.match(ch) else 0.25
+        if used > budget:
+            return text[:i].rstrip() + suffix
+    return text
+
+
+def _bigrams(text: str) -> Set[str]:
+    """归一化后的字符二元组（去空白和标点，忽略大小写）"""
+    norm = _NORMALIZE_RE.sub('', text.lower())
+    if len(norm) < 2:
+        return {norm} if norm else set()
+    return {norm[i:i + 2] for i in range(len(norm) - 1)}
+
+
+def _is_near_duplicate(grams: Set[str], seen: List[Set[str]]) -> bool:
+    """判断与已收录条目是否近似重复"""
+    if not grams:
+        return False
+    for other in seen:
+        if not other:
+            continue
+        inter = len(grams & other)
+        if inter and inter / len(grams | other) >= DEDUP_SIMILARITY:
+            return True
+    return False
+
+
+@dataclass
+class ContextSection:
+    """
+    上下文段落
+
+    text 段落按行分配预算（超出预算的尾部行被丢弃）；
+    items 段落按条目分配，条目先去重、再截断到 item_max_tokens。
+    """
+    name: str
+    priority: int
+    kind: str = 'text'  # 'text' 或 'items'
+    text: str = ''
+    items: List[Dict[str, Any]] = field(default_factory=list)  # [{'text': ..., 'group': ...}]
+    required: bool = False  # 必选段落不受预算限制（技术面）
+    item_max_tokens: int = 0  # 单条上限，0 表示不截断
+
+
+@dataclass
+class SectionUsage:
+    """单个段落的预算使用情况"""
+    name: str
+    tokens: int = 0
+    raw_tokens: int = 0  # 未裁剪前的 Token 数
+    kept: int = 0
+    dropped: int = 0
+    deduped: int = 0
+    truncated: int = 0
+
+
+class PromptContextBuilder:
+    """
+    按优先级分配输入 Token 预算
+
+    使用方式：
+        builder = PromptContextBuilder(budget=3000)
+        builder.add_text('technicals', tech_text, PRIORITY_TECHNICALS, required=True)
+        builder.add_items('risk_news', items, PRIORITY_RISK_NEWS, item_max_tokens=80)
+        rendered = builder.build()
+        builder.log_usage(code)
+    """
+
+    def __init__(self, budget: int):
+        """
+        Args:
+            budget: 输入 Token 预算（<=0 表示不限制）
+        """
+        self.budget = budget
+        self._sections: List[ContextSection] = []
+        self._usage: Dict[str, SectionUsage] = {}
+        self._output: Dict[str, Any] = {}
+
+    def add_text(
+        self,
+        name: str,
+        text: str,
+        priority: int,
+        required: bool = False
+    ) -> None:
+        """添加按行裁剪的文本段落"""
+        self._sections.append(ContextSection(
+            name=name, priority=priority, text=text or '', required=required
+        ))
+
+    def add_items(
+        self,
+        name: str,
+        items: List[Dict[str, Any]],
+        priority: int,
+        item_max_tokens: int = 0
+    ) -> None:
+        """添加按条目裁剪的列表段落（如新闻）"""
+        self._sections.append(ContextSection(
+            name=name, priority=priority, kind='items',
+            items=list(items or []), item_max_tokens=item_max_tokens
+        ))
+
+    def build(self) -> Dict[str, Any]:
+        """
+        执行预算分配
+
+        去重按优先级进行：高优先级段落先收录，低优先级段落中与之近似的条目被丢弃。
+
+        Returns:
+            {段落名: 文本} 或 {段落名: 保留的条目列表}
+        """
+        remaining = self.budget if self.budget > 0 else math.inf
+        seen_grams: List[Set[str]] = []
+
+        for section in sorted(self._sections, key=lambda s: s.priority):
+            usage = SectionUsage(name=section.name)
+            self._usage[section.name] = usage
+
+            if section.kind == 'items':
+                kept_items = []
+                for item in section.items:
+                    text = item.get('text', '')
+                    usage.raw_tokens += estimate_tokens(text)
+
+                    grams = _bigrams(item.get('dedup_key') or text)
+                    if _is_near_duplicate(grams, seen_grams):
+                        usage.deduped += 1
+                        continue
+
+                    if section.item_max_tokens > 0:
+                        short = truncate_to_tokens(text, section.item_max_tokens)
+                        if short != text:
+                            usage.truncated += 1
+                            text = short
+
+                    cost = estimate_tokens(text)
+                    if cost > remaining and not section.required:
+                        usage.dropped += 1
+                        continue
+
+                    remaining -= cost
+                    usage.tokens += cost
+                    seen_grams.append(grams)
+                    kept_items.append(dict(item, text=text))
+
+                usage.kept = len(kept_items)
+                self._output[section.name] = kept_items
+            else:
+                lines = section.text.splitlines()
+                usage.raw_tokens = estimate_tokens(section.text)
+                kept_lines = []
+                for i, line in enumerate(lines):
+                    cost = estimate_tokens(line) + 1  # 换行符
+                    if cost > remaining and not section.required:
+                        # 保持内容连续：截断第一行超出预算的行，其后各行全部丢弃
+                        short = truncate_to_tokens(line, remaining - 1)
+                        if short:
+                            usage.truncated += 1
+                            cost = estimate_tokens(short) + 1
+                            remaining -= cost
+                            usage.tokens += cost
+                            kept_lines.append(short)
+                        usage.dropped += len(lines) - i - (1 if short else 0)
+                        break
+                    remaining -= cost
+                    usage.tokens += cost
+                    kept_lines.append(line)
+                usage.kept = len(kept_lines)
+                self._output[section.name] = '\n'.join(kept_lines)
+
+        return self._output
+
+    @property
+    def total_tokens(self) -> int:
+        """已分配的 Token 总数"""
+        return sum(u.tokens for u in self._usage.values())
+
+    def get_usage(self) -> Dict[str, SectionUsage]:
+        """获取各段落的预算使用情况"""
+        return dict(self._usage)
+
+    def log_usage(self, label: str, overhead_tokens: int = 0) -> None:
+        """
+        输出每段的 Token 账目
+
+        Args:
+            label: 日志标签（通常为股票代码）
+            overhead_tokens: 模板自身占用的 Token 数
+        """
+        parts = []
+        for usage in self._usage.values():
+            detail = f"{usage.name} {usage.tokens}/{usage.raw_tokens}"
+            extras = []
+            if usage.deduped:
+                extras.append(f"去重{usage.deduped}")
+            if usage.truncated:
+                extras.append(f"截断{usage.truncated}")
+            if usage.dropped:
+                extras.append(f"舍弃{usage.dropped}")
+            if extras:
+                detail += f"({','.join(extras)})"
+            parts.append(detail)
+
+        total = self.total_tokens + overhead_tokens
+        budget_str = str(self.budget + overhead_tokens) if self.budget > 0 else '不限'
+        logger.info(
+            f"[上下文预算] {label}: 共约 {total} tokens (预算 {budget_str}, 模板 {overhead_tokens}) | "
+            + ' | '.join(parts)
+        )
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - CPU 进程池
+===================================
+
+职责：
+1. 把纯 Python 的 CPU 密集后处理（趋势分析、LLM 响应解析、Markdown 报告渲染）
+   放到独立进程执行，不与 I/O 线程争抢 GIL，自选股较多时可用满多个核心
+2. 任务输入输出只使用可序列化的紧凑数据（K 线记录列表、响应文本、
+   去掉原始响应的分析结果），避免传输 DataFrame 或服务对象
+3. 未启用（PIPELINE_CPU_PROCESSES=0，默认）或进程池不可用时，在当前线程直接执行
+
+子进程使用 spawn 方式启动：主进程此时已有大量 I/O 线程，fork 可能复制到被占用的锁。
+"""
+
+import dataclasses
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pool_disabled = False  # 进程池出错后本进程内不再使用
+
+# 子进程内复用的无状态对象（每个进程首次使用时创建）
+_trend_analyzer = None
+_notifier = None
+
+
+def get_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    获取 CPU 进程池（按配置延迟创建）
+
+    Returns:
+        进程池；PIPELINE_CPU_PROCESSES=0 或已禁用时返回 None
+    """
+    global _pool
+    if _pool is not None or _pool_disabled:
+        return _pool
+    from config import get_config
+    processes = get_config().pipeline_cpu_processes
+    if processes < 0:
+        processes = os.cpu_count() or 1
+    if processes == 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            logger.info(f"[CPU进程池] 已启用 {processes} 个进程（趋势分析、响应解析、报告渲染）")
+    return _pool
+
+
+def shutdown_cpu_pool() -> None:
+    """关闭 CPU 进程池（等待进行中的任务完成）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def run_cpu_task(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    执行 CPU 密集任务：启用进程池时在子进程执行并等待结果，否则在当前线程执行
+
+    进程池损坏或参数无法序列化时记录警告，改为当前线程执行并停用进程池。
+
+    Args:
+        func: 模块级函数（须可被 pickle）
+        *args: 可序列化的参数
+    """
+    global _pool_disabled
+    pool = get_cpu_pool()
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except (BrokenProcessPool, pickle.PicklingError) as e:
+        logger.warning(f"[CPU进程池] {func.__name__} 无法在子进程执行，改为线程内执行并停用进程池: {e}")
+        _pool_disabled = True
+        shutdown_cpu_pool()
+        return func(*args)
+
+
+def compact_result(result: Any) -> Any:
+    """去掉分析结果中的原始响应（渲染不需要，减少跨进程传输量）"""
+    if dataclasses.is_dataclass(result) and getattr(result, 'raw_response', None):
+        return dataclasses.replace(result, raw_response=None)
+    return result
+
+
+# ============================================================
+# 进程池任务（模块级函数，可被 pickle）
+# ============================================================
+
+def analyze_trend(raw_data: List[dict], code: str) -> Any:
+    """
+    趋势分析
+
+    Args:
+        raw_data: 日线记录列表（storage.get_analysis_context 的 raw_data）
+        code: 股票代码
+
+    Returns:
+        TrendAnalysisResult
+    """
+    global _trend_analyzer
+    import pandas as pd
+    from stock_analyzer import StockTrendAnalyzer
+    if _trend_analyzer is None:
+        _trend_analyzer = StockTrendAnalyzer()
+    return _trend_analyzer.analyze(pd.DataFrame(raw_data), code)
+
+
+def parse_analysis_response(response_text: str, code: str, name: str) -> Any:
+    """
+    解析 LLM 响应
+
+    Returns:
+        AnalysisResult（不含 raw_response，由调用方补充）
+    """
+    from analyzer import GeminiAnalyzer
+    return GeminiAnalyzer._parse_response(response_text, code, name)
+
+
+def _get_notifier() -> Any:
+    global _notifier
+    if _notifier is None:
+        from notification import NotificationService
+        _notifier = NotificationService()
+    return _notifier
+
+
+def render_stock_reports(result: Any, full: bool) -> Tuple[str, str]:
+    """
+    渲染单只股票的报告
+
+    Args:
+        result: AnalysisResult（建议先经过 compact_result）
+        full: 是否同时渲染决策仪表盘（完整报告）
+
+    Returns:
+        (决策仪表盘内容或空字符串, 精简日报内容)
+    """
+    notifier = _get_notifier()
+    dashboard = notifier.generate_dashboard_report([result]) if full else ''
+    return dashboard, notifier.generate_single_stock_report(result)
+
+
+def render_dashboard(results: List[Any]) -> str:
+    """渲染汇总决策仪表盘"""
+    return _get_notifier().generate_dashboard_report(results)
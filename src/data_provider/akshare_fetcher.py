@@ -23,7 +23,7 @@ import random
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 from tenacity import (
@@ -35,6 +35,7 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from metrics import RATE_LIMIT_SLEEP
 
 
 @dataclass
@@ -195,6 +196,13 @@ _etf_realtime_cache: Dict[str, Any] = {
     'ttl': 60  # 60秒缓存有效期
 }
 
+# 港股实时行情缓存
+_hk_realtime_cache: Dict[str, Any] = {
+    'data': None,
+    'timestamp': 0,
+    'ttl': 60  # 60秒缓存有效期
+}
+
 
 def _is_etf_code(stock_code: str) -> bool:
     """
@@ -291,6 +299,7 @@ class AkshareFetcher(BaseFetcher):
         2. 如果间隔不足，补充休眠时间
         3. 然后再执行随机 jitter 休眠
         """
+        slept = 0.0
         if self._last_request_time is not None:
             elapsed = time.time() - self._last_request_time
             min_interval = self.sleep_min
@@ -298,10 +307,12 @@ class AkshareFetcher(BaseFetcher):
                 additional_sleep = min_interval - elapsed
                 logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
                 time.sleep(additional_sleep)
+                slept += additional_sleep
         
         # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
+        slept += self.random_sleep(self.sleep_min, self.sleep_max)
         self._last_request_time = time.time()
+        RATE_LIMIT_SLEEP.inc(slept, limiter='akshare')
     
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
@@ -571,6 +582,26 @@ class AkshareFetcher(BaseFetcher):
         else:
             return self._get_stock_realtime_quote(stock_code)
     
+    def get_realtime_quotes(self, stock_codes: List[str]) -> Dict[str, RealtimeQuote]:
+        """
+        批量获取实时行情数据
+        
+        A 股、ETF、港股的实时行情接口均返回全市场快照，每类市场只请求一次
+        （其余代码命中缓存），适合在分析前为整个自选股列表预取。
+        
+        Args:
+            stock_codes: 股票/ETF代码列表
+            
+        Returns:
+            {代码: RealtimeQuote}，获取失败的代码不出现在结果中
+        """
+        quotes: Dict[str, RealtimeQuote] = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            quote = self.get_realtime_quote(stock_code)
+            if quote is not None:
+                quotes[stock_code] = quote
+        return quotes
+    
     def _get_stock_realtime_quote(self, stock_code: str) -> Optional[RealtimeQuote]:
         """
         获取普通 A 股实时行情数据
@@ -780,21 +811,30 @@ class AkshareFetcher(BaseFetcher):
         import akshare as ak
         
         try:
-            # 防封禁策略
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-            
             # 确保代码格式正确（5位数字）
             code = stock_code.lower().replace('hk', '').zfill(5)
             
-            logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
-            import time as _time
-            api_start = _time.time()
-            
-            df = ak.stock_hk_spot_em()
-            
-            api_elapsed = _time.time() - api_start
-            logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
+            # 检查缓存
+            current_time = time.time()
+            if (_hk_realtime_cache['data'] is not None and 
+                current_time - _hk_realtime_cache['timestamp'] < _hk_realtime_cache['ttl']):
+                df = _hk_realtime_cache['data']
+                logger.debug("[缓存命中] 使用缓存的港股实时行情数据")
+            else:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+                
+                logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
+                import time as _time
+                api_start = _time.time()
+                
+                df = ak.stock_hk_spot_em()
+                
+                api_elapsed = _time.time() - api_start
+                logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
+                _hk_realtime_cache['data'] = df
+                _hk_realtime_cache['timestamp'] = current_time
             
             # 查找指定港股
             row = df[df['代码'] == code]
@@ -19,7 +19,7 @@ import random
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Any
 
 import pandas as pd
 import numpy as np
@@ -30,6 +30,9 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from metrics import FETCH_ERRORS, FETCH_SECONDS
+from tracing import trace_span
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -213,16 +216,20 @@ class BaseFetcher(ABC):
         return df
     
     @staticmethod
-    def random_sleep(min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
+    def random_sleep(min_seconds: float = 1.0, max_seconds: float = 3.0) -> float:
         """
         智能随机休眠（Jitter）
         
         防封禁策略：模拟人类行为的随机延迟
         在请求之间加入不规则的等待时间
+        
+        Returns:
+            实际休眠秒数
         """
         sleep_time = random.uniform(min_seconds, max_seconds)
         logger.debug(f"随机休眠 {sleep_time:.2f} 秒...")
         time.sleep(sleep_time)
+        return sleep_time
 
 
 class DataFetcherManager:
@@ -325,18 +332,21 @@ class DataFetcherManager:
         for fetcher in self._fetchers:
             try:
                 logger.info(f"尝试使用 [{fetcher.name}] 获取 {stock_code}...")
-                df = fetcher.get_daily_data(
-                    stock_code=stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    days=days
-                )
+                with trace_span(f"fetch.{fetcher.name}", key=stock_code), \
+                        FETCH_SECONDS.time(source=fetcher.name):
+                    df = fetcher.get_daily_data(
+                        stock_code=stock_code,
+                        start_date=start_date,
+                        end_date=end_date,
+                        days=days
+                    )
                 
                 if df is not None and not df.empty:
                     logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
                     return df, fetcher.name
                     
             except Exception as e:
+                FETCH_ERRORS.inc(source=fetcher.name)
                 error_msg = f"[{fetcher.name}] 失败: {str(e)}"
                 logger.warning(error_msg)
                 errors.append(error_msg)
@@ -352,3 +362,51 @@ class DataFetcherManager:
     def available_fetchers(self) -> List[str]:
         """返回可用数据源名称列表"""
         return [f.name for f in self._fetchers]
+    
+    def get_base_infos(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取股票基本信息（所处行业、市值、ROE 等），使用第一个支持批量查询且返回数据的数据源
+        
+        Args:
+            stock_codes: 股票代码列表
+            
+        Returns:
+            {代码: 基本信息字典}，获取失败返回空字典
+        """
+        for fetcher in self._fetchers:
+            get_base_infos = getattr(fetcher, 'get_base_infos', None)
+            if get_base_infos is None:
+                continue
+            try:
+                infos = get_base_infos(stock_codes)
+            except Exception as e:
+                logger.warning(f"[{fetcher.name}] 批量获取基本信息失败: {e}")
+                continue
+            if infos:
+                return infos
+        return {}
+    
+    def get_industry(self, stock_code: str) -> Optional[str]:
+        """
+        获取股票所属行业（通过支持 get_belong_board 的数据源）
+        
+        efinance 返回的所属板块通常以行业板块开头（其后为地域、概念板块），取第一个板块名称。
+        
+        Args:
+            stock_code: 股票代码
+            
+        Returns:
+            行业名称，获取失败返回 None
+        """
+        for fetcher in self._fetchers:
+            get_belong_board = getattr(fetcher, 'get_belong_board', None)
+            if get_belong_board is None:
+                continue
+            try:
+                df = get_belong_board(stock_code)
+            except Exception as e:
+                logger.warning(f"[{fetcher.name}] 获取 {stock_code} 所属板块失败: {e}")
+                continue
+            if df is not None and not df.empty and '板块名称' in df.columns:
+                return str(df['板块名称'].iloc[0])
+        return None
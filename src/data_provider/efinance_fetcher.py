@@ -36,6 +36,7 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from metrics import RATE_LIMIT_SLEEP
 
 
 @dataclass
@@ -175,6 +176,7 @@ class EfinanceFetcher(BaseFetcher):
         2. 如果间隔不足，补充休眠时间
         3. 然后再执行随机 jitter 休眠
         """
+        slept = 0.0
         if self._last_request_time is not None:
             elapsed = time.time() - self._last_request_time
             min_interval = self.sleep_min
@@ -182,10 +184,12 @@ class EfinanceFetcher(BaseFetcher):
                 additional_sleep = min_interval - elapsed
                 logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
                 time.sleep(additional_sleep)
+                slept += additional_sleep
         
         # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
+        slept += self.random_sleep(self.sleep_min, self.sleep_max)
         self._last_request_time = time.time()
+        RATE_LIMIT_SLEEP.inc(slept, limiter='efinance')
     
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
@@ -539,6 +543,55 @@ class EfinanceFetcher(BaseFetcher):
             logger.error(f"[API错误] 获取 {stock_code} 基本信息失败: {e}")
             return None
     
+    def get_base_infos(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取股票基本信息（一次请求覆盖整个代码列表）
+        
+        数据来源：ef.stock.get_base_info(代码列表)
+        包含：所处行业、总市值、流通市值、ROE、净利率、毛利率等
+        
+        Args:
+            stock_codes: 股票代码列表
+            
+        Returns:
+            {代码: 基本信息字典}，获取失败返回空字典
+        """
+        import efinance as ef
+        
+        codes = list(dict.fromkeys(stock_codes))
+        if not codes:
+            return {}
+        
+        try:
+            # 防封禁策略
+            self._set_random_user_agent()
+            self._enforce_rate_limit()
+            
+            logger.info(f"[API调用] ef.stock.get_base_info(stock_codes=[{len(codes)} 只]) 批量获取基本信息...")
+            import time as _time
+            api_start = _time.time()
+            
+            df = ef.stock.get_base_info(codes)
+            
+            api_elapsed = _time.time() - api_start
+            
+            if isinstance(df, pd.Series):
+                df = df.to_frame().T
+            if df is None or df.empty or '股票代码' not in df.columns:
+                logger.warning(f"[API返回] 未获取到批量基本信息, 耗时 {api_elapsed:.2f}s")
+                return {}
+            
+            infos = {
+                str(row['股票代码']): {k: v for k, v in row.items() if pd.notna(v)}
+                for _, row in df.iterrows()
+            }
+            logger.info(f"[API返回] ef.stock.get_base_info 成功: 返回 {len(infos)} 只股票, 耗时 {api_elapsed:.2f}s")
+            return infos
+            
+        except Exception as e:
+            logger.error(f"[API错误] 批量获取基本信息失败: {e}")
+            return {}
+    
     def get_belong_board(self, stock_code: str) -> Optional[pd.DataFrame]:
         """
         获取股票所属板块
@@ -30,6 +30,7 @@ from tenacity import (
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
 from config import get_config
+from metrics import RATE_LIMIT_SLEEP
 
 logger = logging.getLogger(__name__)
 
@@ -129,6 +130,7 @@ class TushareFetcher(BaseFetcher):
             )
             
             time.sleep(sleep_time)
+            RATE_LIMIT_SLEEP.inc(sleep_time, limiter='tushare')
             
             # 重置计数器
             self._minute_start = time.time()
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索 API Key 调度
+===================================
+
+职责：
+1. 按计费周期（自然月）记录每个 Key 的调用次数，并持久化到磁盘
+2. 优先使用剩余额度最多的 Key，使多个 Key 的额度均匀消耗
+3. 429 / Retry-After 时让 Key 进入冷却；套餐额度用尽时本月停用，余额不足、Key 无效时本次运行停用
+4. 剩余额度低于保留比例时报告「额度紧张」，让上层优先使用其他搜索引擎
+
+免费额度按月重置（Tavily 1000 次、SerpAPI 100 次），旧实现只做轮询，
+月底额度用尽后每次搜索都会先失败一次才切换。
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 连续失败多少次后进入冷却
+MAX_CONSECUTIVE_ERRORS = 3
+# 普通错误的冷却时间（秒）
+ERROR_COOLDOWN = 120.0
+# 429 且没有 Retry-After 时的首次冷却时间（秒），连续限流时翻倍
+RATE_LIMIT_COOLDOWN = 30.0
+MAX_RATE_LIMIT_COOLDOWN = 900.0
+
+# 套餐月度额度用尽（Tavily 432/433，SerpAPI 月度次数用尽同样按 432 上报）：持久化，本月不再使用
+QUOTA_EXHAUSTED_STATUSES = (432, 433)
+# Key 无效、余额不足（按量付费充值后即恢复）、无权限：只在本次运行停用，不落盘
+DISABLED_STATUSES = (401, 402, 403)
+
+# 两次落盘之间的最短间隔（秒）
+_SAVE_INTERVAL = 5.0
+
+
+def current_period() -> str:
+    """当前计费周期（自然月，如 2026-01）"""
+    return datetime.now().strftime('%Y-%m')
+
+
+def key_id(api_key: str) -> str:
+    """Key 的持久化标识（只保存哈希，不落盘明文 Key）"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+class KeyUsageStore:
+    """
+    Key 用量持久化（线程安全，多个搜索引擎共享一个文件）
+
+    文件结构：{provider: {period: {key_id: {'used': int, 'exhausted': bool}}}}
+    只保留当前计费周期的数据。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 持久化文件路径（None 表示只在内存中记录）
+        """
+        self.path = path
+        self._data: Dict[str, Dict[str, Dict[str, Dict]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except Exception as e:
+            logger.warning(f"[Key调度] 读取 {self.path} 失败，用量从零开始: {e}")
+            self._data = {}
+
+    def get(self, provider: str, api_key: str) -> Dict:
+        """获取当前周期的用量记录（不存在时返回零值）"""
+        with self._lock:
+            entry = self._data.get(provider, {}).get(current_period(), {}).get(key_id(api_key))
+            return dict(entry) if entry else {'used': 0, 'exhausted': False}
+
+    def update(self, provider: str, api_key: str, used_delta: int = 0, exhausted: Optional[bool] = None) -> Dict:
+        """
+        更新当前周期的用量
+
+        Returns:
+            更新后的记录
+        """
+        period = current_period()
+        with self._lock:
+            periods = self._data.setdefault(provider, {})
+            # 进入新周期时丢弃旧数据
+            for old in [p for p in periods if p != period]:
+                del periods[old]
+            entry = periods.setdefault(period, {}).setdefault(key_id(api_key), {'used': 0, 'exhausted': False})
+            entry['used'] += used_delta
+            if exhausted is not None:
+                entry['exhausted'] = exhausted
+            self._dirty = True
+            result = dict(entry)
+            should_save = self.path and time.time() - self._last_save >= _SAVE_INTERVAL
+
+        if should_save:
+            self.flush()
+        return result
+
+    def flush(self) -> None:
+        """写入磁盘（原子替换）"""
+        with self._lock:
+            path = self.path
+            if not path or not self._dirty:
+                return
+            snapshot = json.dumps(self._data, ensure_ascii=False, indent=2)
+            self._dirty = False
+            self._last_save = time.time()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"[Key调度] 写入 {path} 失败: {e}")
+
+    def close(self) -> None:
+        """
+        写入磁盘并取消退出时的写入（搜索服务重建时调用）
+
+        之后只在内存中记录，避免旧实例在进程退出时用旧用量覆盖新实例写入的文件。
+        """
+        if not self.path:
+            return
+        atexit.unregister(self.flush)
+        self.flush()
+        with self._lock:
+            self.path = None
+
+
+@dataclass
+class _KeyState:
+    """单个 Key 的运行时状态（冷却、连续错误）"""
+    cooldown_until: float = 0.0
+    consecutive_errors: int = 0
+    rate_limit_hits: int = 0
+    disabled: bool = False  # Key 无效/余额不足/无权限，本次运行不再使用
+
+
+class KeyScheduler:
+    """
+    单个搜索引擎的 API Key 调度器（线程安全）
+
+    acquire() 在「未冷却、未停用、仍有额度」的 Key 中选择剩余额度最多的一个并
+    预占一次额度；没有可用 Key 时返回 None，由上层切换搜索引擎。
+
+    has_capacity() 默认不计入保留额度：上层据此把额度紧张的搜索引擎排到后面，
+    其他引擎都不可用时才动用保留额度。
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        api_keys: List[str],
+        monthly_quota: int = 0,
+        reserve_ratio: float = 0.05,
+        store: Optional[KeyUsageStore] = None
+    ):
+        """
+        Args:
+            provider: 搜索引擎名称
+            api_keys: API Key 列表
+            monthly_quota: 每个 Key 每月的调用额度（0 表示不限，如按量付费）
+            reserve_ratio: 保留的额度比例（额度紧张时排到其他搜索引擎之后）
+            store: 用量持久化（默认仅内存）
+        """
+        self.provider = provider
+        self.api_keys = list(api_keys)
+        self.monthly_quota = max(0, monthly_quota)
+        self.reserve = int(self.monthly_quota * max(0.0, reserve_ratio))
+        self.store = store or KeyUsageStore()
+        self._states: Dict[str, _KeyState] = {key: _KeyState() for key in self.api_keys}
+        self._lock = threading.Lock()
+
+    def _remaining(self, api_key: str) -> Optional[int]:
+        """剩余额度（不限额度时返回 None）"""
+        if not self.monthly_quota:
+            return None
+        return self.monthly_quota - self.store.get(self.provider, api_key)['used']
+
+    def _usable(self, api_key: str, now: float, use_reserve: bool = True) -> bool:
+        state = self._states[api_key]
+        if state.disabled or state.cooldown_until > now:
+            return False
+        if self.store.get(self.provider, api_key)['exhausted']:
+            return False
+        remaining = self._remaining(api_key)
+        if remaining is None:
+            return True
+        return remaining > (0 if use_reserve else self.reserve)
+
+    def acquire(self) -> Optional[str]:
+        """
+        选择一个 Key 并预占一次额度
+
+        Returns:
+            API Key，没有可用 Key 时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [key for key in self.api_keys if self._usable(key, now)]
+            if not candidates:
+                return None
+            if self.monthly_quota:
+                # 剩余额度最多的优先，额度均匀消耗
+                key = max(candidates, key=lambda k: self._remaining(k))
+            else:
+                # 不限额度：用量最少的优先
+                key = min(candidates, key=lambda k: self.store.get(self.provider, k)['used'])
+            self.store.update(self.provider, key, used_delta=1)
+            return key
+
+    def has_capacity(self, use_reserve: bool = False) -> bool:
+        """
+        当前是否有可分配的 Key
+
+        Args:
+            use_reserve: 是否计入保留额度
+        """
+        now = time.time()
+        with self._lock:
+            return any(self._usable(key, now, use_reserve) for key in self.api_keys)
+
+    def record_success(self, api_key: str) -> None:
+        """记录成功调用（额度已在 acquire 时计入）"""
+        with self._lock:
+            state = self._states.get(api_key)
+            if state:
+                state.consecutive_errors = 0
+                state.rate_limit_hits = 0
+
+    def record_failure(
+        self,
+        api_key: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ) -> None:
+        """
+        记录失败调用
+
+        Args:
+            api_key: API Key
+            status_code: HTTP 状态码（未知时为 None）
+            retry_after: 服务端返回的 Retry-After（秒）
+        """
+        now = time.time()
+        masked = f"{api_key[:8]}..."
+        with self._lock:
+            state = self._states.get(api_key)
+            if state is None:
+                return
+
+            if status_code == 429:
+                state.rate_limit_hits += 1
+                cooldown = retry_after if retry_after else min(
+                    RATE_LIMIT_COOLDOWN * 2 ** (state.rate_limit_hits - 1), MAX_RATE_LIMIT_COOLDOWN
+                )
+                state.cooldown_until = now + cooldown
+                logger.warning(f"[{self.provider}] API Key {masked} 被限流，冷却 {cooldown:.0f}s")
+            elif status_code in QUOTA_EXHAUSTED_STATUSES:
+                self.store.update(self.provider, api_key, exhausted=True)
+                logger.warning(f"[{self.provider}] API Key {masked} 套餐额度已用尽，本月不再使用")
+            elif status_code in DISABLED_STATUSES:
+                state.disabled = True
+                logger.warning(
+                    f"[{self.provider}] API Key {masked} 无效、余额不足或无权限 (HTTP {status_code})，本次运行不再使用"
+                )
+            else:
+                state.consecutive_errors += 1
+                if state.consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                    state.cooldown_until = now + ERROR_COOLDOWN
+                    state.consecutive_errors = 0
+                    logger.warning(
+                        f"[{self.provider}] API Key {masked} 连续失败 {MAX_CONSECUTIVE_ERRORS} 次，"
+                        f"冷却 {ERROR_COOLDOWN:.0f}s"
+                    )
+
+    def get_usage(self) -> List[Dict]:
+        """
+        各 Key 的用量概览（Key 已脱敏）
+
+        Returns:
+            [{'key', 'key_id', 'used', 'quota', 'exhausted', 'cooling'}]
+            key 为前缀脱敏（用于日志），key_id 为哈希（用于公开的指标标签）
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'key': f"{key[:8]}...",
+                    'key_id': key_id(key),
+                    'used': self.store.get(self.provider, key)['used'],
+                    'quota': self.monthly_quota,
+                    'exhausted': self.store.get(self.provider, key)['exhausted'],
+                    'cooling': self._states[key].cooldown_until > now,
+                }
+                for key in self.api_keys
+            ]
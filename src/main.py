@@ -6,7 +6,7 @@ A股自选股智能分析系统 - 主调度程序
 
 职责：
 1. 协调各模块完成股票分析流程
-2. 实现低并发的线程池调度
+2. 分阶段流水线调度（数据获取低并发防封禁，搜索/CPU/LLM 阶段独立限流）
 3. 全局异常处理，确保单股失败不影响整体
 4. 提供命令行入口
 
@@ -20,7 +20,13 @@ A股自选股智能分析系统 - 主调度程序
 - 趋势交易：只做 MA5>MA10>MA20 多头排列
 - 效率优先：关注筹码集中度好的股票
 - 买点偏好：缩量回踩 MA5/MA10 支撑
+
+启动速度：模块顶层只导入轻量模块；pandas/SQLAlchemy、各数据源与 LLM SDK、
+大盘复盘、飞书文档等在实际用到时才导入（--webui-only 等模式不再为它们付出导入开销），
+可用 scripts/bench_import_time.py 测量和检查。
 """
+from __future__ import annotations
+
 import os
 
 # 代理配置 - 仅在本地环境使用，GitHub Actions 不需要
@@ -34,23 +40,35 @@ import argparse
 import logging
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import uuid
+from dataclasses import asdict, dataclass
 from datetime import datetime, date, timezone, timedelta
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from feishu_doc import FeishuDocManager
+from typing import Callable, List, Dict, Any, Iterable, Optional, Tuple, TYPE_CHECKING
 
 from config import get_config, Config
-from storage import get_db, DatabaseManager
-from data_provider import DataFetcherManager
-from data_provider.akshare_fetcher import AkshareFetcher, RealtimeQuote, ChipDistribution
-from analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
-from notification import NotificationService, NotificationChannel, send_daily_report
-from search_service import SearchService, SearchResponse
+from analyzer import AnalysisResult, STOCK_NAME_MAP
+from news_pool import NewsPool
+from market_snapshot import MarketSnapshot
 from enums import ReportType
-from stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
-from market_analyzer import MarketAnalyzer
+from stage_pipeline import Stage, StageJob, StagedPipeline
+from components import get_components
+from metrics import FETCH_ERRORS, FETCH_SECONDS
+from cpu_pool import analyze_trend, compact_result, render_dashboard, render_stock_reports, run_cpu_task
+from tracing import get_tracer, trace_span
+
+if TYPE_CHECKING:
+    # 仅用于类型标注，运行时由组件注册表或函数内按需导入
+    from data_provider import DataFetcherManager
+    from data_provider.akshare_fetcher import AkshareFetcher, RealtimeQuote, ChipDistribution
+    from analyzer import GeminiAnalyzer
+    from model_router import ModelRouter
+    from notification import NotificationService
+    from search_service import SearchService
+    from stock_analyzer import TrendAnalysisResult
 
 # 配置日志格式
 LOG_FORMAT = '%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s'
@@ -122,6 +140,92 @@ def setup_logging(debug: bool = False, log_dir: str = "./logs") -> None:
 logger = logging.getLogger(__name__)
 
 
+# enrich 阶段并发获取的增强数据：StockJob 字段名 -> (AkshareFetcher 方法名, 日志名称)
+ENRICH_SOURCES: Dict[str, Tuple[str, str]] = {
+    'realtime_quote': ('get_realtime_quote', '实时行情'),
+    'chip_data': ('get_chip_distribution', '筹码分布'),
+    'company_info': ('get_company_info', '公司基本信息'),
+    'financial_data': ('get_financial_analysis', '财务摘要'),
+    'capital_flow': ('get_capital_flow', '资金流向'),
+}
+
+
+# 断点阶段（按先后顺序）：日线已保存 → 上下文已生成 → LLM 已返回 → 报告已生成 → 已推送
+CHECKPOINTS = ('fetched', 'context', 'analyzed', 'reported', 'notified')
+
+# 流水线阶段与断点的对应关系：(已达到该断点时跳过本阶段, 本阶段完成后记录的断点)
+# enrich / trend / search 只为 LLM 服务，分析结果已保存时一并跳过
+STAGE_CHECKPOINTS: Dict[str, Tuple[str, Optional[str]]] = {
+    'fetch': ('fetched', 'fetched'),
+    'enrich': ('analyzed', None),
+    'trend': ('analyzed', 'context'),
+    'search': ('analyzed', None),
+    'llm': ('analyzed', 'analyzed'),
+    'report': ('reported', 'reported'),
+    'notify': ('notified', 'notified'),
+}
+
+
+def _checkpoint_level(stage: Optional[str]) -> int:
+    """断点阶段的先后序号（未开始为 0）"""
+    return CHECKPOINTS.index(stage) + 1 if stage in CHECKPOINTS else 0
+
+
+def _parse_deadline(value: str, start: float) -> Optional[float]:
+    """
+    解析个股分析截止时间（RUN_DEADLINE）
+    
+    Args:
+        value: HH:MM（当天时刻）或开始后的分钟数
+        start: 开始时间戳
+        
+    Returns:
+        截止时间戳，未配置或格式错误返回 None；HH:MM 不晚于开始时间时视为已到期
+        （不顺延到次日，避免定时任务晚启动时截止时间被悄悄推迟一整天）
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        if ':' in value:
+            hour, minute = (int(part) for part in value.split(':', 1))
+            started = datetime.fromtimestamp(start)
+            deadline = started.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if deadline <= started:
+                logger.warning(
+                    f"[调度] RUN_DEADLINE {value} 不晚于开始时间 {started.strftime('%H:%M')}，"
+                    f"视为已到期：全部股票延后处理（可用 --resume 继续）"
+                )
+            return deadline.timestamp()
+        return start + float(value) * 60
+    except ValueError:
+        logger.warning(f"[调度] RUN_DEADLINE 格式错误（应为 HH:MM 或分钟数）: {value}")
+        return None
+
+
+@dataclass
+class StockJob(StageJob):
+    """单只股票在流水线各阶段之间传递的数据"""
+    code: str = ''
+    report_type: ReportType = ReportType.SIMPLE
+    skip_analysis: bool = False
+    stock_name: str = ''
+    realtime_quote: Optional[RealtimeQuote] = None
+    chip_data: Optional[ChipDistribution] = None
+    company_info: Optional[Dict[str, Any]] = None
+    financial_data: Optional[Dict[str, Any]] = None
+    capital_flow: Optional[Dict[str, Any]] = None
+    context: Optional[Dict[str, Any]] = None
+    trend_result: Optional[TrendAnalysisResult] = None
+    news_context: Optional[str] = None
+    news_items: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    result: Optional[AnalysisResult] = None
+    report_content: str = ''
+    run_id: Optional[str] = None  # 所属运行（记录断点；None 表示不记录，如 WebUI 单股分析）
+    checkpoint: int = 0  # 已完成的断点序号（见 CHECKPOINTS）
+    rate_limited: bool = False  # llm 阶段已由流水线限速器（LLM_RPM）限速，分析器不再额外延时
+
+
 class StockAnalysisPipeline:
     """
     股票分析主流程调度器
@@ -129,7 +233,7 @@ class StockAnalysisPipeline:
     职责：
     1. 管理整个分析流程
     2. 协调数据获取、存储、搜索、分析、通知等模块
-    3. 实现并发控制和异常处理
+    3. 实现并发控制和异常处理（分阶段流水线，各阶段独立限流）
     """
     
     def __init__(
@@ -147,27 +251,47 @@ class StockAnalysisPipeline:
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
         
-        # 初始化各模块
+        # 初始化各模块（服务组件由注册表在首次使用时创建，多次运行、多个 Web 请求共享）
+        from storage import get_db
         self.db = get_db()
-        self.fetcher_manager = DataFetcherManager()
-        self.akshare_fetcher = AkshareFetcher()  # 用于获取增强数据（量比、筹码等）
-        self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
-        self.analyzer = GeminiAnalyzer()
-        self.notifier = NotificationService()
-        
-        # 初始化搜索服务
-        self.search_service = SearchService(
-            bocha_keys=self.config.bocha_api_keys,
-            tavily_keys=self.config.tavily_api_keys,
-            serpapi_keys=self.config.serpapi_keys,
-        )
+        self.components = get_components()
+        # 增强数据每个来源的并发上限（所有股票共享，防封禁）
+        self._enrich_limits = {
+            field_name: threading.BoundedSemaphore(max(1, self.config.enrich_source_concurrency))
+            for field_name in ENRICH_SOURCES
+        }
+        
+        # 本次运行共享的新闻池（行业级查询每个行业只搜索一次），run() 开始时重建
+        self.news_pool = NewsPool()
+        # 本次运行的只读数据快照（实时行情、基本信息），run() 的预取阶段生成
+        self.snapshot = MarketSnapshot()
         
         logger.info(f"调度器初始化完成，最大并发数: {self.max_workers}")
-        logger.info("已启用趋势分析器 (MA5>MA10>MA20 多头判断)")
-        if self.search_service.is_available:
-            logger.info("搜索服务已启用 (Tavily/SerpAPI)")
-        else:
-            logger.warning("搜索服务未启用（未配置 API Key）")
+    
+    @property
+    def fetcher_manager(self) -> DataFetcherManager:
+        return self.components.get('fetcher_manager', self.config)
+    
+    @property
+    def akshare_fetcher(self) -> AkshareFetcher:
+        """用于获取增强数据（量比、筹码等）"""
+        return self.components.get('akshare_fetcher', self.config)
+    
+    @property
+    def analyzer(self) -> GeminiAnalyzer:
+        return self.components.get('analyzer', self.config)
+    
+    @property
+    def model_router(self) -> ModelRouter:
+        return self.components.get('model_router', self.config)
+    
+    @property
+    def notifier(self) -> NotificationService:
+        return self.components.get('notifier', self.config)
+    
+    @property
+    def search_service(self) -> SearchService:
+        return self.components.get('search_service', self.config)
     
     def fetch_and_save_stock_data(
         self, 
@@ -219,13 +343,11 @@ class StockAnalysisPipeline:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
-        流程：
-        1. 获取实时行情（量比、换手率）
-        2. 获取筹码分布
-        3. 进行趋势分析（基于交易理念）
-        4. 多维度情报搜索（最新消息+风险排查+业绩预期）
-        5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        流程（即流水线中 fetch 之后、report 之前的阶段）：
+        1. 并发获取实时行情（量比、换手率）、筹码分布、F10 资料（耗时取最慢的来源）
+        2. 从数据库获取分析上下文并进行趋势分析（基于交易理念）
+        3. 多维度情报搜索（最新消息+风险排查+业绩预期）
+        4. 调用 AI 进行综合分析
         
         Args:
             code: 股票代码
@@ -233,118 +355,328 @@ class StockAnalysisPipeline:
         Returns:
             AnalysisResult 或 None（如果分析失败）
         """
-        try:
-            # 获取股票名称（优先从实时行情获取真实名称）
-            stock_name = STOCK_NAME_MAP.get(code, '')
-            
-            # Step 1: 获取实时行情（量比、换手率等）
-            realtime_quote: Optional[RealtimeQuote] = None
-            try:
-                realtime_quote = self.akshare_fetcher.get_realtime_quote(code)
-                if realtime_quote:
-                    # 使用实时行情返回的真实股票名称
-                    if realtime_quote.name:
-                        stock_name = realtime_quote.name
-                    logger.info(f"[{code}] {stock_name} 实时行情: 价格={realtime_quote.price}, "
-                              f"量比={realtime_quote.volume_ratio}, 换手率={realtime_quote.turnover_rate}%")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取实时行情失败: {e}")
-            
-            # 如果还是没有名称，使用代码作为名称
-            if not stock_name:
-                stock_name = f'股票{code}'
+        job = StockJob(key=code, code=code, report_type=report_type)
+        stages = [s for s in self._build_stages() if s.name in ('enrich', 'trend', 'search', 'llm')]
+        StagedPipeline.run_inline(stages, job)
+        return job.result
+    
+    def _build_stages(
+        self,
+        skip_analysis: bool = False,
+        single_stock_notify: bool = False
+    ) -> List[Stage]:
+        """
+        构建单只股票的处理阶段（DAG）
+        
+            fetch ──► trend ──┐
+            enrich ───────────┴─► search ─► llm ─► report ─► notify
+        
+        search 等待 trend 完成：没有技术面数据的股票不会进入搜索、浪费搜索额度。
+        
+        - fetch / enrich：数据源网络请求，并发受 max_workers 约束（防封禁）；
+          enrich 内各来源再并发获取，每个来源的并发受 ENRICH_SOURCE_CONCURRENCY 约束
+        - search：搜索 API，并发受额度约束
+        - trend / report：指标计算与报告渲染（CPU）
+        - llm：并发与每分钟调用次数（LLM_RPM）受限
+        
+        Args:
+            skip_analysis: 仅获取数据（dry-run 模式只保留 fetch 阶段）
+            single_stock_notify: 是否追加单股推送阶段
+        """
+        config = self.config
+        # 启用 CPU 进程池时，CPU 阶段的线程只负责提交和等待，线程数不少于进程数
+        cpu_workers = max(config.pipeline_cpu_workers, config.pipeline_cpu_processes)
+        stages = [Stage('fetch', self._stage_fetch, self.max_workers)]
+        if skip_analysis:
+            return stages
+        
+        stages += [
+            Stage('enrich', self._stage_enrich, self.max_workers),
+            Stage('trend', self._stage_trend, cpu_workers, depends_on=('fetch',)),
+            Stage(
+                'search', self._stage_search, config.pipeline_search_workers, depends_on=('enrich', 'trend')
+            ),
+            Stage(
+                'llm', self._stage_llm, config.pipeline_llm_workers,
+                depends_on=('trend', 'search'), rate_per_minute=config.llm_rpm
+            ),
+            # 报告、推送为收尾阶段：截止时间到期前已拿到分析结果的股票照常完成
+            Stage('report', self._stage_report, cpu_workers, depends_on=('llm',), deferrable=False),
+        ]
+        if single_stock_notify:
+            stages.append(Stage('notify', self._stage_notify, 1, depends_on=('report',), deferrable=False))
+        for stage in stages:
+            stage.func = self._with_checkpoint(stage.name, stage.func)
+        return stages
+    
+    def _with_checkpoint(self, stage_name: str, func: Callable[[StockJob], bool]) -> Callable[[StockJob], bool]:
+        """
+        包装阶段函数：记录阶段耗时（耗时追踪），已达到对应断点时跳过，完成后记录断点及产物
+        
+        断点写入失败只记录警告，不影响本次分析。
+        """
+        skip_at, record = STAGE_CHECKPOINTS.get(stage_name, (None, None))
+        
+        def run_stage(job: StockJob) -> bool:
+            if job.run_id is not None and skip_at and job.checkpoint >= _checkpoint_level(skip_at):
+                logger.debug(f"[{job.code}] 断点续跑：跳过已完成的阶段 {stage_name}")
+                return True
+            with trace_span(stage_name, key=job.code) as span:
+                ok = func(job)
+                if ok is False:
+                    span.set(stopped=True)
+            if job.run_id is None:
+                return ok
+            if ok is not False and record and job.checkpoint < _checkpoint_level(record):
+                try:
+                    self.db.save_checkpoint(
+                        job.run_id, job.code, record,
+                        result=asdict(job.result) if record == 'analyzed' and job.result else None,
+                        report_content=job.report_content if record == 'reported' else None,
+                    )
+                    job.checkpoint = _checkpoint_level(record)
+                except Exception as e:
+                    logger.warning(f"[{job.code}] 记录断点 {record} 失败: {e}")
+            return ok
+        
+        return run_stage
+    
+    def prefetch(self, stock_codes: List[str]) -> MarketSnapshot:
+        """
+        预取阶段：为整个股票列表一次性加载全市场数据
+        
+        - 实时行情：A股/ETF/港股接口返回全市场快照，每类市场只请求一次
+        - 基本信息（所处行业、市值、ROE 等）：一次批量查询覆盖全部代码
+        
+        两类请求并发执行；失败的部分留空，流水线中按单只股票补充获取。
+        
+        Args:
+            stock_codes: 股票代码列表
             
-            # Step 2: 获取筹码分布
-            chip_data: Optional[ChipDistribution] = None
-            try:
-                chip_data = self.akshare_fetcher.get_chip_distribution(code)
-                if chip_data:
-                    logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
-                              f"90%集中度={chip_data.concentration_90:.2%}")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取筹码分布失败: {e}")
+        Returns:
+            只读快照（各工作线程共享）
+        """
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch") as executor:
+            quotes_future = executor.submit(self.akshare_fetcher.get_realtime_quotes, stock_codes)
+            infos_future = executor.submit(self.fetcher_manager.get_base_infos, stock_codes)
+        
+        quotes, base_infos = {}, {}
+        try:
+            quotes = quotes_future.result()
+        except Exception as e:
+            logger.warning(f"[预取] 实时行情预取失败: {e}")
+        try:
+            base_infos = infos_future.result()
+        except Exception as e:
+            logger.warning(f"[预取] 基本信息预取失败: {e}")
+        
+        snapshot = MarketSnapshot.build(quotes, base_infos)
+        stats = snapshot.stats(stock_codes)
+        logger.info(
+            f"[预取] {stats['codes']} 只股票: 实时行情 {stats['quotes']} 只, "
+            f"基本信息 {stats['base_infos']} 只, 耗时 {time.time() - start:.2f}s"
+        )
+        return snapshot
+    
+    def _stage_fetch(self, job: StockJob) -> bool:
+        """阶段 fetch：获取并保存日线数据（失败时仍尝试用已有数据分析）"""
+        success, error = self.fetch_and_save_stock_data(job.code)
+        if not success:
+            logger.warning(f"[{job.code}] 数据获取失败: {error}")
+        if job.skip_analysis:
+            logger.info(f"[{job.code}] 跳过 AI 分析（dry-run 模式）")
+            return False
+        return True
+    
+    def _stage_enrich(self, job: StockJob) -> bool:
+        """
+        阶段 enrich：实时行情（量比、换手率、名称）、筹码分布、F10 资料
+        
+        各来源互不依赖，同时发起请求（每个来源的并发数受 ENRICH_SOURCE_CONCURRENCY 限制，
+        跨股票共享）；整体受 ENRICH_DEADLINE 约束，超时未返回的来源按缺失处理。
+        阶段耗时取决于最慢的来源，而不是各来源的休眠与请求时间之和。
+        """
+        code = job.code
+        # 获取股票名称（优先从实时行情获取真实名称）
+        job.stock_name = STOCK_NAME_MAP.get(code, '')
+        
+        # 预取快照中已有的数据直接使用，不再请求上游接口
+        prefetched: Dict[str, Any] = {
+            'realtime_quote': self.snapshot.quote(code),
+            'company_info': self.snapshot.company_info(code),
+        }
+        prefetched = {k: v for k, v in prefetched.items() if v}
+        
+        # 所属行业同时用于行业级情报查询
+        logger.info(f"[{code}] 并发获取实时行情、筹码分布、深度F10资料...")
+        data = self._fetch_enrich_data(code, skip=prefetched.keys())
+        data.update(prefetched)
+        
+        job.realtime_quote = data.get('realtime_quote')
+        if job.realtime_quote:
+            # 使用实时行情返回的真实股票名称
+            if job.realtime_quote.name:
+                job.stock_name = job.realtime_quote.name
+            logger.info(f"[{code}] {job.stock_name} 实时行情: 价格={job.realtime_quote.price}, "
+                      f"量比={job.realtime_quote.volume_ratio}, 换手率={job.realtime_quote.turnover_rate}%")
+        
+        # 如果还是没有名称，使用代码作为名称
+        if not job.stock_name:
+            job.stock_name = f'股票{code}'
+        
+        job.chip_data = data.get('chip_data')
+        if job.chip_data:
+            logger.info(f"[{code}] 筹码分布: 获利比例={job.chip_data.profit_ratio:.1%}, "
+                      f"90%集中度={job.chip_data.concentration_90:.2%}")
+        
+        job.company_info = data.get('company_info') or {}
+        job.financial_data = data.get('financial_data') or {}
+        job.capital_flow = data.get('capital_flow') or {}
+        return True
+    
+    def _fetch_enrich_data(self, code: str, skip: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        并发获取单只股票的增强数据
+        
+        Args:
+            code: 股票代码
+            skip: 不需要获取的来源（StockJob 字段名，如已在预取快照中）
             
-            # Step 3: 趋势分析（基于交易理念）
-            trend_result: Optional[TrendAnalysisResult] = None
+        Returns:
+            {StockJob 字段名: 数据}，失败或超时的来源不出现在结果中
+        """
+        def fetch(field_name: str, method_name: str) -> Any:
+            source = f"enrich.{field_name}"
+            with self._enrich_limits[field_name]:
+                try:
+                    with FETCH_SECONDS.time(source=source):
+                        return getattr(self.akshare_fetcher, method_name)(code)
+                except Exception:
+                    FETCH_ERRORS.inc(source=source)
+                    raise
+        
+        sources = {k: v for k, v in ENRICH_SOURCES.items() if k not in set(skip)}
+        deadline = self.config.enrich_deadline
+        start = time.time()
+        executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix=f"enrich-{code}")
+        tracer = get_tracer()
+        futures = {
+            executor.submit(tracer.traced(f"enrich.{field_name}", fetch), field_name, method_name): field_name
+            for field_name, (method_name, _) in sources.items()
+        }
+        done, pending = wait(futures, timeout=deadline if deadline > 0 else None)
+        # 不等待超时的请求：线程在后台自然结束（仍占用来源的并发名额），结果丢弃
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        data: Dict[str, Any] = {}
+        for future in done:
+            field_name = futures[future]
             try:
-                # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
-                        trend_result = self.trend_analyzer.analyze(df, code)
-                        logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
-                                  f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
+                data[field_name] = future.result()
             except Exception as e:
-                logger.warning(f"[{code}] 趋势分析失败: {e}")
-            
-            # Step 4: 多维度情报搜索（仅在完整报告模式下进行）
-            news_context = None
-            
-            # 只有完整报告才进行搜索（耗时操作）
-            do_search = (
-                self.search_service.is_available and 
-                report_type == ReportType.FULL
-            )
-            
-            if do_search:
-                logger.info(f"[{code}] 开始多维度情报搜索 (模式: FULl)...")
-                
-                # 使用多维度搜索（最多6次搜索，覆盖所有维度）
-                intel_results = self.search_service.search_comprehensive_intel(
-                    stock_code=code,
-                    stock_name=stock_name,
-                    max_searches=6
-                )
-                
-                # 格式化情报报告
-                if intel_results:
-                    news_context = self.search_service.format_intel_report(intel_results, stock_name)
-                    total_results = sum(
-                        len(r.results) for r in intel_results.values() if r.success
-                    )
-                    logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
-                    logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
-            else:
-                logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
-            
-            # Step 5: 获取分析上下文（技术面数据）
-            context = self.db.get_analysis_context(code)
-            
-            if context is None:
-                logger.warning(f"[{code}] 无法获取分析上下文，跳过分析")
-                return None
-
-            # Step 5.5: 获取深度基本面数据 (F10)
-            logger.info(f"[{code}] 获取深度F10资料...")
-            financial_data = self.akshare_fetcher.get_financial_analysis(code) or {}
-            capital_flow = self.akshare_fetcher.get_capital_flow(code) or {}
-            company_info = self.akshare_fetcher.get_company_info(code) or {}
-            
-            # Step 6: 增强上下文数据
-            enhanced_context = self._enhance_context(
-                context, 
-                realtime_quote, 
-                chip_data, 
-                trend_result,
-                stock_name
-            )
-            # 注入深度数据
-            enhanced_context['financial_abstract'] = financial_data
-            enhanced_context['capital_flow'] = capital_flow
-            enhanced_context['company_info'] = company_info
-            
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
-            
-            return result
-            
+                logger.warning(f"[{code}] 获取{ENRICH_SOURCES[field_name][1]}失败: {e}")
+        if pending:
+            missing = ', '.join(ENRICH_SOURCES[futures[f]][1] for f in pending)
+            logger.warning(f"[{code}] 增强数据超过 {deadline:g}s 未返回，按缺失处理: {missing}")
+        logger.debug(f"[{code}] 增强数据获取耗时 {time.time() - start:.2f}s")
+        return data
+    
+    def _stage_trend(self, job: StockJob) -> bool:
+        """阶段 trend：读取技术面上下文并做趋势分析（基于交易理念）"""
+        code = job.code
+        job.context = self.db.get_analysis_context(code)
+        if job.context is None:
+            logger.warning(f"[{code}] 无法获取分析上下文，跳过分析")
+            return False
+        
+        try:
+            raw_data = job.context.get('raw_data')
+            if isinstance(raw_data, list) and len(raw_data) > 0:
+                # 启用 PIPELINE_CPU_PROCESSES 时在 CPU 进程池中计算
+                job.trend_result = run_cpu_task(analyze_trend, raw_data, code)
+                logger.info(f"[{code}] 趋势分析: {job.trend_result.trend_status.value}, "
+                          f"买入信号={job.trend_result.buy_signal.value}, 评分={job.trend_result.signal_score}")
         except Exception as e:
-            logger.error(f"[{code}] 分析失败: {e}")
-            logger.exception(f"[{code}] 详细错误信息:")
-            return None
+            logger.warning(f"[{code}] 趋势分析失败: {e}")
+        return True
+    
+    def _stage_search(self, job: StockJob) -> bool:
+        """阶段 search：多维度情报搜索（仅在完整报告模式下进行）"""
+        code, stock_name = job.code, job.stock_name
+        
+        # 只有完整报告才进行搜索（耗时操作）；没有搜索引擎时仍可从本地新闻索引离线取材
+        do_search = (
+            (self.search_service.is_available or self.search_service.has_news_index) and 
+            job.report_type == ReportType.FULL
+        )
+        if not do_search:
+            logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
+            return True
+        
+        logger.info(f"[{code}] 开始多维度情报搜索 (模式: FULl)...")
+        
+        # 所属行业用于行业级查询（同一行业的股票共享新闻池中的结果）
+        industry = (
+            (job.company_info or {}).get('所属行业') 
+            or self.snapshot.industry(code) 
+            or self.fetcher_manager.get_industry(code)
+        )
+        
+        # 使用多维度搜索（最多6次搜索，覆盖所有维度）
+        intel_results = self.search_service.search_comprehensive_intel(
+            stock_code=code,
+            stock_name=stock_name,
+            max_searches=6,
+            news_pool=self.news_pool,
+            industry=industry
+        )
+        
+        # 跨引擎、跨维度去重并排序，每个维度保留 top-K 条
+        if intel_results:
+            intel_results = self.search_service.rank_intel_results(intel_results, code, stock_name)
+        
+        # 格式化情报报告
+        if intel_results:
+            job.news_context = self.search_service.format_intel_report(intel_results, stock_name)
+            # 结构化条目交给分析器按 Token 预算取舍
+            job.news_items = self.search_service.collect_intel_items(intel_results)
+            total_results = sum(
+                len(r.results) for r in intel_results.values() if r.success
+            )
+            logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
+            logger.debug(f"[{code}] 情报搜索结果:\n{job.news_context}")
+        return True
+    
+    def _stage_llm(self, job: StockJob) -> bool:
+        """阶段 llm：组装增强上下文并调用 AI 综合分析"""
+        enhanced_context = self._enhance_context(
+            job.context, 
+            job.realtime_quote, 
+            job.chip_data, 
+            job.trend_result,
+            job.stock_name
+        )
+        # 注入深度数据
+        enhanced_context['financial_abstract'] = job.financial_data
+        enhanced_context['capital_flow'] = job.capital_flow
+        enhanced_context['company_info'] = job.company_info
+        if job.news_items:
+            enhanced_context['news_items'] = job.news_items
+        
+        # 调用 AI 分析（传入增强的上下文和新闻）
+        job.result = self.model_router.analyze(
+            enhanced_context, news_context=job.news_context, report_type=job.report_type,
+            skip_request_delay=job.rate_limited
+        )
+        if not job.result:
+            return False
+        
+        logger.info(
+            f"[{job.code}] 分析完成: {job.result.operation_advice}, "
+            f"评分 {job.result.sentiment_score}"
+        )
+        return True
     
     def _enhance_context(
         self,
@@ -440,12 +772,82 @@ class StockAnalysisPipeline:
         else:
             return "巨量"
     
+    def _stage_report(self, job: StockJob) -> bool:
+        """阶段 report：生成并保存报告（完整报告为决策仪表盘 + 极简日报）"""
+        code, result = job.code, job.result
+        try:
+            date_str = datetime.now().strftime('%Y%m%d')
+            report_dir = Path("reports")
+            report_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Markdown 渲染为 CPU 密集操作，启用 PIPELINE_CPU_PROCESSES 时在 CPU 进程池中执行
+            full = job.report_type == ReportType.FULL
+            with trace_span('render'):
+                dashboard_content, simple_content = run_cpu_task(render_stock_reports, compact_result(result), full)
+            
+            if full:
+                # 完整报告：决策仪表盘格式 (作为深度报告)
+                # 保存深度报告 --> detail_xxx.md
+                detail_file = report_dir / f"detail_{code}_{date_str}.md"
+                try:
+                    detail_file.write_text(dashboard_content, encoding='utf-8')
+                    logger.info(f"[{code}] 深度分析报告已保存: {detail_file}")
+                except Exception as e:
+                    logger.warning(f"[{code}] 保存深度报告失败: {e}")
+
+                # 同时保存精简日报 (作为摘要)
+                summary_file = report_dir / f"summary_{code}_{date_str}.md"
+                try:
+                    summary_file.write_text(simple_content, encoding='utf-8')
+                    logger.info(f"[{code}] 极简日报已保存: {summary_file}")
+                except Exception as e:
+                    logger.warning(f"[{code}] 保存极简日报失败: {e}")
+                    
+                # 推送内容默认使用完整版 (仪表盘)
+                job.report_content = dashboard_content
+                logger.info(f"[{code}] 生成完整报告格式成功")
+                
+            else:
+                # 精简报告：仅单股报告 (作为摘要)
+                
+                # 保存精简日报 --> summary_xxx.md
+                summary_file = report_dir / f"summary_{code}_{date_str}.md"
+                try:
+                    summary_file.write_text(simple_content, encoding='utf-8')
+                    logger.info(f"[{code}] 极简日报已保存: {summary_file}")
+                except Exception as e:
+                    logger.warning(f"[{code}] 保存极简日报失败: {e}")
+                    
+                job.report_content = simple_content
+                logger.info(f"[{code}] 生成精简报告格式成功")
+
+        except Exception as e:
+            logger.error(f"[{code}] 生成报告内容失败: {e}")
+            job.report_content = ""
+        return True
+    
+    def _stage_notify(self, job: StockJob) -> bool:
+        """阶段 notify：单股推送模式（#55），每分析完一只股票立即推送"""
+        if not (self.notifier.is_available() and job.report_content):
+            return True
+        try:
+            with trace_span('push'):
+                sent = self.notifier.send(job.report_content)
+            if sent:
+                logger.info(f"[{job.code}] 单股推送成功")
+            else:
+                logger.warning(f"[{job.code}] 单股推送失败")
+        except Exception as e:
+            logger.error(f"[{job.code}] 单股推送异常: {e}")
+        return True
+    
     def process_single_stock(
         self, 
         code: str, 
         skip_analysis: bool = False,
         single_stock_notify: bool = False,
-        report_type: ReportType = ReportType.SIMPLE
+        report_type: ReportType = ReportType.SIMPLE,
+        progress_callback: Optional[Callable[[str, str], None]] = None
     ) -> Optional[AnalysisResult]:
         """
         处理单只股票的完整流程
@@ -456,135 +858,64 @@ class StockAnalysisPipeline:
         3. AI 分析
         4. 单股推送（可选，#55）
         
-        此方法会被线程池调用，需要处理好异常
+        在当前线程按顺序执行各阶段（与批量运行的流水线使用同一组阶段函数），
+        供 Web 端等单只股票场景调用；任一阶段异常只影响该股票。
         
         Args:
             code: 股票代码
             skip_analysis: 是否跳过 AI 分析
             single_stock_notify: 是否启用单股推送模式（每分析完一只立即推送）
             report_type: 报告类型枚举
+            progress_callback: 阶段进度回调 (阶段名称, running/done/stopped/failed)，供 Web 端推送进度
             
         Returns:
             AnalysisResult 或 None
         """
         logger.info(f"========== 开始处理 {code} ==========")
-        
-        try:
-            # Step 1: 获取并保存数据
-            success, error = self.fetch_and_save_stock_data(code)
-            
-            if not success:
-                logger.warning(f"[{code}] 数据获取失败: {error}")
-                # 即使获取失败，也尝试用已有数据分析
-            
-            # Step 2: AI 分析
-            if skip_analysis:
-                logger.info(f"[{code}] 跳过 AI 分析（dry-run 模式）")
-                return None
-            
-            result = self.analyze_stock(code, report_type=report_type)
-            
-            if result:
-                logger.info(
-                    f"[{code}] 分析完成: {result.operation_advice}, "
-                    f"评分 {result.sentiment_score}"
-                )
-                
-                # 生成并保存报告
-                try:
-                    date_str = datetime.now().strftime('%Y%m%d')
-                    report_dir = Path("reports")
-                    report_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    report_content = "" # 用于推送的内容
-
-                    # 根据报告类型选择生成方法
-                    if report_type == ReportType.FULL:
-                        # 完整报告：生成决策仪表盘格式 (作为深度报告)
-                        dashboard_content = self.notifier.generate_dashboard_report([result])
-                        
-                        # 保存深度报告 --> detail_xxx.md
-                        detail_file = report_dir / f"detail_{code}_{date_str}.md"
-                        try:
-                            detail_file.write_text(dashboard_content, encoding='utf-8')
-                            logger.info(f"[{code}] 深度分析报告已保存: {detail_file}")
-                        except Exception as e:
-                            logger.warning(f"[{code}] 保存深度报告失败: {e}")
-
-                        # 同时生成精简日报 (作为摘要)
-                        simple_content = self.notifier.generate_single_stock_report(result)
-                        summary_file = report_dir / f"summary_{code}_{date_str}.md"
-                        try:
-                            summary_file.write_text(simple_content, encoding='utf-8')
-                            logger.info(f"[{code}] 极简日报已保存: {summary_file}")
-                        except Exception as e:
-                            logger.warning(f"[{code}] 保存极简日报失败: {e}")
-                            
-                        # 推送内容默认使用完整版 (仪表盘)
-                        report_content = dashboard_content
-                        logger.info(f"[{code}] 生成完整报告格式成功")
-                        
-                    else:
-                        # 精简报告：仅生成单股报告 (作为摘要)
-                        simple_content = self.notifier.generate_single_stock_report(result)
-                        
-                        # 保存精简日报 --> summary_xxx.md
-                        summary_file = report_dir / f"summary_{code}_{date_str}.md"
-                        try:
-                            summary_file.write_text(simple_content, encoding='utf-8')
-                            logger.info(f"[{code}] 极简日报已保存: {summary_file}")
-                        except Exception as e:
-                            logger.warning(f"[{code}] 保存极简日报失败: {e}")
-                            
-                        report_content = simple_content
-                        logger.info(f"[{code}] 生成精简报告格式成功")
-
-                except Exception as e:
-                    logger.error(f"[{code}] 生成报告内容失败: {e}")
-                    report_content = ""
-
-                # 单股推送模式（#55）：每分析完一只股票立即推送
-                if single_stock_notify and self.notifier.is_available() and report_content:
-                    try:
-                        if self.notifier.send(report_content):
-                            logger.info(f"[{code}] 单股推送成功")
-                        else:
-                            logger.warning(f"[{code}] 单股推送失败")
-                    except Exception as e:
-                        logger.error(f"[{code}] 单股推送异常: {e}")
-            
-            return result
-            
-        except Exception as e:
-            # 捕获所有异常，确保单股失败不影响整体
-            logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
-            return None
+        job = StockJob(key=code, code=code, report_type=report_type, skip_analysis=skip_analysis)
+        StagedPipeline.run_inline(self._build_stages(skip_analysis, single_stock_notify), job, progress_callback)
+        return job.result
     
     def run(
         self, 
         stock_codes: Optional[List[str]] = None,
         dry_run: bool = False,
-        send_notification: bool = True
+        send_notification: bool = True,
+        report_type: ReportType = ReportType.SIMPLE,
+        resume_run_id: Optional[str] = None
     ) -> List[AnalysisResult]:
         """
         运行完整的分析流程
         
         流程：
         1. 获取待分析的股票列表
-        2. 使用线程池并发处理
-        3. 收集分析结果
-        4. 发送通知
+        2. 预取阶段：一次性加载全部股票的实时行情、基本信息，生成只读快照
+        3. 分阶段流水线并发处理（各阶段独立的线程数与队列，读取快照）
+        4. 收集分析结果
+        5. 发送通知
         
         Args:
             stock_codes: 股票代码列表（可选，默认使用配置中的自选股）
             dry_run: 是否仅获取数据不分析
             send_notification: 是否发送推送通知
+            report_type: 报告类型枚举
+            resume_run_id: 续跑的运行 ID（使用该运行的股票列表与报告类型，跳过已完成的阶段）
             
         Returns:
-            分析结果列表
+            分析结果列表（按股票列表顺序）
         """
         start_time = time.time()
         
+        # 断点续跑：沿用原运行的股票列表和报告类型
+        run_info = None
+        if resume_run_id:
+            run_info = self.db.get_run(resume_run_id)
+            if run_info is None:
+                logger.error(f"[断点续跑] 未找到运行 {resume_run_id}")
+                return []
+            stock_codes = run_info['stock_codes']
+            report_type = ReportType.from_str(run_info['report_type'] or '')
+        
         # 使用配置中的股票列表
         if stock_codes is None:
             self.config.refresh_stock_list()
@@ -603,31 +934,58 @@ class StockAnalysisPipeline:
         if single_stock_notify:
             logger.info("已启用单股推送模式：每分析完一只股票立即推送")
         
-        results: List[AnalysisResult] = []
-        
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock, 
-                    code, 
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification
-                ): code
-                for code in stock_codes
-            }
-            
-            # 收集结果
-            for future in as_completed(future_to_code):
-                code = future_to_code[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"[{code}] 任务执行失败: {e}")
+        self.news_pool = NewsPool()
+        if not dry_run:
+            # 分析器、模型路由在多次运行间复用，用量统计从本次运行开始重新计算
+            self.analyzer.reset_usage_stats()
+            self.model_router.reset_stats()
+        tracer = get_tracer()
+        tracer.start_run()
+        # dry-run 只获取日线，不需要预取
+        if dry_run:
+            self.snapshot = MarketSnapshot()
+        else:
+            with tracer.span('prefetch'):
+                self.snapshot = self.prefetch(stock_codes)
+        
+        # 分阶段流水线：数据获取受 max_workers 约束（默认3，避免触发反爬），
+        # 搜索、CPU、LLM 阶段各自按自己的上限并发
+        stages = self._build_stages(
+            skip_analysis=dry_run,
+            single_stock_notify=single_stock_notify and send_notification
+        )
+        pipeline = StagedPipeline(stages, queue_size=self.config.pipeline_queue_size)
+        logger.info("流水线阶段: " + ", ".join(f"{s.name}×{max(1, s.workers)}" for s in stages))
+        
+        jobs = [
+            StockJob(
+                key=code, code=code, report_type=report_type, skip_analysis=dry_run,
+                rate_limited=self.config.llm_rpm > 0
+            )
+            for code in stock_codes
+        ]
+        run_id = None if dry_run else self._start_run(jobs, report_type, resume_run_id)
+        tracer.run_id = run_id
+        restored = {job.code for job in jobs if job.result}
+        self._prioritize(jobs)
+        deadline = _parse_deadline(self.config.run_deadline, start_time)
+        if deadline:
+            logger.info(f"[调度] 截止时间: {datetime.fromtimestamp(deadline).strftime('%m-%d %H:%M')}")
+        pipeline.run(jobs, deadline=deadline)
+        # 快照只在本次运行内有效，之后的单股分析（如 WebUI 触发）重新获取实时数据
+        self.snapshot = MarketSnapshot()
+        for job in jobs:
+            if job.error:
+                logger.error(f"[{job.code}] 任务执行失败: {job.error}")
+        results: List[AnalysisResult] = [job.result for job in jobs if job.result]
+        deferred = [job.code for job in jobs if job.deferred and not job.result]
+        if deferred:
+            resume_hint = f"，可使用 --resume {run_id} 继续" if run_id else ""
+            logger.warning(f"[调度] 已到截止时间，{len(deferred)} 只股票延后: {', '.join(deferred)}{resume_hint}")
+        if run_info and run_info['status'] == 'completed' and all(job.code in restored for job in jobs if job.result):
+            # 原运行已发送过汇总推送，且本次没有新的分析结果
+            logger.info(f"[断点续跑] 运行 {resume_run_id} 已完成且没有新的分析结果，不再重复推送")
+            send_notification = False
         
         # 统计
         elapsed_time = time.time() - start_time
@@ -643,19 +1001,129 @@ class StockAnalysisPipeline:
         
         logger.info(f"===== 分析完成 =====")
         logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+        pipeline.log_summary()
+        
+        if not dry_run:
+            # 本次运行的前缀缓存不再需要，主动释放（Gemini 缓存按存储时长计费）
+            self.analyzer.release_prompt_cache()
+            usage = self.analyzer.get_usage_stats()
+            if usage['calls']:
+                logger.info(
+                    f"[LLM用量] 共 {usage['calls']} 次调用, 输入 {usage['prompt_tokens']} tokens "
+                    f"(缓存命中 {usage['cached_tokens']}, {usage['cache_hit_rate']:.1%}), "
+                    f"输出 {usage['output_tokens']} tokens"
+                )
+            self.model_router.log_summary()
+        
+        self.search_service.flush_cache()
+        self.news_pool.log_summary()
+        self.search_service.log_latency_summary()
         
         # 发送通知（单股推送模式下跳过汇总推送，避免重复）
         if results and send_notification and not dry_run:
-            if single_stock_notify:
-                # 单股推送模式：只保存汇总报告，不再重复推送
-                logger.info("单股推送模式：跳过汇总推送，仅保存报告到本地")
-                self._send_notifications(results, skip_push=True)
-            else:
-                self._send_notifications(results)
+            with tracer.span('push.summary'):
+                if single_stock_notify:
+                    # 单股推送模式：只保存汇总报告，不再重复推送
+                    logger.info("单股推送模式：跳过汇总推送，仅保存报告到本地")
+                    self._send_notifications(results, skip_push=True, deferred=deferred)
+                else:
+                    self._send_notifications(results, deferred=deferred)
+        
+        # 各阶段耗时分布与关键路径（写入运行日志和 JSON 文件）
+        trace_report = tracer.finish_run()
+        tracer.log_summary(trace_report)
+        tracer.write_report(trace_report, self.config.log_dir)
+        
+        if run_id:
+            try:
+                self.db.finish_run(run_id, 'partial' if deferred else 'completed')
+            except Exception as e:
+                logger.warning(f"[断点续跑] 标记运行 {run_id} 完成失败: {e}")
         
         return results
     
-    def _send_notifications(self, results: List[AnalysisResult], skip_push: bool = False) -> None:
+    def _prioritize(self, jobs: List[StockJob]) -> None:
+        """
+        安排分析顺序（设置 job.priority，越小越先处理）
+        
+        持仓股票（HOLDING_STOCKS）最先；其次按上次运行的信号强度（评分偏离 50 越远越强）；
+        最后是没有历史结果的股票。同一档内保持股票列表顺序。
+        """
+        holdings = set(self.config.holding_stocks)
+        try:
+            scores = self.db.get_latest_scores([job.code for job in jobs])
+        except Exception as e:
+            logger.warning(f"[调度] 读取历史评分失败，按股票列表顺序分析: {e}")
+            scores = {}
+        
+        def rank(item: Tuple[int, StockJob]) -> Tuple[int, int, int]:
+            index, job = item
+            if job.code in holdings:
+                return 0, 0, index
+            if job.code in scores:
+                return 1, -abs(scores[job.code] - 50), index
+            return 2, 0, index
+        
+        ordered = [job for _, job in sorted(enumerate(jobs), key=rank)]
+        for priority, job in enumerate(ordered):
+            job.priority = priority
+        if holdings or scores:
+            head = ', '.join(job.code for job in ordered[:10])
+            logger.info(f"[调度] 分析顺序: {head}{' ...' if len(ordered) > 10 else ''}")
+    
+    def _start_run(
+        self,
+        jobs: List[StockJob],
+        report_type: ReportType,
+        resume_run_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        创建运行清单，或为续跑的任务恢复断点（已保存的分析结果、报告内容）
+        
+        Args:
+            jobs: 本次运行的任务
+            report_type: 报告类型
+            resume_run_id: 续跑的运行 ID（可选）
+            
+        Returns:
+            运行 ID；清单无法写入时返回 None（本次运行不记录断点）
+        """
+        try:
+            if resume_run_id is None:
+                run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+                self.db.create_run(run_id, [job.code for job in jobs], report_type.value)
+                logger.info(f"[断点续跑] 运行 ID: {run_id}（中断后可使用 --resume {run_id} 继续）")
+            else:
+                run_id = resume_run_id
+                checkpoints = self.db.get_checkpoints(run_id)
+                for job in jobs:
+                    saved = checkpoints.get(job.code)
+                    if not saved:
+                        continue
+                    job.checkpoint = _checkpoint_level(saved['stage'])
+                    if saved['result']:
+                        job.result = AnalysisResult.from_dict(saved['result'])
+                        job.stock_name = job.result.name
+                    elif job.checkpoint >= _checkpoint_level('analyzed'):
+                        # 结果缺失时从 LLM 阶段重新开始
+                        job.checkpoint = _checkpoint_level('context')
+                    job.report_content = saved['report_content'] or ''
+                done = sum(1 for job in jobs if job.checkpoint >= _checkpoint_level('analyzed'))
+                logger.info(f"[断点续跑] 继续运行 {run_id}: {done}/{len(jobs)} 只股票已有分析结果，跳过已完成的阶段")
+        except Exception as e:
+            logger.warning(f"[断点续跑] 运行清单不可用，本次不记录断点: {e}")
+            return None
+        
+        for job in jobs:
+            job.run_id = run_id
+        return run_id
+    
+    def _send_notifications(
+        self,
+        results: List[AnalysisResult],
+        skip_push: bool = False,
+        deferred: Optional[List[str]] = None
+    ) -> None:
         """
         发送分析结果通知
         
@@ -664,12 +1132,20 @@ class StockAnalysisPipeline:
         Args:
             results: 分析结果列表
             skip_push: 是否跳过推送（仅保存到本地，用于单股推送模式）
+            deferred: 因截止时间延后的股票（报告末尾附注，部分结果推送）
         """
+        # 部分结果：注明延后的股票
+        deferred_note = ""
+        if deferred:
+            deferred_note = (
+                f"\n\n---\n\n> ⏳ 已到截止时间，以下 {len(deferred)} 只股票尚未完成分析，已延后：\n"
+                f"> {', '.join(deferred)}"
+            )
         try:
             logger.info("生成决策仪表盘日报...")
             
             # 生成决策仪表盘格式的详细日报
-            report = self.notifier.generate_dashboard_report(results)
+            report = run_cpu_task(render_dashboard, [compact_result(r) for r in results]) + deferred_note
             
             # 保存到本地
             filepath = self.notifier.save_report_to_file(report)
@@ -680,13 +1156,14 @@ class StockAnalysisPipeline:
                 return
             
             # 推送通知
+            from notification import NotificationChannel
             if self.notifier.is_available():
                 channels = self.notifier.get_available_channels()
 
                 # 企业微信：只发精简版（平台限制）
                 wechat_success = False
                 if NotificationChannel.WECHAT in channels:
-                    dashboard_content = self.notifier.generate_wechat_dashboard(results)
+                    dashboard_content = self.notifier.generate_wechat_dashboard(results) + deferred_note
                     logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
                     logger.debug(f"企业微信推送内容:\n{dashboard_content}")
                     wechat_success = self.notifier.send_to_wechat(dashboard_content)
@@ -734,6 +1211,7 @@ def parse_arguments() -> argparse.Namespace:
   python main.py --single-notify    # 启用单股推送模式（每分析完一只立即推送）
   python main.py --schedule         # 启用定时任务模式
   python main.py --market-review    # 仅运行大盘复盘
+  python main.py --resume 20260101180000-a1b2c3  # 续跑中断的运行（跳过已完成的阶段）
         '''
     )
     
@@ -767,6 +1245,13 @@ def parse_arguments() -> argparse.Namespace:
         help='启用单股推送模式：每分析完一只股票立即推送，而不是汇总推送'
     )
     
+    parser.add_argument(
+        '--resume',
+        type=str,
+        metavar='RUN_ID',
+        help='续跑中断的运行：沿用其股票列表，跳过已完成的阶段（含已保存的 AI 分析结果）'
+    )
+    
     parser.add_argument(
         '--workers',
         type=int,
@@ -807,7 +1292,12 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def run_market_review(notifier: NotificationService, analyzer=None, search_service=None) -> Optional[str]:
+def run_market_review(
+    notifier: NotificationService,
+    analyzer=None,
+    search_service=None,
+    news_pool: Optional[NewsPool] = None
+) -> Optional[str]:
     """
     执行大盘复盘分析
     
@@ -815,6 +1305,7 @@ def run_market_review(notifier: NotificationService, analyzer=None, search_servi
         notifier: 通知服务
         analyzer: AI分析器（可选）
         search_service: 搜索服务（可选）
+        news_pool: 本次运行的共享新闻池（可选）
     
     Returns:
         复盘报告文本
@@ -822,9 +1313,11 @@ def run_market_review(notifier: NotificationService, analyzer=None, search_servi
     logger.info("开始执行大盘复盘分析...")
     
     try:
+        from market_analyzer import MarketAnalyzer
         market_analyzer = MarketAnalyzer(
             search_service=search_service,
-            analyzer=analyzer
+            analyzer=analyzer,
+            news_pool=news_pool
         )
         
         # 执行复盘
@@ -880,11 +1373,16 @@ def run_full_analysis(
             max_workers=args.workers
         )
         
+        # 续跑只作用于本次执行（定时任务的后续执行重新开始）
+        resume_run_id = getattr(args, 'resume', None)
+        args.resume = None
+        
         # 1. 运行个股分析
         results = pipeline.run(
             stock_codes=stock_codes,
             dry_run=args.dry_run,
-            send_notification=not args.no_notify
+            send_notification=not args.no_notify,
+            resume_run_id=resume_run_id
         )
         
         # 2. 运行大盘复盘（如果启用且不是仅个股模式）
@@ -894,7 +1392,8 @@ def run_full_analysis(
             review_result = run_market_review(
                 notifier=pipeline.notifier,
                 analyzer=pipeline.analyzer,
-                search_service=pipeline.search_service
+                search_service=pipeline.search_service,
+                news_pool=pipeline.news_pool
             )
             # 如果有结果，赋值给 market_report 用于后续飞书文档生成
             if review_result:
@@ -914,6 +1413,7 @@ def run_full_analysis(
 
         # === 新增：生成飞书云文档 ===
         try:
+            from feishu_doc import FeishuDocManager
             feishu_doc = FeishuDocManager()
             if feishu_doc.is_configured() and (results or market_report):
                 logger.info("正在创建飞书云文档...")
@@ -1009,22 +1509,19 @@ def main() -> int:
         # 模式1: 仅大盘复盘
         if args.market_review:
             logger.info("模式: 仅大盘复盘")
-            notifier = NotificationService()
+            components = get_components()
+            notifier = components.get('notifier', config)
             
             # 初始化搜索服务和分析器（如果有配置）
             search_service = None
             analyzer = None
             
             if config.bocha_api_keys or config.tavily_api_keys or config.serpapi_keys:
-                search_service = SearchService(
-                    bocha_keys=config.bocha_api_keys,
-                    tavily_keys=config.tavily_api_keys,
-                    serpapi_keys=config.serpapi_keys
-                )
+                search_service = components.get('search_service', config)
             
             # 只要配置了任一 API Key 就初始化分析器
             if config.gemini_api_key or config.openai_api_key:
-                analyzer = GeminiAnalyzer(api_key=config.gemini_api_key)
+                analyzer = components.get('analyzer', config)
             
             run_market_review(notifier, analyzer, search_service)
             return 0
@@ -16,10 +16,10 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
-import akshare as ak
 import pandas as pd
 
 from config import get_config
+from news_pool import NewsPool
 from search_service import SearchService
 
 logger = logging.getLogger(__name__)
@@ -97,17 +97,24 @@ class MarketAnalyzer:
         'sh000300': '沪深300',
     }
     
-    def __init__(self, search_service: Optional[SearchService] = None, analyzer=None):
+    def __init__(
+        self,
+        search_service: Optional[SearchService] = None,
+        analyzer=None,
+        news_pool: Optional[NewsPool] = None
+    ):
         """
         初始化大盘分析器
         
         Args:
             search_service: 搜索服务实例
             analyzer: AI分析器实例（用于调用LLM）
+            news_pool: 本次运行的共享新闻池（可选，市场新闻放入池中供复用）
         """
         self.config = get_config()
         self.search_service = search_service
         self.analyzer = analyzer
+        self.news_pool = news_pool
         
     def get_market_overview(self) -> MarketOverview:
         """
@@ -151,6 +158,7 @@ class MarketAnalyzer:
         indices = []
         
         try:
+            import akshare as ak
             logger.info("[大盘] 获取主要指数实时行情...")
             
             # 使用 akshare 获取指数行情（新浪财经接口，包含深市指数）
@@ -194,6 +202,7 @@ class MarketAnalyzer:
     def _get_market_statistics(self, overview: MarketOverview):
         """获取市场涨跌统计"""
         try:
+            import akshare as ak
             logger.info("[大盘] 获取市场涨跌统计...")
             
             # 获取全部A股实时行情
@@ -228,6 +237,7 @@ class MarketAnalyzer:
     def _get_sector_rankings(self, overview: MarketOverview):
         """获取板块涨跌榜"""
         try:
+            import akshare as ak
             logger.info("[大盘] 获取板块涨跌榜...")
             
             # 获取行业板块行情
@@ -307,12 +317,18 @@ class MarketAnalyzer:
             
             for query in search_queries:
                 # 使用 search_stock_news 方法，传入"大盘"作为股票名
-                response = self.search_service.search_stock_news(
-                    stock_code="market",
-                    stock_name="大盘",
-                    max_results=3,
-                    focus_keywords=query.split()
-                )
+                def fetch(q=query):
+                    return self.search_service.search_stock_news(
+                        stock_code="market",
+                        stock_name="大盘",
+                        max_results=3,
+                        focus_keywords=q.split()
+                    )
+                
+                if self.news_pool is not None:
+                    response = self.news_pool.get_or_fetch('market', query, fetch)
+                else:
+                    response = fetch()
                 if response and response.results:
                     all_news.extend(response.results)
                     logger.info(f"[大盘] 搜索 '{query}' 获取 {len(response.results)} 条结果")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 自选股预取快照
+===================================
+
+职责：
+1. 在逐只分析之前，一次性加载整个自选股列表需要的全市场数据
+   （A股/ETF/港股实时行情快照、所处行业与基本信息）
+2. 把结果封装成只读快照，交给流水线各工作线程共享
+
+实时行情接口本身返回全市场数据，基本信息接口支持一次查询多只股票；
+预取后各工作线程直接读取快照，不再各自请求上游接口。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(data: Dict[str, Any]) -> Mapping[str, Any]:
+    """返回只读视图（内层字典同样只读）"""
+    return MappingProxyType({
+        key: MappingProxyType(dict(value)) if isinstance(value, dict) else value
+        for key, value in data.items()
+    })
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    单次运行的只读数据快照（预取阶段生成，各工作线程共享）
+
+    快照中没有的代码（未预取或获取失败）由调用方自行按单只股票获取。
+    """
+    quotes: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))  # 代码 -> RealtimeQuote
+    base_infos: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    created_at: float = 0.0
+
+    @classmethod
+    def build(cls, quotes: Dict[str, Any], base_infos: Dict[str, Dict[str, Any]]) -> 'MarketSnapshot':
+        """
+        由预取结果创建快照
+
+        Args:
+            quotes: {代码: RealtimeQuote}
+            base_infos: {代码: 基本信息字典}
+        """
+        return cls(quotes=_freeze(quotes), base_infos=_freeze(base_infos), created_at=time.time())
+
+    def quote(self, code: str) -> Optional[Any]:
+        """获取预取的实时行情"""
+        return self.quotes.get(code)
+
+    def industry(self, code: str) -> Optional[str]:
+        """获取预取的所处行业"""
+        info = self.base_infos.get(code)
+        industry = info.get('所处行业') if info else None
+        return str(industry) if industry and industry != '-' else None
+
+    def company_info(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        由预取的基本信息组装 F10 公司信息（字段与 AkshareFetcher.get_company_info 一致）
+
+        Returns:
+            公司信息字典（副本，可自由修改），快照中没有该代码时返回 None
+        """
+        info = self.base_infos.get(code)
+        if not info:
+            return None
+        company = {
+            '所属行业': self.industry(code),
+            '总市值': info.get('总市值'),
+            '流通市值': info.get('流通市值'),
+        }
+        for key in ('ROE', '净利率', '毛利率', '净利润'):
+            if key in info:
+                company[key] = info[key]
+        return company
+
+    def stats(self, codes: Iterable[str]) -> Dict[str, int]:
+        """快照对给定代码列表的覆盖情况"""
+        codes: List[str] = list(dict.fromkeys(codes))
+        return {
+            'codes': len(codes),
+            'quotes': sum(1 for c in codes if c in self.quotes),
+            'base_infos': sum(1 for c in codes if c in self.base_infos),
+        }
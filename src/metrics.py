@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - Prometheus 指标
+===================================
+
+职责：
+1. 提供计数器（Counter）与直方图（Histogram），供数据源、LLM、搜索、数据库等热路径记录
+2. 支持采集回调（collector），在抓取时读取队列深度、Key 用量、缓存命中等当前状态
+3. 按 Prometheus 文本格式（0.0.4）输出，由 Web 服务的 /metrics 接口返回
+
+记录不加锁：每个线程写自己的分片（threading.local 中的字典），抓取时合并所有分片；
+线程结束后其分片在下次抓取时并入累计值并移除，线程池频繁创建线程也不会无限增长。
+"""
+
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 耗时类直方图的默认分桶（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 采集回调返回的指标：(名称, 类型, 说明, [(标签, 值), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """
+    按线程分片的指标
+
+    每个分片为 {标签值元组: [数值, ...]}，只由所属线程修改；
+    采集时在锁内合并，已结束线程的分片并入 _retired 后移除。
+    """
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Tuple[str, ...], List[float]]]] = []
+        self._retired: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _values(self, labels: Dict[str, Any]) -> List[float]:
+        """当前线程分片中该标签组合的数值列表（不存在时创建）"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = self._new_values()
+        return values
+
+    def _new_values(self) -> List[float]:
+        raise NotImplementedError
+
+    @staticmethod
+    def _merge(target: Dict[Tuple[str, ...], List[float]], source: Dict[Tuple[str, ...], List[float]]) -> None:
+        for key, values in source.items():
+            merged = target.get(key)
+            if merged is None:
+                target[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    merged[i] += value
+
+    def collect(self) -> Dict[Tuple[str, ...], List[float]]:
+        """合并所有分片"""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard.copy())
+            self._shards = alive
+            merged = {key: list(values) for key, values in self._retired.items()}
+            for _, shard in alive:
+                self._merge(merged, shard.copy())
+        return merged
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    """单调递增计数器"""
+
+    kind = 'counter'
+
+    def _new_values(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """增加计数（amount 须 >= 0）"""
+        self._values(labels)[0] += amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(values[0])}"
+            for key, values in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """直方图（各分桶计数 + 总和 + 次数）"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_values(self) -> List[float]:
+        # [各分桶计数（最后一个为 +Inf）..., 总和, 次数]
+        return [0.0] * (len(self.buckets) + 3)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """记录一次观测值"""
+        values = self._values(labels)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """记录代码块耗时（秒），异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels: Any) -> Callable[[Callable], Callable]:
+        """装饰器：记录函数每次调用的耗时"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, values in sorted(self.collect().items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(values[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _ShardedMetric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """注册计数器（同名时返回已注册的实例）"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """注册直方图（同名时返回已注册的实例）"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """
+        注册采集回调（每次抓取时调用）
+
+        Args:
+            collector: 返回 [(名称, 类型 gauge/counter, 说明, [(标签, 值), ...]), ...]
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """按 Prometheus 文本格式输出全部指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"[指标] 采集 {getattr(collector, '__name__', collector)} 失败: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+# 全局指标注册表
+REGISTRY = MetricsRegistry()
+
+# === 数据源 ===
+FETCH_SECONDS = REGISTRY.histogram(
+    'dsa_fetch_duration_seconds', '数据源请求耗时（日线按数据源，增强数据为 enrich.<来源>）', ('source',)
+)
+FETCH_ERRORS = REGISTRY.counter('dsa_fetch_errors_total', '数据源请求失败次数', ('source',))
+RATE_LIMIT_SLEEP = REGISTRY.counter(
+    'dsa_rate_limit_sleep_seconds_total', '限速等待的累计秒数（数据源防封禁、流水线阶段限速、LLM 请求间隔）', ('limiter',)
+)
+
+# === LLM ===
+LLM_SECONDS = REGISTRY.histogram('dsa_llm_request_duration_seconds', 'LLM 请求耗时（含重试）', ('model',))
+LLM_ERRORS = REGISTRY.counter('dsa_llm_errors_total', 'LLM 请求失败次数', ('model',))
+LLM_TOKENS = REGISTRY.counter('dsa_llm_tokens_total', 'LLM Token 用量（prompt/cached/output）', ('type',))
+
+# === 搜索 ===
+SEARCH_SECONDS = REGISTRY.histogram('dsa_search_duration_seconds', '搜索引擎请求耗时', ('provider',))
+SEARCH_ERRORS = REGISTRY.counter('dsa_search_errors_total', '搜索引擎请求失败次数', ('provider',))
+
+# === 数据库 ===
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    'dsa_db_write_duration_seconds', '数据库写入耗时', ('operation',),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def render_metrics() -> str:
+    """全局注册表的 Prometheus 文本输出"""
+    return REGISTRY.render()
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 模型路由
+===================================
+
+职责：
+1. 根据已有信号（趋势评分、趋势状态、输入规模、报告类型）为每只股票选择模型档位
+2. 快速档结果置信度低或解析失败时，升级到强模型重新分析
+3. 统计各档位的调用次数、耗时、Token 用量与估算费用
+
+档位：
+- fast:   便宜的快速模型（LLM_FAST_MODEL），处理信号明确、无新闻的简单情况
+- strong: 默认主模型（GEMINI_MODEL / OPENAI_MODEL），处理完整报告与模糊情况
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+from context_builder import estimate_tokens
+from enums import ReportType
+
+logger = logging.getLogger(__name__)
+
+
+TIER_FAST = 'fast'
+TIER_STRONG = 'strong'
+
+# 方向明确的趋势状态（与 stock_analyzer.TrendStatus 的取值一致）
+CLEAR_TREND_STATUSES = ('强势多头', '多头排列', '空头排列', '强势空头')
+
+# 命中缓存的输入 Token 按原价的比例计费（Gemini 显式缓存为 25%）
+CACHED_INPUT_PRICE_RATIO = 0.25
+
+
+@dataclass
+class RouteDecision:
+    """路由决策"""
+    tier: str
+    model_name: Optional[str]  # None 表示使用分析器当前的默认模型
+    reasons: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TierStats:
+    """单个档位的统计"""
+    calls: int = 0
+    failures: int = 0
+    escalations: int = 0  # 由本档位升级出去的次数
+    total_latency: float = 0.0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+
+class ModelRouter:
+    """
+    模型路由器
+
+    位于 GeminiAnalyzer.analyze 之前：先用 route() 选档，快速档结果不可靠时
+    升级到强模型。线程安全，可在线程池中共享。
+    """
+
+    def __init__(self, analyzer: Any):
+        """
+        Args:
+            analyzer: GeminiAnalyzer 实例
+        """
+        config = get_config()
+        self.analyzer = analyzer
+        self.fast_model = config.llm_fast_model or None
+        self.max_fast_tokens = config.llm_router_max_fast_tokens
+        self._prices = {
+            TIER_FAST: (config.llm_fast_input_price, config.llm_fast_output_price),
+            TIER_STRONG: (config.llm_strong_input_price, config.llm_strong_output_price),
+        }
+        self._stats: Dict[str, TierStats] = {TIER_FAST: TierStats(), TIER_STRONG: TierStats()}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了快速模型"""
+        return bool(self.fast_model)
+
+    def route(
+        self,
+        context: Dict[str, Any],
+        news_context: Optional[str] = None,
+        report_type: ReportType = ReportType.SIMPLE
+    ) -> RouteDecision:
+        """
+        选择模型档位
+
+        满足以下全部条件才走快速档：
+        - 精简报告（完整报告需要长篇深度分析）
+        - 输入规模不超过 LLM_ROUTER_MAX_FAST_TOKENS
+        - 没有新闻，或趋势信号明确（评分 ≥70 / ≤35，或趋势状态为明确的多头/空头排列）
+
+        Args:
+            context: 分析上下文（含 trend_analysis）
+            news_context: 新闻上下文
+            report_type: 报告类型
+
+        Returns:
+            RouteDecision
+        """
+        if not self.enabled:
+            return RouteDecision(tier=TIER_STRONG, model_name=None, reasons=['未配置快速模型'])
+
+        reasons = []
+        trend = context.get('trend_analysis') or {}
+        signal_score = trend.get('signal_score')
+        trend_status = trend.get('trend_status', '')
+        has_news = bool(news_context or context.get('news_items'))
+        input_tokens = estimate_tokens(news_context or '') + estimate_tokens(str(context.get('company_info') or ''))
+
+        if report_type == ReportType.FULL:
+            reasons.append('完整报告')
+        if input_tokens > self.max_fast_tokens:
+            reasons.append(f'输入约 {input_tokens} tokens')
+
+        clear_signal = (
+            (signal_score is not None and (signal_score >= 70 or signal_score <= 35))
+            or trend_status in CLEAR_TREND_STATUSES
+        )
+        if has_news and not clear_signal:
+            reasons.append(f'信号模糊 (评分 {signal_score}, {trend_status or "未知"}) 且有新闻')
+
+        if reasons:
+            return RouteDecision(tier=TIER_STRONG, model_name=None, reasons=reasons)
+
+        why = '信号明确' if clear_signal else '无新闻'
+        return RouteDecision(tier=TIER_FAST, model_name=self.fast_model, reasons=[why])
+
+    @staticmethod
+    def escalation_reason(result: Any) -> Optional[str]:
+        """
+        判断快速档结果是否需要升级到强模型
+
+        Returns:
+            升级原因，不需要升级时返回 None
+        """
+        if not result.success:
+            return f'分析失败: {(result.error_message or "")[:50]}'
+        if result.dashboard is None:
+            return '未解析出决策仪表盘'
+        if result.confidence_level == '低':
+            return '置信度低'
+        return None
+
+    def analyze(
+        self,
+        context: Dict[str, Any],
+        news_context: Optional[str] = None,
+        report_type: ReportType = ReportType.SIMPLE,
+        skip_request_delay: bool = False
+    ) -> Any:
+        """
+        按路由结果调用分析器，必要时升级
+
+        Args:
+            context: 分析上下文
+            news_context: 新闻上下文
+            report_type: 报告类型
+            skip_request_delay: 调用方已限速（流水线 llm 阶段），跳过分析器的请求前延时
+
+        Returns:
+            AnalysisResult
+        """
+        code = context.get('code', 'Unknown')
+        decision = self.route(context, news_context, report_type)
+        logger.info(f"[模型路由] {code} -> {decision.tier} ({', '.join(decision.reasons)})")
+
+        result = self._run(decision.tier, decision.model_name, context, news_context, skip_request_delay)
+        if decision.tier != TIER_FAST:
+            return result
+
+        reason = self.escalation_reason(result)
+        if reason is None:
+            return result
+
+        logger.info(f"[模型路由] {code} 快速档结果不可靠（{reason}），升级到强模型")
+        with self._lock:
+            self._stats[TIER_FAST].escalations += 1
+        return self._run(TIER_STRONG, None, context, news_context, skip_request_delay)
+
+    def _run(
+        self,
+        tier: str,
+        model_name: Optional[str],
+        context: Dict[str, Any],
+        news_context: Optional[str],
+        skip_request_delay: bool = False
+    ) -> Any:
+        """执行一次分析并记录档位统计"""
+        start = time.time()
+        result = self.analyzer.analyze(
+            context, news_context=news_context, model_override=model_name,
+            skip_request_delay=skip_request_delay
+        )
+        elapsed = time.time() - start
+
+        usage = result.llm_usage or {}
+        input_price, output_price = self._prices[tier]
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        cached_tokens = usage.get('cached_tokens', 0)
+        cost = (
+            (prompt_tokens - cached_tokens) * input_price
+            + cached_tokens * input_price * CACHED_INPUT_PRICE_RATIO
+            + usage.get('output_tokens', 0) * output_price
+        ) / 1_000_000
+
+        with self._lock:
+            stats = self._stats[tier]
+            stats.calls += 1
+            stats.failures += 0 if result.success else 1
+            stats.total_latency += elapsed
+            stats.prompt_tokens += prompt_tokens
+            stats.cached_tokens += cached_tokens
+            stats.output_tokens += usage.get('output_tokens', 0)
+            stats.cost += cost
+        return result
+
+    def reset_stats(self) -> None:
+        """清零各档位统计（每次运行开始调用）"""
+        with self._lock:
+            self._stats = {TIER_FAST: TierStats(), TIER_STRONG: TierStats()}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各档位统计
+
+        Returns:
+            {档位: {calls, failures, escalations, avg_latency, prompt_tokens, cached_tokens, output_tokens, cost}}
+        """
+        with self._lock:
+            snapshot = {tier: TierStats(**vars(stats)) for tier, stats in self._stats.items()}
+
+        result = {}
+        for tier, stats in snapshot.items():
+            data = dict(vars(stats))
+            data['avg_latency'] = round(stats.total_latency / stats.calls, 2) if stats.calls else 0.0
+            data['cost'] = round(stats.cost, 6)
+            result[tier] = data
+        return result
+
+    def log_summary(self) -> None:
+        """输出各档位的耗时与费用汇总"""
+        stats = self.get_stats()
+        total_calls = sum(s['calls'] for s in stats.values())
+        if not total_calls:
+            return
+
+        for tier, s in stats.items():
+            if not s['calls']:
+                continue
+            logger.info(
+                f"[模型路由] {tier}: {s['calls']} 次 (失败 {s['failures']}, 升级 {s['escalations']}), "
+                f"平均耗时 {s['avg_latency']:.2f}s, 输入 {s['prompt_tokens']} / 输出 {s['output_tokens']} tokens, "
+                f"估算费用 ${s['cost']:.4f}"
+            )
+        # 升级的股票在两个档位各计一次调用，按股票数计算快速档完成占比
+        escalations = stats[TIER_FAST]['escalations']
+        finished_fast = stats[TIER_FAST]['calls'] - escalations
+        logger.info(f"[模型路由] 快速档完成 {finished_fast}/{total_calls - escalations} 只股票")
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 本地新闻全文索引
+===================================
+
+职责：
+1. 持久化所有搜索引擎返回的新闻（标题、摘要、URL、发布日期、提及的股票代码）
+2. SQLite FTS5 全文索引（trigram 分词，中文无需分词），按股票 / 关键词检索
+3. 搜索服务先查本地索引，只有缺少足够新的结果时才调用付费搜索 API
+4. 支撑离线复盘（无可用搜索引擎时从索引取材）和 Web 端的新闻检索
+
+搜索结果原先格式化进提示词后即被丢弃；同一只股票的新闻经常出现在其他
+股票的行业查询、大盘复盘的市场新闻中，入库后这些结果都可以被复用。
+
+使用标准库 sqlite3 而不是 storage.py 的 SQLAlchemy：FTS5 虚拟表和 MATCH
+查询无法用 ORM 表达，且搜索服务不应依赖 pandas/SQLAlchemy。
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from news_ranker import canonicalize_url, parse_published_date, simhash
+
+logger = logging.getLogger(__name__)
+
+
+# A 股代码：6 位数字（不与更长的数字串相连）
+_CODE_RE = re.compile(r'(?<!\d)([036]\d{5}|4\d{5}|8\d{5}|9\d{5})(?!\d)')
+# trigram 分词器只能匹配不少于 3 个字符的词，更短的词用 LIKE 过滤
+_MIN_MATCH_LEN = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_items (
+    id INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL UNIQUE,
+    url TEXT,
+    title TEXT NOT NULL DEFAULT '',
+    snippet TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    published_date TEXT,
+    published_at TEXT,
+    codes TEXT NOT NULL DEFAULT '',
+    provider TEXT,
+    query TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_news_items_fetched_at ON news_items(fetched_at);
+CREATE INDEX IF NOT EXISTS ix_news_items_published_at ON news_items(published_at);
+"""
+
+# 外部内容 FTS 表，由触发器与 news_items 保持同步
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, snippet, codes, content='news_items', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS news_items_ai AFTER INSERT ON news_items BEGIN
+    INSERT INTO news_fts(rowid, title, snippet, codes) VALUES (new.id, new.title, new.snippet, new.codes);
+END;
+CREATE TRIGGER IF NOT EXISTS news_items_ad AFTER DELETE ON news_items BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, snippet, codes)
+    VALUES ('delete', old.id, old.title, old.snippet, old.codes);
+END;
+CREATE TRIGGER IF NOT EXISTS news_items_au AFTER UPDATE ON news_items BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, snippet, codes)
+    VALUES ('delete', old.id, old.title, old.snippet, old.codes);
+    INSERT INTO news_fts(rowid, title, snippet, codes) VALUES (new.id, new.title, new.snippet, new.codes);
+END;
+"""
+
+_COLUMNS = 'n.url, n.title, n.snippet, n.source, n.published_date, n.published_at, n.codes, n.provider, n.fetched_at'
+
+
+def extract_codes(text: str) -> List[str]:
+    """提取文本中出现的 A 股代码（去重，保持出现顺序）"""
+    return list(dict.fromkeys(_CODE_RE.findall(text or '')))
+
+
+def _fts_phrase(term: str) -> str:
+    """转义为 FTS5 短语（双引号包裹，内部引号加倍）"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class NewsIndex:
+    """
+    本地新闻索引（线程安全，单连接 + 锁，WAL 模式）
+
+    同一篇文章（按规范化 URL 判重）只保存一次；再次搜到时刷新抓取时间并
+    合并提及的股票代码。当前 SQLite 不支持 FTS5 时退化为 LIKE 查询。
+    """
+
+    def __init__(self, path: Optional[str] = None, retention_days: int = 90):
+        """
+        Args:
+            path: 数据库文件路径（None 表示仅在内存中索引）
+            retention_days: 保留天数（按抓取时间，<=0 表示不清理）
+        """
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.fts_enabled = False
+        self.added = 0
+
+        with self._lock, self._conn:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"[新闻索引] 当前 SQLite 不支持 FTS5 trigram 分词，改用 LIKE 查询: {e}")
+
+        if retention_days > 0:
+            self.prune(retention_days)
+
+    def add(
+        self,
+        results: Iterable[Any],
+        provider: str = '',
+        query: str = '',
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None
+    ) -> int:
+        """
+        写入一批搜索结果
+
+        提及的股票代码取自标题和摘要中的 6 位代码；标题或摘要提到 stock_name
+        （或 stock_code）时同时记入 stock_code。
+
+        Args:
+            results: SearchResult 列表（需有 title/snippet/url/source/published_date 属性）
+            provider: 搜索引擎名称
+            query: 搜索查询
+            stock_code: 查询针对的股票代码（可选）
+            stock_name: 查询针对的股票名称（可选）
+
+        Returns:
+            新增的条目数
+        """
+        now = time.time()
+        fetched = datetime.fromtimestamp(now)
+        added = 0
+        with self._lock, self._conn:
+            for r in results:
+                title, snippet = r.title or '', r.snippet or ''
+                text = f"{title} {snippet}"
+                codes = extract_codes(text)
+                if stock_code and stock_code not in codes and (
+                    stock_code in text or (stock_name and stock_name in text)
+                ):
+                    codes.insert(0, stock_code)
+
+                url_key = canonicalize_url(r.url) or f"simhash:{simhash(text):016x}"
+                published = parse_published_date(r.published_date, fetched)
+                published_at = published.replace(tzinfo=None).isoformat(timespec='seconds') if published else None
+
+                row = self._conn.execute(
+                    "SELECT id, codes FROM news_items WHERE url_key = ?", (url_key,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO news_items (url_key, url, title, snippet, source, published_date, "
+                        "published_at, codes, provider, query, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url_key, r.url, title, snippet, r.source, r.published_date, published_at,
+                         ' '.join(codes), provider, query, now)
+                    )
+                    added += 1
+                else:
+                    merged = list(dict.fromkeys(row['codes'].split() + codes))
+                    self._conn.execute(
+                        "UPDATE news_items SET codes = ?, fetched_at = ? WHERE id = ?",
+                        (' '.join(merged), now, row['id'])
+                    )
+            self.added += added
+        return added
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        keywords: Optional[List[str]] = None,
+        max_age: Optional[float] = None,
+        published_within_days: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        检索本地新闻
+
+        条件之间为「且」：提到该股票（代码或名称）、命中任一关键词、
+        全文包含 text 的全部词。结果按发布时间（未知时按抓取时间）倒序。
+
+        Args:
+            text: 全文检索词（空格分隔，全部命中）
+            stock_code: 股票代码
+            stock_name: 股票名称
+            keywords: 关键词列表（命中任一即可）
+            max_age: 只返回最近 N 秒内抓取（或再次搜到）的结果
+            published_within_days: 只返回最近 N 天发布的结果（发布日期未知的保留）
+            limit: 最多返回条数
+
+        Returns:
+            [{'url', 'title', 'snippet', 'source', 'published_date', 'published_at',
+              'codes', 'provider', 'fetched_at'}]
+        """
+        match_terms: List[str] = []
+        where: List[str] = []
+        params: List[Any] = []
+
+        # 实体条件：代码列包含该代码，或标题/摘要提到股票名称
+        entity_sql, entity_match = [], []
+        if stock_code:
+            if self.fts_enabled:
+                entity_match.append(f"codes : {_fts_phrase(stock_code)}")
+            else:
+                entity_sql.append("(' ' || n.codes || ' ') LIKE ?")
+                params.append(f"% {stock_code} %")
+        if stock_name:
+            if self.fts_enabled and len(stock_name) >= _MIN_MATCH_LEN:
+                entity_match.append(f"{{title snippet}} : {_fts_phrase(stock_name)}")
+            else:
+                entity_sql.append("(n.title LIKE ? OR n.snippet LIKE ?)")
+                params.extend([f"%{stock_name}%"] * 2)
+        if entity_match and not entity_sql:
+            match_terms.append('(' + ' OR '.join(entity_match) + ')')
+        elif entity_match or entity_sql:
+            # 部分条件无法用 MATCH 表达时整体改用子查询 + LIKE 组合
+            parts = list(entity_sql)
+            if entity_match:
+                parts.insert(0, "n.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?)")
+                params.insert(0, ' OR '.join(entity_match))
+            where.append('(' + ' OR '.join(parts) + ')')
+
+        # 全文检索词：全部命中
+        for term in (text or '').split():
+            if self.fts_enabled and len(term) >= _MIN_MATCH_LEN:
+                match_terms.append(f"{{title snippet}} : {_fts_phrase(term)}")
+            else:
+                where.append("(n.title LIKE ? OR n.snippet LIKE ?)")
+                params.extend([f"%{term}%"] * 2)
+
+        # 关键词：命中任一
+        keywords = [k for k in (keywords or []) if k]
+        if keywords:
+            where.append('(' + ' OR '.join(["n.title LIKE ? OR n.snippet LIKE ?"] * len(keywords)) + ')')
+            for kw in keywords:
+                params.extend([f"%{kw}%"] * 2)
+
+        if max_age is not None:
+            where.append("n.fetched_at >= ?")
+            params.append(time.time() - max_age)
+        if published_within_days is not None:
+            since = datetime.fromtimestamp(time.time() - published_within_days * 86400)
+            where.append("(n.published_at IS NULL OR n.published_at >= ?)")
+            params.append(since.isoformat(timespec='seconds'))
+
+        if match_terms:
+            sql = f"SELECT {_COLUMNS} FROM news_fts JOIN news_items n ON n.id = news_fts.rowid"
+            where.insert(0, "news_fts MATCH ?")
+            params.insert(0, ' AND '.join(match_terms))
+        else:
+            sql = f"SELECT {_COLUMNS} FROM news_items n"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY COALESCE(n.published_at, datetime(n.fetched_at, 'unixepoch', 'localtime')) DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        items = []
+        for row in rows:
+            item = dict(row)
+            item['codes'] = item['codes'].split()
+            items.append(item)
+        return items
+
+    def prune(self, retention_days: int) -> int:
+        """
+        删除超过保留天数的条目
+
+        Returns:
+            删除的条目数
+        """
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM news_items WHERE fetched_at < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info(f"[新闻索引] 清理 {retention_days} 天前的条目 {deleted} 条")
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        """索引统计：条目总数、本次运行新增条数"""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM news_items").fetchone()[0]
+            return {'items': total, 'added': self.added}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+# 全局实例（Web 端等只读场景使用，搜索服务按自身配置创建）
+_news_index: Optional[NewsIndex] = None
+_news_index_lock = threading.Lock()
+
+
+def get_news_index() -> Optional[NewsIndex]:
+    """
+    获取按配置创建的新闻索引单例
+
+    Returns:
+        NewsIndex，未启用本地新闻索引时返回 None
+    """
+    global _news_index
+    from config import get_config
+    config = get_config()
+    if not config.news_index_enabled:
+        return None
+    with _news_index_lock:
+        if _news_index is None:
+            _news_index = NewsIndex(config.news_index_path, config.news_index_retention_days)
+    return _news_index
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 单次运行共享新闻池
+===================================
+
+职责：
+1. 行业级 / 宏观级查询每次运行只搜索一次（同一行业的股票共享结果）
+2. 并发场景下单飞（single-flight）：同一查询正在搜索时，其他线程等待结果而不是重复请求；
+   失败或没有结果的查询在短时间内直接返回同一结果，不会让每个等待者轮流重试
+3. 按实体（行业名、股票名称/代码）和关键词建立索引，个股情报先从池中取材
+
+「政策宏观」「行业分析」维度对同一行业的股票几乎相同，大盘复盘的市场新闻
+也与个股无关；放入池中后，每次运行的搜索次数随行业数而不是股票数增长。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from search_cache import canonicalize_query
+
+logger = logging.getLogger(__name__)
+
+# 失败或没有结果的查询在此时间内不再重复搜索（秒）
+FAILURE_TTL = 60.0
+
+
+class NewsPool:
+    """
+    单次运行内共享的新闻池（线程安全）
+
+    条目为 search_service.SearchResponse；池只保存成功且有结果的响应。
+    失败（含异常）或没有结果的搜索记录 FAILURE_TTL 秒：期间的调用（包括正在等待的线程）
+    直接得到同一结果，过期后再重新尝试。
+    """
+
+    def __init__(self):
+        self._responses: Dict[Tuple[str, str], object] = {}
+        self._inflight: Dict[Tuple[str, str], threading.Event] = {}
+        # 近期失败：键 -> (过期时间, 响应或异常)
+        self._failures: Dict[Tuple[str, str], Tuple[float, object]] = {}
+        self._lock = threading.Lock()
+        # 索引：实体/关键词 -> 结果列表下标
+        self._results: List[object] = []
+        self._index: Dict[str, Set[int]] = {}
+        self._seen_urls: Set[str] = set()
+        self.fetches = 0
+        self.reuses = 0
+        self.failure_reuses = 0
+
+    def get_or_fetch(self, scope: str, dimension: str, fetch: Callable[[], object]) -> object:
+        """
+        获取池中的响应，不存在时调用 fetch 搜索并放入池中
+
+        同一 (scope, dimension) 并发调用时只有一个线程执行 fetch，其他线程等待其结果；
+        fetch 失败、抛出异常或没有结果时，FAILURE_TTL 秒内的调用返回同一响应（或抛出同一异常）。
+
+        Args:
+            scope: 作用域（行业名称或 'market'）
+            dimension: 维度名称（如 policy_macro）
+            fetch: 执行搜索的函数，返回 SearchResponse
+
+        Returns:
+            SearchResponse
+        """
+        key = (scope, dimension)
+        while True:
+            with self._lock:
+                response = self._responses.get(key)
+                if response is not None:
+                    self.reuses += 1
+                    return response
+                failure = self._failures.get(key)
+                if failure is not None and failure[0] > time.monotonic():
+                    self.failure_reuses += 1
+                    break
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    failure = None
+                    break
+            # 其他线程正在搜索同一查询：等待后重新检查（成功或失败都已记录）
+            event.wait()
+
+        if failure is not None:
+            outcome = failure[1]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        try:
+            try:
+                response = fetch()
+            except Exception as e:
+                self._record_failure(key, e)
+                raise
+            finally:
+                with self._lock:
+                    self.fetches += 1
+            if response.success and response.results:
+                self.add(scope, dimension, response)
+            else:
+                self._record_failure(key, response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _record_failure(self, key: Tuple[str, str], outcome: object) -> None:
+        """记录失败的搜索（响应或异常），FAILURE_TTL 秒内复用"""
+        with self._lock:
+            self._failures[key] = (time.monotonic() + FAILURE_TTL, outcome)
+
+    def add(self, scope: str, dimension: str, response: object) -> None:
+        """
+        放入响应并建立索引
+
+        索引词：作用域、查询关键词（规范化后），以及 URL 去重后的每条结果。
+        """
+        terms = {scope.lower()} | set(canonicalize_query(response.query).split())
+        with self._lock:
+            self._responses[(scope, dimension)] = response
+            self._failures.pop((scope, dimension), None)
+            for result in response.results:
+                if result.url and result.url in self._seen_urls:
+                    continue
+                if result.url:
+                    self._seen_urls.add(result.url)
+                idx = len(self._results)
+                self._results.append(result)
+                for term in terms:
+                    self._index.setdefault(term, set()).add(idx)
+
+    def lookup(self, entities: List[str], keywords: Optional[List[str]] = None, limit: int = 5) -> List[object]:
+        """
+        查找池中与实体相关的结果
+
+        结果须在标题或摘要中提到任一实体（股票名称/代码）；给出关键词时，
+        只在这些关键词索引到的结果中查找。
+
+        Args:
+            entities: 实体列表（如 [股票名称, 股票代码]）
+            keywords: 关键词过滤（可选）
+            limit: 最多返回条数
+
+        Returns:
+            SearchResult 列表
+        """
+        entities = [e for e in entities if e]
+        if not entities:
+            return []
+        with self._lock:
+            if keywords:
+                candidates: Set[int] = set()
+                for kw in keywords:
+                    candidates |= self._index.get(kw.lower(), set())
+                pool = [self._results[i] for i in sorted(candidates)]
+            else:
+                pool = list(self._results)
+
+        matched = []
+        for result in pool:
+            text = f"{result.title} {result.snippet}"
+            if any(e in text for e in entities):
+                matched.append(result)
+                if len(matched) >= limit:
+                    break
+        return matched
+
+    def stats(self) -> Dict[str, int]:
+        """池统计：实际搜索次数、复用次数、复用近期失败结果的次数、收录条目数"""
+        with self._lock:
+            return {
+                'fetches': self.fetches,
+                'reuses': self.reuses,
+                'failure_reuses': self.failure_reuses,
+                'responses': len(self._responses),
+                'results': len(self._results),
+            }
+
+    def log_summary(self) -> None:
+        """输出池的复用情况"""
+        stats = self.stats()
+        if stats['fetches'] or stats['reuses'] or stats['failure_reuses']:
+            logger.info(
+                f"[新闻池] 共享查询搜索 {stats['fetches']} 次，复用 {stats['reuses']} 次，"
+                f"跳过近期失败的查询 {stats['failure_reuses']} 次，收录 {stats['results']} 条结果"
+            )
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 情报去重与排序
+===================================
+
+职责：
+1. URL 规范化：去掉跟踪参数、移动版前缀、锚点等，识别同一篇文章的不同链接
+2. SimHash 近似去重：识别转载/镜像站点（标题 + 摘要的 64 位指纹，汉明距离阈值）
+3. 相关性排序：时效性 + 来源权威度 + 与股票/查询关键词的匹配度
+4. 每个维度只保留得分最高的 top-K 条，减少提示词输入
+
+多维度情报搜索轮流使用不同搜索引擎，同一篇公告/新闻经常以不同 URL 在
+多个维度中重复出现；在写入提示词之前统一处理。
+"""
+
+import hashlib
+import logging
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+
+# 视为同一篇文章的 SimHash 汉明距离上限（64 位）
+SIMHASH_MAX_DISTANCE = 3
+
+# 时效性得分的半衰期（天）
+RECENCY_HALF_LIFE_DAYS = 7.0
+# 无法解析发布日期时的时效性得分
+UNKNOWN_DATE_SCORE = 0.3
+
+# 综合得分权重
+WEIGHT_RELEVANCE = 0.4
+WEIGHT_RECENCY = 0.35
+WEIGHT_AUTHORITY = 0.25
+
+# 来源权威度（按域名后缀匹配，未列出的来源为 DEFAULT_AUTHORITY）
+SOURCE_AUTHORITY = {
+    'cninfo.com.cn': 1.0,      # 巨潮资讯（法定信息披露）
+    'sse.com.cn': 1.0,         # 上交所
+    'szse.cn': 1.0,            # 深交所
+    'bse.cn': 1.0,             # 北交所
+    'csrc.gov.cn': 1.0,        # 证监会
+    'gov.cn': 0.9,
+    'cs.com.cn': 0.9,          # 中国证券报
+    'cnstock.com': 0.9,        # 上海证券报
+    'stcn.com': 0.9,           # 证券时报
+    'yicai.com': 0.85,         # 第一财经
+    'caixin.com': 0.85,
+    'eastmoney.com': 0.8,
+    'jrj.com.cn': 0.7,
+    'sina.com.cn': 0.7,
+    'finance.sina.com.cn': 0.75,
+    '10jqka.com.cn': 0.7,
+    'hexun.com': 0.7,
+    'cls.cn': 0.8,             # 财联社
+    'nbd.com.cn': 0.75,        # 每日经济新闻
+    'xueqiu.com': 0.5,
+    'guba.eastmoney.com': 0.3,  # 股吧
+    'baidu.com': 0.3,
+    'sohu.com': 0.5,
+    '163.com': 0.5,
+}
+DEFAULT_AUTHORITY = 0.5
+
+# 不影响内容的 URL 参数（跟踪、分享、来源标记）
+_TRACKING_PARAMS = {
+    'spm', 'from', 'source', 'src', 'share', 'share_token', 'sharetype', 'timestamp',
+    'fr', 'ref', 'refer', 'referer', 'wfr', 'isappinstalled', 'scene', 'clicktime',
+}
+_MOBILE_PREFIXES = ('www.', 'm.', 'wap.', 'mobile.', '3g.')
+
+_TOKEN_RE = re.compile(r'[\s\W_]+', re.UNICODE)
+_RELATIVE_DATE_RE = re.compile(r'(\d+)\s*(分钟|小时|天|周|个月|minutes?|hours?|days?|weeks?)\s*(前|ago)', re.I)
+_DATE_RE = re.compile(r'(\d{4})[-/年.](\d{1,2})[-/月.](\d{1,2})')
+
+
+@dataclass
+class RankedItem:
+    """参与排序的单条结果"""
+    dimension: str
+    result: object  # search_service.SearchResult
+    canonical_url: str
+    fingerprint: int
+    score: float = 0.0
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化 URL
+
+    - 协议与主机名小写，去掉 www./m./wap. 等前缀和默认端口
+    - 去掉锚点、跟踪参数，剩余参数排序
+    - 去掉路径末尾的斜杠和 index.html
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        规范化后的 URL（无法解析时返回原值）
+    """
+    if not url:
+        return ''
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return url
+
+    host = (parsed.hostname or '').lower()
+    for prefix in _MOBILE_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = re.sub(r'/(index\.s?html?)?$', '', parsed.path or '')
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith('utm_')
+    )
+    return urlunparse(('', host, path, '', urlencode(query), '')).lstrip('/')
+
+
+def _features(text: str) -> List[str]:
+    """SimHash 特征：归一化文本的字符三元组（中文无需分词）"""
+    norm = _TOKEN_RE.sub('', text.lower())
+    if len(norm) < 3:
+        return [norm] if norm else []
+    return [norm[i:i + 3] for i in range(len(norm) - 2)]
+
+
+def simhash(text: str) -> int:
+    """
+    计算 64 位 SimHash 指纹
+
+    Args:
+        text: 文本（通常为标题 + 摘要）
+
+    Returns:
+        64 位整数指纹（空文本返回 0）
+    """
+    weights = [0] * 64
+    features = _features(text)
+    if not features:
+        return 0
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+def source_authority(url: str, source: str = '') -> float:
+    """
+    按域名后缀查找来源权威度
+
+    Args:
+        url: 结果 URL
+        source: 来源名称（URL 缺失时兜底）
+
+    Returns:
+        0~1 的权威度
+    """
+    host = (urlparse(url).hostname or '').lower() if url else ''
+    host = host or (source or '').lower()
+    best_len, best = 0, DEFAULT_AUTHORITY
+    for domain, weight in SOURCE_AUTHORITY.items():
+        # 取最长匹配的后缀，使 guba.eastmoney.com 优先于 eastmoney.com
+        if (host == domain or host.endswith('.' + domain)) and len(domain) > best_len:
+            best_len, best = len(domain), weight
+    return best
+
+
+def parse_published_date(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    解析搜索结果的发布日期
+
+    支持 ISO 格式、"2026-01-05"/"2026年1月5日" 以及 "3小时前"/"2 days ago" 等相对时间。
+
+    Returns:
+        datetime，无法解析时返回 None
+    """
+    if not value:
+        return None
+    now = now or datetime.now()
+    text = str(value).strip()
+
+    m = _RELATIVE_DATE_RE.search(text)
+    if m:
+        amount, unit = int(m.group(1)), m.group(2).lower()
+        if unit in ('分钟',) or unit.startswith('minute'):
+            return now - timedelta(minutes=amount)
+        if unit in ('小时',) or unit.startswith('hour'):
+            return now - timedelta(hours=amount)
+        if unit in ('天',) or unit.startswith('day'):
+            return now - timedelta(days=amount)
+        if unit in ('周',) or unit.startswith('week'):
+            return now - timedelta(weeks=amount)
+        if unit == '个月':
+            return now - timedelta(days=30 * amount)
+
+    if text in ('昨天', 'yesterday'):
+        return now - timedelta(days=1)
+
+    m = _DATE_RE.search(text)
+    if m:
+        try:
+            return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None
+    return None
+
+
+def recency_score(published: Optional[str], now: Optional[datetime] = None) -> float:
+    """时效性得分：按半衰期指数衰减，未知日期取 UNKNOWN_DATE_SCORE"""
+    now = now or datetime.now()
+    dt = parse_published_date(published, now)
+    if dt is None:
+        return UNKNOWN_DATE_SCORE
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    age_days = max(0.0, (now - dt).total_seconds() / 86400)
+    return math.pow(0.5, age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+def relevance_score(title: str, snippet: str, entity_terms: Sequence[str], keywords: Sequence[str]) -> float:
+    """
+    关键词匹配得分
+
+    - 标题提到股票名称/代码得 0.6，仅摘要提到得 0.3
+    - 查询关键词（如「减持」「业绩预告」）命中比例最多加 0.4
+
+    Returns:
+        0~1 的相关性
+    """
+    title = (title or '').lower()
+    snippet = (snippet or '').lower()
+    score = 0.0
+    terms = [t.lower() for t in entity_terms if t]
+    if any(t in title for t in terms):
+        score += 0.6
+    elif any(t in snippet for t in terms):
+        score += 0.3
+
+    keywords = [k.lower() for k in keywords if k]
+    if keywords:
+        hits = sum(1 for k in keywords if k in title or k in snippet)
+        score += 0.4 * hits / len(keywords)
+    return min(score, 1.0)
+
+
+def dedupe_and_rank(
+    intel_results: Dict[str, object],
+    stock_code: str,
+    stock_name: str,
+    top_k: int = 3,
+    now: Optional[datetime] = None
+) -> Tuple[Dict[str, List[object]], Dict[str, int]]:
+    """
+    跨搜索引擎、跨维度去重并按综合得分排序
+
+    所有维度的结果统一打分后按得分从高到低收录：URL 规范化后相同、或
+    SimHash 距离不超过 SIMHASH_MAX_DISTANCE 的结果只保留得分最高的一条
+    （留在其所在维度），每个维度最多收录 top-K 条。
+
+    Args:
+        intel_results: {维度名称: SearchResponse}
+        stock_code: 股票代码
+        stock_name: 股票名称
+        top_k: 每个维度保留的条数（<=0 表示不限制）
+        now: 当前时间（默认 datetime.now()）
+
+    Returns:
+        ({维度名称: 排序后的 SearchResult 列表}, 统计 {'total', 'duplicates', 'dropped'})
+    """
+    now = now or datetime.now()
+    entity_terms = [stock_name, stock_code]
+
+    candidates: List[RankedItem] = []
+    for dim_name, resp in intel_results.items():
+        if not getattr(resp, 'success', False) or not resp.results:
+            continue
+        keywords = [t for t in resp.query.split() if t not in entity_terms]
+        for r in resp.results:
+            item = RankedItem(
+                dimension=dim_name,
+                result=r,
+                canonical_url=canonicalize_url(r.url),
+                fingerprint=simhash(f"{r.title} {r.snippet}"),
+            )
+            item.score = (
+                WEIGHT_RELEVANCE * relevance_score(r.title, r.snippet, entity_terms, keywords)
+                + WEIGHT_RECENCY * recency_score(r.published_date, now)
+                + WEIGHT_AUTHORITY * source_authority(r.url, r.source)
+            )
+            candidates.append(item)
+
+    candidates.sort(key=lambda x: x.score, reverse=True)
+
+    kept: Dict[str, List[object]] = {dim: [] for dim in intel_results}
+    seen_urls = set()
+    seen_prints: List[int] = []
+    duplicates = dropped = 0
+    for item in candidates:
+        if item.canonical_url and item.canonical_url in seen_urls:
+            duplicates += 1
+            continue
+        if item.fingerprint and any(
+            hamming_distance(item.fingerprint, fp) <= SIMHASH_MAX_DISTANCE for fp in seen_prints
+        ):
+            duplicates += 1
+            continue
+        if 0 < top_k <= len(kept[item.dimension]):
+            # 未收录的结果不参与后续判重，其他维度中的同一篇文章仍可保留
+            dropped += 1
+            continue
+
+        if item.canonical_url:
+            seen_urls.add(item.canonical_url)
+        if item.fingerprint:
+            seen_prints.append(item.fingerprint)
+        kept[item.dimension].append(item.result)
+
+    return kept, {'total': len(candidates), 'duplicates': duplicates, 'dropped': dropped}
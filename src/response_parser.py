@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - LLM 响应 JSON 解析
+===================================
+
+职责：
+1. 单遍扫描定位响应中最外层的 JSON 对象（正确处理字符串与转义）
+2. 容错修复：注释、尾随逗号、Python 风格字面量、输出被截断的结构
+3. 按决策仪表盘的字段结构校验并规整类型
+
+实现要点：
+- 快速路径：先用 json 的 C 扫描器 raw_decode 直接从起点解析，合法输出零复制
+- 快速修复路径：按 C 解码器报告的错误位置就地修复注释、尾随逗号、Python 字面量，
+  截断的输出按未闭合括号补齐，整体仍由 C 解码器解析
+- 修复路径（快速修复不适用时）：只在结构字符（括号、引号、逗号、冒号、注释）之间跳跃，
+  字符串和普通文本交给 re 在 C 层整段跳过
+- 需要修复时只记录少量编辑点，最后一次性拼接
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 字符串外需要关注的记号（T/F/N 用于识别 Python 风格字面量，单字符集合可走快速匹配）
+_STRUCT_RE = re.compile(r'[{}\[\]",:/TFN]')
+_LITERAL_RE = re.compile(r'(?:True|False|None)\b')
+# 完整的字符串字面量（展开循环写法，整段在 C 层匹配）
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# 截断补齐：可能不完整的数字、括号以外的字符
+_NUMBER_CHARS = '0123456789.+-eE'
+_NON_BRACKET_RE = re.compile(r'[^{}\[\]]+')
+# 从 ```json 代码块开始查找
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*\{')
+
+_DECODER = json.JSONDecoder(strict=False)
+
+_LITERAL_MAP = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+# 找不到合法对象时最多尝试的起点数量（跳过正文中的零散花括号）
+_MAX_CANDIDATES = 3
+# 快速修复路径最多定点修复的次数（每次修复后整体重新解码，错误多时交给单遍扫描）
+_MAX_QUICK_REPAIRS = 8
+
+
+@dataclass
+class ParseOutcome:
+    """JSON 提取结果"""
+    data: Optional[Dict[str, Any]] = None
+    repairs: List[str] = field(default_factory=list)  # 执行过的修复
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.data is not None
+
+
+def _repair_at_errors(text: str, start: int, error: json.JSONDecodeError) -> Optional[Tuple[Any, List[str]]]:
+    """
+    按解码错误位置做定点修复后重新解码（快速修复路径）
+
+    C 解码器报告的错误位置一定在字符串之外，常见的少量格式错误（注释、尾随逗号、
+    Python 字面量）在该位置就地修复，其余部分始终由 C 解码器处理。遇到无法定点修复
+    的错误（如输出被截断）或修复次数过多时返回 None，交给 _scan_object。
+
+    Returns:
+        (解码结果, 修复记录)，无法定点修复时返回 None
+    """
+    repairs: List[str] = []
+    for _ in range(_MAX_QUICK_REPAIRS):
+        p = error.pos
+        if p >= len(text.rstrip()) or error.msg.startswith('Unterminated string'):
+            return _close_truncated(text, start, p, repairs)
+        if text.startswith('//', p):
+            end = text.find('\n', p)
+            text = text[:p] + (text[end:] if end >= 0 else '')
+            kind = 'comment'
+        elif text.startswith('/*', p):
+            end = text.find('*/', p + 2)
+            if end < 0:
+                return None
+            text = text[:p] + text[end + 2:]
+            kind = 'comment'
+        elif text.startswith(('}', ']'), p):
+            comma = len(text[:p].rstrip()) - 1
+            if comma < start or text[comma] != ',':
+                return None
+            text = text[:comma] + text[comma + 1:]
+            kind = 'trailing_comma'
+        else:
+            lit = _LITERAL_RE.match(text, p)
+            if lit is None:
+                return None
+            text = text[:p] + _LITERAL_MAP[lit.group()] + text[lit.end():]
+            kind = 'python_literal'
+        if kind not in repairs:
+            repairs.append(kind)
+        try:
+            return _DECODER.raw_decode(text, start)[0], repairs
+        except json.JSONDecodeError as e:
+            error = e
+    return None
+
+
+def _close_truncated(text: str, start: int, end: int, repairs: List[str]) -> Optional[Tuple[Any, List[str]]]:
+    """
+    补齐被截断的输出（快速修复路径）
+
+    end 为解码器停下的位置，之前的内容都合法：去掉末尾不完整的数字、没有值的键和
+    多余的逗号，再按未闭合的括号补齐。括号层次用 C 层的字符串操作计算（不逐字符循环）。
+
+    Returns:
+        (解码结果, 修复记录)，无法补齐时返回 None（交给 _scan_object）
+    """
+    prefix = text[start:end].rstrip()
+    if prefix[-1:] in _NUMBER_CHARS and not prefix.endswith(('true', 'false', 'null')):
+        # 末尾的数字可能不完整（如 72 被截断为 7），丢弃
+        prefix = prefix.rstrip(_NUMBER_CHARS).rstrip()
+    dangling_key = prefix.endswith(':')
+    if dangling_key:
+        prefix = prefix[:-1].rstrip()
+
+    # prefix 中的字符串都是完整的：去掉转义后按引号切分，偶数段即字符串之外的部分
+    plain = prefix.replace('\\\\', '').replace('\\"', '')
+    brackets = _NON_BRACKET_RE.sub('', ''.join(plain.split('"')[::2]))
+    while '{}' in brackets or '[]' in brackets:
+        brackets = brackets.replace('{}', '').replace('[]', '')
+    if not brackets or '}' in brackets or ']' in brackets:
+        return None
+
+    if prefix.endswith('"') and (dangling_key or brackets[-1] == '{'):
+        # 对象内的最后一个字符串紧跟在 { 或逗号之后即为键：没有值，连同键一起丢弃
+        key_start = prefix.rfind('"', 0, len(prefix) - 1)
+        if key_start <= 0 or prefix[key_start - 1] == '\\':
+            return None
+        before = prefix[:key_start].rstrip()
+        if dangling_key or before.endswith(('{', ',')):
+            prefix = before
+    elif dangling_key:
+        return None
+    if prefix.endswith(','):
+        prefix = prefix[:-1]
+
+    closers = brackets[::-1].replace('{', '}').replace('[', ']')
+    try:
+        data = _DECODER.decode(prefix + closers)
+    except json.JSONDecodeError:
+        return None
+    repairs.append('truncated')
+    return data, repairs
+
+
+def _scan_object(text: str, start: int) -> Tuple[str, List[str]]:
+    """
+    从 start（必须是 '{'）开始扫描一个 JSON 对象
+
+    Returns:
+        (可交给 json.loads 的文本, 修复记录)
+    """
+    n = len(text)
+    stack: List[str] = []        # 未闭合的容器: '{' 或 '['
+    expect_key: List[bool] = []  # 与 stack 对应：对象内下一个字符串是否为键
+    edits: List[Tuple[int, int, str]] = []  # (起, 止, 替换文本)
+    repairs: List[str] = []
+
+    pending_comma = -1   # 尚未确认是否为尾随逗号的逗号位置
+    gap_start = 0        # 逗号之后、下一个记号之前的区间起点
+    safe_cut = start     # 最近一个「截断后仍可闭合」的位置
+    safe_depth = 0
+
+    i = start
+    while True:
+        m = _STRUCT_RE.search(text, i)
+        if m is None:
+            break
+        tok = m.group()
+        p = m.start()
+
+        # 注释（字符串外）
+        if tok == '/':
+            nxt = text[p + 1:p + 2]
+            if nxt == '/':
+                end = text.find('\n', p)
+                end = n if end < 0 else end
+            elif nxt == '*':
+                end = text.find('*/', p + 2)
+                end = n if end < 0 else end + 2
+            else:
+                i = p + 1
+                continue
+            if pending_comma >= 0 and not text[gap_start:p].strip():
+                gap_start = end
+            else:
+                pending_comma = -1
+            edits.append((p, end, ''))
+            if 'comment' not in repairs:
+                repairs.append('comment')
+            i = end
+            continue
+
+        # 逗号之后的第一个记号：判断是否为尾随逗号
+        if pending_comma >= 0:
+            if tok in '}]' and not text[gap_start:p].strip():
+                edits.append((pending_comma, pending_comma + 1, ''))
+                if 'trailing_comma' not in repairs:
+                    repairs.append('trailing_comma')
+            pending_comma = -1
+
+        if tok == '"':
+            m2 = _STRING_RE.match(text, p)
+            if m2 is None:
+                break  # 截断在字符串内部
+            j = m2.end()
+            in_object = bool(stack) and stack[-1] == '{'
+            if in_object and expect_key[-1]:
+                expect_key[-1] = False
+            else:
+                safe_cut, safe_depth = j, len(stack)
+            i = j
+            continue
+
+        if tok == '{' or tok == '[':
+            if stack:
+                # 嵌套的值：先交给 C 解码器，完整合法的子树整体跳过，只逐记号扫描有问题的部分
+                try:
+                    _, j = _DECODER.raw_decode(text, p)
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    safe_cut, safe_depth = j, len(stack)
+                    i = j
+                    continue
+            stack.append(tok)
+            expect_key.append(tok == '{')
+            safe_cut, safe_depth = p + 1, len(stack)
+        elif tok == '}' or tok == ']':
+            stack.pop()
+            expect_key.pop()
+            if not stack:
+                end = p + 1
+                return _apply_edits(text, start, end, edits, ''), repairs
+            safe_cut, safe_depth = p + 1, len(stack)
+        elif tok == ',':
+            # 前一个元素（含数字/字面量值）在逗号处完整结束
+            if stack[-1] == '[' or not expect_key[-1]:
+                safe_cut, safe_depth = p, len(stack)
+            if stack[-1] == '{':
+                expect_key[-1] = True
+            pending_comma = p
+            gap_start = p + 1
+        elif tok == ':':
+            pass
+        else:
+            # Python 风格字面量
+            lit = _LITERAL_RE.match(text, p)
+            if lit is not None and not (p and (text[p - 1].isalnum() or text[p - 1] == '_')):
+                edits.append((p, lit.end(), _LITERAL_MAP[lit.group()]))
+                if 'python_literal' not in repairs:
+                    repairs.append('python_literal')
+                i = lit.end()
+                continue
+        i = m.end()
+
+    # 走到这里说明对象未闭合（输出被截断）：回退到最近的安全点并补齐括号
+    closers = ''.join('}' if c == '{' else ']' for c in reversed(stack[:safe_depth]))
+    repairs.append('truncated')
+    return _apply_edits(text, start, safe_cut, edits, closers), repairs
+
+
+def _apply_edits(text: str, start: int, end: int, edits: List[Tuple[int, int, str]], tail: str) -> str:
+    """将编辑点应用到 text[start:end] 并追加 tail"""
+    if not edits:
+        return text[start:end] + tail if tail else text[start:end]
+    parts = []
+    pos = start
+    # 尾随逗号在看到下一个记号时才确认，可能排在其后的注释编辑之后
+    for e_start, e_end, repl in sorted(edits):
+        if e_start >= end:
+            break
+        parts.append(text[pos:e_start])
+        parts.append(repl)
+        pos = min(e_end, end)
+    parts.append(text[pos:end])
+    parts.append(tail)
+    return ''.join(parts)
+
+
+def extract_json_object(text: str) -> ParseOutcome:
+    """
+    从 LLM 响应中提取最外层 JSON 对象
+
+    优先从 ```json 代码块开始查找；解析失败时跳过正文中的零散花括号继续尝试。
+
+    Args:
+        text: 原始响应文本
+
+    Returns:
+        ParseOutcome
+    """
+    if not text:
+        return ParseOutcome(error='空响应')
+
+    fence = _FENCE_RE.search(text)
+    pos = fence.end() - 1 if fence else text.find('{')
+    last_error = '未找到 JSON 对象'
+
+    for _ in range(_MAX_CANDIDATES):
+        if pos < 0:
+            break
+        try:
+            data, _end = _DECODER.raw_decode(text, pos)
+            if isinstance(data, dict):
+                return ParseOutcome(data=data)
+        except json.JSONDecodeError as e:
+            quick = _repair_at_errors(text, pos, e)
+            if quick is not None and isinstance(quick[0], dict):
+                return ParseOutcome(data=quick[0], repairs=quick[1])
+        json_str, repairs = _scan_object(text, pos)
+        try:
+            data = _DECODER.decode(json_str)
+        except json.JSONDecodeError as e:
+            last_error = f'JSON 解析失败: {e}'
+        else:
+            if isinstance(data, dict):
+                return ParseOutcome(data=data, repairs=repairs)
+            last_error = '顶层不是对象'
+        pos = text.find('{', pos + 1)
+
+    return ParseOutcome(error=last_error)
+
+
+# ========== 决策仪表盘结构校验 ==========
+
+# 顶层字段的期望类型（未列出的字段不校验）
+ANALYSIS_FIELD_TYPES: Dict[str, type] = {
+    'sentiment_score': int,
+    'trend_prediction': str,
+    'operation_advice': str,
+    'confidence_level': str,
+    'dashboard': dict,
+    'battle_plan': dict,
+    'analysis_summary': str,
+    'detailed_analysis': str,
+    'key_points': str,
+    'risk_warning': str,
+    'buy_reason': str,
+    'plain_talk_short': str,
+    'plain_talk_long': str,
+}
+
+# 必须存在的顶层字段
+REQUIRED_FIELDS = ('sentiment_score', 'trend_prediction', 'operation_advice')
+
+# dashboard 内的字典字段
+DASHBOARD_SECTIONS = ('core_conclusion', 'data_perspective', 'intelligence', 'battle_plan')
+
+_INT_RE = re.compile(r'-?\d+')
+
+
+def _coerce(value: Any, expected: type) -> Tuple[Any, bool]:
+    """
+    将值规整为期望类型
+
+    Returns:
+        (规整后的值, 是否可用)
+    """
+    if isinstance(value, expected) and not (expected is int and isinstance(value, bool)):
+        return value, True
+    if expected is int:
+        if isinstance(value, float):
+            return int(round(value)), True
+        if isinstance(value, str):
+            m = _INT_RE.search(value)  # 如 "75分"
+            if m:
+                return int(m.group()), True
+        return None, False
+    if expected is str:
+        if value is None:
+            return '', True
+        if isinstance(value, (list, tuple)):
+            return '\n'.join(str(v) for v in value), True
+        if isinstance(value, (int, float)):
+            return str(value), True
+        return None, False
+    if expected is dict:
+        return None, False
+    return None, False
+
+
+def validate_analysis_payload(data: Dict[str, Any]) -> List[str]:
+    """
+    按决策仪表盘结构校验并就地规整字段类型
+
+    - 缺失的必填字段记为问题（由调用方决定默认值）
+    - 类型可规整的字段就地修正（如 "75分" -> 75、列表 -> 多行文本）
+    - 无法规整的字段删除，避免下游 .get() 链式调用出错
+    - sentiment_score 限定在 0-100
+
+    Args:
+        data: json.loads 得到的字典
+
+    Returns:
+        问题列表（空列表表示完全符合）
+    """
+    issues: List[str] = []
+
+    for key in REQUIRED_FIELDS:
+        if key not in data:
+            issues.append(f'缺少字段 {key}')
+
+    for key, expected in ANALYSIS_FIELD_TYPES.items():
+        if key not in data:
+            continue
+        value, ok = _coerce(data[key], expected)
+        if not ok:
+            issues.append(f'字段 {key} 类型错误 ({type(data[key]).__name__})')
+            del data[key]
+        elif value is not data[key]:
+            data[key] = value
+
+    score = data.get('sentiment_score')
+    if isinstance(score, int) and not 0 <= score <= 100:
+        issues.append(f'sentiment_score 超出范围 ({score})')
+        data['sentiment_score'] = max(0, min(100, score))
+
+    dashboard = data.get('dashboard')
+    if isinstance(dashboard, dict):
+        for section in DASHBOARD_SECTIONS:
+            if section in dashboard and not isinstance(dashboard[section], dict):
+                issues.append(f'dashboard.{section} 类型错误')
+                dashboard[section] = {}
+
+    # 作战计划可能在顶层，也可能在 dashboard 内，两处都要校验
+    plans = [('battle_plan', data.get('battle_plan'))]
+    if isinstance(dashboard, dict):
+        plans.append(('dashboard.battle_plan', dashboard.get('battle_plan')))
+    for prefix, battle_plan in plans:
+        if not isinstance(battle_plan, dict):
+            continue
+        for term in ('short_term', 'long_term'):
+            if term in battle_plan and not isinstance(battle_plan[term], dict):
+                issues.append(f'{prefix}.{term} 类型错误')
+                battle_plan[term] = {}
+
+    return issues
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索结果缓存
+===================================
+
+职责：
+1. 规范化搜索查询（与搜索引擎无关），相同语义的查询共用一条缓存
+2. 按「规范化查询 + 时间窗口」缓存成功的搜索结果，每类查询使用各自的 TTL
+3. LRU 淘汰 + 磁盘持久化，跨运行复用，节省付费搜索额度和等待时间
+
+同一只股票的「减持 处罚 利空 风险」等查询在一天内结果基本不变，
+多维度情报搜索又是轮流分配搜索引擎的，按引擎区分缓存会让命中率大打折扣。
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 查询中可忽略的分隔符（空白、标点、括号等）
+_SEPARATOR_RE = re.compile(r'[\s,，、;；:：|/()（）\[\]【】"\'“”‘’]+')
+
+# 两次落盘之间的最短间隔（秒），其余写入在 flush() 时统一落盘
+_SAVE_INTERVAL = 5.0
+
+
+def canonicalize_query(query: str) -> str:
+    """
+    规范化查询文本
+
+    - NFKC 归一（全角转半角）并转小写
+    - 按空白和标点切分，去重后排序（词序不影响搜索引擎的结果集合）
+    - 忽略 OR 等布尔连接词
+
+    Args:
+        query: 原始查询
+
+    Returns:
+        规范化后的查询
+    """
+    text = unicodedata.normalize('NFKC', query or '').lower()
+    tokens = {t for t in _SEPARATOR_RE.split(text) if t and t != 'or'}
+    return ' '.join(sorted(tokens))
+
+
+class SearchCache:
+    """
+    搜索结果缓存（线程安全）
+
+    缓存值为 SearchResponse 的可序列化字典，由调用方负责转换。
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000):
+        """
+        Args:
+            path: 持久化文件路径（None 表示仅内存缓存）
+            max_entries: 最大条目数，超出后淘汰最久未使用的条目
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(query: str, recency_days: int, max_results: int) -> str:
+        """缓存键：规范化查询 + 时间窗口 + 结果数"""
+        return f"{recency_days}d|{max_results}|{canonicalize_query(query)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Returns:
+            缓存的响应字典，未命中或已过期返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry['expires_at'] <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def put(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键（见 make_key）
+            value: 响应字典
+            ttl: 有效期（秒）
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = {'value': value, 'expires_at': time.time() + ttl}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            should_save = self.path and time.time() - self._last_save >= _SAVE_INTERVAL
+
+        if should_save:
+            self.flush()
+
+    def flush(self) -> None:
+        """将缓存写入磁盘（原子替换）"""
+        with self._lock:
+            path = self.path
+            if not path or not self._dirty:
+                return
+            now = time.time()
+            snapshot = {k: v for k, v in self._entries.items() if v['expires_at'] > now}
+            self._dirty = False
+            self._last_save = now
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 写入 {path} 失败: {e}")
+
+    def close(self) -> None:
+        """
+        写入磁盘并取消退出时的写入（缓存被新实例替换时调用）
+
+        之后只在内存中记录，避免旧实例在进程退出时用旧数据覆盖新实例写入的文件。
+        """
+        if not self.path:
+            return
+        atexit.unregister(self.flush)
+        self.flush()
+        with self._lock:
+            self.path = None
+
+    def _load(self) -> None:
+        """从磁盘加载未过期的条目（按过期时间排序近似恢复 LRU 顺序）"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 读取 {self.path} 失败，忽略已有缓存: {e}")
+            return
+
+        now = time.time()
+        valid = [(k, v) for k, v in data.items() if v.get('expires_at', 0) > now]
+        valid.sort(key=lambda kv: kv[1]['expires_at'])
+        for key, entry in valid[-self.max_entries:]:
+            self._entries[key] = entry
+        logger.info(f"[搜索缓存] 已加载 {len(self._entries)} 条缓存 ({self.path})")
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
@@ -9,16 +9,26 @@ A股自选股智能分析系统 - 搜索服务模块
 2. 支持 Tavily 和 SerpAPI 两种搜索引擎
 3. 多 Key 负载均衡和故障转移
 4. 搜索结果缓存和格式化
+5. 搜索结果写入本地新闻索引，先查索引再调用付费搜索 API
 """
 
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from itertools import cycle
+
+from news_index import NewsIndex
+from news_pool import NewsPool
+from key_scheduler import KeyUsageStore, KeyScheduler
+from news_ranker import dedupe_and_rank
+from search_cache import SearchCache
+from metrics import SEARCH_ERRORS, SEARCH_SECONDS
+from tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +57,27 @@ class SearchResponse:
     success: bool = True
     error_message: Optional[str] = None
     search_time: float = 0.0  # 搜索耗时（秒）
+    cached: bool = False  # 是否来自搜索缓存
+    status_code: Optional[int] = None  # 失败时的 HTTP 状态码（供 Key 调度判断限流/额度）
+    retry_after: Optional[float] = None  # 服务端要求的重试等待（秒）
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可持久化的字典（用于搜索缓存）"""
+        return {
+            'query': self.query,
+            'provider': self.provider,
+            'results': [vars(r).copy() for r in self.results],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchResponse':
+        """从缓存字典恢复"""
+        return cls(
+            query=data.get('query', ''),
+            results=[SearchResult(**r) for r in data.get('results', [])],
+            provider=data.get('provider', ''),
+            cached=True,
+        )
     
     def to_context(self, max_results: int = 5) -> str:
         """将搜索结果转换为可用于 AI 分析的上下文"""
@@ -60,22 +91,65 @@ class SearchResponse:
         return "\n".join(lines)
 
 
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 class BaseSearchProvider(ABC):
     """搜索引擎基类"""
     
-    def __init__(self, api_keys: List[str], name: str):
+    # 保留的最近耗时样本数（用于 p50/p95 统计）
+    LATENCY_WINDOW = 500
+    
+    def __init__(
+        self,
+        api_keys: List[str],
+        name: str,
+        max_concurrency: int = 2,
+        pool_size: int = 4,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        monthly_quota: int = 0,
+        quota_reserve: float = 0.05,
+        usage_store: Optional[KeyUsageStore] = None
+    ):
         """
         初始化搜索引擎
         
         Args:
             api_keys: API Key 列表（支持多个 key 负载均衡）
             name: 搜索引擎名称
+            max_concurrency: 同时进行的最大请求数（跨股票、跨维度共享）
+            pool_size: 每个 API Key 的 HTTP 连接池大小
+            timeout: 单次请求的读取超时（秒）
+            connect_timeout: 建立连接的超时（秒）
+            monthly_quota: 每个 Key 每月的调用额度（0 表示不限）
+            quota_reserve: 保留额度比例，低于该比例时优先使用其他搜索引擎
+            usage_store: Key 用量持久化（默认仅内存）
         """
         self._api_keys = api_keys
         self._name = name
-        self._key_cycle = cycle(api_keys) if api_keys else None
-        self._key_usage: Dict[str, int] = {key: 0 for key in api_keys}
-        self._key_errors: Dict[str, int] = {key: 0 for key in api_keys}
+        # Key 选择、用量与冷却由调度器负责（线程安全，按月持久化用量）
+        self._scheduler = KeyScheduler(name, api_keys, monthly_quota, quota_reserve, usage_store)
+        # 会话与耗时样本在多线程下需要加锁
+        self._key_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._pool_size = max(1, pool_size)
+        self._timeout = (connect_timeout, timeout)
+        # 每个 API Key 一个长连接会话（与 provider 同生命周期），复用 TCP/TLS 连接
+        self._sessions: Dict[str, Any] = {}
+        self._latencies: List[float] = []
     
     @property
     def name(self) -> str:
@@ -86,51 +160,111 @@ class BaseSearchProvider(ABC):
         """检查是否有可用的 API Key"""
         return bool(self._api_keys)
     
-    def _get_next_key(self) -> Optional[str]:
+    def has_capacity(self, use_reserve: bool = False) -> bool:
         """
-        获取下一个可用的 API Key（负载均衡）
+        是否有未冷却、仍有额度的 Key
         
-        策略：轮询 + 跳过错误过多的 key
+        Args:
+            use_reserve: 是否计入保留额度（默认不计入，额度紧张时让位给其他引擎）
         """
-        if not self._key_cycle:
-            return None
-        
-        # 最多尝试所有 key
-        for _ in range(len(self._api_keys)):
-            key = next(self._key_cycle)
-            # 跳过错误次数过多的 key（超过 3 次）
-            if self._key_errors.get(key, 0) < 3:
-                return key
+        return self._scheduler.has_capacity(use_reserve)
+    
+    def get_key_usage(self) -> List[Dict[str, Any]]:
+        """各 Key 本月用量（Key 已脱敏）"""
+        return self._scheduler.get_usage()
+    
+    def _get_next_key(self) -> Optional[str]:
+        """
+        获取下一个可用的 API Key
         
-        # 所有 key 都有问题，重置错误计数并返回第一个
-        logger.warning(f"[{self._name}] 所有 API Key 都有错误记录，重置错误计数")
-        self._key_errors = {key: 0 for key in self._api_keys}
-        return self._api_keys[0] if self._api_keys else None
+        策略：剩余额度最多的优先，跳过冷却中、已停用和额度用尽的 Key
+        """
+        return self._scheduler.acquire()
     
     def _record_success(self, key: str) -> None:
         """记录成功使用"""
-        self._key_usage[key] = self._key_usage.get(key, 0) + 1
-        # 成功后减少错误计数
-        if key in self._key_errors and self._key_errors[key] > 0:
-            self._key_errors[key] -= 1
+        self._scheduler.record_success(key)
+    
+    def _get_session(self, api_key: str):
+        """
+        获取 API Key 对应的 requests.Session（首次使用时创建）
+        
+        连接池大小为 pool_size，不在适配器层重试（重试与故障转移由上层负责）。
+        """
+        with self._key_lock:
+            session = self._sessions.get(api_key)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[api_key] = session
+            return session
+    
+    def close(self) -> None:
+        """关闭所有连接会话"""
+        with self._key_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+    
+    def _record_latency(self, elapsed: float) -> None:
+        """记录一次请求耗时（只保留最近 LATENCY_WINDOW 个样本）"""
+        SEARCH_SECONDS.observe(elapsed, provider=self.name)
+        with self._key_lock:
+            self._latencies.append(elapsed)
+            if len(self._latencies) > self.LATENCY_WINDOW:
+                del self._latencies[:len(self._latencies) - self.LATENCY_WINDOW]
+    
+    def get_latency_stats(self) -> Dict[str, float]:
+        """
+        获取搜索耗时统计
+        
+        Returns:
+            {'count', 'p50', 'p95', 'max'}（秒）
+        """
+        with self._key_lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        
+        def percentile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+        
+        return {
+            'count': len(samples),
+            'p50': round(percentile(0.5), 3),
+            'p95': round(percentile(0.95), 3),
+            'max': round(samples[-1], 3),
+        }
     
-    def _record_error(self, key: str) -> None:
-        """记录错误"""
-        self._key_errors[key] = self._key_errors.get(key, 0) + 1
-        logger.warning(f"[{self._name}] API Key {key[:8]}... 错误计数: {self._key_errors[key]}")
+    def _record_error(self, key: str, response: Optional[SearchResponse] = None) -> None:
+        """记录错误（限流进入冷却，额度用尽/Key 无效时停用）"""
+        SEARCH_ERRORS.inc(provider=self.name)
+        status_code = response.status_code if response else None
+        retry_after = response.retry_after if response else None
+        self._scheduler.record_failure(key, status_code, retry_after)
     
     @abstractmethod
-    def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
+    def _do_search(self, query: str, api_key: str, max_results: int, recency_days: int) -> SearchResponse:
         """执行搜索（子类实现）"""
         pass
     
-    def search(self, query: str, max_results: int = 5) -> SearchResponse:
+    def search(self, query: str, max_results: int = 5, recency_days: int = 7) -> SearchResponse:
         """
         执行搜索
         
         Args:
             query: 搜索关键词
             max_results: 最大返回结果数
+            recency_days: 只搜索最近 N 天的内容（搜索引擎不支持时忽略）
             
         Returns:
             SearchResponse 对象
@@ -142,19 +276,25 @@ class BaseSearchProvider(ABC):
                 results=[],
                 provider=self._name,
                 success=False,
-                error_message=f"{self._name} 未配置 API Key"
+                error_message=(
+                    f"{self._name} 没有可用的 API Key（额度用尽或冷却中）"
+                    if self._api_keys else f"{self._name} 未配置 API Key"
+                )
             )
         
         start_time = time.time()
         try:
-            response = self._do_search(query, api_key, max_results)
+            # 并发上限：超出时排队等待（等待时间计入 search_time）
+            with self._semaphore:
+                response = self._do_search(query, api_key, max_results, recency_days)
             response.search_time = time.time() - start_time
+            self._record_latency(response.search_time)
             
             if response.success:
                 self._record_success(api_key)
                 logger.info(f"[{self._name}] 搜索 '{query}' 成功，返回 {len(response.results)} 条结果，耗时 {response.search_time:.2f}s")
             else:
-                self._record_error(api_key)
+                self._record_error(api_key, response)
             
             return response
             
@@ -184,13 +324,30 @@ class TavilySearchProvider(BaseSearchProvider):
     文档：https://docs.tavily.com/
     """
     
-    def __init__(self, api_keys: List[str]):
-        super().__init__(api_keys, "Tavily")
+    def __init__(self, api_keys: List[str], max_concurrency: int = 2, **options):
+        super().__init__(api_keys, "Tavily", max_concurrency, **options)
+        self._clients: Dict[str, Any] = {}
     
-    def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
+    def _get_client(self, api_key: str):
+        """获取 API Key 对应的 TavilyClient（与 provider 同生命周期，复用连接池会话）"""
+        client = self._clients.get(api_key)
+        if client is None:
+            from tavily import TavilyClient
+            
+            session = self._get_session(api_key)
+            try:
+                client = TavilyClient(api_key=api_key, session=session)
+            except TypeError:
+                # 旧版 tavily-python 不支持传入 session，只复用客户端对象
+                client = TavilyClient(api_key=api_key)
+            with self._key_lock:
+                client = self._clients.setdefault(api_key, client)
+        return client
+    
+    def _do_search(self, query: str, api_key: str, max_results: int, recency_days: int) -> SearchResponse:
         """执行 Tavily 搜索"""
         try:
-            from tavily import TavilyClient
+            import tavily  # noqa: F401
         except ImportError:
             return SearchResponse(
                 query=query,
@@ -201,17 +358,22 @@ class TavilySearchProvider(BaseSearchProvider):
             )
         
         try:
-            client = TavilyClient(api_key=api_key)
+            client = self._get_client(api_key)
             
-            # 执行搜索（优化：使用advanced深度、限制最近7天）
-            response = client.search(
+            # 执行搜索（优化：使用advanced深度、限制时间范围）
+            search_kwargs = dict(
                 query=query,
                 search_depth="advanced",  # advanced 获取更多结果
                 max_results=max_results,
                 include_answer=False,
                 include_raw_content=False,
-                days=7,  # 只搜索最近7天的内容
+                days=recency_days,  # 只搜索最近 N 天的内容
             )
+            try:
+                response = client.search(**search_kwargs, timeout=self._timeout[1])
+            except TypeError:
+                # 旧版 tavily-python 不支持 timeout 参数
+                response = client.search(**search_kwargs)
             
             # 记录原始响应到日志
             logger.info(f"[Tavily] 搜索完成，query='{query}', 返回 {len(response.get('results', []))} 条结果")
@@ -237,8 +399,9 @@ class TavilySearchProvider(BaseSearchProvider):
             
         except Exception as e:
             error_msg = str(e)
+            status_code = self._status_from_error(e)
             # 检查是否是配额问题
-            if 'rate limit' in error_msg.lower() or 'quota' in error_msg.lower():
+            if status_code in (429, 432, 433) or 'quota' in error_msg.lower():
                 error_msg = f"API 配额已用尽: {error_msg}"
             
             return SearchResponse(
@@ -246,9 +409,25 @@ class TavilySearchProvider(BaseSearchProvider):
                 results=[],
                 provider=self.name,
                 success=False,
-                error_message=error_msg
+                error_message=error_msg,
+                status_code=status_code
             )
     
+    @staticmethod
+    def _status_from_error(error: Exception) -> Optional[int]:
+        """tavily-python 以异常形式返回 HTTP 错误，按异常类型/信息还原状态码"""
+        name = type(error).__name__
+        message = str(error).lower()
+        if name == 'UsageLimitExceededError' or 'usage limit' in message:
+            return 432
+        if name == 'InvalidAPIKeyError' or 'invalid api key' in message or 'unauthorized' in message:
+            return 401
+        if name == 'ForbiddenError':
+            return 403
+        if 'rate limit' in message or '429' in message:
+            return 429
+        return None
+    
     @staticmethod
     def _extract_domain(url: str) -> str:
         """从 URL 提取域名作为来源"""
@@ -273,20 +452,23 @@ class SerpAPISearchProvider(BaseSearchProvider):
     文档：https://serpapi.com/
     """
     
-    def __init__(self, api_keys: List[str]):
-        super().__init__(api_keys, "SerpAPI")
+    # SerpAPI 的 JSON 接口（即 google-search-results 库请求的地址）
+    API_URL = "https://serpapi.com/search.json"
     
-    def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
-        """执行 SerpAPI 搜索"""
+    def __init__(self, api_keys: List[str], max_concurrency: int = 2, **options):
+        super().__init__(api_keys, "SerpAPI", max_concurrency, **options)
+    
+    def _do_search(self, query: str, api_key: str, max_results: int, recency_days: int) -> SearchResponse:
+        """执行 SerpAPI 搜索（百度引擎不支持时间范围参数，recency_days 忽略）"""
         try:
-            from serpapi import GoogleSearch
+            import requests  # noqa: F401
         except ImportError:
             return SearchResponse(
                 query=query,
                 results=[],
                 provider=self.name,
                 success=False,
-                error_message="google-search-results 未安装，请运行: pip install google-search-results"
+                error_message="requests 未安装，请运行: pip install requests"
             )
         
         try:
@@ -295,10 +477,27 @@ class SerpAPISearchProvider(BaseSearchProvider):
                 "engine": "baidu",  # 使用百度搜索
                 "q": query,
                 "api_key": api_key,
+                "output": "json",
             }
             
-            search = GoogleSearch(params)
-            response = search.get_dict()
+            # 直接请求 JSON 接口以复用该 Key 的连接池（google-search-results 每次请求都新建连接）
+            http_response = self._get_session(api_key).get(self.API_URL, params=params, timeout=self._timeout)
+            response = http_response.json()
+            if response.get('error'):
+                error_msg = response['error']
+                status_code = http_response.status_code if http_response.status_code != 200 else None
+                # 月度额度用尽时 SerpAPI 同样返回 429，按套餐额度用尽处理而不是短暂冷却
+                if 'run out of searches' in error_msg.lower():
+                    status_code = 432
+                return SearchResponse(
+                    query=query,
+                    results=[],
+                    provider=self.name,
+                    success=False,
+                    error_message=error_msg,
+                    status_code=status_code,
+                    retry_after=_parse_retry_after(http_response.headers.get('Retry-After'))
+                )
             
             # 记录原始响应到日志
             logger.debug(f"[SerpAPI] 原始响应 keys: {response.keys()}")
@@ -324,7 +523,8 @@ class SerpAPISearchProvider(BaseSearchProvider):
             )
             
         except Exception as e:
-            error_msg = str(e)
+            # 请求地址中带有 API Key，避免写入日志
+            error_msg = str(e).replace(api_key, "***")
             return SearchResponse(
                 query=query,
                 results=[],
@@ -357,10 +557,23 @@ class BochaSearchProvider(BaseSearchProvider):
     文档：https://bocha-ai.feishu.cn/wiki/RXEOw02rFiwzGSkd9mUcqoeAnNK
     """
     
-    def __init__(self, api_keys: List[str]):
-        super().__init__(api_keys, "Bocha")
+    def __init__(self, api_keys: List[str], max_concurrency: int = 2, **options):
+        super().__init__(api_keys, "Bocha", max_concurrency, **options)
+    
+    @staticmethod
+    def _freshness(recency_days: int) -> str:
+        """将天数映射为博查的 freshness 取值"""
+        if recency_days <= 1:
+            return "oneDay"
+        if recency_days <= 7:
+            return "oneWeek"
+        if recency_days <= 31:
+            return "oneMonth"
+        if recency_days <= 366:
+            return "oneYear"
+        return "noLimit"
     
-    def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
+    def _do_search(self, query: str, api_key: str, max_results: int, recency_days: int) -> SearchResponse:
         """执行博查搜索"""
         try:
             import requests
@@ -386,13 +599,13 @@ class BochaSearchProvider(BaseSearchProvider):
             # 请求参数（严格按照API文档）
             payload = {
                 "query": query,
-                "freshness": "oneMonth",  # 搜索近一个月，适合捕获财报、公告等信息
+                "freshness": self._freshness(recency_days),
                 "summary": True,  # 启用AI摘要
                 "count": min(max_results, 50)  # 最大50条
             }
             
-            # 执行搜索
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            # 执行搜索（复用该 Key 的长连接会话）
+            response = self._get_session(api_key).post(url, headers=headers, json=payload, timeout=self._timeout)
             
             # 检查HTTP状态码
             if response.status_code != 200:
@@ -425,7 +638,9 @@ class BochaSearchProvider(BaseSearchProvider):
                     results=[],
                     provider=self.name,
                     success=False,
-                    error_message=error_msg
+                    error_message=error_msg,
+                    status_code=response.status_code,
+                    retry_after=_parse_retry_after(response.headers.get('Retry-After'))
                 )
             
             # 解析响应
@@ -538,13 +753,54 @@ class SearchService:
     1. 管理多个搜索引擎
     2. 自动故障转移
     3. 结果聚合和格式化
+    4. 按规范化查询缓存搜索结果（与搜索引擎无关，跨运行持久化）
     """
     
+    # 各类查询的缓存有效期（秒）：新闻时效性越强，有效期越短
+    CACHE_TTL = {
+        'stock_news': 2 * 3600,
+        'stock_events': 12 * 3600,
+        'latest_news': 2 * 3600,
+        'risk_check': 12 * 3600,
+        'earnings': 24 * 3600,
+        'policy_macro': 24 * 3600,
+        'industry_analysis': 72 * 3600,
+        'capital_flow': 4 * 3600,
+    }
+    
+    # 各搜索引擎免费版每个 Key 的月度额度（博查按量付费，不限）
+    DEFAULT_MONTHLY_QUOTAS = {'Bocha': 0, 'Tavily': 1000, 'SerpAPI': 100}
+    
+    # 每个情报维度向搜索引擎请求的条数（去重排序后保留 intel_top_k 条）
+    INTEL_RESULTS_PER_DIMENSION = 5
+    
+    # 来自本地新闻索引的响应使用的 provider 名称
+    LOCAL_INDEX_PROVIDER = "LocalIndex"
+    
     def __init__(
         self,
         bocha_keys: Optional[List[str]] = None,
         tavily_keys: Optional[List[str]] = None,
         serpapi_keys: Optional[List[str]] = None,
+        provider_concurrency: int = 2,
+        intel_deadline: float = 20.0,
+        cache_enabled: bool = True,
+        cache_path: Optional[str] = None,
+        cache_max_entries: int = 1000,
+        http_pool_size: int = 4,
+        http_timeout: float = 10.0,
+        http_connect_timeout: float = 5.0,
+        intel_top_k: int = 3,
+        monthly_quotas: Optional[Dict[str, int]] = None,
+        quota_reserve: float = 0.05,
+        key_usage_path: Optional[str] = None,
+        provider_timeouts: Optional[Dict[str, float]] = None,
+        news_deadline: float = 15.0,
+        hedge_delay: float = 3.0,
+        news_min_results: int = 3,
+        news_index_enabled: bool = True,
+        news_index_path: Optional[str] = None,
+        news_index_retention_days: int = 90,
     ):
         """
         初始化搜索服务
@@ -553,23 +809,63 @@ class SearchService:
             bocha_keys: 博查搜索 API Key 列表
             tavily_keys: Tavily API Key 列表
             serpapi_keys: SerpAPI Key 列表
+            provider_concurrency: 每个搜索引擎的最大并发请求数
+            intel_deadline: 多维度情报搜索的总时限（秒），超时返回已完成的部分结果
+            cache_enabled: 是否启用搜索结果缓存
+            cache_path: 缓存持久化文件路径（None 表示仅在内存中缓存）
+            cache_max_entries: 缓存最大条目数（LRU 淘汰）
+            http_pool_size: 每个 API Key 的 HTTP 连接池大小
+            http_timeout: 单次搜索请求的读取超时（秒）
+            http_connect_timeout: 建立连接的超时（秒）
+            intel_top_k: 情报去重排序后每个维度保留的条数
+            monthly_quotas: 各搜索引擎每个 Key 的月度额度 {引擎名称: 次数}，0 表示不限
+            quota_reserve: 保留额度比例，低于该比例时优先使用其他搜索引擎
+            key_usage_path: Key 用量持久化文件路径（None 表示仅在内存中记录）
+            provider_timeouts: 各搜索引擎的读取超时 {引擎名称: 秒}，未指定的使用 http_timeout
+            news_deadline: 单次股票新闻搜索（含故障转移）的总时限（秒）
+            hedge_delay: 当前引擎超过该时间仍未返回时并发启动下一个引擎（秒，0 表示不对冲）
+            news_min_results: 股票新闻搜索结果达到该条数即返回，不再等待其他引擎
+            news_index_enabled: 是否启用本地新闻索引
+            news_index_path: 新闻索引数据库路径（None 表示仅在内存中索引）
+            news_index_retention_days: 新闻索引保留天数
         """
         self._providers: List[BaseSearchProvider] = []
+        self.intel_deadline = intel_deadline
+        self.intel_top_k = intel_top_k
+        self.news_deadline = news_deadline
+        self.hedge_delay = hedge_delay
+        self.news_min_results = news_min_results
+        self._cache = SearchCache(cache_path, cache_max_entries) if cache_enabled else None
+        self._news_index = NewsIndex(news_index_path, news_index_retention_days) if news_index_enabled else None
+        self._index_hits = 0
+        self._index_misses = 0
+        quotas = dict(self.DEFAULT_MONTHLY_QUOTAS, **(monthly_quotas or {}))
+        self._usage_store = usage_store = KeyUsageStore(key_usage_path)
+        
+        def options(name: str) -> Dict[str, Any]:
+            return {
+                'pool_size': http_pool_size,
+                'timeout': (provider_timeouts or {}).get(name, http_timeout),
+                'connect_timeout': http_connect_timeout,
+                'monthly_quota': quotas.get(name, 0),
+                'quota_reserve': quota_reserve,
+                'usage_store': usage_store,
+            }
         
         # 初始化搜索引擎（按优先级排序）
         # 1. Bocha 优先（中文搜索优化，AI摘要）
         if bocha_keys:
-            self._providers.append(BochaSearchProvider(bocha_keys))
+            self._providers.append(BochaSearchProvider(bocha_keys, provider_concurrency, **options("Bocha")))
             logger.info(f"已配置 Bocha 搜索，共 {len(bocha_keys)} 个 API Key")
         
         # 2. Tavily（免费额度更多，每月 1000 次）
         if tavily_keys:
-            self._providers.append(TavilySearchProvider(tavily_keys))
+            self._providers.append(TavilySearchProvider(tavily_keys, provider_concurrency, **options("Tavily")))
             logger.info(f"已配置 Tavily 搜索，共 {len(tavily_keys)} 个 API Key")
         
         # 3. SerpAPI 作为备选（每月 100 次）
         if serpapi_keys:
-            self._providers.append(SerpAPISearchProvider(serpapi_keys))
+            self._providers.append(SerpAPISearchProvider(serpapi_keys, provider_concurrency, **options("SerpAPI")))
             logger.info(f"已配置 SerpAPI 搜索，共 {len(serpapi_keys)} 个 API Key")
         
         if not self._providers:
@@ -580,6 +876,244 @@ class SearchService:
         """检查是否有可用的搜索引擎"""
         return any(p.is_available for p in self._providers)
     
+    @property
+    def has_news_index(self) -> bool:
+        """是否启用了本地新闻索引（无可用搜索引擎时仍可从索引取材）"""
+        return self._news_index is not None
+    
+    def _ordered_providers(self) -> List[BaseSearchProvider]:
+        """
+        按额度状态排序的搜索引擎
+        
+        额度充足的引擎在前（保持配置的优先级），只剩保留额度的在后；
+        所有 Key 都在冷却或额度用尽的引擎不参与，避免浪费一次失败的请求。
+        """
+        available = [p for p in self._providers if p.is_available]
+        healthy = [p for p in available if p.has_capacity()]
+        reserve = [p for p in available if p not in healthy and p.has_capacity(use_reserve=True)]
+        return healthy + reserve
+    
+    def _get_cached(self, query: str, max_results: int, recency_days: int) -> Optional[SearchResponse]:
+        """查询缓存，命中时返回 SearchResponse"""
+        if self._cache is None:
+            return None
+        data = self._cache.get(SearchCache.make_key(query, recency_days, max_results))
+        if data is None:
+            return None
+        logger.info(f"[搜索缓存] 命中 '{query}' ({data.get('provider')}, {len(data.get('results', []))} 条)")
+        return SearchResponse.from_dict(data)
+    
+    def _put_cached(
+        self,
+        response: SearchResponse,
+        max_results: int,
+        recency_days: int,
+        cache_kind: str
+    ) -> None:
+        """写入缓存（只缓存有结果的成功响应）"""
+        if self._cache is None or not response.success or not response.results or response.cached:
+            return
+        ttl = self.CACHE_TTL.get(cache_kind, 0)
+        self._cache.put(SearchCache.make_key(response.query, recency_days, max_results), response.to_dict(), ttl)
+    
+    def _search_with_cache(
+        self,
+        provider: BaseSearchProvider,
+        query: str,
+        max_results: int,
+        recency_days: int,
+        cache_kind: str,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None
+    ) -> SearchResponse:
+        """先查缓存，未命中再调用指定搜索引擎（该引擎额度紧张时换用其他引擎），结果写入本地新闻索引"""
+        cached = self._get_cached(query, max_results, recency_days)
+        if cached is not None:
+            return cached
+        if not provider.has_capacity():
+            ordered = self._ordered_providers()
+            if ordered and ordered[0] is not provider:
+                logger.info(f"[Key调度] {provider.name} 额度紧张或冷却中，改用 {ordered[0].name}")
+                provider = ordered[0]
+        response = provider.search(query, max_results, recency_days)
+        self._put_cached(response, max_results, recency_days, cache_kind)
+        self._index_response(response, stock_code, stock_name)
+        return response
+    
+    def _index_response(
+        self,
+        response: SearchResponse,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None
+    ) -> None:
+        """将搜索引擎返回的结果写入本地新闻索引（缓存、索引、新闻池的结果已入库，跳过）"""
+        if self._news_index is None or not response.success or not response.results or response.cached:
+            return
+        if response.provider in (self.LOCAL_INDEX_PROVIDER, "NewsPool"):
+            return
+        try:
+            self._news_index.add(response.results, response.provider, response.query, stock_code, stock_name)
+        except Exception as e:
+            logger.warning(f"[新闻索引] 写入失败: {e}")
+    
+    def _search_local(
+        self,
+        query: str,
+        stock_code: str,
+        stock_name: str,
+        keywords: Optional[List[str]],
+        recency_days: int,
+        cache_kind: str,
+        offline: bool = False
+    ) -> Optional[SearchResponse]:
+        """
+        从本地新闻索引查找提到该股票的结果
+        
+        在线时只采用该类查询有效期（CACHE_TTL）内抓取、且在 recency_days 天内发布的
+        结果，条数不少于 intel_top_k 才视为命中，否则由付费搜索补齐新鲜度；
+        离线（没有可用搜索引擎）时不限时间，有结果即返回。
+        
+        Args:
+            query: 原始查询（用于 SearchResponse）
+            stock_code: 股票代码
+            stock_name: 股票名称
+            keywords: 关键词（命中任一，None 表示只按股票匹配）
+            recency_days: 只采用最近 N 天发布的结果
+            cache_kind: 查询类型（决定抓取时间的有效期）
+            offline: 是否为离线模式
+            
+        Returns:
+            命中时返回 provider 为 LocalIndex 的 SearchResponse，否则 None
+        """
+        if self._news_index is None:
+            return None
+        start = time.time()
+        try:
+            items = self._news_index.search(
+                stock_code=stock_code,
+                stock_name=stock_name,
+                keywords=keywords,
+                max_age=None if offline else self.CACHE_TTL.get(cache_kind, 0),
+                published_within_days=None if offline else recency_days,
+                limit=self.INTEL_RESULTS_PER_DIMENSION,
+            )
+        except Exception as e:
+            logger.warning(f"[新闻索引] 查询失败: {e}")
+            return None
+        
+        if not items or (not offline and len(items) < self.intel_top_k):
+            self._index_misses += 1
+            return None
+        self._index_hits += 1
+        logger.info(f"[新闻索引] {'离线' if offline else '命中'} '{query}': 本地 {len(items)} 条结果")
+        return SearchResponse(
+            query=query,
+            results=[
+                SearchResult(
+                    title=item['title'],
+                    snippet=item['snippet'],
+                    url=item['url'] or '',
+                    source=item['source'] or '',
+                    published_date=item['published_date'],
+                )
+                for item in items
+            ],
+            provider=self.LOCAL_INDEX_PROVIDER,
+            search_time=time.time() - start,
+        )
+    
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各搜索引擎的耗时统计
+        
+        Returns:
+            {引擎名称: {'count', 'p50', 'p95', 'max'}}
+        """
+        return {p.name: p.get_latency_stats() for p in self._providers}
+    
+    def log_latency_summary(self) -> None:
+        """输出各搜索引擎的 p50/p95 耗时与 Key 本月用量（运行结束时调用）"""
+        for name, stats in self.get_latency_stats().items():
+            if stats['count']:
+                logger.info(
+                    f"[搜索耗时] {name}: {stats['count']} 次, p50 {stats['p50']:.2f}s, "
+                    f"p95 {stats['p95']:.2f}s, 最大 {stats['max']:.2f}s"
+                )
+        for provider in self._providers:
+            usage = ', '.join(
+                f"{u['key']} {u['used']}/{u['quota'] or '不限'}" + (' (已用尽)' if u['exhausted'] else '')
+                for u in provider.get_key_usage()
+            )
+            if usage:
+                logger.info(f"[Key调度] {provider.name} 本月用量: {usage}")
+    
+    def collect_metrics(self) -> List[tuple]:
+        """
+        Key 用量与缓存命中的当前值（/metrics 采集时调用）
+
+        Returns:
+            metrics.MetricsRegistry.register_collector 约定的指标列表
+        """
+        used, quota = [], []
+        for provider in self._providers:
+            for u in provider.get_key_usage():
+                # /metrics 无需鉴权，标签只用哈希标识，不暴露 Key 前缀
+                labels = {'provider': provider.name, 'key': u['key_id']}
+                used.append((labels, u['used']))
+                quota.append((labels, u['quota'] or 0))
+        families = [
+            ('dsa_search_key_used', 'gauge', '搜索 API Key 本月已用次数', used),
+            ('dsa_search_key_quota', 'gauge', '搜索 API Key 每月额度（0 表示不限）', quota),
+        ]
+
+        hits, misses = [], []
+        if self._cache is not None:
+            stats = self._cache.stats()
+            hits.append(({'cache': 'search'}, stats['hits']))
+            misses.append(({'cache': 'search'}, stats['misses']))
+        if self._news_index is not None:
+            hits.append(({'cache': 'news_index'}, self._index_hits))
+            misses.append(({'cache': 'news_index'}, self._index_misses))
+        ratio = [
+            (labels, h / (h + m) if h + m else 0.0)
+            for (labels, h), (_, m) in zip(hits, misses)
+        ]
+        families += [
+            ('dsa_cache_hits', 'gauge', '缓存命中次数（本进程）', hits),
+            ('dsa_cache_misses', 'gauge', '缓存未命中次数（本进程）', misses),
+            ('dsa_cache_hit_ratio', 'gauge', '缓存命中率', ratio),
+        ]
+        return families
+
+    def close(self) -> None:
+        """关闭各搜索引擎的连接会话，写回搜索缓存与 Key 用量（组件重建时调用）"""
+        for provider in self._providers:
+            provider.close()
+        if self._cache is not None:
+            self._cache.close()
+        self._usage_store.close()
+        if self._news_index is not None:
+            self._news_index.close()
+    
+    def flush_cache(self) -> None:
+        """将搜索缓存写入磁盘并输出缓存、本地新闻索引的命中统计（运行结束时调用）"""
+        if self._cache is not None:
+            self._cache.flush()
+            stats = self._cache.stats()
+            if stats['hits'] or stats['misses']:
+                logger.info(
+                    f"[搜索缓存] 命中 {stats['hits']}/{stats['hits'] + stats['misses']} "
+                    f"({stats['hit_rate']:.0%})，当前 {stats['entries']} 条"
+                )
+        if self._news_index is not None:
+            stats = self._news_index.stats()
+            lookups = self._index_hits + self._index_misses
+            if lookups or stats['added']:
+                logger.info(
+                    f"[新闻索引] 命中 {self._index_hits}/{lookups}，"
+                    f"本次新增 {stats['added']} 条，共 {stats['items']} 条"
+                )
+    
     def search_stock_news(
         self,
         stock_code: str,
@@ -590,43 +1124,50 @@ class SearchService:
         """
         搜索股票相关新闻
         
+        按优先级尝试各搜索引擎，总耗时不超过 news_deadline：当前引擎失败时立即
+        换下一个；超过 hedge_delay 仍未返回时并发启动下一个引擎（对冲请求），
+        先返回不少于 news_min_results 条结果的引擎胜出。都不足时返回结果最多的一个。
+        
         Args:
             stock_code: 股票代码
             stock_name: 股票名称
             max_results: 最大返回结果数
-            focus_keywords: 重点关注的关键词列表
+            focus_keywords: 重点关注的关键词列表（传入时查询由股票名称 + 关键词组成）
             
         Returns:
             SearchResponse 对象
         """
-        # 默认重点关注关键词（基于交易理念）
-        if focus_keywords is None:
-            focus_keywords = [
-                "年报预告", "业绩预告", "业绩快报",  # 业绩相关
-                "减持", "增持", "回购",              # 股东动向
-                "机构调研", "机构评级",              # 机构动向
-                "利好", "利空",                      # 消息面
-                "合同", "订单", "中标",              # 业务进展
-            ]
-        
         # 构建搜索查询（优化搜索效果）
-        # 主查询：股票名称 + 核心关键词
-        query = f"{stock_name} {stock_code} 股票 最新消息"
+        if focus_keywords:
+            # 指定关键词：股票名称 + 关键词（关键词已包含名称时不重复）
+            terms = list(focus_keywords)
+            if stock_name not in terms:
+                terms.insert(0, stock_name)
+            query = " ".join(terms)
+        else:
+            # 主查询：股票名称 + 核心关键词
+            query = f"{stock_name} {stock_code} 股票 最新消息"
         
-        logger.info(f"搜索股票新闻: {stock_name}({stock_code})")
+        logger.info(f"搜索股票新闻: {stock_name}({stock_code}) - '{query}'")
         
-        # 依次尝试各个搜索引擎
-        for provider in self._providers:
-            if not provider.is_available:
-                continue
-            
-            response = provider.search(query, max_results)
-            
-            if response.success and response.results:
-                logger.info(f"使用 {provider.name} 搜索成功")
-                return response
-            else:
-                logger.warning(f"{provider.name} 搜索失败: {response.error_message}，尝试下一个引擎")
+        cached = self._get_cached(query, max_results, recency_days=7)
+        if cached is not None:
+            return cached
+        
+        # 本地新闻索引中已有足够新的结果时不调用付费搜索
+        providers = self._ordered_providers()
+        local = self._search_local(
+            query, stock_code, stock_name, focus_keywords, 7, 'stock_news', offline=not providers
+        )
+        if local is not None:
+            return local
+        
+        # 依次尝试各个搜索引擎（额度紧张的排在后面），超时对冲 + 总时限
+        response = self._search_with_failover(query, providers, max_results, 7, stock_code, stock_name)
+        if response is not None:
+            logger.info(f"使用 {response.provider} 搜索成功")
+            self._put_cached(response, max_results, 7, 'stock_news')
+            return response
         
         # 所有引擎都失败
         return SearchResponse(
@@ -637,6 +1178,95 @@ class SearchService:
             error_message="所有搜索引擎都不可用或搜索失败"
         )
     
+    def _search_with_failover(
+        self,
+        query: str,
+        providers: List[BaseSearchProvider],
+        max_results: int,
+        recency_days: int,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None
+    ) -> Optional[SearchResponse]:
+        """
+        带总时限、对冲请求和提前返回的故障转移搜索
+        
+        - 引擎返回失败或空结果时立即启动下一个引擎
+        - 最近启动的引擎超过 hedge_delay 未返回时并发启动下一个引擎
+        - 任一引擎返回不少于 news_min_results 条结果即返回，不等待其他引擎
+        - 到达 news_deadline 时返回已有的最佳结果，未完成的请求在后台结束后丢弃
+        
+        每个引擎的耗时与结果记录在一行日志中。
+        
+        Returns:
+            结果最多的成功响应，没有成功响应时返回 None
+        """
+        if not providers:
+            return None
+        
+        start = time.time()
+        deadline_at = start + self.news_deadline
+        queue = list(providers)
+        executor = ThreadPoolExecutor(max_workers=len(queue), thread_name_prefix="news")
+        pending: Dict[Any, tuple] = {}
+        timings: List[str] = []
+        best: Optional[SearchResponse] = None
+        last_launch = start
+        
+        def launch(reason: str = '') -> None:
+            nonlocal last_launch
+            provider = queue.pop(0)
+            last_launch = time.time()
+            if reason:
+                logger.info(f"[新闻搜索] {reason}，启动 {provider.name}")
+            pending[executor.submit(provider.search, query, max_results, recency_days)] = (provider, last_launch)
+        
+        launch()
+        while pending:
+            now = time.time()
+            if now >= deadline_at:
+                break
+            timeout = deadline_at - now
+            hedging = queue and self.hedge_delay > 0
+            if hedging:
+                timeout = min(timeout, max(0.0, last_launch + self.hedge_delay - now))
+            
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if hedging and time.time() < deadline_at:
+                    running = ', '.join(p.name for p, _ in pending.values())
+                    launch(f"{running} 超过 {self.hedge_delay:g}s 未返回")
+                continue
+            
+            enough = False
+            for future in done:
+                provider, started = pending.pop(future)
+                response = future.result()
+                elapsed = time.time() - started
+                if response.success and response.results:
+                    timings.append(f"{provider.name} {elapsed:.2f}s {len(response.results)} 条")
+                    self._index_response(response, stock_code, stock_name)
+                    if best is None or len(response.results) > len(best.results):
+                        best = response
+                    enough = enough or len(response.results) >= self.news_min_results
+                else:
+                    timings.append(f"{provider.name} {elapsed:.2f}s 失败")
+                    logger.warning(f"{provider.name} 搜索失败: {response.error_message}，尝试下一个引擎")
+            if enough:
+                break
+            if not pending and queue:
+                launch()
+        
+        for provider, started in pending.values():
+            timings.append(f"{provider.name} {time.time() - started:.2f}s 未完成")
+        # 不等待未完成的请求：线程在后台自然结束（受各引擎的读取超时约束），结果丢弃
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        elapsed = time.time() - start
+        if pending and elapsed >= self.news_deadline:
+            logger.warning(f"[新闻搜索] '{query}' 超过总时限 {self.news_deadline:g}s")
+        logger.info(f"[新闻搜索] '{query}' 耗时 {elapsed:.2f}s: {'; '.join(timings)}")
+        return best
+    
     def search_stock_events(
         self,
         stock_code: str,
@@ -665,14 +1295,24 @@ class SearchService:
         
         logger.info(f"搜索股票事件: {stock_name}({stock_code}) - {event_types}")
         
-        # 依次尝试各个搜索引擎
-        for provider in self._providers:
-            if not provider.is_available:
-                continue
-            
-            response = provider.search(query, max_results=5)
+        cached = self._get_cached(query, 5, recency_days=30)
+        if cached is not None:
+            return cached
+        
+        providers = self._ordered_providers()
+        local = self._search_local(
+            query, stock_code, stock_name, event_types, 30, 'stock_events', offline=not providers
+        )
+        if local is not None:
+            return local
+        
+        # 依次尝试各个搜索引擎（额度紧张的排在后面）
+        for provider in providers:
+            response = provider.search(query, max_results=5, recency_days=30)
             
             if response.success:
+                self._put_cached(response, 5, 30, 'stock_events')
+                self._index_response(response, stock_code, stock_name)
                 return response
         
         return SearchResponse(
@@ -687,7 +1327,10 @@ class SearchService:
         self,
         stock_code: str,
         stock_name: str,
-        max_searches: int = 3
+        max_searches: int = 3,
+        deadline: Optional[float] = None,
+        news_pool: Optional[NewsPool] = None,
+        industry: Optional[str] = None
     ) -> Dict[str, SearchResponse]:
         """
         多维度情报搜索（同时使用多个引擎、多个维度）
@@ -696,85 +1339,237 @@ class SearchService:
         1. 最新消息 - 近期新闻动态
         2. 风险排查 - 减持、处罚、利空
         3. 业绩预期 - 年报预告、业绩快报
+        4. 政策宏观 / 行业分析 / 资金流向
+        
+        各维度轮流分配给可用的搜索引擎并发执行（每个引擎受并发上限约束），
+        总耗时约等于最慢的一次搜索；超过 deadline 仍未完成的维度返回失败的
+        SearchResponse，已完成的结果照常返回。命中缓存的维度不消耗搜索额度。
+        
+        传入 news_pool 和 industry 时，「政策宏观」「行业分析」改为行业级查询，
+        同一行业的股票在本次运行中只搜索一次；其他维度先从池中查找提到该股票的
+        结果，足够 intel_top_k 条时不再搜索。
+        
+        每个维度先查本地新闻索引（有效期内抓取的结果足够 intel_top_k 条时不再搜索），
+        没有可用的搜索引擎时改为离线模式，只使用本地新闻索引中的历史结果。
         
         Args:
             stock_code: 股票代码
             stock_name: 股票名称
             max_searches: 最大搜索次数
+            deadline: 总时限（秒），默认使用初始化时的 intel_deadline
+            news_pool: 本次运行的共享新闻池（可选）
+            industry: 所属行业（可选，用于行业级查询）
             
         Returns:
-            {维度名称: SearchResponse} 字典
+            {维度名称: SearchResponse} 字典（按维度定义顺序）
         """
-        results = {}
-        search_count = 0
+        deadline = self.intel_deadline if deadline is None else deadline
         
-        # 定义搜索维度
+        # 定义搜索维度（days: 只搜索最近 N 天，同时作为缓存键的一部分）
         search_dimensions = [
             {
                 'name': 'latest_news',
                 'query': f"{stock_name} {stock_code} 最新 新闻 2026年1月",
-                'desc': '最新消息'
+                'desc': '最新消息',
+                'days': 7
             },
             {
                 'name': 'risk_check', 
                 'query': f"{stock_name} 减持 处罚 利空 风险",
-                'desc': '风险排查'
+                'desc': '风险排查',
+                'days': 30
             },
             {
                 'name': 'earnings',
                 'query': f"{stock_name} 年报预告 业绩预告 业绩快报 2025年报",
-                'desc': '业绩预期'
+                'desc': '业绩预期',
+                'days': 30
             },
             {
                 'name': 'policy_macro',
                 'query': f"{stock_name} 行业政策 宏观利好 国家规划 监管",
-                'desc': '政策宏观'
+                'industry_query': f"{industry} 行业政策 宏观利好 国家规划 监管",
+                'desc': '政策宏观',
+                'days': 30
             },
             {
                 'name': 'industry_analysis',
                 'query': f"{stock_name} 行业地位 竞争对手 市场份额",
-                'desc': '行业分析'
+                'industry_query': f"{industry} 行业 景气度 竞争格局 龙头",
+                'desc': '行业分析',
+                'days': 30
             },
             {
                 'name': 'capital_flow',
                 'query': f"{stock_name} 主力资金 龙虎榜 北向资金",
-                'desc': '资金流向'
+                'desc': '资金流向',
+                'days': 7
             },
         ]
         
-        logger.info(f"开始多维度情报搜索: {stock_name}({stock_code})")
+        available_providers = self._ordered_providers()
+        if not available_providers:
+            if self._news_index is None:
+                logger.warning(f"[情报搜索] 没有可用的搜索引擎（额度用尽或冷却中），跳过 {stock_name}")
+                return {}
+            return self._search_intel_offline(stock_code, stock_name, search_dimensions[:max_searches])
         
         # 轮流使用不同的搜索引擎
-        provider_index = 0
+        assignments = [
+            (dim, available_providers[i % len(available_providers)])
+            for i, dim in enumerate(search_dimensions[:max_searches])
+        ]
+        if not assignments:
+            # max_searches <= 0：没有要搜索的维度（线程池不接受 0 个线程）
+            return {}
         
-        for dim in search_dimensions:
-            if search_count >= max_searches:
-                break
+        logger.info(f"开始多维度情报搜索: {stock_name}({stock_code})，{len(assignments)} 个维度并发，时限 {deadline:g}s")
+        start_time = time.time()
+        
+        executor = ThreadPoolExecutor(max_workers=len(assignments), thread_name_prefix="intel")
+        tracer = get_tracer()
+        futures = {}
+        pooled: Dict[str, SearchResponse] = {}
+        for dim, provider in assignments:
+            industry_level = news_pool is not None and bool(industry) and 'industry_query' in dim
+            if industry_level:
+                dim['query'] = dim['industry_query']
+            search_args = (provider, dim['query'], self.INTEL_RESULTS_PER_DIMENSION, dim['days'], dim['name'])
             
-            # 选择搜索引擎（轮流使用）
-            available_providers = [p for p in self._providers if p.is_available]
-            if not available_providers:
-                break
+            if industry_level:
+                # 行业级查询：同一行业只搜索一次，其余股票直接复用
+                logger.info(f"[情报搜索] {dim['desc']}: 行业级查询 '{industry}'，使用 {provider.name}")
+                futures[dim['name']] = executor.submit(
+                    tracer.traced(f"search.{dim['name']}", news_pool.get_or_fetch, provider=provider.name),
+                    industry, dim['name'],
+                    lambda args=search_args: self._search_with_cache(*args)
+                )
+                continue
             
-            provider = available_providers[provider_index % len(available_providers)]
-            provider_index += 1
+            keywords = self._dimension_keywords(dim, stock_code, stock_name)
+            if news_pool is not None:
+                hits = news_pool.lookup([stock_name, stock_code], keywords, limit=self.intel_top_k)
+                if hits and len(hits) >= self.intel_top_k:
+                    logger.info(f"[情报搜索] {dim['desc']}: 新闻池中已有 {len(hits)} 条相关结果，跳过搜索")
+                    pooled[dim['name']] = SearchResponse(query=dim['query'], results=hits, provider="NewsPool")
+                    continue
             
-            logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
+            local = self._search_local(dim['query'], stock_code, stock_name, keywords, dim['days'], dim['name'])
+            if local is not None:
+                pooled[dim['name']] = local
+                continue
             
-            response = provider.search(dim['query'], max_results=3)
+            logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
+            futures[dim['name']] = executor.submit(
+                tracer.traced(f"search.{dim['name']}", self._search_with_cache, provider=provider.name),
+                *search_args, stock_code=stock_code, stock_name=stock_name
+            )
+        
+        wait(futures.values(), timeout=deadline)
+        # 不等待超时的请求：线程在后台自然结束，结果丢弃
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        results = {}
+        timed_out = []
+        for dim, provider in assignments:
+            future = futures.get(dim['name'])
+            if future is None:
+                response = pooled[dim['name']]
+            elif future.done() and not future.cancelled():
+                response = future.result()
+            else:
+                timed_out.append(dim['desc'])
+                response = SearchResponse(
+                    query=dim['query'],
+                    results=[],
+                    provider=provider.name,
+                    success=False,
+                    error_message=f"超过情报搜索总时限 {deadline:g}s",
+                    search_time=time.time() - start_time,
+                )
             results[dim['name']] = response
-            search_count += 1
             
             if response.success:
                 logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
             else:
                 logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
-            
-            # 短暂延迟避免请求过快
-            time.sleep(0.5)
         
+        elapsed = time.time() - start_time
+        if timed_out:
+            logger.warning(f"[情报搜索] {stock_name} 超时未完成的维度: {', '.join(timed_out)}，返回部分结果")
+        logger.info(f"[情报搜索] {stock_name} 完成，耗时 {elapsed:.2f}s")
+        
+        return results
+    
+    @staticmethod
+    def _dimension_keywords(dim: Dict[str, Any], stock_code: str, stock_name: str) -> Optional[List[str]]:
+        """情报维度在新闻池 / 本地索引中匹配用的关键词（「最新消息」只按股票匹配）"""
+        if dim['name'] == 'latest_news':
+            return None
+        return [t for t in dim['query'].split() if t not in (stock_name, stock_code)]
+    
+    def _search_intel_offline(
+        self,
+        stock_code: str,
+        stock_name: str,
+        dimensions: List[Dict[str, Any]]
+    ) -> Dict[str, SearchResponse]:
+        """
+        离线情报：没有可用搜索引擎时从本地新闻索引取各维度的历史结果
+        
+        Returns:
+            {维度名称: SearchResponse}，只包含有结果的维度
+        """
+        logger.info(f"[情报搜索] 没有可用的搜索引擎，{stock_name} 使用本地新闻索引（离线模式）")
+        results = {}
+        for dim in dimensions:
+            keywords = self._dimension_keywords(dim, stock_code, stock_name)
+            local = self._search_local(
+                dim['query'], stock_code, stock_name, keywords, dim['days'], dim['name'], offline=True
+            )
+            if local is not None:
+                results[dim['name']] = local
+        logger.info(f"[情报搜索] {stock_name} 离线模式命中 {len(results)}/{len(dimensions)} 个维度")
         return results
     
+    def rank_intel_results(
+        self,
+        intel_results: Dict[str, SearchResponse],
+        stock_code: str,
+        stock_name: str,
+        top_k: Optional[int] = None
+    ) -> Dict[str, SearchResponse]:
+        """
+        跨搜索引擎、跨维度去重，并按时效性 / 来源权威度 / 关键词匹配排序
+        
+        同一篇文章经常以不同 URL（转载、移动版、镜像站）出现在多个维度中，
+        在格式化为提示词之前统一去重，每个维度只保留得分最高的 top-K 条。
+        
+        Args:
+            intel_results: search_comprehensive_intel 的返回值
+            stock_code: 股票代码
+            stock_name: 股票名称
+            top_k: 每个维度保留的条数，默认使用初始化时的 intel_top_k
+            
+        Returns:
+            {维度名称: SearchResponse} 字典（results 为去重排序后的结果）
+        """
+        top_k = self.intel_top_k if top_k is None else top_k
+        ranked, stats = dedupe_and_rank(intel_results, stock_code, stock_name, top_k)
+        
+        output = {}
+        for dim_name, resp in intel_results.items():
+            if resp.success and resp.results:
+                resp = replace(resp, results=ranked.get(dim_name, []))
+            output[dim_name] = resp
+        
+        kept = sum(len(r) for r in ranked.values())
+        logger.info(
+            f"[情报去重] {stock_name}: {stats['total']} 条 -> {kept} 条 "
+            f"(重复 {stats['duplicates']}, 超出 top-{top_k} {stats['dropped']})"
+        )
+        return output
+    
     def format_intel_report(self, intel_results: Dict[str, SearchResponse], stock_name: str) -> str:
         """
         格式化情报搜索结果为报告
@@ -846,6 +1641,40 @@ class SearchService:
         
         return "\n".join(lines)
     
+    def collect_intel_items(
+        self,
+        intel_results: Dict[str, SearchResponse]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        将情报搜索结果整理为结构化条目（供提示词上下文预算使用）
+        
+        与 format_intel_report 不同，这里保留全部条目和完整摘要，
+        由 context_builder 按优先级去重、截断和取舍。
+        
+        Args:
+            intel_results: 多维度搜索结果
+            
+        Returns:
+            {维度名称: [{'title', 'snippet', 'date', 'source', 'url', 'provider'}]} 字典
+        """
+        items: Dict[str, List[Dict[str, Any]]] = {}
+        for dim_name, resp in intel_results.items():
+            if not resp.success or not resp.results:
+                items[dim_name] = []
+                continue
+            items[dim_name] = [
+                {
+                    'title': r.title,
+                    'snippet': r.snippet,
+                    'date': r.published_date,
+                    'source': r.source,
+                    'url': r.url,
+                    'provider': resp.provider,
+                }
+                for r in resp.results
+            ]
+        return items
+    
     def batch_search(
         self,
         stocks: List[Dict[str, str]],
@@ -894,6 +1723,29 @@ def get_search_service() -> SearchService:
             bocha_keys=config.bocha_api_keys,
             tavily_keys=config.tavily_api_keys,
             serpapi_keys=config.serpapi_keys,
+            provider_concurrency=config.search_provider_concurrency,
+            intel_deadline=config.search_intel_deadline,
+            cache_enabled=config.search_cache_enabled,
+            cache_path=config.search_cache_path,
+            cache_max_entries=config.search_cache_max_entries,
+            http_pool_size=config.search_http_pool_size,
+            http_timeout=config.search_http_timeout,
+            http_connect_timeout=config.search_http_connect_timeout,
+            intel_top_k=config.search_intel_top_k,
+            monthly_quotas={
+                'Bocha': config.bocha_monthly_quota,
+                'Tavily': config.tavily_monthly_quota,
+                'SerpAPI': config.serpapi_monthly_quota,
+            },
+            quota_reserve=config.search_quota_reserve,
+            key_usage_path=config.search_key_usage_path,
+            provider_timeouts=config.search_provider_timeouts,
+            news_deadline=config.search_news_deadline,
+            hedge_delay=config.search_hedge_delay,
+            news_min_results=config.search_news_min_results,
+            news_index_enabled=config.news_index_enabled,
+            news_index_path=config.news_index_path,
+            news_index_retention_days=config.news_index_retention_days,
         )
     
     return _search_service
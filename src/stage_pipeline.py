@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 分阶段流水线
+===================================
+
+职责：
+1. 把单只股票的处理拆成多个阶段，按依赖关系组成有向无环图（DAG）
+2. 每个阶段有独立的有界线程池和输入队列，阶段之间通过队列传递任务
+3. 阶段可设置每分钟调用上限（如 LLM 的 RPM）
+4. 统计各阶段的处理数、忙碌时间，找出瓶颈阶段
+5. 队列按任务优先级出队；到达截止时间后不再开始新的工作，剩余任务标记为延后
+
+旧实现在一个线程内按顺序执行 获取数据 → 实时行情 → 筹码 → 趋势 → 搜索 →
+F10 → LLM → 报告 → 推送，网络、CPU、LLM 阶段共用 max_workers=3 的线程池；
+拆分后各阶段同时按自己的上限满负荷运行，总耗时接近最慢的阶段而不是各阶段之和。
+"""
+
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from metrics import RATE_LIMIT_SLEEP
+
+logger = logging.getLogger(__name__)
+
+
+# 队列中表示「线程退出」的标记
+_STOP = object()
+
+
+class RateLimiter:
+    """
+    每分钟调用次数限制（线程安全，按最小间隔均匀放行）
+    """
+
+    def __init__(self, per_minute: float, name: str = ''):
+        """
+        Args:
+            per_minute: 每分钟最多调用次数（<=0 表示不限）
+            name: 限速器名称（等待时长按此名称计入指标）
+        """
+        self.name = name
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        等待到可以调用为止
+
+        Returns:
+            等待的秒数
+        """
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+            RATE_LIMIT_SLEEP.inc(delay, limiter=self.name)
+        return delay
+
+
+@dataclass
+class Stage:
+    """
+    流水线阶段
+
+    func(job) 处理一个任务；返回 False 表示任务到此为止（不再进入下游阶段），
+    抛出异常时记录到 job.error 并同样终止该任务。
+    """
+    name: str
+    func: Callable[[Any], Optional[bool]]
+    workers: int = 1
+    depends_on: Sequence[str] = ()
+    rate_per_minute: float = 0.0  # 每分钟最多处理的任务数（0 表示不限）
+    deferrable: bool = True  # 到达截止时间后不再开始该阶段（False：收尾阶段，已到达的任务仍会完成）
+
+
+@dataclass
+class StageJob:
+    """流经流水线的任务（业务数据由子类扩展）"""
+    key: str
+    priority: int = 0  # 越小越先处理
+    stage_times: Dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）
+    error: Optional[str] = None
+    stopped: bool = False  # 某阶段终止了该任务
+    deferred: bool = False  # 到达截止时间未完成，延后处理
+
+
+@dataclass
+class _StageStats:
+    processed: int = 0
+    errors: int = 0
+    busy: float = 0.0  # 处理耗时之和（秒）
+    throttled: float = 0.0  # 限速等待之和（秒）
+    deferred: int = 0  # 因截止时间未开始的任务数
+
+
+class StagedPipeline:
+    """
+    分阶段 DAG 流水线
+
+    任务先进入没有依赖的阶段；某阶段完成后，所有依赖都已完成的下游阶段
+    立即接收该任务，互不依赖的阶段可以对同一任务并行执行。阶段之间的
+    队列有界（queue_size > 0 时），下游积压时上游自动放慢。
+    
+    各阶段队列按 job.priority 出队（相同优先级先进先出）。设置截止时间后，
+    到期时正在执行的阶段照常完成，此后任务不再进入可延后的阶段，标记为 deferred。
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 0, name: str = "流水线"):
+        """
+        Args:
+            stages: 阶段列表（依赖须指向列表中已有的阶段）
+            queue_size: 每个阶段输入队列的容量（0 表示不限）
+            name: 日志中使用的名称
+        """
+        names = [s.name for s in stages]
+        for stage in stages:
+            unknown = [d for d in stage.depends_on if d not in names[:names.index(stage.name)]]
+            if unknown:
+                raise ValueError(f"阶段 {stage.name} 的依赖 {unknown} 不存在或未排在其前面")
+
+        self.stages = stages
+        self.name = name
+        self._downstream: Dict[str, List[Stage]] = {
+            s.name: [t for t in stages if s.name in t.depends_on] for s in stages
+        }
+        self._queue_size = max(0, queue_size)
+        self._stats: Dict[str, _StageStats] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self.elapsed = 0.0
+        self.deferred = 0
+
+    def run(self, jobs: List[StageJob], deadline: Optional[float] = None) -> List[StageJob]:
+        """
+        处理一批任务，全部结束（完成、被终止或延后）后返回
+
+        Args:
+            jobs: 任务列表（按 priority 优先进入流水线）
+            deadline: 截止时间（时间戳，可选）
+
+        Returns:
+            同一批任务（按完成顺序）
+        """
+        start = time.time()
+        self._stats = {s.name: _StageStats() for s in self.stages}
+        self._limiters = {s.name: RateLimiter(s.rate_per_minute, name=f"stage.{s.name}") for s in self.stages}
+        queues = {s.name: queue.PriorityQueue(maxsize=self._queue_size) for s in self.stages}
+        seq = itertools.count()  # 相同优先级按入队顺序
+        lock = threading.Lock()
+        all_done = threading.Condition(lock)
+        finished: List[StageJob] = []
+        # 每个任务：已完成的阶段、已进入的阶段、正在处理中的阶段数
+        completed: Dict[int, set] = {id(job): set() for job in jobs}
+        entered: Dict[int, set] = {id(job): set() for job in jobs}
+        inflight: Dict[int, int] = {id(job): 0 for job in jobs}
+
+        def enqueue(job: StageJob, stages: List[Stage]) -> None:
+            for stage in stages:
+                queues[stage.name].put((job.priority, next(seq), job))
+
+        def expired() -> bool:
+            return deadline is not None and time.time() >= deadline
+
+        def schedule(job: StageJob, done_stage: Optional[str]) -> List[Stage]:
+            """在锁内调用：记录完成的阶段，返回可以进入的下游阶段"""
+            key = id(job)
+            if done_stage is not None:
+                completed[key].add(done_stage)
+                inflight[key] -= 1
+            ready = []
+            if not job.stopped:
+                candidates = self._downstream[done_stage] if done_stage else [
+                    s for s in self.stages if not s.depends_on
+                ]
+                for stage in candidates:
+                    if stage.name not in entered[key] and all(d in completed[key] for d in stage.depends_on):
+                        entered[key].add(stage.name)
+                        ready.append(stage)
+            inflight[key] += len(ready)
+            if inflight[key] == 0:
+                finished.append(job)
+                all_done.notify_all()
+            return ready
+
+        def worker(stage: Stage) -> None:
+            stats = self._stats[stage.name]
+            limiter = self._limiters[stage.name]
+            stage_queue = queues[stage.name]
+            while True:
+                job = stage_queue.get()[2]
+                if job is _STOP:
+                    return
+                if job.stopped:
+                    # 并行的其他阶段已终止该任务
+                    with lock:
+                        ready = schedule(job, stage.name)
+                    enqueue(job, ready)
+                    continue
+                if stage.deferrable and expired():
+                    with lock:
+                        stats.deferred += 1
+                        job.deferred = job.stopped = True
+                        ready = schedule(job, stage.name)
+                    enqueue(job, ready)
+                    continue
+
+                throttled = limiter.acquire()
+                t0 = time.time()
+                ok, failed = True, False
+                try:
+                    ok = stage.func(job) is not False
+                except Exception as e:
+                    ok, failed = False, True
+                    job.error = f"{stage.name}: {e}"
+                    logger.exception(f"[{self.name}] {job.key} 阶段 {stage.name} 异常: {e}")
+                elapsed = time.time() - t0
+                with lock:
+                    job.stage_times[stage.name] = elapsed
+                    stats.processed += 1
+                    stats.errors += int(failed)
+                    stats.busy += elapsed
+                    stats.throttled += throttled
+                    if not ok:
+                        job.stopped = True
+                    ready = schedule(job, stage.name)
+                enqueue(job, ready)
+
+        threads = [
+            threading.Thread(target=worker, args=(stage,), name=f"stage-{stage.name}-{i}", daemon=True)
+            for stage in self.stages
+            for i in range(max(1, stage.workers))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for job in sorted(jobs, key=lambda j: j.priority):
+                with lock:
+                    if expired():
+                        job.deferred = job.stopped = True
+                    ready = schedule(job, None)
+                enqueue(job, ready)
+            with lock:
+                while len(finished) < len(jobs):
+                    all_done.wait()
+        finally:
+            for stage in self.stages:
+                for _ in range(max(1, stage.workers)):
+                    queues[stage.name].put((math.inf, next(seq), _STOP))
+            for thread in threads:
+                thread.join()
+
+        self.elapsed = time.time() - start
+        self.deferred = sum(1 for job in jobs if job.deferred)
+        return list(finished)
+
+    @staticmethod
+    def run_inline(
+        stages: List[Stage],
+        job: StageJob,
+        on_stage: Optional[Callable[[str, str], None]] = None,
+    ) -> StageJob:
+        """
+        在当前线程按顺序执行各阶段（单只股票、Web 触发等场景）
+
+        与 run() 使用同一组阶段函数，阶段终止或异常时跳过后续阶段。
+
+        Args:
+            stages: 阶段列表
+            job: 任务
+            on_stage: 阶段进度回调 on_stage(阶段名称, running/done/stopped/failed)（可选）
+        """
+        for stage in stages:
+            if on_stage:
+                on_stage(stage.name, 'running')
+            t0 = time.time()
+            failed = False
+            try:
+                ok = stage.func(job) is not False
+            except Exception as e:
+                ok, failed = False, True
+                job.error = f"{stage.name}: {e}"
+                logger.exception(f"[{job.key}] 阶段 {stage.name} 异常: {e}")
+            job.stage_times[stage.name] = time.time() - t0
+            if on_stage:
+                on_stage(stage.name, 'failed' if failed else 'done' if ok else 'stopped')
+            if not ok:
+                job.stopped = True
+                break
+        return job
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        各阶段统计
+
+        Returns:
+            {阶段名称: {'workers', 'processed', 'errors', 'busy', 'throttled', 'deferred', 'load'}}
+            load 为忙碌时间 / (线程数 × 总耗时)，接近 1 表示该阶段是瓶颈
+        """
+        stats = {}
+        for stage in self.stages:
+            s = self._stats.get(stage.name, _StageStats())
+            workers = max(1, stage.workers)
+            stats[stage.name] = {
+                'workers': workers,
+                'processed': s.processed,
+                'errors': s.errors,
+                'busy': round(s.busy, 2),
+                'throttled': round(s.throttled, 2),
+                'deferred': s.deferred,
+                'load': round(s.busy / (workers * self.elapsed), 2) if self.elapsed else 0.0,
+            }
+        return stats
+
+    def log_summary(self) -> None:
+        """输出各阶段的处理量与负载，并指出瓶颈阶段"""
+        stats = self.get_stats()
+        active = {name: s for name, s in stats.items() if s['processed']}
+        if not active:
+            return
+        for name, s in active.items():
+            throttled = f", 限速等待 {s['throttled']:.1f}s" if s['throttled'] else ""
+            logger.info(
+                f"[{self.name}] {name}: {s['processed']} 个任务, {s['workers']} 线程, "
+                f"忙碌 {s['busy']:.1f}s, 负载 {s['load']:.0%}{throttled}"
+            )
+        bottleneck = max(active, key=lambda n: active[n]['busy'] / active[n]['workers'])
+        deferred = f"，{self.deferred} 个任务因截止时间延后" if self.deferred else ""
+        logger.info(f"[{self.name}] 总耗时 {self.elapsed:.1f}s，瓶颈阶段: {bottleneck}{deferred}")
@@ -11,6 +11,7 @@ A股自选股智能分析系统 - 存储层
 4. 实现智能更新逻辑（断点续传）
 """
 
+import json
 import logging
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
@@ -25,11 +26,13 @@ from sqlalchemy import (
     Date,
     DateTime,
     Integer,
+    Text,
     Index,
     UniqueConstraint,
     select,
     and_,
     desc,
+    func,
 )
 from sqlalchemy.orm import (
     declarative_base,
@@ -39,6 +42,7 @@ from sqlalchemy.orm import (
 from sqlalchemy.exc import IntegrityError
 
 from config import get_config
+from metrics import DB_WRITE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +123,54 @@ class StockDaily(Base):
         }
 
 
+class AnalysisRun(Base):
+    """
+    分析运行清单
+    
+    每次 run() 一条记录，保存股票列表和报告类型，用于 --resume 断点续跑
+    """
+    __tablename__ = 'analysis_run'
+    
+    run_id = Column(String(32), primary_key=True)
+    stock_codes = Column(Text, nullable=False)  # JSON 数组
+    report_type = Column(String(16))
+    status = Column(String(16), default='running')  # running / completed / partial（有股票因截止时间延后）
+    
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<AnalysisRun(run_id={self.run_id}, status={self.status})>"
+
+
+class RunCheckpoint(Base):
+    """
+    运行断点：单只股票在某次运行中已完成的阶段及其产物
+    
+    阶段依次为 fetched（日线已保存）→ context（上下文已生成）→ analyzed（LLM 已返回）
+    → reported（报告已生成）→ notified（已推送），续跑时跳过已完成的阶段
+    """
+    __tablename__ = 'run_checkpoint'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(32), nullable=False, index=True)
+    code = Column(String(10), nullable=False)
+    stage = Column(String(16), nullable=False)
+    
+    result_json = Column(Text)  # LLM 分析结果（JSON）
+    report_content = Column(Text)  # 生成的单股报告（单股推送使用）
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('run_id', 'code', name='uix_run_code'),
+        Index('ix_checkpoint_code_updated', 'code', 'updated_at'),
+    )
+    
+    def __repr__(self):
+        return f"<RunCheckpoint(run_id={self.run_id}, code={self.code}, stage={self.stage})>"
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -172,8 +224,10 @@ class DatabaseManager:
             autoflush=False,
         )
         
-        # 创建所有表
+        # 创建所有表（已有的表不会补建后来新增的索引，单独检查）
         Base.metadata.create_all(self._engine)
+        for index in RunCheckpoint.__table__.indexes:
+            index.create(self._engine, checkfirst=True)
         
         self._initialized = True
         logger.info(f"数据库初始化完成: {db_url}")
@@ -295,6 +349,7 @@ class DatabaseManager:
             
             return list(results)
     
+    @DB_WRITE_SECONDS.timed(operation='save_daily_data')
     def save_daily_data(
         self, 
         df: pd.DataFrame, 
@@ -445,6 +500,166 @@ class DatabaseManager:
         
         return context
     
+    @DB_WRITE_SECONDS.timed(operation='create_run')
+    def create_run(self, run_id: str, stock_codes: List[str], report_type: str) -> None:
+        """
+        创建运行清单
+        
+        Args:
+            run_id: 运行 ID
+            stock_codes: 股票代码列表
+            report_type: 报告类型
+        """
+        with self.get_session() as session:
+            session.add(AnalysisRun(
+                run_id=run_id,
+                stock_codes=json.dumps(stock_codes),
+                report_type=report_type,
+                status='running',
+            ))
+            session.commit()
+    
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取运行清单
+        
+        Returns:
+            {'run_id', 'stock_codes', 'report_type', 'status', 'created_at'}，不存在返回 None
+        """
+        with self.get_session() as session:
+            run = session.get(AnalysisRun, run_id)
+            if run is None:
+                return None
+            return {
+                'run_id': run.run_id,
+                'stock_codes': json.loads(run.stock_codes),
+                'report_type': run.report_type,
+                'status': run.status,
+                'created_at': run.created_at,
+            }
+    
+    @DB_WRITE_SECONDS.timed(operation='finish_run')
+    def finish_run(self, run_id: str, status: str = 'completed') -> None:
+        """
+        标记运行结束（汇总推送已发送）
+        
+        Args:
+            run_id: 运行 ID
+            status: completed（全部完成）或 partial（有股票延后）
+        """
+        with self.get_session() as session:
+            run = session.get(AnalysisRun, run_id)
+            if run is not None:
+                run.status = status
+                run.updated_at = datetime.now()
+                session.commit()
+    
+    @DB_WRITE_SECONDS.timed(operation='save_checkpoint')
+    def save_checkpoint(
+        self,
+        run_id: str,
+        code: str,
+        stage: str,
+        result: Optional[Dict[str, Any]] = None,
+        report_content: Optional[str] = None
+    ) -> None:
+        """
+        记录单只股票已完成的阶段（已有的产物不会被覆盖为空）
+        
+        Args:
+            run_id: 运行 ID
+            code: 股票代码
+            stage: 已完成的阶段
+            result: LLM 分析结果字典（可选）
+            report_content: 报告内容（可选）
+        """
+        with self.get_session() as session:
+            try:
+                checkpoint = session.execute(
+                    select(RunCheckpoint).where(
+                        and_(RunCheckpoint.run_id == run_id, RunCheckpoint.code == code)
+                    )
+                ).scalar_one_or_none()
+                if checkpoint is None:
+                    checkpoint = RunCheckpoint(run_id=run_id, code=code)
+                    session.add(checkpoint)
+                checkpoint.stage = stage
+                if result is not None:
+                    checkpoint.result_json = json.dumps(result, ensure_ascii=False, default=str)
+                if report_content is not None:
+                    checkpoint.report_content = report_content
+                checkpoint.updated_at = datetime.now()
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+    
+    def get_checkpoints(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        获取某次运行所有股票的断点
+        
+        Returns:
+            {代码: {'stage', 'result', 'report_content'}}，result 为分析结果字典或 None
+        """
+        with self.get_session() as session:
+            rows = session.execute(
+                select(RunCheckpoint).where(RunCheckpoint.run_id == run_id)
+            ).scalars().all()
+            return {
+                row.code: {
+                    'stage': row.stage,
+                    'result': json.loads(row.result_json) if row.result_json else None,
+                    'report_content': row.report_content,
+                }
+                for row in rows
+            }
+    
+    def get_latest_scores(self, codes: List[str]) -> Dict[str, int]:
+        """
+        获取各股票最近一次运行的 AI 评分（用于安排分析顺序）
+        
+        每只股票只读取最近 30 天内最新的一条带结果的断点（按代码分组取最大更新时间）。
+        
+        Args:
+            codes: 股票代码列表
+            
+        Returns:
+            {代码: sentiment_score}，没有历史结果的代码不出现在结果中
+        """
+        scores: Dict[str, int] = {}
+        if not codes:
+            return scores
+        latest = (
+            select(RunCheckpoint.code, func.max(RunCheckpoint.updated_at).label('updated_at'))
+            .where(and_(
+                RunCheckpoint.code.in_(codes),
+                RunCheckpoint.result_json.isnot(None),
+                RunCheckpoint.updated_at >= datetime.now() - timedelta(days=30),
+            ))
+            .group_by(RunCheckpoint.code)
+            .subquery()
+        )
+        with self.get_session() as session:
+            rows = session.execute(
+                select(RunCheckpoint.code, RunCheckpoint.result_json)
+                .join(latest, and_(
+                    RunCheckpoint.code == latest.c.code,
+                    RunCheckpoint.updated_at == latest.c.updated_at,
+                ))
+                .where(RunCheckpoint.result_json.isnot(None))
+            ).all()
+        # 更新时间相同的多条记录只取其一
+        for code, result_json in rows:
+            if code in scores:
+                continue
+            try:
+                score = json.loads(result_json).get('sentiment_score')
+            except (ValueError, AttributeError):
+                continue
+            if isinstance(score, (int, float)):
+                scores[code] = int(score)
+        return scores
+    
     def _analyze_ma_status(self, data: StockDaily) -> str:
         """
         分析均线形态
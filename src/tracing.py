@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 运行耗时追踪
+===================================
+
+职责：
+1. 以 span（带开始/结束时间的区间）记录每只股票、每个阶段的耗时：
+   各数据源获取、每项增强数据、每个搜索维度、LLM 请求（含 Token 用量）、
+   响应解析、报告渲染、推送
+2. 运行结束时汇总各 span 名称的 p50/p95/最大耗时，并找出关键路径
+   （决定本次运行结束时间的那只股票，依次经过的阶段与排队等待）
+3. 汇总写入 JSON 文件并输出到运行日志；配置 TRACE_OTLP_ENDPOINT 时
+   同时通过 OpenTelemetry（OTLP/HTTP）导出
+
+span 按线程嵌套：同一线程内后开始的 span 自动成为子 span；提交到其他线程执行的
+函数用 traced() 包装，沿用提交时的父 span。不在运行期间（start_run 之前或
+finish_run 之后）的 span 不记录，开销可以忽略。
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """一段耗时记录"""
+    name: str
+    key: Optional[str] = None  # 所属股票代码（运行级别的 span 为 None）
+    start: float = 0.0
+    end: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional['Span'] = None
+    error: Optional[str] = None
+    _otel: Any = None
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+    def set(self, **attrs: Any) -> None:
+        """补充属性（如 Token 用量、结果条数）"""
+        self.attrs.update(attrs)
+
+
+class _NoopSpan(Span):
+    """不在运行期间时返回的空 span"""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan(name='noop')
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+
+class Tracer:
+    """
+    运行耗时追踪器（线程安全）
+    """
+
+    def __init__(self, enabled: bool = True, otlp_endpoint: str = ""):
+        """
+        Args:
+            enabled: 是否记录
+            otlp_endpoint: OpenTelemetry OTLP/HTTP 导出地址（留空不导出）
+        """
+        self.enabled = enabled
+        self.otlp_endpoint = otlp_endpoint
+        self.run_id: Optional[str] = None
+        self._recording = False
+        self._started_at = 0.0
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._otel_tracer = None
+        self._otel_provider = None
+        self._root: Optional[Span] = None
+
+    # ========== 记录 ==========
+
+    def start_run(self, run_id: Optional[str] = None) -> None:
+        """开始记录一次运行（清空上一次的记录）"""
+        if not self.enabled:
+            return
+        if self.otlp_endpoint and self._otel_tracer is None:
+            self._init_otel()
+        with self._lock:
+            self.run_id = run_id
+            self._spans = []
+            self._started_at = time.time()
+            self._recording = True
+        self._root = Span(name='run', start=self._started_at)
+        self._root._otel = self._otel_start(self._root, None)
+
+    def current(self) -> Optional[Span]:
+        """当前线程正在进行的 span"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, key: Optional[str] = None, parent: Optional[Span] = None,
+             **attrs: Any) -> Iterator[Span]:
+        """
+        记录一个 span（上下文管理器）
+
+        Args:
+            name: 名称（如 'fetch'、'fetch.AkshareFetcher'、'llm.request'）
+            key: 股票代码（不传时沿用父 span 的）
+            parent: 父 span（不传时为当前线程正在进行的 span）
+            **attrs: 附加属性
+        """
+        if not self._recording:
+            yield _NOOP
+            return
+        parent = parent or self.current()
+        if parent is _NOOP:
+            parent = None
+        span = Span(
+            name=name,
+            key=key if key is not None else (parent.key if parent else None),
+            start=time.time(),
+            attrs=dict(attrs),
+            parent=parent,
+        )
+        span._otel = self._otel_start(span, parent or self._root)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            span.end = time.time()
+            self._otel_end(span)
+            with self._lock:
+                if self._recording:
+                    self._spans.append(span)
+
+    def traced(self, name: str, func: Callable[..., Any], **attrs: Any) -> Callable[..., Any]:
+        """
+        包装将在其他线程执行的函数：执行时记录 span，父 span 为包装时的当前 span
+        """
+        parent = self.current()
+
+        def run(*args: Any, **kwargs: Any) -> Any:
+            with self.span(name, parent=parent, **attrs):
+                return func(*args, **kwargs)
+        return run
+
+    def finish_run(self) -> Dict[str, Any]:
+        """
+        结束记录并生成汇总
+
+        Returns:
+            汇总报告（结构见 summarize）；未在记录时返回空字典
+        """
+        with self._lock:
+            if not self._recording:
+                return {}
+            self._recording = False
+            spans = list(self._spans)
+        if self._root is not None:
+            self._root.end = time.time()
+            self._otel_end(self._root)
+            self._root = None
+        if self._otel_provider is not None:
+            try:
+                self._otel_provider.force_flush()
+            except Exception as e:
+                logger.warning(f"[耗时追踪] OpenTelemetry 导出失败: {e}")
+        return self.summarize(spans, self._started_at, time.time(), self.run_id)
+
+    # ========== 汇总 ==========
+
+    @staticmethod
+    def summarize(spans: List[Span], started_at: float, ended_at: float,
+                  run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        汇总 span
+
+        Returns:
+            {
+                'run_id', 'started_at', 'elapsed', 'span_count',
+                'spans': {名称: {'count', 'errors', 'total', 'p50', 'p95', 'max', 'totals'}},
+                'stocks': {代码: {'elapsed', 'stages': {阶段: 秒}}},
+                'critical_path': {'key', 'elapsed', 'segments': [{'name', 'start', 'duration'}]},
+            }
+            时间单位为秒，start 为相对运行开始的偏移；totals 为数值属性之和（如 Token 用量）
+        """
+        by_name: Dict[str, List[Span]] = {}
+        for span in spans:
+            by_name.setdefault(span.name, []).append(span)
+
+        span_stats = {}
+        for name, group in sorted(by_name.items()):
+            samples = sorted(s.duration for s in group)
+            totals: Dict[str, float] = {}
+            for span in group:
+                for attr, value in span.attrs.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        totals[attr] = totals.get(attr, 0) + value
+            span_stats[name] = {
+                'count': len(samples),
+                'errors': sum(1 for s in group if s.error),
+                'total': round(sum(samples), 3),
+                'p50': round(_percentile(samples, 0.5), 3),
+                'p95': round(_percentile(samples, 0.95), 3),
+                'max': round(samples[-1], 3),
+                'totals': totals,
+            }
+
+        # 每只股票的顶层 span（即流水线阶段）
+        stages_by_key: Dict[str, List[Span]] = {}
+        for span in spans:
+            if span.key is not None and span.parent is None:
+                stages_by_key.setdefault(span.key, []).append(span)
+
+        stocks = {}
+        for key, group in stages_by_key.items():
+            stage_times: Dict[str, float] = {}
+            for span in group:
+                stage_times[span.name] = round(stage_times.get(span.name, 0.0) + span.duration, 3)
+            stocks[key] = {
+                'elapsed': round(max(s.end for s in group) - min(s.start for s in group), 3),
+                'stages': stage_times,
+            }
+
+        return {
+            'run_id': run_id,
+            'started_at': datetime.fromtimestamp(started_at).isoformat(timespec='seconds'),
+            'elapsed': round(ended_at - started_at, 3),
+            'span_count': len(spans),
+            'spans': span_stats,
+            'stocks': stocks,
+            'critical_path': Tracer._critical_path(stages_by_key, started_at),
+        }
+
+    @staticmethod
+    def _critical_path(stages_by_key: Dict[str, List[Span]], started_at: float) -> Dict[str, Any]:
+        """
+        关键路径：最后结束的股票，从其最后一个阶段向前，每次取在当前阶段开始前
+        最晚结束的阶段；阶段之间的空档记为「等待」（排队、限速、等待并行的阶段）
+        """
+        if not stages_by_key:
+            return {}
+        key = max(stages_by_key, key=lambda k: max(s.end for s in stages_by_key[k]))
+        group = stages_by_key[key]
+        current = max(group, key=lambda s: s.end)
+        chain = [current]
+        while True:
+            previous = [s for s in group if s.end <= current.start + 1e-6 and s is not current]
+            if not previous:
+                break
+            current = max(previous, key=lambda s: s.end)
+            chain.append(current)
+        chain.reverse()
+
+        segments = []
+        cursor = started_at
+        for span in chain:
+            if span.start - cursor > 0.001:
+                segments.append({'name': '等待', 'start': round(cursor - started_at, 3),
+                                 'duration': round(span.start - cursor, 3)})
+            segments.append({'name': span.name, 'start': round(span.start - started_at, 3),
+                             'duration': round(span.duration, 3)})
+            cursor = span.end
+        return {'key': key, 'elapsed': round(cursor - started_at, 3), 'segments': segments}
+
+    def log_summary(self, report: Dict[str, Any]) -> None:
+        """输出各 span 的耗时分布与关键路径"""
+        if not report.get('spans'):
+            return
+        for name, s in report['spans'].items():
+            errors = f", 失败 {s['errors']}" if s['errors'] else ""
+            totals = ''.join(f", {attr} {value:g}" for attr, value in s['totals'].items())
+            logger.info(
+                f"[耗时追踪] {name}: {s['count']} 次, p50 {s['p50']:.2f}s, p95 {s['p95']:.2f}s, "
+                f"最大 {s['max']:.2f}s, 合计 {s['total']:.1f}s{errors}{totals}"
+            )
+        path = report.get('critical_path')
+        if path:
+            chain = ' → '.join(f"{seg['name']} {seg['duration']:.1f}s" for seg in path['segments'])
+            logger.info(f"[耗时追踪] 关键路径 {path['key']}（{path['elapsed']:.1f}s）: {chain}")
+
+    def write_report(self, report: Dict[str, Any], output_dir: str) -> Optional[Path]:
+        """
+        写入 JSON 文件 trace_<运行ID或时间>.json
+
+        Returns:
+            文件路径，写入失败返回 None
+        """
+        if not report:
+            return None
+        name = report.get('run_id') or datetime.now().strftime('%Y%m%d%H%M%S')
+        path = Path(output_dir) / f"trace_{name}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"[耗时追踪] 写入 {path} 失败: {e}")
+            return None
+        logger.info(f"[耗时追踪] 运行耗时报告已保存: {path}")
+        return path
+
+    # ========== OpenTelemetry ==========
+
+    def _init_otel(self) -> None:
+        """按 OTLP 地址初始化导出（未安装 opentelemetry-sdk 时跳过）"""
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        except ImportError:
+            logger.warning(
+                "[耗时追踪] 已配置 TRACE_OTLP_ENDPOINT，但未安装 opentelemetry-sdk / "
+                "opentelemetry-exporter-otlp-proto-http，跳过导出"
+            )
+            self.otlp_endpoint = ""
+            return
+        provider = TracerProvider(resource=Resource.create({'service.name': 'daily_stock_analysis'}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=self.otlp_endpoint)))
+        self._otel_provider = provider
+        self._otel_tracer = provider.get_tracer(__name__)
+        logger.info(f"[耗时追踪] OpenTelemetry 导出已启用: {self.otlp_endpoint}")
+
+    def _otel_start(self, span: Span, parent: Optional[Span]) -> Any:
+        if self._otel_tracer is None:
+            return None
+        from opentelemetry import trace as otel_trace
+        context = otel_trace.set_span_in_context(parent._otel) if parent and parent._otel else None
+        return self._otel_tracer.start_span(span.name, context=context, start_time=int(span.start * 1e9))
+
+    def _otel_end(self, span: Span) -> None:
+        if span._otel is None:
+            return
+        from opentelemetry.trace import Status, StatusCode
+        attrs = dict(span.attrs)
+        if span.key is not None:
+            attrs['stock.code'] = span.key
+        for name, value in attrs.items():
+            span._otel.set_attribute(name, value if isinstance(value, (str, bool, int, float)) else str(value))
+        if span.error:
+            span._otel.set_status(Status(StatusCode.ERROR, span.error))
+        span._otel.end(end_time=int(span.end * 1e9))
+
+
+# 全局追踪器
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器（按配置创建）"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from config import get_config
+                config = get_config()
+                _tracer = Tracer(enabled=config.trace_enabled, otlp_endpoint=config.trace_otlp_endpoint)
+    return _tracer
+
+
+def trace_span(name: str, **kwargs: Any):
+    """get_tracer().span 的快捷方式"""
+    return get_tracer().span(name, **kwargs)
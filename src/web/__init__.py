@@ -6,6 +6,7 @@ Web 服务模块
 
 分层架构：
 - server.py    - HTTP 服务器核心
+- async_server.py - asyncio 服务器（WEBUI_SERVER=asyncio）
 - router.py    - 路由分发
 - handlers.py  - 请求处理器
 - services.py  - 业务服务层
@@ -22,9 +23,10 @@ Web 服务模块
     server.run()
 """
 
-from web.server import WebServer, run_server_in_thread
+from web.server import WebServer, create_server, run_server_in_thread
 
 __all__ = [
     'WebServer',
+    'create_server',
     'run_server_in_thread',
 ]
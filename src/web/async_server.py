@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Web 服务器 - asyncio 模式
+===================================
+
+职责：
+1. 基于 asyncio.start_server 实现 HTTP/1.1 服务（支持 keep-alive）
+2. 通过 Router.handle 复用现有路由和处理器（PageHandler / ApiHandler）
+3. 处理器是同步阻塞的，统一放到有上限的线程池执行
+4. SSE、长轮询等推送类响应在事件循环中等待数据，不占用处理线程
+
+与 ThreadingHTTPServer 相比，空闲的 keep-alive 连接（如多个桌面客户端打开的
+任务页面）只占用一个协程而不是一个线程，线程数只取决于同时处理中的请求数。
+
+启用方式：WEBUI_SERVER=asyncio（默认 threading）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from web.handlers import EventStreamResponse, LongPollResponse, OpenStream, Response
+from web.router import Router
+from web.server import WebServer
+
+logger = logging.getLogger(__name__)
+
+# 单行请求行 / 请求头的最大长度
+MAX_LINE_BYTES = 16 * 1024
+# 请求头最多行数
+MAX_HEADERS = 100
+# 请求体上限（配置页表单、.env 文本）
+MAX_BODY_BYTES = 4 * 1024 * 1024
+# keep-alive 连接的空闲超时（秒）
+KEEPALIVE_TIMEOUT = 15.0
+# 读取请求头 / 请求体的超时（秒）
+READ_TIMEOUT = 30.0
+
+
+class _BadRequest(Exception):
+    """请求无法解析，回复错误后关闭连接"""
+
+    def __init__(self, status: HTTPStatus):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+class AsyncWebServer(WebServer):
+    """
+    asyncio Web 服务器
+
+    接口与 WebServer 相同（run / start_background / stop / is_running），
+    可直接替换；端口被占用时同样尝试清理旧进程后重试。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        router: Optional[Router] = None,
+        max_workers: int = 8
+    ):
+        """
+        初始化 Web 服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口
+            router: 路由器实例（可选，默认使用全局路由）
+            max_workers: 执行处理器的线程数上限
+        """
+        super().__init__(host=host, port=port, router=router)
+        self.max_workers = max(1, max_workers)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_server: Optional[asyncio.base_events.Server] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._socket: Optional[socket.socket] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._push_queues: Set[asyncio.Queue] = set()
+
+    # ------------------------------------------------------------
+    # 启动 / 停止
+    # ------------------------------------------------------------
+
+    def _bind(self) -> socket.socket:
+        """绑定监听端口（端口被占用时清理旧进程后重试一次）"""
+        try:
+            return socket.create_server((self.host, self.port), reuse_port=False)
+        except OSError as e:
+            if 'Address already in use' not in str(e):
+                raise
+            logger.warning(f"端口 {self.port} 被占用，尝试并杀死旧进程...")
+            print(f"端口 {self.port} 被占用，尝试并杀死旧进程...", file=sys.stderr)
+            self._kill_zombie_process(self.port)
+            time.sleep(1.5)
+            return socket.create_server((self.host, self.port), reuse_port=False)
+
+    async def _serve(self) -> None:
+        """在当前事件循环中运行服务器，直到 stop() 或被取消"""
+        self._loop = asyncio.get_running_loop()
+        self._async_server = await asyncio.start_server(
+            self._handle_connection, sock=self._socket, limit=MAX_LINE_BYTES
+        )
+        try:
+            await self._async_server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._async_server.close()
+            # 结束进行中的推送，关闭空闲的 keep-alive 连接，等各连接协程正常退出后再结束事件循环
+            for chunks in list(self._push_queues):
+                chunks.put_nowait(None)
+            for writer in list(self._connections.values()):
+                writer.close()
+            if self._connections:
+                await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def _run_loop(self) -> None:
+        """运行事件循环（阻塞），结束后释放线程池"""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="webui_")
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._async_server = None
+            self._loop = None
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    def run(self) -> None:
+        """
+        前台运行服务器（阻塞）
+
+        按 Ctrl+C 退出
+        """
+        self._socket = self._bind()
+        logger.info(f"WebUI 服务启动 (asyncio, {self.max_workers} 个处理线程): {self.address}")
+        print(f"WebUI 服务启动: {self.address}")
+        print(f"WebUI 服务启动: {self.address}", file=sys.stderr)  # Ensure visible in log
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self._log_routes()
+
+        try:
+            self._run_loop()
+        except KeyboardInterrupt:
+            logger.info("收到退出信号，服务器关闭")
+
+    def start_background(self) -> threading.Thread:
+        """
+        后台运行服务器（非阻塞）
+
+        Returns:
+            服务器线程
+        """
+        self._socket = self._bind()
+
+        def serve():
+            logger.info(f"WebUI 已启动 (asyncio): {self.address}")
+            print(f"WebUI 已启动: {self.address}")
+            try:
+                self._run_loop()
+            except Exception as e:
+                logger.error(f"WebUI 发生错误: {e}")
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """停止服务器（进行中的请求在后台自然结束）"""
+        loop, server = self._loop, self._async_server
+        if loop is not None and server is not None:
+            loop.call_soon_threadsafe(server.close)
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            logger.info("WebUI 服务已停止")
+
+    def is_running(self) -> bool:
+        """检查服务器是否运行中"""
+        return self._socket is not None
+
+    # ------------------------------------------------------------
+    # 连接处理
+    # ------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接上的多个请求（HTTP/1.1 keep-alive）"""
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest as e:
+                    writer.write(self._serialize(Response(e.status.phrase.encode(), e.status), False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+
+                if method == "OPTIONS":
+                    response = Response(b"", HTTPStatus.OK)
+                elif method in ("GET", "POST"):
+                    response = await loop.run_in_executor(
+                        self._executor, self.router.handle, method, target, body
+                    )
+                else:
+                    response = Response(b"Method Not Allowed", HTTPStatus.METHOD_NOT_ALLOWED)
+
+                # 推送类响应在事件循环中等待数据，不占用处理线程
+                if isinstance(response, EventStreamResponse):
+                    await self._send_event_stream(response, writer)
+                    break
+                if isinstance(response, LongPollResponse):
+                    response.body = await self._wait_long_poll(response)
+
+                writer.write(self._serialize(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    def _open_push(self, open_stream: OpenStream) -> Tuple[asyncio.Queue, Callable[[], None]]:
+        """注册推送回调：其他线程推送的数据经 call_soon_threadsafe 放入队列"""
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        self._push_queues.add(chunks)
+        cancel = open_stream(lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk))
+
+        def close() -> None:
+            cancel()
+            self._push_queues.discard(chunks)
+
+        return chunks, close
+
+    async def _send_event_stream(self, response: EventStreamResponse, writer: asyncio.StreamWriter) -> None:
+        """写出 SSE 事件直到推送结束；结束后关闭连接"""
+        chunks, close = self._open_push(response.open_stream)
+        try:
+            writer.write(self._serialize_head(response, keep_alive=False))
+            await writer.drain()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.get(), response.heartbeat)
+                except asyncio.TimeoutError:
+                    chunk = response.KEEPALIVE
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            close()
+
+    async def _wait_long_poll(self, response: LongPollResponse) -> bytes:
+        """等待长轮询的第一段数据，超时时使用 on_timeout()"""
+        chunks, close = self._open_push(response.open_stream)
+        try:
+            chunk = await asyncio.wait_for(chunks.get(), response.timeout)
+        except asyncio.TimeoutError:
+            chunk = None
+        finally:
+            close()
+        return chunk if chunk is not None else response.on_timeout()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes, bool]]:
+        """
+        读取一个请求
+
+        Returns:
+            (方法, 请求路径, 请求头（小写键）, 请求体, 是否保持连接)；
+            连接已关闭或空闲超时时返回 None
+        """
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:
+            raise _BadRequest(HTTPStatus.REQUEST_URI_TOO_LONG)
+        if not request_line.strip():
+            return None
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise _BadRequest(HTTPStatus.BAD_REQUEST)
+        method, target, version = parts
+
+        headers: Dict[str, str] = {}
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            except ValueError:
+                raise _BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise _BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise _BadRequest(HTTPStatus.BAD_REQUEST)
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise _BadRequest(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        return method.upper(), target, headers, body, keep_alive
+
+    @staticmethod
+    def _serialize_head(response: Response, keep_alive: bool) -> bytes:
+        """响应状态行与响应头"""
+        status = HTTPStatus(response.status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in response.headers()]
+        lines.append(f"Date: {formatdate(usegmt=True)}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        if keep_alive:
+            lines.append(f"Keep-Alive: timeout={int(KEEPALIVE_TIMEOUT)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    @classmethod
+    def _serialize(cls, response: Response, keep_alive: bool) -> bytes:
+        """响应序列化为 HTTP/1.1 报文"""
+        return cls._serialize_head(response, keep_alive) + response.body
@@ -17,11 +17,13 @@ Web 处理器层 - 请求处理
 from __future__ import annotations
 
 import json
+import math
+import queue
 import re
 import logging
 from http import HTTPStatus
 from datetime import datetime
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Callable, Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 
 from web.services import get_config_service, get_analysis_service
 from web.templates import render_config_page
@@ -32,6 +34,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# 任务的终止状态（推送最终状态后结束 SSE 连接）
+_FINISHED_STATUSES = ("completed", "failed")
+
 
 # ============================================================
 # 响应辅助类
@@ -50,16 +55,22 @@ class Response:
         self.status = status
         self.content_type = content_type
     
+    def headers(self) -> List[Tuple[str, str]]:
+        """响应头（不同服务器实现共用）"""
+        return [
+            # CORS Headers
+            ("Access-Control-Allow-Origin", "*"),
+            ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+            ("Access-Control-Allow-Headers", "Content-Type"),
+            ("Content-Type", self.content_type),
+            ("Content-Length", str(len(self.body))),
+        ]
+    
     def send(self, handler: 'BaseHTTPRequestHandler') -> None:
         """发送响应到客户端"""
         handler.send_response(self.status)
-        # CORS Headers
-        handler.send_header("Access-Control-Allow-Origin", "*")
-        handler.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        handler.send_header("Access-Control-Allow-Headers", "Content-Type")
-        
-        handler.send_header("Content-Type", self.content_type)
-        handler.send_header("Content-Length", str(len(self.body)))
+        for name, value in self.headers():
+            handler.send_header(name, value)
         handler.end_headers()
         handler.wfile.write(self.body)
 
@@ -111,17 +122,101 @@ class DownloadResponse(Response):
         )
         self.filename = filename
         
-    def send(self, handler: 'BaseHTTPRequestHandler') -> None:
-        """发送带附件头的响应"""
-        handler.send_response(self.status)
-        handler.send_header("Content-Type", self.content_type)
-        handler.send_header("Content-Length", str(len(self.body)))
+    def headers(self) -> List[Tuple[str, str]]:
+        """带附件头的响应头"""
         # URL编码文件名以支持中文
         from urllib.parse import quote
         encoded_filename = quote(self.filename)
-        handler.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{encoded_filename}")
-        handler.end_headers()
-        handler.wfile.write(self.body)
+        return [
+            ("Content-Type", self.content_type),
+            ("Content-Length", str(len(self.body))),
+            ("Content-Disposition", f"attachment; filename*=UTF-8''{encoded_filename}"),
+        ]
+
+
+# 推送回调：push(数据) 写出一段数据，push(None) 表示结束
+PushCallback = Callable[[Optional[bytes]], None]
+# 注册推送回调并返回取消函数
+OpenStream = Callable[[PushCallback], Callable[[], None]]
+
+
+class EventStreamResponse(Response):
+    """
+    Server-Sent Events 响应
+    
+    open_stream(push) 注册推送回调（可能在任意线程被调用）并返回取消函数；
+    连接空闲 heartbeat 秒时写出注释行保活，同时及时发现已断开的客户端。
+    
+    线程服务器在连接线程中阻塞推送（send）；asyncio 服务器自行读取推送数据，不占用线程。
+    """
+    
+    KEEPALIVE = b": keepalive\n\n"
+    
+    def __init__(self, open_stream: OpenStream, heartbeat: float = 15.0):
+        super().__init__(body=b"", content_type="text/event-stream; charset=utf-8")
+        self.open_stream = open_stream
+        self.heartbeat = heartbeat
+    
+    def headers(self) -> List[Tuple[str, str]]:
+        """SSE 响应头（不带 Content-Length，禁止缓存与反向代理缓冲）"""
+        return [
+            ("Access-Control-Allow-Origin", "*"),
+            ("Content-Type", self.content_type),
+            ("Cache-Control", "no-cache"),
+            ("X-Accel-Buffering", "no"),
+        ]
+    
+    def send(self, handler: 'BaseHTTPRequestHandler') -> None:
+        """逐条写出事件，直到推送结束或客户端断开"""
+        chunks: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        cancel = self.open_stream(chunks.put)
+        handler.close_connection = True
+        try:
+            handler.send_response(self.status)
+            for name, value in self.headers():
+                handler.send_header(name, value)
+            handler.end_headers()
+            while True:
+                try:
+                    chunk = chunks.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    chunk = self.KEEPALIVE
+                if chunk is None:
+                    break
+                handler.wfile.write(chunk)
+                handler.wfile.flush()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            cancel()
+
+
+class LongPollResponse(Response):
+    """
+    长轮询响应
+    
+    等待 open_stream 推送的第一段数据作为 JSON 响应体；timeout 秒内没有数据
+    （或推送了 None）时使用 on_timeout() 的返回值。
+    """
+    
+    def __init__(self, open_stream: OpenStream, timeout: float, on_timeout: Callable[[], bytes]):
+        super().__init__(body=b"", content_type="application/json; charset=utf-8")
+        self.open_stream = open_stream
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+    
+    def send(self, handler: 'BaseHTTPRequestHandler') -> None:
+        """在连接线程中等待数据后发送"""
+        chunks: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        cancel = self.open_stream(chunks.put)
+        try:
+            chunk = chunks.get(timeout=self.timeout)
+        except queue.Empty:
+            chunk = None
+        finally:
+            cancel()
+        self.body = chunk if chunk is not None else self.on_timeout()
+        super().send(handler)
 
 
 # ============================================================
@@ -183,6 +278,23 @@ class ApiHandler:
         }
         return JsonResponse(data)
     
+    def handle_metrics(self) -> Response:
+        """
+        Prometheus 指标 GET /metrics
+        
+        返回 Prometheus 文本格式（0.0.4）：数据源/LLM/搜索耗时与失败次数、限速等待、
+        Token 用量、数据库写入耗时、搜索 Key 用量、缓存命中率、分析任务队列深度
+        """
+        from components import get_components
+        from metrics import render_metrics
+        
+        # 确保组件指标采集已注册（不会创建任何组件）
+        get_components()
+        return Response(
+            body=render_metrics().encode("utf-8"),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
     def handle_analysis(self, query: Dict[str, list]) -> Response:
         """
         触发股票分析 GET /analysis?code=xxx
@@ -279,6 +391,88 @@ class ApiHandler:
         
         return JsonResponse({"success": True, "task": task})
     
+    def handle_task_stream(self, query: Dict[str, list]) -> Response:
+        """
+        任务进度推送 GET /task/stream?id=xxx（Server-Sent Events）
+        
+        每次任务更新（状态变化、进入/完成 fetch、search、llm、report 等阶段）推送一条
+        event: task 事件，data 为任务状态 JSON（含 stage、progress、version）；
+        任务完成或失败后推送最终状态并结束。
+        """
+        task_id = (query.get("id") or [""])[0].strip()
+        if not task_id:
+            return JsonResponse(
+                {"success": False, "error": "缺少必填参数: id (任务ID)"},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        if self.analysis_service.get_task_status(task_id) is None:
+            return JsonResponse(
+                {"success": False, "error": f"任务不存在: {task_id}"},
+                status=HTTPStatus.NOT_FOUND
+            )
+        
+        def open_stream(push: PushCallback) -> Callable[[], None]:
+            def on_update(task: Dict[str, Any]) -> None:
+                data = json.dumps(task, ensure_ascii=False, separators=(",", ":"))
+                push(f"id: {task['version']}\nevent: task\ndata: {data}\n\n".encode("utf-8"))
+                if task["status"] in _FINISHED_STATUSES:
+                    push(None)
+            
+            unsubscribe = self.analysis_service.subscribe(task_id, on_update)
+            if unsubscribe is None:
+                push(None)
+                return lambda: None
+            return unsubscribe
+        
+        return EventStreamResponse(open_stream)
+    
+    def handle_task_poll(self, query: Dict[str, list]) -> Response:
+        """
+        任务进度长轮询 GET /task/poll?id=xxx&since=版本号&timeout=秒
+        
+        任务版本大于 since（或任务已结束）时立即返回，否则最多等待 timeout 秒（默认 25，最大 60）
+        后返回当前状态；返回格式与 /task 相同。不支持 SSE 的客户端使用。
+        """
+        task_id = (query.get("id") or [""])[0].strip()
+        if not task_id:
+            return JsonResponse(
+                {"success": False, "error": "缺少必填参数: id (任务ID)"},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        try:
+            since = int((query.get("since") or ["-1"])[0])
+            timeout = float((query.get("timeout") or ["25"])[0])
+            if not math.isfinite(timeout):
+                # nan 比较恒为 False，min/max 无法限定，会让 Queue.get 永久阻塞
+                raise ValueError(timeout)
+            timeout = min(max(timeout, 0.0), 60.0)
+        except ValueError:
+            return JsonResponse(
+                {"success": False, "error": "参数 since/timeout 必须是数字"},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        if self.analysis_service.get_task_status(task_id) is None:
+            return JsonResponse(
+                {"success": False, "error": f"任务不存在: {task_id}"},
+                status=HTTPStatus.NOT_FOUND
+            )
+        
+        def encode(task: Optional[Dict[str, Any]]) -> bytes:
+            data = {"success": True, "task": task} if task else {"success": False, "error": f"任务不存在: {task_id}"}
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        
+        def open_stream(push: PushCallback) -> Callable[[], None]:
+            def on_update(task: Dict[str, Any]) -> None:
+                if task["version"] > since or task["status"] in _FINISHED_STATUSES:
+                    push(encode(task))
+            
+            return self.analysis_service.subscribe(task_id, on_update) or (lambda: None)
+        
+        return LongPollResponse(
+            open_stream, timeout,
+            on_timeout=lambda: encode(self.analysis_service.get_task_status(task_id))
+        )
+    
     def handle_download_report(self, query: Dict[str, list]) -> Response:
         """
         下载报告 GET /report/download?code=xxx&type=detail|summary|plain_talk|zip&date=yyyymmdd
@@ -352,13 +546,6 @@ class ApiHandler:
             )
         
         try:
-            # 从数据库或缓存获取分析结果
-            from main import StockAnalysisPipeline
-            from config import get_config
-            
-            config = get_config()
-            pipeline = StockAnalysisPipeline(config)
-            
             # 尝试从最近的分析结果获取大白话
             # 这里简化处理：从 summary 文件中提取或重新分析
             summary_content = summary_path.read_text(encoding='utf-8')
@@ -453,6 +640,51 @@ class ApiHandler:
             
         except Exception as e:
             logger.error(f"创建 ZIP 文件失败: {e}")
+    def handle_news_search(self, query: Dict[str, list]) -> Response:
+        """
+        检索本地新闻索引 GET /api/news?code=xxx&name=xxx&q=xxx&days=7&limit=20
+
+        Args:
+            query: URL 查询参数（均可选）
+
+        返回:
+            {
+                "success": true,
+                "items": [{"title", "snippet", "url", "source", "published_date", "codes", ...}]
+            }
+        """
+        from news_index import get_news_index
+
+        index = get_news_index()
+        if index is None:
+            return JsonResponse(
+                {"success": False, "error": "本地新闻索引未启用 (NEWS_INDEX_ENABLED=false)"},
+                status=HTTPStatus.NOT_FOUND
+            )
+
+        def param(name: str) -> str:
+            return (query.get(name, [""])[0] or "").strip()
+
+        try:
+            days = int(param("days")) if param("days") else None
+            limit = min(int(param("limit") or "20"), 100)
+        except ValueError:
+            return JsonResponse(
+                {"success": False, "error": "参数 days / limit 必须为整数"},
+                status=HTTPStatus.BAD_REQUEST
+            )
+
+        items = index.search(
+            text=param("q") or None,
+            stock_code=param("code") or None,
+            stock_name=param("name") or None,
+            published_within_days=days,
+            limit=limit,
+        )
+        for item in items:
+            item["fetched_at"] = datetime.fromtimestamp(item["fetched_at"]).isoformat(timespec="seconds")
+        return JsonResponse({"success": True, "items": items})
+
     def handle_get_api_config(self, query: Dict[str, list]) -> Response:
         """获取当前 API 配置信息 (敏感信息脱敏)"""
         from config import get_config
@@ -15,7 +15,7 @@ from __future__ import annotations
 import logging
 from http import HTTPStatus
 from typing import Callable, Dict, List, Optional, TYPE_CHECKING, Tuple
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs
 
 from web.handlers import (
     Response, HtmlResponse,
@@ -122,43 +122,54 @@ class Router:
         
         return routes_for_path.get(method)
     
-    def dispatch(
-        self,
-        request_handler: 'BaseHTTPRequestHandler',
-        method: str
-    ) -> None:
+    def handle(self, method: str, target: str, body: bytes = b"") -> Response:
         """
-        分发请求
+        处理请求并返回响应（与服务器实现无关，线程服务器和 asyncio 服务器共用）
+        
+        路由按 {路径: {方法: 路由}} 字典直接查找；查询字符串为空时不做解析。
         
         Args:
-            request_handler: HTTP 请求处理器
             method: HTTP 方法
+            target: 请求路径（可带查询字符串）
+            body: 请求体（POST 表单）
+            
+        Returns:
+            响应对象（未匹配时为 404，处理器异常时为 500）
         """
-        # 解析 URL
-        parsed = urlparse(request_handler.path)
-        path = parsed.path
-        query = parse_qs(parsed.query)
-        
-        # 处理根路径
-        if path == "":
-            path = "/"
+        method = method.upper()
+        path, _, query_string = target.split("#", 1)[0].partition("?")
+        path = path or "/"
         
         # 匹配路由
         route = self.match(path, method)
-        
         if route is None:
-            # 404 Not Found
-            self._send_not_found(request_handler, path)
-            return
+            return self._not_found_response(path)
+        
+        # GET 传入查询参数，POST 传入表单数据
+        if method == "POST":
+            params = parse_qs(body.decode("utf-8", errors="replace"))
+        else:
+            params = parse_qs(query_string) if query_string else {}
         
         try:
-            # 调用处理器
-            response = route.handler(query)
-            response.send(request_handler)
-            
+            return route.handler(params)
         except Exception as e:
             logger.error(f"[Router] 处理请求失败: {method} {path} - {e}")
-            self._send_error(request_handler, str(e))
+            return self._error_response(str(e))
+    
+    def dispatch(
+        self,
+        request_handler: 'BaseHTTPRequestHandler',
+        method: str
+    ) -> None:
+        """
+        分发请求
+        
+        Args:
+            request_handler: HTTP 请求处理器
+            method: HTTP 方法
+        """
+        self.handle(method, request_handler.path).send(request_handler)
     
     def dispatch_post(
         self,
@@ -170,29 +181,10 @@ class Router:
         Args:
             request_handler: HTTP 请求处理器
         """
-        parsed = urlparse(request_handler.path)
-        path = parsed.path
-        
         # 读取 POST body
         content_length = int(request_handler.headers.get("Content-Length", "0") or "0")
-        raw_body = request_handler.rfile.read(content_length).decode("utf-8", errors="replace")
-        form_data = parse_qs(raw_body)
-        
-        # 匹配路由
-        route = self.match(path, "POST")
-        
-        if route is None:
-            self._send_not_found(request_handler, path)
-            return
-        
-        try:
-            # 调用处理器（传入 form_data）
-            response = route.handler(form_data)
-            response.send(request_handler)
-            
-        except Exception as e:
-            logger.error(f"[Router] 处理 POST 请求失败: {path} - {e}")
-            self._send_error(request_handler, str(e))
+        body = request_handler.rfile.read(content_length)
+        self.handle("POST", request_handler.path, body).send(request_handler)
     
     def list_routes(self) -> List[Tuple[str, str, str]]:
         """
@@ -207,25 +199,15 @@ class Router:
                 routes.append((method, path, route.description))
         return sorted(routes, key=lambda x: (x[1], x[0]))
     
-    def _send_not_found(
-        self,
-        request_handler: 'BaseHTTPRequestHandler',
-        path: str
-    ) -> None:
-        """发送 404 响应"""
+    def _not_found_response(self, path: str) -> Response:
+        """404 响应"""
         body = render_error_page(404, "页面未找到", f"路径 {path} 不存在")
-        response = HtmlResponse(body, status=HTTPStatus.NOT_FOUND)
-        response.send(request_handler)
+        return HtmlResponse(body, status=HTTPStatus.NOT_FOUND)
     
-    def _send_error(
-        self,
-        request_handler: 'BaseHTTPRequestHandler',
-        message: str
-    ) -> None:
-        """发送 500 响应"""
+    def _error_response(self, message: str) -> Response:
+        """500 响应"""
         body = render_error_page(500, "服务器内部错误", message)
-        response = HtmlResponse(body, status=HTTPStatus.INTERNAL_SERVER_ERROR)
-        response.send(request_handler)
+        return HtmlResponse(body, status=HTTPStatus.INTERNAL_SERVER_ERROR)
 
 
 # ============================================================
@@ -260,6 +242,12 @@ def create_default_router() -> Router:
         "健康检查"
     )
     
+    router.register(
+        "/metrics", "GET",
+        lambda q: api_handler.handle_metrics(),
+        "Prometheus 指标"
+    )
+    
     router.register(
         "/analysis", "GET",
         lambda q: api_handler.handle_analysis(q),
@@ -277,6 +265,18 @@ def create_default_router() -> Router:
         lambda q: api_handler.handle_task_status(q),
         "查询任务状态"
     )
+    
+    router.register(
+        "/task/stream", "GET",
+        lambda q: api_handler.handle_task_stream(q),
+        "任务进度推送 (SSE)"
+    )
+    
+    router.register(
+        "/task/poll", "GET",
+        lambda q: api_handler.handle_task_poll(q),
+        "任务进度长轮询"
+    )
 
     router.register(
         "/report/download", "GET",
@@ -284,6 +284,12 @@ def create_default_router() -> Router:
         "下载详细报告"
     )
 
+    router.register(
+        "/api/news", "GET",
+        lambda q: api_handler.handle_news_search(q),
+        "检索本地新闻索引"
+    )
+
     # === 设置路由 ===
     router.register(
         "/api/config", "GET",
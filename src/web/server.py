@@ -168,6 +168,14 @@ class WebServer:
             print(f"清理端口占用失败: {e}", file=sys.stderr)
             sys.stderr.flush()
 
+    def _log_routes(self) -> None:
+        """打印路由列表"""
+        routes = self.router.list_routes()
+        if routes:
+            logger.info("已注册路由:")
+            for method, path, desc in routes:
+                logger.info(f"  {method:6} {path:20} - {desc}")
+
     def run(self) -> None:
         """
         前台运行服务器（阻塞）
@@ -207,12 +215,7 @@ class WebServer:
         sys.stdout.flush()
         sys.stderr.flush()
         
-        # 打印路由列表
-        routes = self.router.list_routes()
-        if routes:
-            logger.info("已注册路由:")
-            for method, path, desc in routes:
-                logger.info(f"  {method:6} {path:20} - {desc}")
+        self._log_routes()
         
         try:
             self._server.serve_forever()
@@ -263,6 +266,36 @@ class WebServer:
 # 便捷函数
 # ============================================================
 
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    router: Optional[Router] = None,
+    mode: Optional[str] = None
+) -> WebServer:
+    """
+    按配置创建 Web 服务器
+    
+    Args:
+        host: 监听地址
+        port: 监听端口
+        router: 路由器实例（可选）
+        mode: threading（每个连接一个线程）或 asyncio（协程处理连接，
+              处理器在有上限的线程池执行）；默认读取 WEBUI_SERVER 配置
+        
+    Returns:
+        WebServer 或 AsyncWebServer
+    """
+    from config import get_config
+    config = get_config()
+    mode = (mode or config.webui_server or "threading").lower()
+    if mode == "asyncio":
+        from web.async_server import AsyncWebServer
+        return AsyncWebServer(host=host, port=port, router=router, max_workers=config.webui_workers)
+    if mode != "threading":
+        logger.warning(f"未知的 WEBUI_SERVER={mode}，使用 threading 模式")
+    return WebServer(host=host, port=port, router=router)
+
+
 def run_server_in_thread(
     host: str = "127.0.0.1",
     port: int = 8000,
@@ -279,7 +312,7 @@ def run_server_in_thread(
     Returns:
         服务器线程
     """
-    server = WebServer(host=host, port=port, router=router)
+    server = create_server(host=host, port=port, router=router)
     return server.start_background()
 
 
@@ -296,5 +329,5 @@ def run_server(
         port: 监听端口
         router: 路由器实例（可选）
     """
-    server = WebServer(host=host, port=port, router=router)
+    server = create_server(host=host, port=port, router=router)
     server.run()
@@ -17,9 +17,10 @@ import logging
 import threading
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+from typing import Callable, Optional, Dict, Any, List, Union
 
 from enums import ReportType
+from metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -189,6 +190,10 @@ class ConfigService:
             if 'api_key' in config_data: config.openai_api_key = config_data['api_key']
             if 'base_url' in config_data: config.openai_base_url = config_data['base_url']
             if 'model_name' in config_data: config.openai_model = config_data['model_name']
+        
+        # 已创建的分析器按新配置重建（下次分析时生效）
+        from components import get_components
+        get_components().reload('analyzer')
             
         return {"success": True, "message": "配置已保存并热加载"}
 
@@ -215,6 +220,9 @@ class AnalysisService:
         self._max_workers = max_workers
         self._tasks: Dict[str, Dict[str, Any]] = {}
         self._tasks_lock = threading.Lock()
+        # 任务每次更新 version 加 1 并回调订阅者（SSE / 长轮询）
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        REGISTRY.register_collector(self.collect_metrics)
     
     @classmethod
     def get_instance(cls) -> 'AnalysisService':
@@ -256,6 +264,21 @@ class AnalysisService:
         
         task_id = f"{code}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
         
+        # 排队中的任务同样可查询状态（线程池满时需等待前面的任务完成）
+        with self._tasks_lock:
+            self._tasks[task_id] = {
+                "task_id": task_id,
+                "code": code,
+                "status": "pending",
+                "start_time": datetime.now().isoformat(),
+                "result": None,
+                "error": None,
+                "report_type": report_type.value,
+                "stage": None,
+                "progress": [],
+                "version": 0
+            }
+        
         # 提交到线程池
         self.executor.submit(self._run_analysis, code, task_id, report_type)
         
@@ -272,16 +295,99 @@ class AnalysisService:
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务状态"""
         with self._tasks_lock:
-            return self._tasks.get(task_id)
+            task = self._tasks.get(task_id)
+            return self._snapshot(task) if task else None
     
     def list_tasks(self, limit: int = 20) -> List[Dict[str, Any]]:
         """列出最近的任务"""
         with self._tasks_lock:
-            tasks = list(self._tasks.values())
+            tasks = [self._snapshot(task) for task in self._tasks.values()]
         # 按开始时间倒序
         tasks.sort(key=lambda x: x.get('start_time', ''), reverse=True)
         return tasks[:limit]
     
+    def subscribe(
+        self,
+        task_id: str,
+        listener: Callable[[Dict[str, Any]], None]
+    ) -> Optional[Callable[[], None]]:
+        """
+        订阅任务更新
+        
+        订阅时立即以当前状态回调一次，之后每次更新回调一次。回调在持有任务锁时执行
+        （保证顺序），只应做入队等轻量操作。
+        
+        Args:
+            task_id: 任务ID
+            listener: listener(任务状态快照)
+            
+        Returns:
+            取消订阅函数；任务不存在时返回 None
+        """
+        with self._tasks_lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            self._listeners.setdefault(task_id, []).append(listener)
+            listener(self._snapshot(task))
+        
+        def unsubscribe() -> None:
+            with self._tasks_lock:
+                listeners = self._listeners.get(task_id, [])
+                if listener in listeners:
+                    listeners.remove(listener)
+                if not listeners:
+                    self._listeners.pop(task_id, None)
+        
+        return unsubscribe
+    
+    @staticmethod
+    def _snapshot(task: Dict[str, Any]) -> Dict[str, Any]:
+        """任务状态快照（调用方须持有任务锁）"""
+        return dict(task, progress=list(task.get("progress", ())))
+    
+    def _update_task(self, task_id: str, stage_event: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
+        """
+        更新任务状态并通知订阅者
+        
+        Args:
+            task_id: 任务ID
+            stage_event: 追加的阶段进度事件（可选）
+            **fields: 更新的字段
+        """
+        with self._tasks_lock:
+            task = self._tasks[task_id]
+            task.update(fields)
+            if stage_event is not None:
+                task["progress"].append(stage_event)
+            task["version"] += 1
+            if task_id in self._listeners:
+                snapshot = self._snapshot(task)
+                for listener in self._listeners[task_id]:
+                    try:
+                        listener(snapshot)
+                    except Exception as e:
+                        logger.warning(f"[AnalysisService] 推送任务 {task_id} 进度失败: {e}")
+    
+    def _on_stage(self, task_id: str, stage: str, state: str) -> None:
+        """流水线阶段进度回调"""
+        self._update_task(
+            task_id,
+            stage_event={"stage": stage, "state": state, "time": datetime.now().isoformat()},
+            stage=stage,
+        )
+    
+    def collect_metrics(self) -> List[tuple]:
+        """任务队列深度（/metrics 采集时调用）"""
+        counts = {"pending": 0, "running": 0, "completed": 0, "failed": 0}
+        with self._tasks_lock:
+            for task in self._tasks.values():
+                counts[task["status"]] = counts.get(task["status"], 0) + 1
+        return [(
+            "dsa_analysis_tasks", "gauge", "分析任务数（按状态）",
+            [({"state": state}, count) for state, count in counts.items()],
+        )]
+    
     def _run_analysis(
         self, 
         code: str, 
@@ -298,17 +404,8 @@ class AnalysisService:
             task_id: 任务ID
             report_type: 报告类型枚举
         """
-        # 初始化任务状态
-        with self._tasks_lock:
-            self._tasks[task_id] = {
-                "task_id": task_id,
-                "code": code,
-                "status": "running",
-                "start_time": datetime.now().isoformat(),
-                "result": None,
-                "error": None,
-                "report_type": report_type.value
-            }
+        # 更新任务状态
+        self._update_task(task_id, status="running", start_time=datetime.now().isoformat())
         
         try:
             # 延迟导入避免循环依赖
@@ -317,7 +414,7 @@ class AnalysisService:
             
             logger.info(f"[AnalysisService] 开始分析股票: {code}")
             
-            # 创建分析管道
+            # 创建分析管道（服务组件从注册表复用，创建开销很小）
             config = get_config()
             pipeline = StockAnalysisPipeline(config=config, max_workers=1)
             
@@ -326,28 +423,23 @@ class AnalysisService:
                 code=code,
                 skip_analysis=False,
                 single_stock_notify=True,
-                report_type=report_type
+                report_type=report_type,
+                progress_callback=lambda stage, state: self._on_stage(task_id, stage, state)
             )
             
             if result:
                 result_data = result.to_dict()
                 
-                with self._tasks_lock:
-                    self._tasks[task_id].update({
-                        "status": "completed",
-                        "end_time": datetime.now().isoformat(),
-                        "result": result_data
-                    })
+                self._update_task(
+                    task_id, status="completed", end_time=datetime.now().isoformat(), result=result_data
+                )
                 
                 logger.info(f"[AnalysisService] 股票 {code} 分析完成: {result.operation_advice}")
                 return {"success": True, "task_id": task_id, "result": result_data}
             else:
-                with self._tasks_lock:
-                    self._tasks[task_id].update({
-                        "status": "failed",
-                        "end_time": datetime.now().isoformat(),
-                        "error": "分析返回空结果"
-                    })
+                self._update_task(
+                    task_id, status="failed", end_time=datetime.now().isoformat(), error="分析返回空结果"
+                )
                 
                 logger.warning(f"[AnalysisService] 股票 {code} 分析失败: 返回空结果")
                 return {"success": False, "task_id": task_id, "error": "分析返回空结果"}
@@ -356,12 +448,9 @@ class AnalysisService:
             error_msg = str(e)
             logger.error(f"[AnalysisService] 股票 {code} 分析异常: {error_msg}")
             
-            with self._tasks_lock:
-                self._tasks[task_id].update({
-                    "status": "failed",
-                    "end_time": datetime.now().isoformat(),
-                    "error": error_msg
-                })
+            self._update_task(
+                task_id, status="failed", end_time=datetime.now().isoformat(), error=error_msg
+            )
             
             return {"success": False, "task_id": task_id, "error": error_msg}
 
@@ -488,6 +488,10 @@ button:active {
     gap: 0.2rem;
 }
 
+.task-meta .task-stage {
+    color: var(--primary);
+}
+
 /* Task Result Badge */
 .task-result {
     display: flex;
@@ -790,10 +794,13 @@ def render_config_page(
     // 全局变量
     const tasks = new Map();
     const openDetails = new Set();
-    let pollInterval = null;
-    const MAX_POLL_COUNT = 120;
-    const POLL_INTERVAL_MS = 3000;
+    const subscriptions = new Map();  // taskId -> {source, version, stopped}
+    const POLL_RETRY_MS = 3000;
     const MAX_TASKS_DISPLAY = 10;
+    const STAGE_LABELS = {
+        fetch: '获取行情', enrich: '补充数据', trend: '趋势分析', search: '搜索情报',
+        llm: 'AI 分析', report: '生成报告', notify: '推送通知'
+    };
     
     // 获取 DOM 元素 (每次调用时获取，防止初始化失败)
     function getEl(id) { return document.getElementById(id); }
@@ -988,6 +995,7 @@ def render_config_page(
                     <span>⏱ ${formatTime(task.start_time)}</span>
                     <span>⏳ ${calcDuration(task.start_time, task.end_time)}</span>
                     <span>${task.report_type === 'full' ? '📊完整' : '📝精简'}</span>
+                    ${status === 'running' && task.stage ? '<span class="task-stage">🔄 ' + (STAGE_LABELS[task.stage] || task.stage) + '</span>' : ''}
                 </div>
             </div>
             ${resultHtml}
@@ -1141,54 +1149,76 @@ def render_config_page(
     
     // 全局函数：移除任务
     window.removeTask = function(taskId) {
+        unwatchTask(taskId);
         tasks.delete(taskId);
         renderAllTasks();
-        checkStopPolling();
     };
     
-    // 轮询逻辑
-    function pollAllTasks() {
-        let hasRunning = false;
-        tasks.forEach((taskData, taskId) => {
-            const status = taskData.task?.status;
-            if (status === 'running' || status === 'pending' || !status) {
-                hasRunning = true;
-                taskData.pollCount = (taskData.pollCount || 0) + 1;
-                
-                if (taskData.pollCount > MAX_POLL_COUNT) {
-                    taskData.task = taskData.task || {};
-                    taskData.task.status = 'failed';
-                    taskData.task.error = '超时';
-                    return;
-                }
-                
-                fetch('/task?id=' + encodeURIComponent(taskId))
-                    .then(r => r.json())
-                    .then(data => {
-                        if (data.success && data.task) {
-                            taskData.task = data.task;
-                            renderAllTasks();
-                        }
-                    }).catch(e => console.error(e));
-            }
-        });
-        
-        if (!hasRunning) checkStopPolling();
+    // 任务进度订阅：优先使用 SSE（/task/stream），浏览器不支持或连接失败时改用长轮询（/task/poll）
+    function isActive(status) {
+        return status === 'running' || status === 'pending' || !status;
     }
     
-    function checkStopPolling() {
-        let hasRunning = false;
-        tasks.forEach((t) => {
-            if (t.task?.status === 'running' || t.task?.status === 'pending') hasRunning = true;
-        });
-        if (!hasRunning && pollInterval) {
-            clearInterval(pollInterval);
-            pollInterval = null;
+    // 应用服务端推送的任务状态，返回任务是否已结束
+    function applyTaskUpdate(taskId, task) {
+        const taskData = tasks.get(taskId);
+        if (!taskData) return true;
+        taskData.task = task;
+        renderAllTasks();
+        return !isActive(task.status);
+    }
+    
+    function watchTask(taskId) {
+        if (subscriptions.has(taskId)) return;
+        const sub = { source: null, version: -1, stopped: false };
+        subscriptions.set(taskId, sub);
+        
+        if (!window.EventSource) {
+            longPoll(taskId, sub);
+            return;
         }
+        const source = new EventSource('/task/stream?id=' + encodeURIComponent(taskId));
+        sub.source = source;
+        source.addEventListener('task', (e) => {
+            const task = JSON.parse(e.data);
+            sub.version = task.version;
+            if (applyTaskUpdate(taskId, task)) unwatchTask(taskId);
+        });
+        source.onerror = () => {
+            // 连接失败或被代理中断：改用长轮询，从已收到的版本继续
+            source.close();
+            sub.source = null;
+            longPoll(taskId, sub);
+        };
+    }
+    
+    function longPoll(taskId, sub) {
+        if (sub.stopped) return;
+        fetch('/task/poll?id=' + encodeURIComponent(taskId) + '&since=' + sub.version)
+            .then(r => r.json())
+            .then(data => {
+                if (sub.stopped) return;
+                if (!data.success || !data.task) {
+                    // 任务不存在（如服务已重启）
+                    const taskData = tasks.get(taskId);
+                    const task = Object.assign({}, taskData ? taskData.task : {}, { status: 'failed', error: data.error });
+                    applyTaskUpdate(taskId, task);
+                    unwatchTask(taskId);
+                    return;
+                }
+                sub.version = data.task.version;
+                if (applyTaskUpdate(taskId, data.task)) unwatchTask(taskId);
+                else longPoll(taskId, sub);
+            })
+            .catch(() => setTimeout(() => longPoll(taskId, sub), POLL_RETRY_MS));
     }
     
-    function startPolling() {
-        if (!pollInterval) pollInterval = setInterval(pollAllTasks, POLL_INTERVAL_MS);
+    function unwatchTask(taskId) {
+        const sub = subscriptions.get(taskId);
+        if (!sub) return;
+        sub.stopped = true;
+        if (sub.source) sub.source.close();
+        subscriptions.delete(taskId);
     }
     
     // 全局提交函数
@@ -1247,22 +1277,18 @@ def render_config_page(
                      tasks.set(data.task_id, {
                         task: {
                             code: code,
-                            status: 'running',
+                            status: 'pending',
                             start_time: new Date().toISOString(),
                             report_type: reportType
-                        },
-                        pollCount: 0
+                        }
                     });
                     
                     openDetails.add(data.task_id); // 自动展开
                     renderAllTasks();
-                    startPolling();
                     codeInput.value = ''; // 清空输入
                     
-                    // 立即轮询一次
-                    setTimeout(() => {
-                        pollAllTasks(); 
-                    }, 500);
+                    // 订阅任务进度（服务端推送各阶段进展）
+                    watchTask(data.task_id);
                 } else {
                     alert('提交失败: ' + (data.error || '未知错误'));
                 }
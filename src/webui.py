@@ -10,6 +10,7 @@ WebUI 入口文件 (向后兼容)
     web/
     ├── __init__.py    - 包初始化
     ├── server.py      - HTTP 服务器
+    ├── async_server.py - asyncio 服务器（WEBUI_SERVER=asyncio）
     ├── router.py      - 路由分发
     ├── handlers.py    - 请求处理器
     ├── services.py    - 业务服务层
@@ -21,11 +22,14 @@ API Endpoints:
   GET  /analysis?code=xxx - 触发单只股票异步分析
   GET  /tasks         - 查询任务列表
   GET  /task?id=xxx   - 查询任务状态
+  GET  /task/stream?id=xxx - 任务进度推送 (SSE)
+  GET  /task/poll?id=xxx&since=N - 任务进度长轮询
   POST /update        - 更新配置
 
 Usage:
   python webui.py
   WEBUI_HOST=0.0.0.0 WEBUI_PORT=8000 python webui.py
+  WEBUI_SERVER=asyncio python webui.py
 """
 
 from __future__ import annotations
@@ -34,7 +38,7 @@ import os
 import logging
 
 # 从 web 包导入（新架构）
-from web.server import WebServer, run_server_in_thread, run_server
+from web.server import WebServer, create_server, run_server_in_thread, run_server
 from web.router import Router, get_router
 from web.services import ConfigService, AnalysisService, get_config_service, get_analysis_service
 from web.handlers import PageHandler, ApiHandler
@@ -46,6 +50,7 @@ logger = logging.getLogger(__name__)
 __all__ = [
     # 服务器
     'WebServer',
+    'create_server',
     'run_server_in_thread',
     'run_server',
     # 路由
@@ -72,6 +77,7 @@ def main() -> int:
     支持环境变量配置:
         WEBUI_HOST: 监听地址 (默认 127.0.0.1)
         WEBUI_PORT: 监听端口 (默认 8000)
+        WEBUI_SERVER: 服务器实现 threading / asyncio (默认 threading)
     """
     host = os.getenv("WEBUI_HOST", "127.0.0.1")
     port = int(os.getenv("WEBUI_PORT", "8000"))
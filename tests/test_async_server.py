@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio Web 服务器测试（Router.handle 适配、keep-alive、请求大小限制）
+
+使用方法：
+    python -m pytest -q tests/test_async_server.py
+"""
+import json
+import os
+import socket
+import sys
+import time
+from http import HTTPStatus
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from web.async_server import MAX_BODY_BYTES, MAX_HEADERS, MAX_LINE_BYTES, AsyncWebServer
+from web.handlers import JsonResponse
+from web.router import Router
+
+
+def _router():
+    router = Router()
+    router.register('/echo', 'GET', lambda query: JsonResponse(query))
+    router.register('/form', 'POST', lambda form: JsonResponse(form))
+
+    def boom(query):
+        raise RuntimeError('boom')
+
+    router.register('/boom', 'GET', boom)
+    return router
+
+
+@pytest.fixture
+def server():
+    """监听随机端口的后台服务器"""
+    server = AsyncWebServer(host='127.0.0.1', port=0, router=_router(), max_workers=2)
+    server.start_background()
+    server.port = server._socket.getsockname()[1]
+    deadline = time.monotonic() + 5
+    while server._async_server is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield server
+    server.stop()
+
+
+class _Client:
+    """在一个 TCP 连接上收发原始 HTTP 报文"""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+        self.rfile = self.sock.makefile('rb')
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def request(self, method, target, body=b'', version='HTTP/1.1', headers=()):
+        lines = [f"{method} {target} {version}", 'Host: localhost', *headers]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        self.send(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        return self.read_response()
+
+    def read_response(self):
+        """读取一个响应：(状态码, 响应头（小写键）, 响应体)"""
+        status_line = self.rfile.readline()
+        assert status_line, '连接已关闭'
+        status = int(status_line.split()[1])
+        headers = {}
+        for line in iter(self.rfile.readline, b'\r\n'):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = self.rfile.read(int(headers.get('content-length', 0)))
+        return status, headers, body
+
+    def is_closed(self):
+        return self.rfile.read(1) == b''
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+@pytest.fixture
+def client(server):
+    client = _Client(server.port)
+    yield client
+    client.close()
+
+
+# ========== Router.handle 适配 ==========
+
+def test_get_query_is_routed(client):
+    status, headers, body = client.request('GET', '/echo?code=600519&code=000858&x=1#frag')
+    assert status == HTTPStatus.OK
+    assert headers['content-type'] == 'application/json; charset=utf-8'
+    assert json.loads(body) == {'code': ['600519', '000858'], 'x': ['1']}
+
+
+def test_post_form_body_is_parsed(client):
+    status, _, body = client.request('POST', '/form', body='stock_list=600519%2C000858'.encode())
+    assert status == HTTPStatus.OK
+    assert json.loads(body) == {'stock_list': ['600519,000858']}
+
+
+def test_router_errors_keep_connection_open(client):
+    assert client.request('GET', '/missing')[0] == HTTPStatus.NOT_FOUND
+    assert client.request('GET', '/boom')[0] == HTTPStatus.INTERNAL_SERVER_ERROR
+    # 同一方法未注册的路径也是 404
+    assert client.request('POST', '/echo')[0] == HTTPStatus.NOT_FOUND
+    assert client.request('GET', '/echo?a=1')[0] == HTTPStatus.OK
+
+
+def test_options_and_unsupported_method(client):
+    status, headers, body = client.request('OPTIONS', '/echo')
+    assert status == HTTPStatus.OK and body == b''
+    assert headers['access-control-allow-methods'] == 'GET, POST, OPTIONS'
+    assert client.request('PUT', '/echo')[0] == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+# ========== keep-alive ==========
+
+def test_http11_connection_is_reused(client):
+    for i in range(3):
+        status, headers, body = client.request('GET', f'/echo?i={i}')
+        assert status == HTTPStatus.OK
+        assert json.loads(body) == {'i': [str(i)]}
+        assert headers['connection'] == 'keep-alive'
+        assert headers['keep-alive'] == 'timeout=15'
+        assert 'date' in headers
+
+
+def test_pipelined_requests_are_answered_in_order(client):
+    client.send(b''.join(
+        f"GET /echo?i={i} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode() for i in range(3)
+    ))
+    assert [json.loads(client.read_response()[2]) for _ in range(3)] == [{'i': ['0']}, {'i': ['1']}, {'i': ['2']}]
+
+
+@pytest.mark.parametrize('version, headers', [
+    ('HTTP/1.1', ['Connection: close']),
+    ('HTTP/1.0', []),
+])
+def test_connection_closed_when_not_keep_alive(client, version, headers):
+    status, response_headers, _ = client.request('GET', '/echo', version=version, headers=headers)
+    assert status == HTTPStatus.OK
+    assert response_headers['connection'] == 'close'
+    assert 'keep-alive' not in response_headers
+    assert client.is_closed()
+
+
+def test_http10_keep_alive_header_keeps_connection(client):
+    for _ in range(2):
+        _, headers, _ = client.request('GET', '/echo', version='HTTP/1.0', headers=['Connection: keep-alive'])
+        assert headers['connection'] == 'keep-alive'
+
+
+# ========== 请求大小限制 ==========
+
+def _expect_error(client, raw, status):
+    client.send(raw)
+    response_status, headers, body = client.read_response()
+    assert response_status == status
+    assert body == HTTPStatus(status).phrase.encode()
+    assert headers['connection'] == 'close'
+    assert client.is_closed()
+
+
+@pytest.mark.parametrize('length', [MAX_BODY_BYTES + 1, -1])
+def test_oversized_body_rejected_with_413(client, length):
+    # 只发请求头：不读取声明的请求体就直接拒绝
+    raw = f"POST /form HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+    _expect_error(client, raw, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+
+def test_invalid_content_length_rejected_with_400(client):
+    _expect_error(client, b"POST /form HTTP/1.1\r\nContent-Length: abc\r\n\r\n", HTTPStatus.BAD_REQUEST)
+
+
+def test_header_line_too_long_rejected_with_431(client):
+    raw = b"GET /echo HTTP/1.1\r\nX-Long: " + b"a" * (MAX_LINE_BYTES + 1) + b"\r\n\r\n"
+    _expect_error(client, raw, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+
+def test_too_many_headers_rejected_with_431(client):
+    headers = b''.join(f"X-H{i}: {i}\r\n".encode() for i in range(MAX_HEADERS + 1))
+    _expect_error(client, b"GET /echo HTTP/1.1\r\n" + headers + b"\r\n", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+
+def test_max_headers_accepted(client):
+    headers = [f"X-H{i}: {i}" for i in range(MAX_HEADERS - 1)]  # 加上 Host 正好 MAX_HEADERS 行
+    assert client.request('GET', '/echo', headers=headers)[0] == HTTPStatus.OK
+
+
+def test_request_line_too_long_rejected_with_414(client):
+    raw = b"GET /echo?q=" + b"a" * (MAX_LINE_BYTES + 1) + b" HTTP/1.1\r\n\r\n"
+    _expect_error(client, raw, HTTPStatus.REQUEST_URI_TOO_LONG)
+
+
+def test_malformed_request_line_rejected_with_400(client):
+    _expect_error(client, b"GET /echo\r\n\r\n", HTTPStatus.BAD_REQUEST)
+
+
+def test_stop_closes_idle_keep_alive_connections(server, client):
+    assert client.request('GET', '/echo')[0] == HTTPStatus.OK
+    server.stop()
+    assert client.is_closed()
+    assert not server.is_running()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+提示词上下文预算测试（Token 估算、预算约束、优先级、截断与去重）
+
+使用方法：
+    python -m pytest -q tests/test_context_builder.py
+"""
+import os
+import sys
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from context_builder import (
+    PRIORITY_F10,
+    PRIORITY_OTHER_NEWS,
+    PRIORITY_RISK_NEWS,
+    PRIORITY_TECHNICALS,
+    PromptContextBuilder,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+
+
+def _news(*texts):
+    return [{'text': t} for t in texts]
+
+
+# 各段内容互不相似，避免触发去重
+TECH = '\n'.join(f"指标{i}: MA{i} 多头排列，量比 1.{i}" for i in range(5))
+RISK = _news('大股东拟减持不超过2%股份', '收到监管问询函，涉及关联交易')
+F10 = '主营：高端白酒生产与销售\n行业：酿酒行业\n市值：1.9万亿'
+OTHER = _news('一季度营收同比增长18%', '新品发布会定于下月举行', '海外市场拓展顺利')
+
+
+def _builder(budget):
+    # 按优先级相反的顺序添加，验证分配顺序只取决于优先级
+    builder = PromptContextBuilder(budget)
+    builder.add_items('other_news', OTHER, PRIORITY_OTHER_NEWS)
+    builder.add_text('f10', F10, PRIORITY_F10)
+    builder.add_items('risk_news', RISK, PRIORITY_RISK_NEWS)
+    builder.add_text('technicals', TECH, PRIORITY_TECHNICALS, required=True)
+    return builder
+
+
+def _full_cost():
+    builder = _builder(0)
+    builder.build()
+    return {name: usage.tokens for name, usage in builder.get_usage().items()}
+
+
+# ========== Token 估算 ==========
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('贵州茅台') == 4
+    assert estimate_tokens('abcd efgh') == 3  # 9 个非中文字符 / 4 向上取整
+    assert estimate_tokens('茅台 MA5') == 2 + 1
+
+
+def test_truncate_to_tokens():
+    text = '贵州茅台缩量回踩均线企稳'
+    assert truncate_to_tokens(text, 100) == text
+    short = truncate_to_tokens(text, 6)
+    assert short.endswith('...') and estimate_tokens(short) <= 6
+    assert truncate_to_tokens(text, 0) == ''
+
+
+# ========== 预算 ==========
+
+def test_unlimited_budget_keeps_everything():
+    builder = _builder(0)
+    out = builder.build()
+    assert out['technicals'] == TECH
+    assert out['f10'] == F10
+    assert [i['text'] for i in out['risk_news']] == [i['text'] for i in RISK]
+    assert len(out['other_news']) == len(OTHER)
+
+
+def test_budget_is_enforced():
+    cost = _full_cost()
+    for budget in range(cost['technicals'], sum(cost.values()), 3):
+        builder = _builder(budget)
+        builder.build()
+        assert builder.total_tokens <= budget
+
+
+def test_required_section_ignores_budget():
+    builder = _builder(1)
+    out = builder.build()
+    assert out['technicals'] == TECH
+    assert out['risk_news'] == [] and out['f10'] == '' and out['other_news'] == []
+    assert builder.get_usage()['technicals'].tokens > 1
+
+
+# ========== 优先级 ==========
+
+def test_priority_order_technicals_risk_f10_other():
+    cost = _full_cost()
+    # 预算刚好覆盖技术面 + 风险新闻：F10、其他新闻不再分到预算
+    builder = _builder(cost['technicals'] + cost['risk_news'])
+    out = builder.build()
+    assert out['technicals'] == TECH
+    assert len(out['risk_news']) == len(RISK)
+    assert out['f10'] == ''
+    assert out['other_news'] == []
+
+    # 再加上 F10：其他新闻仍在最后
+    builder = _builder(cost['technicals'] + cost['risk_news'] + cost['f10'])
+    out = builder.build()
+    assert out['f10'] == F10
+    assert out['other_news'] == []
+    assert list(builder.get_usage()) == ['technicals', 'risk_news', 'f10', 'other_news']
+
+
+# ========== 截断 ==========
+
+def test_first_overflowing_line_is_truncated_not_dropped():
+    cost = _full_cost()
+    first_line, second_line = F10.splitlines()[:2]
+    # F10 的预算：第一行完整 + 第二行的一部分
+    budget = cost['technicals'] + cost['risk_news'] + estimate_tokens(first_line) + 1 + 5
+    builder = _builder(budget)
+    out = builder.build()
+
+    lines = out['f10'].splitlines()
+    assert lines[0] == first_line
+    assert len(lines) == 2
+    assert lines[1].endswith('...') and second_line.startswith(lines[1][:-3])
+    usage = builder.get_usage()['f10']
+    assert usage.truncated == 1
+    assert usage.dropped == 1  # 第三行
+    assert builder.total_tokens <= budget
+
+
+def test_item_truncated_to_item_max_tokens():
+    builder = PromptContextBuilder(0)
+    builder.add_items('risk_news', _news('监管' * 50), PRIORITY_RISK_NEWS, item_max_tokens=20)
+    out = builder.build()
+    assert estimate_tokens(out['risk_news'][0]['text']) <= 20
+    assert builder.get_usage()['risk_news'].truncated == 1
+
+
+# ========== 去重 ==========
+
+def test_near_duplicate_dropped_from_lower_priority_section():
+    builder = PromptContextBuilder(0)
+    builder.add_items('risk_news', _news('贵州茅台大股东拟减持不超过2%股份'), PRIORITY_RISK_NEWS)
+    builder.add_items(
+        'other_news',
+        _news('贵州茅台：大股东拟减持不超过 2% 股份。', '一季度营收同比增长18%'),
+        PRIORITY_OTHER_NEWS,
+    )
+    out = builder.build()
+    assert [i['text'] for i in out['other_news']] == ['一季度营收同比增长18%']
+    assert builder.get_usage()['other_news'].deduped == 1
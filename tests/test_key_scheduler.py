@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+搜索 API Key 调度与用量持久化测试
+
+使用方法：
+    python -m pytest -q tests/test_key_scheduler.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import key_scheduler
+from key_scheduler import KeyScheduler, KeyUsageStore, key_id
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的时钟"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(key_scheduler.time, 'time', lambda: now[0])
+    return now
+
+
+def _scheduler(keys=('key-a', 'key-b'), quota=100, **kwargs):
+    return KeyScheduler('Tavily', list(keys), monthly_quota=quota, **kwargs)
+
+
+# ========== 选择 Key ==========
+
+def test_acquire_picks_key_with_most_remaining_quota():
+    scheduler = _scheduler()
+    scheduler.store.update('Tavily', 'key-a', used_delta=5)
+
+    assert scheduler.acquire() == 'key-b'
+    assert scheduler.store.get('Tavily', 'key-b')['used'] == 1
+
+
+def test_acquire_spreads_usage_evenly():
+    scheduler = _scheduler(keys=('key-a', 'key-b', 'key-c'))
+    for _ in range(9):
+        scheduler.acquire()
+    assert [scheduler.store.get('Tavily', k)['used'] for k in ('key-a', 'key-b', 'key-c')] == [3, 3, 3]
+
+
+def test_unlimited_quota_prefers_least_used():
+    scheduler = _scheduler(quota=0)
+    scheduler.store.update('Tavily', 'key-b', used_delta=3)
+    assert scheduler.acquire() == 'key-a'
+    assert scheduler.get_usage()[0]['quota'] == 0
+
+
+def test_acquire_returns_none_when_all_quota_used():
+    scheduler = _scheduler(keys=('key-a',), quota=2)
+    assert scheduler.acquire() == 'key-a'
+    assert scheduler.acquire() == 'key-a'
+    assert scheduler.acquire() is None
+
+
+def test_reserve_ratio_reports_tight_capacity():
+    scheduler = _scheduler(keys=('key-a',), quota=100, reserve_ratio=0.1)
+    scheduler.store.update('Tavily', 'key-a', used_delta=90)
+
+    # 剩余 10 次 = 保留额度：不计保留时视为无容量，但仍可分配
+    assert not scheduler.has_capacity()
+    assert scheduler.has_capacity(use_reserve=True)
+    assert scheduler.acquire() == 'key-a'
+
+
+# ========== 失败处理 ==========
+
+def test_rate_limit_with_retry_after(clock):
+    scheduler = _scheduler()
+    scheduler.record_failure('key-a', 429, retry_after=60)
+
+    assert scheduler.acquire() == 'key-b'
+    clock[0] += 59
+    assert [scheduler.acquire() for _ in range(2)] == ['key-b', 'key-b']
+    clock[0] += 2
+    assert scheduler.acquire() == 'key-a'
+
+
+def test_rate_limit_without_retry_after_backs_off(clock):
+    scheduler = _scheduler(keys=('key-a',))
+    cooldown = key_scheduler.RATE_LIMIT_COOLDOWN
+
+    scheduler.record_failure('key-a', 429)
+    clock[0] += cooldown - 1
+    assert scheduler.acquire() is None
+    clock[0] += 2
+    assert scheduler.acquire() == 'key-a'
+
+    # 连续限流时冷却时间翻倍
+    scheduler.record_failure('key-a', 429)
+    clock[0] += cooldown * 2 - 1
+    assert scheduler.acquire() is None
+    clock[0] += 2
+    assert scheduler.acquire() == 'key-a'
+
+    # 成功后重新从首次冷却时间开始
+    scheduler.record_success('key-a')
+    scheduler.record_failure('key-a', 429)
+    clock[0] += cooldown + 1
+    assert scheduler.acquire() == 'key-a'
+
+
+def test_consecutive_errors_trigger_cooldown(clock):
+    scheduler = _scheduler(keys=('key-a',))
+    for _ in range(key_scheduler.MAX_CONSECUTIVE_ERRORS - 1):
+        scheduler.record_failure('key-a', 500)
+    assert scheduler.has_capacity()
+
+    scheduler.record_failure('key-a', 500)
+    assert not scheduler.has_capacity()
+    clock[0] += key_scheduler.ERROR_COOLDOWN + 1
+    assert scheduler.has_capacity()
+
+
+@pytest.mark.parametrize('status', [401, 402, 403])
+def test_auth_and_balance_errors_disable_key_for_this_run_only(status):
+    store = KeyUsageStore()
+    scheduler = KeyScheduler('Bocha', ['key-a'], store=store)
+    scheduler.record_failure('key-a', status)
+
+    assert scheduler.acquire() is None
+    assert store.get('Bocha', 'key-a')['exhausted'] is False
+    # 下次运行（新的调度器）重新启用
+    assert KeyScheduler('Bocha', ['key-a'], store=store).acquire() == 'key-a'
+
+
+@pytest.mark.parametrize('status', [432, 433])
+def test_plan_quota_exhaustion_is_persisted_for_the_month(status):
+    store = KeyUsageStore()
+    _scheduler(keys=('key-a',), store=store).record_failure('key-a', status)
+
+    assert store.get('Tavily', 'key-a')['exhausted'] is True
+    assert _scheduler(keys=('key-a',), store=store).acquire() is None
+
+
+# ========== 用量持久化 ==========
+
+def test_period_rollover_resets_usage(monkeypatch):
+    store = KeyUsageStore()
+    monkeypatch.setattr(key_scheduler, 'current_period', lambda: '2026-01')
+    store.update('Tavily', 'key-a', used_delta=5, exhausted=True)
+    assert store.get('Tavily', 'key-a') == {'used': 5, 'exhausted': True}
+
+    monkeypatch.setattr(key_scheduler, 'current_period', lambda: '2026-02')
+    assert store.get('Tavily', 'key-a') == {'used': 0, 'exhausted': False}
+    store.update('Tavily', 'key-a', used_delta=1)
+    assert list(store._data['Tavily']) == ['2026-02']
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / 'usage.json')
+    store = KeyUsageStore(path)
+    store.update('Tavily', 'tvly-secret-key', used_delta=7)
+    store.update('SerpAPI', 'serp-secret-key', exhausted=True)
+    store.close()
+
+    raw = open(path, encoding='utf-8').read()
+    assert 'secret' not in raw
+    assert key_id('tvly-secret-key') in json.loads(raw)['Tavily'][key_scheduler.current_period()]
+
+    reloaded = KeyUsageStore(path)
+    assert reloaded.get('Tavily', 'tvly-secret-key') == {'used': 7, 'exhausted': False}
+    assert reloaded.get('SerpAPI', 'serp-secret-key') == {'used': 0, 'exhausted': True}
+    reloaded.close()
+
+
+def test_closed_store_stops_writing(tmp_path):
+    path = str(tmp_path / 'usage.json')
+    store = KeyUsageStore(path)
+    store.update('Tavily', 'key-a', used_delta=1)
+    store.close()
+
+    store.update('Tavily', 'key-a', used_delta=100)
+    store.flush()
+    assert KeyUsageStore(path).get('Tavily', 'key-a')['used'] == 1
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus 指标测试（文本格式、直方图累计分桶、标签转义、线程分片合并）
+
+使用方法：
+    python -m pytest -q tests/test_metrics.py
+"""
+import os
+import sys
+import threading
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from metrics import MetricsRegistry
+
+
+def _samples(text):
+    """解析文本输出中的样本行为 {名称{标签}: 值}"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = value
+    return samples
+
+
+# ========== 文本格式 ==========
+
+def test_counter_render():
+    registry = MetricsRegistry()
+    counter = registry.counter('dsa_test_total', '测试计数', ('source',))
+    counter.inc(source='tushare')
+    counter.inc(2.5, source='tushare')
+    counter.inc(source='akshare')
+
+    assert registry.render() == (
+        '# HELP dsa_test_total 测试计数\n'
+        '# TYPE dsa_test_total counter\n'
+        'dsa_test_total{source="akshare"} 1\n'
+        'dsa_test_total{source="tushare"} 3.5\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('dsa_test_seconds', '测试耗时', ('op',), buckets=(1.0, 0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0, 3.0):
+        histogram.observe(value, op='save')
+
+    text = registry.render()
+    assert '# TYPE dsa_test_seconds histogram' in text
+    lines = [line for line in text.splitlines() if line.startswith('dsa_test_seconds_bucket')]
+    # 分桶按上界排序输出；等于上界的观测值计入该桶（le）
+    assert lines == [
+        'dsa_test_seconds_bucket{op="save",le="0.1"} 2',
+        'dsa_test_seconds_bucket{op="save",le="0.5"} 3',
+        'dsa_test_seconds_bucket{op="save",le="1"} 4',
+        'dsa_test_seconds_bucket{op="save",le="+Inf"} 6',
+    ]
+    samples = _samples(text)
+    assert samples['dsa_test_seconds_count{op="save"}'] == '6'
+    assert float(samples['dsa_test_seconds_sum{op="save"}']) == sum((0.05, 0.1, 0.3, 0.7, 2.0, 3.0))
+
+
+def test_histogram_time_records_on_exception():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('dsa_test_seconds', '测试耗时')
+    try:
+        with histogram.time():
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+
+    @histogram.timed()
+    def work():
+        return 1
+
+    assert work() == 1
+    assert _samples(registry.render())['dsa_test_seconds_count'] == '2'
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    counter = registry.counter('dsa_test_total', '测试计数', ('model',))
+    counter.inc(model='a\\b "c"\nd')
+    assert 'dsa_test_total{model="a\\\\b \\"c\\"\\nd"} 1' in registry.render().splitlines()
+
+
+def test_missing_label_renders_empty_value():
+    registry = MetricsRegistry()
+    registry.counter('dsa_test_total', '测试计数', ('source',)).inc()
+    assert 'dsa_test_total{source=""} 1' in registry.render()
+
+
+def test_same_name_returns_registered_metric():
+    registry = MetricsRegistry()
+    assert registry.counter('dsa_test_total', 'a') is registry.counter('dsa_test_total', 'b')
+    # 尚无记录时只输出 HELP / TYPE
+    assert registry.render() == '# HELP dsa_test_total a\n# TYPE dsa_test_total counter\n'
+
+
+# ========== 采集回调 ==========
+
+def test_collectors_render_and_failures_are_skipped():
+    registry = MetricsRegistry()
+
+    def queue_depth():
+        return [('dsa_queue_depth', 'gauge', '队列深度', [({'queue': 'llm'}, 3), ({'queue': 'fetch'}, 0.5)])]
+
+    def broken():
+        raise RuntimeError('boom')
+
+    registry.register_collector(broken)
+    registry.register_collector(queue_depth)
+    registry.register_collector(queue_depth)  # 重复注册只保留一个
+
+    assert registry.render() == (
+        '# HELP dsa_queue_depth 队列深度\n'
+        '# TYPE dsa_queue_depth gauge\n'
+        'dsa_queue_depth{queue="llm"} 3\n'
+        'dsa_queue_depth{queue="fetch"} 0.5\n'
+    )
+
+
+# ========== 线程分片 ==========
+
+def _run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_shards_of_finished_threads_are_merged_and_removed():
+    registry = MetricsRegistry()
+    counter = registry.counter('dsa_test_total', '测试计数', ('source',))
+    histogram = registry.histogram('dsa_test_seconds', '测试耗时', buckets=(1.0,))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(source='x')
+        histogram.observe(0.5)
+        histogram.observe(2.0)
+
+    _run_threads(8, work)
+    assert len(counter._shards) == 8
+
+    samples = _samples(registry.render())
+    assert samples['dsa_test_total{source="x"}'] == '8000'
+    assert samples['dsa_test_seconds_bucket{le="1"}'] == '8'
+    assert samples['dsa_test_seconds_bucket{le="+Inf"}'] == '16'
+    # 已结束线程的分片并入累计值后移除
+    assert counter._shards == [] and histogram._shards == []
+
+    # 之后的抓取仍包含已并入的累计值
+    _run_threads(2, work)
+    assert _samples(registry.render())['dsa_test_total{source="x"}'] == '10000'
+
+
+def test_live_thread_shard_is_included_without_retiring():
+    registry = MetricsRegistry()
+    counter = registry.counter('dsa_test_total', '测试计数')
+    recorded, release = threading.Event(), threading.Event()
+
+    def work():
+        counter.inc(5)
+        recorded.set()
+        release.wait(5)
+        counter.inc(1)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    recorded.wait(5)
+    counter.inc(2)
+
+    assert _samples(registry.render())['dsa_test_total'] == '7'
+    assert len(counter._shards) == 2
+    release.set()
+    thread.join()
+    assert _samples(registry.render())['dsa_test_total'] == '8'
+    assert _samples(registry.render())['dsa_test_total'] == '8'  # 重复抓取不重复累计
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+本地新闻全文索引测试（FTS5 trigram 与 LIKE 回退、URL 去重、代码合并、过期清理）
+
+使用方法：
+    python -m pytest -q tests/test_news_index.py
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import news_index
+from news_index import NewsIndex, extract_codes
+
+
+def _item(title, snippet='', url='', published_date=None, source='证券时报'):
+    return SimpleNamespace(title=title, snippet=snippet, url=url, source=source, published_date=published_date)
+
+
+NEWS = [
+    _item('贵州茅台一季度营收增长', '白酒龙头 600519 业绩稳健', 'https://www.stcn.com/a/1.html'),
+    _item('五粮液回应渠道调整', '000858 经销商库存下降', 'https://finance.sina.com.cn/b/2'),
+    _item('白酒板块午后走强', '贵州茅台、五粮液领涨', 'https://m.cls.cn/c/3?utm_source=app'),
+    _item('宁德时代发布新电池', '300750 钠离子电池量产', 'https://www.yicai.com/d/4'),
+]
+
+
+@pytest.fixture(params=['fts', 'like'])
+def index(request, tmp_path, monkeypatch):
+    """同一组用例分别在 FTS5 trigram 和 LIKE 回退两种模式下运行"""
+    if request.param == 'like':
+        # 模拟不支持 FTS5 的 SQLite：创建虚拟表失败
+        monkeypatch.setattr(news_index, '_FTS_SCHEMA', "CREATE VIRTUAL TABLE news_fts USING no_such_module(x);")
+    idx = NewsIndex(str(tmp_path / 'news.db'))
+    assert idx.fts_enabled == (request.param == 'fts')
+    yield idx
+    idx.close()
+
+
+def _titles(items):
+    return sorted(item['title'] for item in items)
+
+
+def test_extract_codes():
+    assert extract_codes('600519 与 000858、300750；1600519 不算') == ['600519', '000858', '300750']
+    assert extract_codes('') == []
+
+
+# ========== 检索 ==========
+
+def test_search_by_code_name_text_and_keywords(index):
+    assert index.add(NEWS, provider='Tavily', query='白酒') == 4
+
+    assert _titles(index.search(stock_code='600519')) == ['贵州茅台一季度营收增长']
+    # 代码或名称命中任一即可
+    assert _titles(index.search(stock_code='600519', stock_name='贵州茅台')) == [
+        '白酒板块午后走强', '贵州茅台一季度营收增长',
+    ]
+    # 全文检索词全部命中（「白酒」不足 3 个字符，走 LIKE）
+    assert _titles(index.search(text='白酒 五粮液')) == ['白酒板块午后走强']
+    assert _titles(index.search(text='钠离子电池')) == ['宁德时代发布新电池']
+    # 关键词命中任一，与实体条件为「且」
+    assert _titles(index.search(stock_name='五粮液', keywords=['渠道', '库存'])) == ['五粮液回应渠道调整']
+    assert index.search(stock_name='宁德时代', keywords=['白酒']) == []
+
+
+def test_short_name_uses_like(index):
+    index.add([_item('中信研报：看好平安', '平安 估值修复', 'https://x.com/1')])
+    assert _titles(index.search(stock_name='平安')) == ['中信研报：看好平安']
+
+
+def test_search_result_fields_and_limit(index):
+    index.add(NEWS, provider='Bocha', query='白酒')
+    items = index.search(text='白酒', limit=1)
+    assert len(items) == 1
+    assert items[0]['provider'] == 'Bocha'
+    assert isinstance(items[0]['codes'], list)
+
+
+# ========== 去重与代码合并 ==========
+
+def test_same_article_is_stored_once_and_codes_are_merged(index):
+    index.add([NEWS[2]], stock_code='000858', stock_name='五粮液')
+    # 同一篇文章：协议、移动端前缀、跟踪参数不同
+    again = _item('白酒板块午后走强', '贵州茅台、五粮液领涨', 'http://cls.cn/c/3')
+    assert index.add([again], stock_code='600519', stock_name='贵州茅台') == 0
+
+    assert index.stats()['items'] == 1
+    [item] = index.search(stock_code='600519')
+    assert item['codes'] == ['000858', '600519']
+    assert _titles(index.search(stock_code='000858')) == ['白酒板块午后走强']
+
+
+def test_stock_code_recorded_only_when_mentioned(index):
+    index.add([NEWS[3]], stock_code='600519', stock_name='贵州茅台')
+    assert index.search(stock_code='600519') == []
+    assert index.search(stock_code='300750')[0]['codes'] == ['300750']
+
+
+def test_items_without_url_deduplicate_by_content(index):
+    item = _item('茅台批价企稳', '飞天茅台批价回升至 2500 元')
+    assert index.add([item, item]) == 1
+    assert index.stats() == {'items': 1, 'added': 1}
+
+
+# ========== 时间过滤与清理 ==========
+
+def test_max_age_and_published_window(index, monkeypatch):
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(news_index.time, 'time', lambda: clock[0])
+    index.add([_item('旧闻：茅台提价', url='https://x.com/old', published_date='2023-01-01')])
+    clock[0] += 3600
+    index.add([_item('茅台发布新品', url='https://x.com/new', published_date='1小时前'),
+               _item('茅台日期未知', url='https://x.com/unknown')])
+
+    assert _titles(index.search(text='茅台', max_age=600)) == ['茅台发布新品', '茅台日期未知']
+    # 发布日期未知的条目保留
+    assert _titles(index.search(text='茅台', published_within_days=7)) == ['茅台发布新品', '茅台日期未知']
+    assert len(index.search(text='茅台')) == 3
+
+
+def test_prune_removes_old_items_from_table_and_full_text(index, monkeypatch):
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(news_index.time, 'time', lambda: clock[0])
+    index.add([NEWS[0]])
+    clock[0] += 10 * 86400
+    index.add([NEWS[1]])
+
+    assert index.prune(7) == 1
+    assert index.stats()['items'] == 1
+    assert index.search(stock_name='贵州茅台') == []
+    assert index.search(text='营收增长') == []
+    assert _titles(index.search(stock_name='五粮液')) == ['五粮液回应渠道调整']
+
+
+def test_reopen_applies_retention(tmp_path, monkeypatch):
+    path = str(tmp_path / 'news.db')
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(news_index.time, 'time', lambda: clock[0])
+    first = NewsIndex(path)
+    first.add(NEWS)
+    first.close()
+
+    clock[0] += 5 * 86400
+    kept = NewsIndex(path, retention_days=30)
+    assert kept.stats() == {'items': 4, 'added': 0}
+    kept.close()
+
+    pruned = NewsIndex(path, retention_days=3)
+    assert pruned.stats()['items'] == 0
+    pruned.close()
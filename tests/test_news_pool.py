@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+单次运行共享新闻池测试（单飞、失败短期复用、实体查找）
+
+使用方法：
+    python -m pytest -q tests/test_news_pool.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import news_pool
+from news_pool import NewsPool
+from search_service import SearchResponse, SearchResult
+
+
+def _response(query='白酒 政策', titles=('贵州茅台 提价',), success=True):
+    results = [SearchResult(title=t, snippet='', url=f"https://example.com/{t}", source='x') for t in titles]
+    return SearchResponse(query=query, results=results if success else [], provider='Tavily', success=success)
+
+
+def _concurrent(pool, fetch, n=5):
+    """n 个线程同时请求同一查询，返回各线程的结果或异常"""
+    outcomes = [None] * n
+    start = threading.Barrier(n)
+
+    def worker(i):
+        start.wait()
+        try:
+            outcomes[i] = pool.get_or_fetch('白酒', 'policy_macro', fetch)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return outcomes
+
+
+def _slow(outcome, calls):
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return fetch
+
+
+def test_concurrent_callers_share_one_fetch():
+    pool, calls = NewsPool(), []
+    response = _response()
+    outcomes = _concurrent(pool, _slow(response, calls))
+
+    assert len(calls) == 1
+    assert all(o is response for o in outcomes)
+    assert pool.stats()['fetches'] == 1
+    assert pool.stats()['reuses'] == 4
+
+
+@pytest.mark.parametrize('outcome', [_response(success=False), _response(titles=())])
+def test_failed_or_empty_response_is_shared_with_waiters(outcome):
+    pool, calls = NewsPool(), []
+    outcomes = _concurrent(pool, _slow(outcome, calls))
+
+    assert len(calls) == 1
+    assert all(o is outcome for o in outcomes)
+    assert pool.stats()['failure_reuses'] == 4
+    assert pool.stats()['responses'] == 0
+
+
+def test_exception_is_shared_with_waiters():
+    pool, calls = NewsPool(), []
+    error = RuntimeError('timeout')
+    outcomes = _concurrent(pool, _slow(error, calls))
+
+    assert len(calls) == 1
+    assert all(o is error for o in outcomes)
+
+
+def test_failure_is_retried_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(news_pool.time, 'monotonic', lambda: now[0])
+    pool, calls = NewsPool(), []
+    failed, ok = _response(success=False), _response()
+
+    assert pool.get_or_fetch('白酒', 'policy_macro', _slow(failed, calls)) is failed
+    now[0] += news_pool.FAILURE_TTL - 1
+    assert pool.get_or_fetch('白酒', 'policy_macro', _slow(ok, calls)) is failed
+    now[0] += 2
+    assert pool.get_or_fetch('白酒', 'policy_macro', _slow(ok, calls)) is ok
+    assert pool.get_or_fetch('白酒', 'policy_macro', _slow(failed, calls)) is ok
+    assert len(calls) == 2
+
+
+def test_lookup_by_entity_and_keyword():
+    pool = NewsPool()
+    pool.add('白酒', 'policy_macro', _response(titles=('贵州茅台 提价', '五粮液 渠道调整', '贵州茅台 提价')))
+
+    assert [r.title for r in pool.lookup(['贵州茅台', '600519'])] == ['贵州茅台 提价']
+    assert [r.title for r in pool.lookup(['五粮液'], keywords=['白酒'])] == ['五粮液 渠道调整']
+    assert pool.lookup(['五粮液'], keywords=['银行']) == []
+    assert pool.lookup(['', None]) == []
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+情报结果去重与排序测试（URL 规范化、SimHash 近似重复、各维度 top-K）
+
+使用方法：
+    python -m pytest -q tests/test_news_ranker.py
+"""
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from news_ranker import (
+    SIMHASH_MAX_DISTANCE,
+    canonicalize_url,
+    dedupe_and_rank,
+    hamming_distance,
+    parse_published_date,
+    simhash,
+    source_authority,
+)
+
+NOW = datetime(2026, 3, 2, 15, 0)
+
+REPORT = '贵州茅台2024年一季度实现营业收入464.85亿元，同比增长18.04%；归母净利润240.65亿元，同比增长15.73%，业绩符合市场预期'
+
+
+def _result(title, snippet='', url='', published_date='2026-03-01', source=''):
+    return SimpleNamespace(title=title, snippet=snippet, url=url, source=source, published_date=published_date)
+
+
+def _response(query, *results, success=True):
+    return SimpleNamespace(query=query, results=list(results), success=success)
+
+
+# ========== URL 规范化 ==========
+
+@pytest.mark.parametrize('url', [
+    'https://www.stcn.com/article/detail/123.html',
+    'http://stcn.com/article/detail/123.html',
+    'https://m.stcn.com/article/detail/123.html?utm_source=wechat&from=timeline',
+    'HTTPS://WWW.STCN.COM:443/article/detail/123.html#comments',
+])
+def test_canonicalize_url_variants_collapse(url):
+    assert canonicalize_url(url) == 'stcn.com/article/detail/123.html'
+
+
+def test_canonicalize_url_sorts_params_and_strips_index():
+    assert canonicalize_url('https://example.com/a/b/index.html?b=2&spm=x&a=1') == 'example.com/a/b?a=1&b=2'
+    assert canonicalize_url('https://example.com/a/b/?a=1&b=2') == 'example.com/a/b?a=1&b=2'
+    # 有意义的参数保留：不同文章不合并
+    assert canonicalize_url('https://example.com/news?id=1') != canonicalize_url('https://example.com/news?id=2')
+    assert canonicalize_url('') == ''
+
+
+# ========== SimHash ==========
+
+def test_simhash_near_duplicates_within_threshold():
+    reprint = REPORT.replace('，', ',').replace('；', ';').replace('市场预期', '预期')
+    unrelated = '宁德时代发布第二代神行超充电池，续航突破1000公里，将于年内量产装车'
+
+    assert simhash(REPORT) == simhash(REPORT + '。')  # 只差标点
+    assert hamming_distance(simhash(REPORT), simhash(reprint)) <= SIMHASH_MAX_DISTANCE
+    assert hamming_distance(simhash(REPORT), simhash(unrelated)) > SIMHASH_MAX_DISTANCE
+    assert simhash('') == 0
+
+
+# ========== 打分因子 ==========
+
+def test_source_authority_prefers_longest_suffix():
+    assert source_authority('https://www.cninfo.com.cn/x') == 1.0
+    assert source_authority('https://guba.eastmoney.com/x') == 0.3
+    assert source_authority('https://data.eastmoney.com/x') == 0.8
+    assert source_authority('', source='cls.cn') == 0.8
+    assert source_authority('https://unknown.example.com/x') == 0.5
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-02-28', datetime(2026, 2, 28)),
+    ('2026年2月28日', datetime(2026, 2, 28)),
+    ('3小时前', datetime(2026, 3, 2, 12, 0)),
+    ('2 days ago', datetime(2026, 2, 28, 15, 0)),
+    ('昨天', datetime(2026, 3, 1, 15, 0)),
+    ('未知', None),
+    (None, None),
+])
+def test_parse_published_date(value, expected):
+    assert parse_published_date(value, NOW) == expected
+
+
+# ========== 去重与 top-K ==========
+
+def test_top_k_per_dimension_keeps_highest_scores():
+    risk = [
+        _result('白酒渠道库存调查', url='https://unknown.example.com/1', published_date='2026-01-01'),
+        _result('贵州茅台 股东减持计划公告', url='https://www.cninfo.com.cn/1', published_date='2026-03-02'),
+        _result('消费板块资金流出', url='https://unknown.example.com/2', published_date='2026-01-05'),
+        _result('贵州茅台回应减持传闻', url='https://www.stcn.com/2', published_date='2026-03-01'),
+        _result('高端白酒批价回落', url='https://unknown.example.com/3'),
+    ]
+    kept, stats = dedupe_and_rank({'risk_check': _response('贵州茅台 减持', *risk)}, '600519', '贵州茅台', top_k=2, now=NOW)
+
+    assert [r.url for r in kept['risk_check']] == ['https://www.cninfo.com.cn/1', 'https://www.stcn.com/2']
+    assert stats == {'total': 5, 'duplicates': 0, 'dropped': 3}
+
+
+def test_duplicate_across_dimensions_kept_once_in_best_dimension():
+    article = _result('贵州茅台 业绩预告 超预期', REPORT, 'https://www.stcn.com/a/1.html')
+    reprint = _result('贵州茅台 业绩预告 超预期', REPORT, 'https://m.stcn.com/a/1.html?from=app')
+    results = {
+        # 「业绩预告」命中 earnings 的查询关键词，得分更高
+        'latest_news': _response('贵州茅台 最新消息', reprint),
+        'earnings': _response('贵州茅台 业绩预告', article),
+    }
+    kept, stats = dedupe_and_rank(results, '600519', '贵州茅台', now=NOW)
+
+    assert kept == {'latest_news': [], 'earnings': [article]}
+    assert stats['duplicates'] == 1
+
+
+def test_near_duplicate_without_same_url_is_removed():
+    original = _result('贵州茅台一季报', REPORT, 'https://www.cs.com.cn/1')
+    reprint = _result('贵州茅台一季报', REPORT + '。', 'https://www.sohu.com/2')
+    kept, stats = dedupe_and_rank({'latest_news': _response('贵州茅台', original, reprint)}, '600519', '贵州茅台', now=NOW)
+
+    assert kept['latest_news'] == [original]  # 权威来源得分更高
+    assert stats['duplicates'] == 1
+
+
+def test_dropped_result_does_not_block_other_dimensions():
+    shared = _result('贵州茅台 行业 政策', '白酒消费税政策', 'https://www.yicai.com/x')
+    top = [
+        _result('贵州茅台 政策 利好落地', url='https://www.cninfo.com.cn/1', published_date='2026-03-02'),
+        _result('促消费政策加码 贵州茅台受益', url='https://www.cs.com.cn/2', published_date='2026-03-02'),
+    ]
+    results = {
+        'policy_macro': _response('贵州茅台 政策', *top, shared),
+        'industry_analysis': _response('贵州茅台 行业', _result('无关标题', url=shared.url)),
+    }
+    kept, stats = dedupe_and_rank(results, '600519', '贵州茅台', top_k=2, now=NOW)
+
+    assert kept['policy_macro'] == top
+    # shared 在 policy_macro 中因 top-K 未收录，industry_analysis 中同一 URL 的结果仍保留
+    assert [r.url for r in kept['industry_analysis']] == [shared.url]
+    assert stats['dropped'] == 1 and stats['duplicates'] == 0
+
+
+def test_failed_responses_are_skipped_and_unlimited_top_k():
+    results = {
+        'latest_news': _response('贵州茅台', *[_result(f'贵州茅台 消息{i}', url=f'https://x.com/{i}') for i in range(5)]),
+        'risk_check': _response('贵州茅台 减持', _result('x', url='https://y.com'), success=False),
+    }
+    kept, stats = dedupe_and_rank(results, '600519', '贵州茅台', top_k=0, now=NOW)
+    assert len(kept['latest_news']) == 5
+    assert kept['risk_check'] == []
+    assert stats['total'] == 5
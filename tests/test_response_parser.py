@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 响应 JSON 解析与结构校验测试
+
+使用方法：
+    python -m pytest -q tests/test_response_parser.py
+"""
+import os
+import sys
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from response_parser import extract_json_object, validate_analysis_payload
+
+
+def _valid_payload(**extra):
+    data = {'sentiment_score': 60, 'trend_prediction': '看多', 'operation_advice': '买入'}
+    data.update(extra)
+    return data
+
+
+# ========== extract_json_object ==========
+
+def test_extract_plain_object():
+    outcome = extract_json_object('{"a": 1, "b": "x"}')
+    assert outcome.data == {'a': 1, 'b': 'x'}
+    assert not outcome.repairs
+
+
+def test_extract_from_code_fence_with_surrounding_text():
+    text = '分析如下 {见附注}\n```json\n{"a": {"b": [1, 2]}}\n```\n以上'
+    assert extract_json_object(text).data == {'a': {'b': [1, 2]}}
+
+
+def test_extract_skips_stray_braces():
+    text = '说明 {不是 JSON} 结果：{"a": 1}'
+    assert extract_json_object(text).data == {'a': 1}
+
+
+def test_extract_braces_inside_strings():
+    outcome = extract_json_object('{"a": "含 } 与 \\" 的文本", "b": 2}')
+    assert outcome.data == {'a': '含 } 与 " 的文本', 'b': 2}
+
+
+def test_extract_repairs_trailing_comma_and_comments():
+    text = '{\n  // 注释\n  "a": 1,\n  "b": [1, 2,],\n}'
+    outcome = extract_json_object(text)
+    assert outcome.data == {'a': 1, 'b': [1, 2]}
+    assert outcome.repairs
+
+
+def test_extract_repairs_python_literals():
+    outcome = extract_json_object('{"a": True, "b": None, "c": "True"}')
+    assert outcome.data == {'a': True, 'b': None, 'c': 'True'}
+
+
+def test_extract_closes_truncated_output():
+    # 末尾可能是不完整的值，回退到最近的完整元素后补齐括号
+    outcome = extract_json_object('{"a": {"b": [1, 2')
+    assert outcome.data == {'a': {'b': [1]}}
+    assert 'truncated' in outcome.repairs
+
+
+def test_extract_closes_truncated_key_and_number():
+    # 没有值的键连同键名丢弃；末尾数字可能不完整，丢弃
+    assert extract_json_object('{"a": 1, "b": {"c": "x", "d"').data == {'a': 1, 'b': {'c': 'x'}}
+    assert extract_json_object('{"a": 1, "b": ').data == {'a': 1}
+    assert extract_json_object('{"a": [1, 2], "b": 7').data == {'a': [1, 2]}
+    assert extract_json_object('{"a": ["x", "y"').data == {'a': ['x', 'y']}
+
+
+def test_extract_truncated_with_escaped_quotes_and_brackets_in_strings():
+    outcome = extract_json_object('{"a": "含 \\"{[\\" 的文本", "b": {"c": "]}\\\\", "d": [true')
+    assert outcome.data == {'a': '含 "{[" 的文本', 'b': {'c': ']}\\', 'd': [True]}}
+    assert outcome.repairs == ['truncated']
+
+
+def test_extract_mixed_errors_and_truncation():
+    outcome = extract_json_object('```json\n{"a": True, /* x */ "b": [1, 2,], "c": {"d": None')
+    assert outcome.data == {'a': True, 'b': [1, 2], 'c': {'d': None}}
+    assert set(outcome.repairs) == {'python_literal', 'comment', 'trailing_comma', 'truncated'}
+
+
+def test_extract_empty_and_missing():
+    assert extract_json_object('').data is None
+    assert extract_json_object('').error
+    assert extract_json_object('没有对象').data is None
+
+
+# ========== validate_analysis_payload ==========
+
+def test_validate_complete_payload():
+    data = _valid_payload(dashboard={'core_conclusion': {'one_sentence': 'x'}})
+    assert validate_analysis_payload(data) == []
+
+
+def test_validate_missing_required_fields():
+    issues = validate_analysis_payload({'sentiment_score': 50})
+    assert any('trend_prediction' in i for i in issues)
+    assert any('operation_advice' in i for i in issues)
+
+
+def test_validate_coerces_types():
+    data = _valid_payload(sentiment_score='75分', key_points=['a', 'b'], analysis_summary=None)
+    validate_analysis_payload(data)
+    assert data['sentiment_score'] == 75
+    assert data['key_points'] == 'a\nb'
+    assert data['analysis_summary'] == ''
+
+
+def test_validate_drops_uncoercible_fields():
+    data = _valid_payload(dashboard='不是对象', sentiment_score=True)
+    issues = validate_analysis_payload(data)
+    assert 'dashboard' not in data
+    assert 'sentiment_score' not in data
+    assert len(issues) == 2
+
+
+def test_validate_clamps_score():
+    data = _valid_payload(sentiment_score=150)
+    validate_analysis_payload(data)
+    assert data['sentiment_score'] == 100
+
+
+def test_validate_dashboard_sections():
+    data = _valid_payload(dashboard={'intelligence': '文本', 'data_perspective': {}})
+    issues = validate_analysis_payload(data)
+    assert data['dashboard']['intelligence'] == {}
+    assert issues == ['dashboard.intelligence 类型错误']
+
+
+def test_validate_top_level_battle_plan_terms():
+    data = _valid_payload(battle_plan={'short_term': 'buy', 'long_term': {'action': 'hold'}})
+    issues = validate_analysis_payload(data)
+    assert data['battle_plan'] == {'short_term': {}, 'long_term': {'action': 'hold'}}
+    assert issues == ['battle_plan.short_term 类型错误']
+
+
+def test_validate_dashboard_battle_plan_terms():
+    data = _valid_payload(dashboard={'battle_plan': {'short_term': 'buy', 'long_term': ['x']}})
+    issues = validate_analysis_payload(data)
+    assert data['dashboard']['battle_plan'] == {'short_term': {}, 'long_term': {}}
+    assert issues == [
+        'dashboard.battle_plan.short_term 类型错误',
+        'dashboard.battle_plan.long_term 类型错误',
+    ]
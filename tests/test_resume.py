@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+断点续跑测试（临时 SQLite 数据库，各阶段使用假实现）
+
+使用方法：
+    python -m pytest -q tests/test_resume.py
+"""
+import dataclasses
+import os
+import sys
+import threading
+
+import pytest
+
+# Add src directory to path（放在最前面：仓库根目录的 main.py 是转发脚本）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from analyzer import AnalysisResult
+from components import ComponentRegistry
+from config import get_config
+from enums import ReportType
+from main import CHECKPOINTS, StockAnalysisPipeline, StockJob, _checkpoint_level
+from market_snapshot import MarketSnapshot
+from storage import DatabaseManager
+
+
+class _Stub:
+    """只需被调用、不关心返回值的组件（分析器、模型路由、搜索服务）"""
+
+    def get_usage_stats(self):
+        return {'calls': 0}
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _FakePipeline(StockAnalysisPipeline):
+    """各阶段只记录调用；llm 阶段对 fail_codes 中的股票返回失败"""
+
+    def __init__(self, config, fail_codes=()):
+        super().__init__(config=config)
+        self.components = ComponentRegistry()
+        for name in ('analyzer', 'model_router', 'search_service'):
+            self.components.register(name, lambda config, registry: _Stub())
+        self.fail_codes = set(fail_codes)
+        self.calls = {}
+        self.notified = []
+        self._calls_lock = threading.Lock()
+
+    def _record(self, stage, job):
+        with self._calls_lock:
+            self.calls.setdefault(stage, []).append(job.code)
+
+    def prefetch(self, stock_codes):
+        return MarketSnapshot()
+
+    def _stage_fetch(self, job):
+        self._record('fetch', job)
+        return True
+
+    def _stage_enrich(self, job):
+        self._record('enrich', job)
+        return True
+
+    def _stage_trend(self, job):
+        self._record('trend', job)
+        return True
+
+    def _stage_search(self, job):
+        self._record('search', job)
+        return True
+
+    def _stage_llm(self, job):
+        self._record('llm', job)
+        if job.code in self.fail_codes:
+            return False
+        job.result = AnalysisResult(
+            code=job.code, name=f"股票{job.code}", sentiment_score=72,
+            trend_prediction='看多', operation_advice='买入', dashboard={'core_conclusion': {'one_sentence': 'x'}},
+        )
+        return True
+
+    def _stage_report(self, job):
+        self._record('report', job)
+        job.report_content = f"report {job.code}"
+        return True
+
+    def _send_notifications(self, results, skip_push=False, deferred=None):
+        self.notified.append(sorted(r.code for r in results))
+
+
+@pytest.fixture
+def db(tmp_path):
+    DatabaseManager.reset_instance()
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'resume.db'}")
+    yield manager
+    DatabaseManager.reset_instance()
+
+
+@pytest.fixture
+def config(tmp_path):
+    return dataclasses.replace(
+        get_config(), log_dir=str(tmp_path), run_deadline='', holding_stocks=[], single_stock_notify=False,
+    )
+
+
+def _latest_run_id(db):
+    from storage import AnalysisRun
+    with db.get_session() as session:
+        return session.query(AnalysisRun).order_by(AnalysisRun.created_at.desc()).first().run_id
+
+
+def test_resume_skips_completed_stages_and_restores_results(db, config):
+    first = _FakePipeline(config, fail_codes={'000001'})
+    results = first.run(['600519', '000001'])
+    assert [r.code for r in results] == ['600519']
+    run_id = _latest_run_id(db)
+
+    checkpoints = db.get_checkpoints(run_id)
+    assert checkpoints['600519']['stage'] == 'reported'
+    assert checkpoints['600519']['result']['sentiment_score'] == 72
+    assert checkpoints['600519']['report_content'] == 'report 600519'
+    # LLM 失败的股票停在上下文断点，没有分析结果
+    assert checkpoints['000001']['stage'] == 'context'
+    assert checkpoints['000001']['result'] is None
+
+    resumed = _FakePipeline(config)
+    results = resumed.run(resume_run_id=run_id)
+
+    assert sorted(r.code for r in results) == ['000001', '600519']
+    assert resumed.calls.get('llm') == ['000001']
+    assert 'fetch' not in resumed.calls
+    assert resumed.calls.get('report') == ['000001']
+    restored = next(r for r in results if r.code == '600519')
+    assert isinstance(restored, AnalysisResult)
+    assert restored.name == '股票600519'
+    assert restored.dashboard == {'core_conclusion': {'one_sentence': 'x'}}
+    assert resumed.notified == [['000001', '600519']]
+    assert db.get_run(run_id)['status'] == 'completed'
+
+
+def test_resume_of_completed_run_does_not_repush(db, config):
+    _FakePipeline(config).run(['600519'])
+    run_id = _latest_run_id(db)
+
+    resumed = _FakePipeline(config)
+    results = resumed.run(resume_run_id=run_id)
+
+    assert [r.code for r in results] == ['600519']
+    assert 'llm' not in resumed.calls
+    assert resumed.notified == []
+
+
+def test_missing_result_falls_back_to_context(db, config):
+    db.create_run('run-1', ['600519', '000001'], ReportType.SIMPLE.value)
+    db.save_checkpoint('run-1', '600519', 'analyzed')  # 结果未写入
+    db.save_checkpoint('run-1', '000001', 'fetched')
+
+    pipeline = _FakePipeline(config)
+    jobs = [StockJob(key=code, code=code) for code in ('600519', '000001')]
+    assert pipeline._start_run(jobs, ReportType.SIMPLE, resume_run_id='run-1') == 'run-1'
+
+    assert jobs[0].result is None
+    assert jobs[0].checkpoint == _checkpoint_level('context')
+    assert jobs[1].checkpoint == _checkpoint_level('fetched')
+    assert all(job.run_id == 'run-1' for job in jobs)
+
+
+def test_checkpoint_levels_are_ordered():
+    assert [_checkpoint_level(stage) for stage in CHECKPOINTS] == list(range(1, len(CHECKPOINTS) + 1))
+    assert _checkpoint_level(None) == 0
+
+
+def test_latest_scores_use_newest_result_per_code(db):
+    from datetime import datetime, timedelta
+    from storage import RunCheckpoint
+    now = datetime.now()
+    rows = [
+        ('run-old', '600519', 80, now - timedelta(days=2)),
+        ('run-new', '600519', 30, now - timedelta(days=1)),
+        ('run-new', '000001', 65, now - timedelta(days=1)),
+        ('run-stale', '000002', 90, now - timedelta(days=40)),
+    ]
+    for run_id, code, score, updated_at in rows:
+        db.save_checkpoint(run_id, code, 'analyzed', result={'sentiment_score': score})
+        with db.get_session() as session:
+            checkpoint = session.query(RunCheckpoint).filter_by(run_id=run_id, code=code).one()
+            checkpoint.updated_at = updated_at
+            session.commit()
+    # 更新的运行只到上下文断点（没有结果）时不影响评分
+    db.save_checkpoint('run-latest', '600519', 'context')
+
+    assert db.get_latest_scores(['600519', '000001', '000002', '300750']) == {'600519': 30, '000001': 65}
+    assert db.get_latest_scores([]) == {}
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+个股分析截止时间（RUN_DEADLINE）解析测试
+
+使用方法：
+    python -m pytest -q tests/test_run_deadline.py
+"""
+import logging
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add src directory to path（放在最前面：仓库根目录的 main.py 是转发脚本）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from main import _parse_deadline
+
+START = datetime(2026, 3, 2, 15, 30, 20).timestamp()
+
+
+@pytest.mark.parametrize('value', ['', '   ', None])
+def test_unset_means_no_deadline(value):
+    assert _parse_deadline(value, START) is None
+
+
+def test_minutes_after_start():
+    assert _parse_deadline('45', START) == START + 45 * 60
+    assert _parse_deadline(' 1.5 ', START) == START + 90
+
+
+def test_clock_time_later_today():
+    assert _parse_deadline('17:55', START) == datetime(2026, 3, 2, 17, 55).timestamp()
+
+
+@pytest.mark.parametrize('value', ['15:30', '09:00', '00:00'])
+def test_clock_time_not_after_start_is_already_expired(value, caplog):
+    with caplog.at_level(logging.WARNING, logger='main'):
+        deadline = _parse_deadline(value, START)
+
+    # 不顺延到次日：当天的时刻已过，截止时间早于开始时间
+    hour, minute = map(int, value.split(':'))
+    assert deadline == datetime(2026, 3, 2, hour, minute).timestamp()
+    assert deadline <= START
+    assert '视为已到期' in caplog.text
+
+
+@pytest.mark.parametrize('value', ['abc', '25:00', '17:61', '17:5x'])
+def test_invalid_values(value, caplog):
+    with caplog.at_level(logging.WARNING, logger='main'):
+        assert _parse_deadline(value, START) is None
+    assert 'RUN_DEADLINE 格式错误' in caplog.text
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存测试（查询规范化、TTL、LRU 淘汰、持久化）
+
+使用方法：
+    python -m pytest -q tests/test_search_cache.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import search_cache
+from search_cache import SearchCache, canonicalize_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的时钟"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(search_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def _value(tag):
+    return {'query': tag, 'results': [{'title': tag}], 'provider': 'Tavily'}
+
+
+# ========== 查询规范化 ==========
+
+@pytest.mark.parametrize('query, expected', [
+    ('贵州茅台 减持 处罚', '减持 处罚 贵州茅台'),
+    ('  贵州茅台，减持、处罚 ', '减持 处罚 贵州茅台'),
+    ('【贵州茅台】(减持)|处罚', '减持 处罚 贵州茅台'),
+    ('ＡＢＣ　Ｌａｔｅｓｔ', 'abc latest'),  # 全角转半角、小写
+    ('茅台 OR 五粮液 or 泸州老窖', '五粮液 泸州老窖 茅台'),
+    ('茅台 茅台 减持', '减持 茅台'),
+    ('', ''),
+    (None, ''),
+])
+def test_canonicalize_query(query, expected):
+    assert canonicalize_query(query) == expected
+
+
+def test_reordered_keywords_share_one_entry():
+    # 有意为之：search_service 生成的查询是关键词组合，词序不影响搜索引擎返回的结果集合，
+    # 因此只有词序不同的查询共用一条缓存（即使语序不同、读起来含义不同）
+    assert canonicalize_query('茅台 减持 大股东') == canonicalize_query('大股东 减持 茅台')
+    assert SearchCache.make_key('宁德时代 供应 特斯拉', 3, 5) == SearchCache.make_key('特斯拉 供应 宁德时代', 3, 5)
+
+
+def test_operators_and_window_keep_queries_apart():
+    # 排除词的减号不是分隔符，与普通关键词不会合并
+    assert canonicalize_query('茅台 -减持') != canonicalize_query('茅台 减持')
+    # 时间窗口、结果数不同的查询互不共用
+    keys = {SearchCache.make_key('茅台 减持', days, n) for days, n in ((3, 5), (7, 5), (3, 10))}
+    assert len(keys) == 3
+
+
+# ========== TTL 与 LRU ==========
+
+def test_entry_expires_after_ttl(clock):
+    cache = SearchCache()
+    cache.put('k', _value('a'), ttl=60)
+
+    clock[0] += 59
+    assert cache.get('k') == _value('a')
+    clock[0] += 1
+    assert cache.get('k') is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_non_positive_ttl_is_not_cached():
+    cache = SearchCache()
+    cache.put('k', _value('a'), ttl=0)
+    assert cache.get('k') is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = SearchCache(max_entries=2)
+    cache.put('a', _value('a'), ttl=60)
+    cache.put('b', _value('b'), ttl=60)
+    assert cache.get('a') is not None  # a 变为最近使用
+
+    cache.put('c', _value('c'), ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+# ========== 持久化 ==========
+
+def test_flush_and_load_round_trip(tmp_path, clock):
+    path = str(tmp_path / 'cache' / 'search.json')
+    cache = SearchCache(path)
+    cache.put('short', _value('short'), ttl=10)
+    cache.put('long', _value('long'), ttl=3600)
+    clock[0] += 20
+    cache.close()
+
+    # 过期条目不写入磁盘
+    with open(path, encoding='utf-8') as f:
+        assert set(json.load(f)) == {'long'}
+    reloaded = SearchCache(path)
+    assert reloaded.get('long') == _value('long')
+    assert reloaded.get('short') is None
+    reloaded.close()
+
+
+def test_load_keeps_latest_expiring_entries_within_capacity(tmp_path, clock):
+    path = str(tmp_path / 'search.json')
+    cache = SearchCache(path, max_entries=10)
+    for i, ttl in enumerate((300, 100, 200)):
+        cache.put(f"k{i}", _value(str(i)), ttl=ttl)
+    cache.close()
+
+    reloaded = SearchCache(path, max_entries=2)
+    assert reloaded.get('k1') is None
+    assert reloaded.get('k0') is not None and reloaded.get('k2') is not None
+    reloaded.close()
+
+
+def test_closed_cache_stops_writing(tmp_path):
+    path = str(tmp_path / 'search.json')
+    cache = SearchCache(path)
+    cache.put('a', _value('a'), ttl=60)
+    cache.close()
+
+    cache.put('b', _value('b'), ttl=60)
+    cache.flush()
+    assert SearchCache(path).get('b') is None
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / 'search.json'
+    path.write_text('{not json', encoding='utf-8')
+    cache = SearchCache(str(path))
+    assert cache.stats()['entries'] == 0
+    cache.put('a', _value('a'), ttl=60)
+    cache.close()
+    assert json.loads(path.read_text(encoding='utf-8'))['a']['value'] == _value('a')
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+搜索服务测试（不发起网络请求）
+
+使用方法：
+    python -m pytest -q tests/test_search_service.py
+"""
+import os
+import sys
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from search_service import SearchService
+
+
+def test_comprehensive_intel_without_dimensions_returns_empty():
+    service = SearchService(tavily_keys=['tvly-test'], cache_enabled=False)
+    assert service.search_comprehensive_intel('600519', '贵州茅台', max_searches=0) == {}
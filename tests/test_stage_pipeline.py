@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段 DAG 流水线测试
+
+使用方法：
+    python -m pytest -q tests/test_stage_pipeline.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from stage_pipeline import RateLimiter, Stage, StageJob, StagedPipeline
+
+
+class _Recorder:
+    """记录各阶段的调用（线程安全）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []  # [(阶段, 任务键)]
+
+    def stage(self, name, delay=0.0, result=None, error=None):
+        def func(job):
+            if delay:
+                time.sleep(delay)
+            with self.lock:
+                self.calls.append((name, job.key))
+            if error is not None and job.key in error:
+                raise RuntimeError(f"boom {job.key}")
+            if result is not None:
+                return result(job)
+            return None
+        return func
+
+    def keys(self, name):
+        with self.lock:
+            return [key for stage, key in self.calls if stage == name]
+
+
+def _jobs(n, **kwargs):
+    return [StageJob(key=f"job{i}", **kwargs) for i in range(n)]
+
+
+# ========== DAG ==========
+
+def test_rejects_unknown_or_later_dependency():
+    with pytest.raises(ValueError):
+        StagedPipeline([Stage('a', lambda job: None, depends_on=('b',)), Stage('b', lambda job: None)])
+
+
+def test_fan_in_waits_for_all_dependencies():
+    lock = threading.Lock()
+    done = {}  # 任务键 -> 已完成的阶段
+    violations = []
+
+    def make(name, delay=0.0):
+        def func(job):
+            time.sleep(delay)
+            with lock:
+                if name == 'search' and not {'enrich', 'trend'} <= done.get(job.key, set()):
+                    violations.append(job.key)
+                done.setdefault(job.key, set()).add(name)
+        return func
+
+    stages = [
+        Stage('fetch', make('fetch'), workers=2),
+        Stage('enrich', make('enrich', 0.03), workers=2, depends_on=('fetch',)),
+        Stage('trend', make('trend', 0.01), workers=2, depends_on=('fetch',)),
+        Stage('search', make('search'), workers=2, depends_on=('enrich', 'trend')),
+    ]
+    jobs = _jobs(6)
+    finished = StagedPipeline(stages).run(jobs)
+
+    assert len(finished) == 6
+    assert violations == []
+    assert all(done[job.key] == {'fetch', 'enrich', 'trend', 'search'} for job in jobs)
+    assert all(set(job.stage_times) == {'fetch', 'enrich', 'trend', 'search'} for job in jobs)
+
+
+def test_parallel_branches_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def branch(job):
+        # enrich 与 trend 互不依赖：两者都在等待对方时只有并行执行才能通过屏障
+        barrier.wait()
+
+    stages = [
+        Stage('fetch', lambda job: None),
+        Stage('enrich', branch, depends_on=('fetch',)),
+        Stage('trend', branch, depends_on=('fetch',)),
+    ]
+    job = StagedPipeline(stages).run(_jobs(1))[0]
+    assert job.error is None
+    assert set(job.stage_times) == {'fetch', 'enrich', 'trend'}
+
+
+# ========== 终止 ==========
+
+def test_stage_returning_false_stops_downstream():
+    rec = _Recorder()
+    stages = [
+        Stage('fetch', rec.stage('fetch', result=lambda job: job.key != 'job1')),
+        Stage('llm', rec.stage('llm'), depends_on=('fetch',)),
+        Stage('report', rec.stage('report'), depends_on=('llm',)),
+    ]
+    jobs = _jobs(3)
+    StagedPipeline(stages).run(jobs)
+
+    assert sorted(rec.keys('fetch')) == ['job0', 'job1', 'job2']
+    assert sorted(rec.keys('report')) == ['job0', 'job2']
+    assert 'job1' not in rec.keys('llm')
+    assert jobs[1].stopped and jobs[1].error is None
+    assert not jobs[0].stopped
+
+
+def test_stage_exception_stops_downstream_and_records_error():
+    rec = _Recorder()
+    stages = [
+        Stage('fetch', rec.stage('fetch', error={'job0'})),
+        Stage('llm', rec.stage('llm'), depends_on=('fetch',)),
+    ]
+    jobs = _jobs(2)
+    pipeline = StagedPipeline(stages)
+    pipeline.run(jobs)
+
+    assert rec.keys('llm') == ['job1']
+    assert jobs[0].stopped
+    assert jobs[0].error.startswith('fetch:')
+    assert pipeline.get_stats()['fetch']['errors'] == 1
+    assert pipeline.get_stats()['llm']['processed'] == 1
+
+
+def test_stop_in_one_branch_skips_join_stage():
+    rec = _Recorder()
+    stages = [
+        Stage('fetch', rec.stage('fetch')),
+        Stage('enrich', rec.stage('enrich', delay=0.02), depends_on=('fetch',)),
+        Stage('trend', rec.stage('trend', result=lambda job: False), depends_on=('fetch',)),
+        Stage('search', rec.stage('search'), depends_on=('enrich', 'trend')),
+    ]
+    jobs = _jobs(2)
+    finished = StagedPipeline(stages).run(jobs)
+
+    assert len(finished) == 2
+    assert rec.keys('search') == []
+    assert all(job.stopped for job in jobs)
+
+
+# ========== 有界队列与优先级 ==========
+
+def test_bounded_queue_applies_backpressure():
+    lock = threading.Lock()
+    state = {'produced': 0, 'consumed': 0, 'max_gap': 0}
+
+    def produce(job):
+        with lock:
+            state['produced'] += 1
+            state['max_gap'] = max(state['max_gap'], state['produced'] - state['consumed'])
+
+    def consume(job):
+        with lock:
+            state['consumed'] += 1
+        time.sleep(0.02)
+
+    stages = [
+        Stage('fast', produce, workers=1),
+        Stage('slow', consume, workers=1, depends_on=('fast',)),
+    ]
+    StagedPipeline(stages, queue_size=1).run(_jobs(10))
+
+    # 上游最多领先：下游队列中 1 个 + 正在入队的 1 个
+    assert state['produced'] == state['consumed'] == 10
+    assert state['max_gap'] <= 2
+
+
+def test_queue_dequeues_by_priority():
+    n = 6
+    lock = threading.Lock()
+    arrived = threading.Event()
+    count = {'a': 0}
+    order = []
+
+    def spread(job):
+        # 优先级数值越小越晚到达下游，与出队顺序相反
+        time.sleep(0.01 * (n - job.priority))
+        with lock:
+            count['a'] += 1
+            if count['a'] == n:
+                arrived.set()
+
+    def consume(job):
+        if not order:
+            # 第一个到达的任务占住线程，等其余任务都进入队列
+            arrived.wait(2)
+            time.sleep(0.05)
+        order.append(job.priority)
+
+    stages = [
+        Stage('a', spread, workers=n),
+        Stage('b', consume, workers=1, depends_on=('a',)),
+    ]
+    jobs = [StageJob(key=f"job{p}", priority=p) for p in range(n)]
+    StagedPipeline(stages).run(jobs)
+
+    assert order[0] == n - 1
+    assert order[1:] == sorted(order[1:])
+
+
+# ========== 截止时间 ==========
+
+def test_deadline_defers_remaining_jobs_but_finishes_non_deferrable_stage():
+    rec = _Recorder()
+    stages = [
+        Stage('llm', rec.stage('llm', delay=0.2), workers=1),
+        Stage('report', rec.stage('report'), depends_on=('llm',), deferrable=False),
+    ]
+    jobs = _jobs(5)
+    pipeline = StagedPipeline(stages)
+    # job0 在截止前完成；job1 在截止前开始、之后完成；其余任务到期后不再开始
+    pipeline.run(jobs, deadline=time.time() + 0.3)
+
+    assert rec.keys('llm') == ['job0', 'job1']
+    assert rec.keys('report') == ['job0', 'job1']
+    assert [job.deferred for job in jobs] == [False, False, True, True, True]
+    assert pipeline.deferred == 3
+    assert pipeline.get_stats()['llm']['deferred'] == 3
+
+
+def test_expired_deadline_defers_everything():
+    rec = _Recorder()
+    jobs = _jobs(3)
+    pipeline = StagedPipeline([Stage('fetch', rec.stage('fetch'))])
+    finished = pipeline.run(jobs, deadline=time.time() - 1)
+
+    assert len(finished) == 3
+    assert rec.calls == []
+    assert all(job.deferred and job.stopped for job in jobs)
+
+
+# ========== 限速 ==========
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(600)  # 每 0.1 秒一次
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() > 0.05
+    assert RateLimiter(0).acquire() == 0.0
+
+
+# ========== run_inline ==========
+
+def test_run_inline_runs_in_order_with_callbacks():
+    rec = _Recorder()
+    events = []
+    stages = [Stage(name, rec.stage(name)) for name in ('fetch', 'llm', 'report')]
+    job = StagedPipeline.run_inline(stages, StageJob(key='x'), on_stage=lambda *e: events.append(e))
+
+    assert [stage for stage, _ in rec.calls] == ['fetch', 'llm', 'report']
+    assert events == [
+        ('fetch', 'running'), ('fetch', 'done'),
+        ('llm', 'running'), ('llm', 'done'),
+        ('report', 'running'), ('report', 'done'),
+    ]
+    assert not job.stopped
+
+
+def test_run_inline_stops_on_false_and_exception():
+    rec = _Recorder()
+    events = []
+    stages = [
+        Stage('fetch', rec.stage('fetch', result=lambda job: False)),
+        Stage('llm', rec.stage('llm')),
+    ]
+    job = StagedPipeline.run_inline(stages, StageJob(key='x'), on_stage=lambda *e: events.append(e))
+    assert rec.keys('llm') == []
+    assert job.stopped and job.error is None
+    assert events[-1] == ('fetch', 'stopped')
+
+    events.clear()
+    stages = [
+        Stage('fetch', rec.stage('fetch', error={'y'})),
+        Stage('llm', rec.stage('llm')),
+    ]
+    job = StagedPipeline.run_inline(stages, StageJob(key='y'), on_stage=lambda *e: events.append(e))
+    assert rec.keys('llm') == []
+    assert job.stopped and job.error.startswith('fetch:')
+    assert events[-1] == ('fetch', 'failed')
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+分析任务进度推送测试（订阅、SSE 推送、长轮询）
+
+使用方法：
+    python -m pytest -q tests/test_task_stream.py
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from metrics import REGISTRY
+from web.handlers import ApiHandler, EventStreamResponse, LongPollResponse
+from web.services import AnalysisService
+
+
+class _FakeHandler:
+    """记录写出内容的 BaseHTTPRequestHandler 替身"""
+
+    def __init__(self):
+        self.status = None
+        self.headers = []
+        self.wfile = io.BytesIO()
+        self.close_connection = False
+
+    def send_response(self, status):
+        self.status = status
+
+    def send_header(self, name, value):
+        self.headers.append((name, value))
+
+    def end_headers(self):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """不执行真实分析的任务服务：提交的任务停在 pending，由测试推进状态"""
+    service = AnalysisService()
+    monkeypatch.setattr(service, '_run_analysis', lambda *args: None)
+    yield service
+    with REGISTRY._lock:
+        REGISTRY._collectors.remove(service.collect_metrics)
+    if service._executor is not None:
+        service._executor.shutdown()
+
+
+@pytest.fixture
+def api(service):
+    handler = ApiHandler()
+    handler.analysis_service = service
+    return handler
+
+
+def _submit(service, code='600519'):
+    return service.submit_analysis(code)['task_id']
+
+
+def _later(delay, func, *args, **kwargs):
+    timer = threading.Timer(delay, func, args, kwargs)
+    timer.start()
+    return timer
+
+
+def _send_in_thread(response, service=None, task_id=None):
+    """在线程中发送响应；给出任务时等到连接已订阅该任务再返回"""
+    handler = _FakeHandler()
+    thread = threading.Thread(target=response.send, args=(handler,), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while service is not None and not service._listeners.get(task_id) and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return handler, thread
+
+
+def _events(handler):
+    """解析 SSE 输出为 [(id, 任务状态)]"""
+    events = []
+    for block in handler.wfile.getvalue().decode('utf-8').split('\n\n'):
+        if not block.startswith('id: '):
+            continue
+        lines = dict(line.split(': ', 1) for line in block.splitlines())
+        assert lines['event'] == 'task'
+        events.append((int(lines['id']), json.loads(lines['data'])))
+    return events
+
+
+# ========== 订阅 ==========
+
+def test_subscribe_delivers_current_state_immediately(service):
+    task_id = _submit(service)
+    received = []
+    unsubscribe = service.subscribe(task_id, received.append)
+
+    assert [(t['status'], t['version']) for t in received] == [('pending', 0)]
+
+    service._on_stage(task_id, 'fetch', 'running')
+    service._update_task(task_id, status='running')
+    assert [t['version'] for t in received] == [0, 1, 2]
+    assert received[1]['stage'] == 'fetch'
+    assert [e['state'] for e in received[2]['progress']] == ['running']
+
+    unsubscribe()
+    service._update_task(task_id, status='completed')
+    assert len(received) == 3
+    assert service.subscribe('missing', received.append) is None
+
+
+def test_snapshots_are_not_mutated_by_later_updates(service):
+    task_id = _submit(service)
+    received = []
+    service.subscribe(task_id, received.append)
+    service._on_stage(task_id, 'fetch', 'running')
+    service._on_stage(task_id, 'fetch', 'done')
+
+    assert len(received[1]['progress']) == 1
+    assert len(received[2]['progress']) == 2
+
+
+def test_failing_listener_does_not_block_others(service):
+    task_id = _submit(service)
+    received = []
+
+    def broken(task):
+        if task['version'] > 0:
+            raise RuntimeError('closed')
+
+    service.subscribe(task_id, broken)
+    service.subscribe(task_id, received.append)
+    service._update_task(task_id, status='running')
+    assert [t['status'] for t in received] == ['pending', 'running']
+
+
+# ========== SSE ==========
+
+@pytest.mark.parametrize('final', ['completed', 'failed'])
+def test_stream_pushes_updates_and_closes_on_finish(service, api, final):
+    task_id = _submit(service)
+    response = api.handle_task_stream({'id': [task_id]})
+    assert isinstance(response, EventStreamResponse)
+
+    handler, thread = _send_in_thread(response, service, task_id)
+    service._on_stage(task_id, 'llm', 'running')
+    service._update_task(task_id, status=final)
+    thread.join(2)
+
+    assert not thread.is_alive()
+    assert handler.status == HTTPStatus.OK
+    assert ('Content-Type', 'text/event-stream; charset=utf-8') in handler.headers
+    assert handler.close_connection
+    events = _events(handler)
+    assert [v for v, _ in events] == [0, 1, 2]
+    assert events[1][1]['stage'] == 'llm'
+    assert events[-1][1]['status'] == final
+
+
+def test_stream_of_finished_task_sends_final_state_and_closes(service, api):
+    task_id = _submit(service)
+    service._update_task(task_id, status='completed', result={'code': '600519'})
+
+    handler, thread = _send_in_thread(api.handle_task_stream({'id': [task_id]}))
+    thread.join(2)
+
+    assert not thread.is_alive()
+    [(version, task)] = _events(handler)
+    assert version == 1 and task['result'] == {'code': '600519'}
+
+
+def test_stream_sends_keepalive_when_idle(service, api):
+    task_id = _submit(service)
+    response = api.handle_task_stream({'id': [task_id]})
+    response.heartbeat = 0.02
+
+    handler, thread = _send_in_thread(response, service, task_id)
+    _later(0.1, service._update_task, task_id, status='failed')
+    thread.join(2)
+
+    assert EventStreamResponse.KEEPALIVE in handler.wfile.getvalue()
+
+
+def test_stream_rejects_missing_or_unknown_task(api):
+    assert api.handle_task_stream({}).status == HTTPStatus.BAD_REQUEST
+    assert api.handle_task_stream({'id': ['missing']}).status == HTTPStatus.NOT_FOUND
+
+
+# ========== 长轮询 ==========
+
+def _poll(api, **params):
+    query = {k: [str(v)] for k, v in params.items()}
+    response = api.handle_task_poll(query)
+    if not isinstance(response, LongPollResponse):
+        return response.status, json.loads(response.body)
+    handler = _FakeHandler()
+    start = time.monotonic()
+    response.send(handler)
+    return handler.status, json.loads(handler.wfile.getvalue()), time.monotonic() - start
+
+
+def test_poll_returns_immediately_when_newer_version_exists(service, api):
+    task_id = _submit(service)
+    service._update_task(task_id, status='running')
+
+    status, body, elapsed = _poll(api, id=task_id, since=0, timeout=5)
+    assert status == HTTPStatus.OK
+    assert body['task']['version'] == 1
+    assert elapsed < 1
+
+
+def test_poll_waits_for_next_update(service, api):
+    task_id = _submit(service)
+    _later(0.1, service._on_stage, task_id, 'search', 'running')
+
+    status, body, elapsed = _poll(api, id=task_id, since=0, timeout=5)
+    assert body['task']['version'] == 1
+    assert body['task']['stage'] == 'search'
+    assert 0.05 < elapsed < 2
+
+
+def test_poll_returns_current_state_on_timeout(service, api):
+    task_id = _submit(service)
+
+    status, body, elapsed = _poll(api, id=task_id, since=0, timeout=0.1)
+    assert status == HTTPStatus.OK
+    assert body == {'success': True, 'task': service.get_task_status(task_id)}
+    assert elapsed >= 0.1
+
+
+def test_poll_of_finished_task_returns_immediately(service, api):
+    task_id = _submit(service)
+    service._update_task(task_id, status='completed')
+
+    _, body, elapsed = _poll(api, id=task_id, since=99, timeout=5)
+    assert body['task']['status'] == 'completed'
+    assert elapsed < 1
+
+
+@pytest.mark.parametrize('params', [
+    {'timeout': 'nan'},
+    {'timeout': 'inf'},
+    {'timeout': '-inf'},
+    {'timeout': 'soon'},
+    {'since': '1.5'},
+])
+def test_poll_rejects_invalid_parameters(service, api, params):
+    task_id = _submit(service)
+    status, body = _poll(api, id=task_id, **params)
+    assert status == HTTPStatus.BAD_REQUEST
+    assert body['success'] is False
+
+
+def test_poll_clamps_timeout_and_checks_task(service, api):
+    task_id = _submit(service)
+    assert api.handle_task_poll({'id': [task_id], 'timeout': ['3600']}).timeout == 60.0
+    assert api.handle_task_poll({'id': [task_id], 'timeout': ['-5']}).timeout == 0.0
+    assert api.handle_task_poll({}).status == HTTPStatus.BAD_REQUEST
+    assert api.handle_task_poll({'id': ['missing']}).status == HTTPStatus.NOT_FOUND